@@ -0,0 +1,6 @@
+"""
+Benchmarks
+
+Synthetic league data and pytest-benchmark suites for the feature and
+prediction pipeline.
+"""
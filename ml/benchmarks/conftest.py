@@ -0,0 +1,103 @@
+"""
+Benchmark Fixtures
+
+Shared synthetic datasets for the benchmark suite. The data size is chosen
+with --scale:
+
+    season   one NBA season (~1.2k games)
+    decade   10 seasons of NBA, NFL and NHL (~28k games)
+    century  100 seasons of NBA, NFL and NHL (~280k games)
+
+Odds snapshots always cover the most recent season only, like the live
+OddsSnapshot table.
+"""
+
+import sys
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.synthetic import generate, venue_coordinates  # noqa: E402
+from features.game_log import games_frame  # noqa: E402
+
+SCALES = {
+    "season": dict(seasons=1, leagues=("NBA",)),
+    "decade": dict(seasons=10, leagues=("NBA", "NFL", "NHL")),
+    "century": dict(seasons=100, leagues=("NBA", "NFL", "NHL")),
+}
+
+try:
+    import pytest_benchmark  # noqa: F401
+except ImportError:
+    collect_ignore_glob = ["test_*.py"]
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--scale",
+        default="season",
+        choices=sorted(SCALES),
+        help="Synthetic dataset size for the benchmarks"
+    )
+
+
+def pytest_report_header(config):
+    return f"benchmark scale: {config.getoption('--scale')}"
+
+
+@pytest.fixture(scope="session")
+def scale(request):
+    return request.config.getoption("--scale")
+
+
+@pytest.fixture(scope="session")
+def dataset(scale):
+    """Synthetic tables keyed by name (see benchmarks.synthetic.generate)."""
+    return generate(**SCALES[scale])
+
+
+@pytest.fixture(scope="session")
+def games_df(dataset):
+    """All games in games_frame() order."""
+    return games_frame(dataset["Game"])
+
+
+@pytest.fixture(scope="session")
+def game_dicts(games_df):
+    """Games as the list of dicts the scalar feature functions take."""
+    records = games_df.to_dict("records")
+    for game in records:
+        if game["status"] != "FINAL":
+            game["homeScore"] = game["awayScore"] = None
+    return records
+
+
+@pytest.fixture(scope="session")
+def venues(dataset):
+    return venue_coordinates(dataset["Team"])
+
+
+@pytest.fixture
+def measure(benchmark):
+    """
+    Benchmark a call and record its peak Python allocation.
+
+    The timed rounds run without tracing; one extra traced call stores the
+    tracemalloc peak (MB) in the benchmark's extra_info, next to the timings
+    in the saved results.
+    """
+    def run(function, *args, **kwargs):
+        result = benchmark(function, *args, **kwargs)
+        tracemalloc.start()
+        try:
+            function(*args, **kwargs)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info["peak_mb"] = round(peak / 2**20, 2)
+        return result
+
+    return run
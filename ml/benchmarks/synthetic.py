@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Synthetic League Data
+
+Deterministic League / Team / Game / OddsSnapshot tables for benchmarks and
+local pipeline runs, from one season of one league up to 100 seasons of
+several. Team strength drifts between seasons, scores follow strength and
+home advantage, and odds are polled repeatedly with mostly unchanged
+prices, like jobs/pollOdds.ts.
+
+Usage:
+    python benchmarks/synthetic.py --seasons 10 --leagues NBA NFL NHL --output data/synthetic
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# teams, games per team, season start (month, day), season length (days),
+# days between rounds, mean points per team, score s.d., home advantage,
+# whether ties stand
+LEAGUE_PROFILES = {
+    "NBA": dict(teams=30, games_per_team=82, start=(10, 22), days=170, round_days=None,
+                points=112.0, sd=12.0, home=3.0, ties=False),
+    "NFL": dict(teams=32, games_per_team=17, start=(9, 7), days=119, round_days=7,
+                points=22.0, sd=9.5, home=1.5, ties=True),
+    "NHL": dict(teams=32, games_per_team=82, start=(10, 10), days=180, round_days=None,
+                points=3.0, sd=1.6, home=0.2, ties=False),
+}
+MARKET_TYPES = ("MONEYLINE", "SPREAD", "TOTAL")
+FIRST_SEASON = 1990
+ODDS_OPEN_HOURS = 120.0
+UNCHANGED_POLL_RATE = 0.7  # Share of polls that repeat the previous price
+
+
+def generate(
+    seasons=1,
+    leagues=("NBA",),
+    seed=0,
+    upcoming_days=7,
+    odds_seasons=1,
+    bookmakers=5,
+    polls=8,
+    last_season=None,
+):
+    """
+    Generate a synthetic database snapshot.
+
+    Args:
+        seasons: Seasons per league
+        leagues: League abbreviations from LEAGUE_PROFILES
+        seed: RNG seed (same arguments -> identical tables)
+        upcoming_days: Games in the last N days of the timeline are
+            SCHEDULED without scores
+        odds_seasons: Most recent seasons that get odds snapshots
+        bookmakers: Bookmakers quoting each game
+        polls: Snapshots per (game, market, bookmaker)
+        last_season: Year of the last season (default: FIRST_SEASON +
+            seasons - 1)
+
+    Returns:
+        dict: DataFrames keyed by table name (League, Team, Game, Market,
+            Bookmaker, OddsSnapshot) with Prisma column names; Game also
+            carries the league abbreviation and OddsSnapshot the market type,
+            like the ml/db queries
+    """
+    rng = np.random.default_rng(seed)
+    last_season = last_season or FIRST_SEASON + seasons - 1
+    first_season = last_season - seasons + 1
+
+    league_rows, team_rows, game_frames, strengths = [], [], [], []
+    for abbr in leagues:
+        profile = LEAGUE_PROFILES[abbr]
+        league_id = f"league-{abbr.lower()}"
+        league_rows.append({"id": league_id, "name": abbr, "abbr": abbr, "active": True})
+        team_ids = [f"{abbr.lower()}-team-{i:02d}" for i in range(profile["teams"])]
+        team_rows.extend(
+            {
+                "id": team_id, "leagueId": league_id, "name": f"{abbr} Team {i:02d}",
+                "abbr": f"T{i:02d}", "city": f"City {i:02d}", "active": True,
+            }
+            for i, team_id in enumerate(team_ids)
+        )
+        strength = rng.normal(0.0, profile["sd"] * 0.4, profile["teams"])
+        for season in range(first_season, last_season + 1):
+            strength = 0.7 * strength + rng.normal(0.0, profile["sd"] * 0.25, len(strength))
+            games = _season_games(rng, abbr, league_id, team_ids, strength, season, profile)
+            game_frames.append(games)
+            strengths.append(games.pop("_expected_margin"))
+
+    games = pd.concat(game_frames, ignore_index=True)
+    expected_margin = np.concatenate(strengths)
+    order = np.lexsort((games["id"].to_numpy(), games["startTime"].to_numpy()))
+    games = games.iloc[order].reset_index(drop=True)
+    expected_margin = expected_margin[order]
+    games["id"] = [f"game-{i:08d}" for i in range(len(games))]
+
+    if upcoming_days:
+        horizon = games["startTime"].max() - pd.Timedelta(days=upcoming_days)
+        upcoming = (games["startTime"] > horizon).to_numpy()
+        games.loc[upcoming, "status"] = "SCHEDULED"
+        games.loc[upcoming, ["homeScore", "awayScore"]] = np.nan
+
+    markets = pd.DataFrame({
+        "id": [f"market-{m.lower()}" for m in MARKET_TYPES],
+        "type": list(MARKET_TYPES),
+        "name": ["Moneyline", "Point Spread", "Total Points"],
+    })
+    books = pd.DataFrame({
+        "id": [f"book-{i:02d}" for i in range(bookmakers)],
+        "name": [f"Book {i:02d}" for i in range(bookmakers)],
+    })
+    recent = (games["startTime"] >= pd.Timestamp(last_season - odds_seasons + 1, 7, 1)).to_numpy()
+    odds = _odds_snapshots(
+        rng, games[recent], expected_margin[recent], books["id"].to_numpy(), polls
+    )
+
+    return {
+        "League": pd.DataFrame(league_rows),
+        "Team": pd.DataFrame(team_rows),
+        "Game": games,
+        "Market": markets,
+        "Bookmaker": books,
+        "OddsSnapshot": odds,
+    }
+
+
+def venue_coordinates(teams):
+    """Deterministic {venue: (latitude, longitude)} for generated teams."""
+    rng = np.random.default_rng(len(teams))
+    latitude = rng.uniform(25.0, 49.0, len(teams))
+    longitude = rng.uniform(-123.0, -70.0, len(teams))
+    return {
+        _venue(team_id): (lat, lon)
+        for team_id, lat, lon in zip(teams["id"], latitude, longitude)
+    }
+
+
+def _season_games(rng, abbr, league_id, team_ids, strength, season, profile):
+    """One regular season: rounds of random pairings, scores from strength."""
+    n_teams = len(team_ids)
+    per_round = n_teams // 2
+    rounds = int(np.ceil(profile["games_per_team"] * n_teams / 2 / per_round))
+    pairs = np.stack([rng.permutation(n_teams)[:2 * per_round] for _ in range(rounds)])
+    home = pairs[:, 0::2].ravel()
+    away = pairs[:, 1::2].ravel()
+    round_of_game = np.repeat(np.arange(rounds), per_round)
+
+    month, day = profile["start"]
+    opening = np.datetime64(f"{season}-{month:02d}-{day:02d}T23:00", "m")
+    step = profile["round_days"] or profile["days"] / rounds
+    day_offset = np.floor(round_of_game * step).astype("timedelta64[D]")
+    minutes = rng.integers(0, 4, len(home)) * 30  # Staggered tip-off times
+    start = opening + day_offset + minutes.astype("timedelta64[m]")
+
+    margin = strength[home] - strength[away] + profile["home"]
+    noise = rng.normal(0.0, profile["sd"], (2, len(home)))
+    home_score = np.maximum(np.rint(profile["points"] + margin / 2 + noise[0]), 0)
+    away_score = np.maximum(np.rint(profile["points"] - margin / 2 + noise[1]), 0)
+    if not profile["ties"]:
+        tied = home_score == away_score
+        home_wins = rng.random(len(home)) < 0.5
+        home_score[tied & home_wins] += 1
+        away_score[tied & ~home_wins] += 1
+
+    team_ids = np.asarray(team_ids, dtype=object)
+    return pd.DataFrame({
+        "id": [f"{abbr}-{season}-{i:05d}" for i in range(len(home))],
+        "leagueId": league_id,
+        "league": abbr,
+        "homeTeamId": team_ids[home],
+        "awayTeamId": team_ids[away],
+        "startTime": start.astype("datetime64[ms]"),
+        "status": "FINAL",
+        "homeScore": home_score,
+        "awayScore": away_score,
+        "venue": [_venue(t) for t in team_ids[home]],
+        "_expected_margin": margin,
+    })
+
+
+def _odds_snapshots(rng, games, expected_margin, book_ids, polls):
+    """Polled lines per (game, market, bookmaker) drifting toward the start."""
+    n_games, n_books = len(games), len(book_ids)
+    if n_games == 0:
+        return pd.DataFrame(columns=[
+            "id", "gameId", "marketId", "market", "bookmakerId", "timestamp",
+            "homeOdds", "awayOdds", "overOdds", "underOdds", "line",
+        ])
+    n_series = n_games * len(MARKET_TYPES) * n_books
+    game = np.repeat(np.arange(n_games), len(MARKET_TYPES) * n_books)
+    market = np.tile(np.repeat(np.arange(len(MARKET_TYPES)), n_books), n_games)
+    book = np.tile(np.arange(n_books), n_games * len(MARKET_TYPES))
+
+    # Poll times: sorted offsets between the open and the start
+    offsets = np.sort(rng.uniform(0.0, ODDS_OPEN_HOURS, (n_series, polls)), axis=1)[:, ::-1]
+    start = games["startTime"].to_numpy().astype("datetime64[ms]")
+    timestamp = start[game][:, None] - (offsets * 3_600_000).astype("timedelta64[ms]")
+
+    profiles = [LEAGUE_PROFILES[league] for league in games["league"]]
+    scale = np.array([profile["sd"] for profile in profiles])[game][:, None]
+    points = np.array([2.0 * profile["points"] for profile in profiles])[game][:, None]
+
+    # Expected margin drifts; most polls repeat the previous value
+    steps = rng.normal(0.0, 0.05, (n_series, polls))
+    steps[rng.random((n_series, polls)) < UNCHANGED_POLL_RATE] = 0.0
+    steps[:, 0] = rng.normal(0.0, 0.1, n_series)  # Book-specific opening view
+    margin = expected_margin[game][:, None] + np.cumsum(steps, axis=1) * scale
+    home_prob = 1.0 / (1.0 + np.exp(-margin / scale))
+    half = lambda x: np.round(x * 2.0) / 2.0  # noqa: E731 - lines move in half points
+
+    is_moneyline = (market == 0)[:, None]
+    is_spread = (market == 1)[:, None]
+    is_total = (market == 2)[:, None]
+    home_odds = np.where(is_moneyline, _american(home_prob), -110.0)
+    away_odds = np.where(is_moneyline, _american(1.0 - home_prob), -110.0)
+    line = np.where(is_spread, half(-margin), np.where(is_total, half(points + margin * 0.1), np.nan))
+
+    n = n_series * polls
+    market_types = np.asarray(MARKET_TYPES, dtype=object)
+    return pd.DataFrame({
+        "id": [f"odds-{i:09d}" for i in range(n)],
+        "gameId": games["id"].to_numpy()[game].repeat(polls),
+        "marketId": np.char.add("market-", np.char.lower(market_types[market].astype(str))).repeat(polls),
+        "market": market_types[market].repeat(polls),
+        "bookmakerId": np.asarray(book_ids, dtype=object)[book].repeat(polls),
+        "timestamp": timestamp.ravel(),
+        "homeOdds": np.where(is_total, np.nan, home_odds).ravel(),
+        "awayOdds": np.where(is_total, np.nan, away_odds).ravel(),
+        "overOdds": np.where(is_total, -110.0, np.nan).repeat(polls),
+        "underOdds": np.where(is_total, -110.0, np.nan).repeat(polls),
+        "line": line.ravel(),
+    })
+
+
+def _american(probability):
+    """Probability -> American odds rounded to 5 cents."""
+    probability = np.clip(probability, 0.02, 0.98)
+    odds = np.where(
+        probability >= 0.5,
+        -100.0 * probability / (1.0 - probability),
+        100.0 * (1.0 - probability) / probability,
+    )
+    return np.round(odds / 5.0) * 5.0
+
+
+def _venue(team_id):
+    return f"{team_id} arena"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic league data as Parquet")
+    parser.add_argument(
+        "--seasons",
+        type=int,
+        default=1,
+        help="Seasons per league"
+    )
+    parser.add_argument(
+        "--leagues",
+        nargs="+",
+        default=["NBA"],
+        choices=sorted(LEAGUE_PROFILES),
+        help="Leagues to generate"
+    )
+    parser.add_argument(
+        "--odds-seasons",
+        type=int,
+        default=1,
+        help="Most recent seasons with odds snapshots"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Random seed"
+    )
+    parser.add_argument(
+        "--output",
+        default="data/synthetic",
+        help="Output directory (one Parquet file per table)"
+    )
+
+    args = parser.parse_args()
+    tables = generate(args.seasons, args.leagues, args.seed, odds_seasons=args.odds_seasons)
+
+    output = Path(args.output)
+    output.mkdir(parents=True, exist_ok=True)
+    for name, table in tables.items():
+        table.to_parquet(output / f"{name}.parquet", index=False)
+        print(f"   {name}: {len(table)} rows")
+    print(f"✅ Synthetic data saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
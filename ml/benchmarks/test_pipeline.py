@@ -0,0 +1,58 @@
+"""
+End-to-end feature and prediction benchmarks.
+
+extract_features itself reads Postgres; these cover everything after the
+query: FeatureBuilder over the whole history, odds features for the games
+with snapshots, and batch scoring of the resulting rows.
+"""
+
+import numpy as np
+import pytest
+
+from features.odds import odds_features, prediction_cutoffs
+from scripts.extract_features import DEFAULT_CHUNK_SIZE, FeatureBuilder
+
+
+@pytest.fixture(scope="module")
+def features_df(games_df, venues):
+    return FeatureBuilder(venue_coordinates=venues).build(games_df)
+
+
+def test_feature_builder(measure, games_df, venues):
+    def run():
+        builder = FeatureBuilder(venue_coordinates=venues)
+        return [
+            builder.build(games_df.iloc[start:start + DEFAULT_CHUNK_SIZE])
+            for start in range(0, len(games_df), DEFAULT_CHUNK_SIZE)
+        ]
+
+    chunks = measure(run)
+    assert sum(len(chunk) for chunk in chunks) == len(games_df)
+
+
+def test_odds_features(measure, dataset, games_df):
+    odds = dataset["OddsSnapshot"]
+    games = games_df[games_df["id"].isin(odds["gameId"]).to_numpy()]
+    cutoffs = prediction_cutoffs(games)
+    features = measure(odds_features, odds, games, cutoffs)
+    assert len(features) == len(games)
+
+
+def test_batch_prediction(measure, features_df):
+    pytest.importorskip("sklearn")
+    from serving.models import ServedModel
+    from training.estimators import feature_columns, make_estimator
+
+    columns = feature_columns(features_df)
+    train = features_df[features_df["home_win"].notna().to_numpy()]
+    estimator = make_estimator("WIN_PROBABILITY", "logistic_regression")
+    estimator.fit(train[columns].to_numpy(dtype=np.float64), train["home_win"].to_numpy())
+    model = ServedModel(
+        {"id": "benchmark", "version": "benchmark", "model_type": "WIN_PROBABILITY",
+         "features": columns},
+        estimator,
+    )
+    rows = features_df[columns].to_dict("records")
+
+    predictions = measure(model.predict_rows, rows)
+    assert len(predictions) == len(rows)
@@ -0,0 +1,21 @@
+"""Recent performance benchmarks."""
+
+from features import calculate_last_n_games, rolling_last_n_games, split_features
+
+
+def test_calculate_last_n_games(measure, game_dicts):
+    # The scalar path as callers use it: one team's games, last 10
+    team_id = game_dicts[0]["homeTeamId"]
+    team_games = [g for g in game_dicts if team_id in (g["homeTeamId"], g["awayTeamId"])]
+    stats = measure(calculate_last_n_games, team_games, 10, team_id)
+    assert stats["games"] == 10
+
+
+def test_rolling_last_n_games(measure, games_df):
+    features = measure(rolling_last_n_games, games_df, (5, 10))
+    assert len(features) == len(games_df)
+
+
+def test_split_features(measure, games_df):
+    features = measure(split_features, games_df)
+    assert len(features) == len(games_df)
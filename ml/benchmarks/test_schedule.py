@@ -0,0 +1,8 @@
+"""Schedule feature benchmarks."""
+
+from features.schedule import schedule_features
+
+
+def test_schedule_features(measure, games_df, venues):
+    features = measure(schedule_features, games_df, venues)
+    assert len(features) == len(games_df)
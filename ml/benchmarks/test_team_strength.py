@@ -0,0 +1,24 @@
+"""ELO and opponent-adjustment benchmarks."""
+
+from features import EloEngine, calculate_elo_ratings, elo_sweep, opponent_features
+from scripts.extract_features import calculate_elo_features
+
+
+def test_calculate_elo_ratings(measure, game_dicts, games_df):
+    ratings = measure(calculate_elo_ratings, game_dicts)
+    assert len(ratings) == len(set(games_df["homeTeamId"]) | set(games_df["awayTeamId"]))
+
+
+def test_calculate_elo_features(measure, games_df):
+    home_elo, _ = measure(lambda: calculate_elo_features(EloEngine(), games_df))
+    assert len(home_elo) == len(games_df)
+
+
+def test_elo_sweep(measure, games_df):
+    results = measure(elo_sweep, games_df)
+    assert len(results) == 7 * 5 * 2 * 3
+
+
+def test_opponent_features(measure, games_df):
+    features = measure(opponent_features, games_df)
+    assert len(features) == len(games_df)
@@ -0,0 +1,71 @@
+"""
+Database Access Module
+
+Pooled Postgres access for the ML scripts (tables are created by Prisma).
+"""
+
+from .connection import (
+    connection,
+    database_url,
+    dispose_engine,
+    fetch_arrow,
+    fetch_frame,
+    get_engine,
+    iter_query,
+    round_trips,
+)
+from .queries import (
+    fetch_active_model,
+    fetch_final_games_updated_since,
+    fetch_games_arrow,
+    fetch_games_on_date,
+    fetch_model,
+    fetch_model_metric_state,
+    fetch_models,
+    fetch_odds_arrow,
+    fetch_odds_snapshots_arrow,
+    fetch_odds_time_range,
+    fetch_prediction_times,
+    fetch_predictions,
+    fetch_unevaluated_predictions,
+    fetch_upcoming_games,
+    stream_games,
+    stream_odds,
+)
+from .writers import (
+    create_sqlite_tables,
+    record_model_metrics,
+    set_model_config,
+    upsert_predictions,
+)
+
+__all__ = [
+    "connection",
+    "database_url",
+    "dispose_engine",
+    "fetch_arrow",
+    "fetch_frame",
+    "get_engine",
+    "iter_query",
+    "round_trips",
+    "fetch_active_model",
+    "fetch_final_games_updated_since",
+    "fetch_games_arrow",
+    "fetch_games_on_date",
+    "fetch_model",
+    "fetch_model_metric_state",
+    "fetch_models",
+    "fetch_odds_arrow",
+    "fetch_odds_snapshots_arrow",
+    "fetch_odds_time_range",
+    "fetch_prediction_times",
+    "fetch_predictions",
+    "fetch_unevaluated_predictions",
+    "fetch_upcoming_games",
+    "stream_games",
+    "stream_odds",
+    "create_sqlite_tables",
+    "record_model_metrics",
+    "set_model_config",
+    "upsert_predictions",
+]
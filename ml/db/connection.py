@@ -0,0 +1,217 @@
+"""
+Database Connection
+
+Pooled connections to the application's Postgres database (DATABASE_URL).
+All ml/scripts entry points share one SQLAlchemy engine per process, so a
+pipeline run pays for connection setup once rather than once per step.
+"""
+
+import io
+import os
+import threading
+from contextlib import contextmanager
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import pandas as pd
+import pyarrow.csv as pacsv
+from psycopg2.extensions import cursor as PgCursor
+from sqlalchemy import create_engine
+
+try:
+    from dotenv import load_dotenv
+except ImportError:  # python-dotenv is optional at runtime
+    load_dotenv = None
+
+# Prisma-only URL parameters that libpq rejects
+PRISMA_URL_PARAMS = {"schema", "connection_limit", "pool_timeout", "pgbouncer"}
+
+POOL_SIZE = 5
+MAX_OVERFLOW = 5
+
+_engine = None
+_round_trips = 0
+_round_trips_lock = threading.Lock()
+
+
+class CountingCursor(PgCursor):
+    """
+    psycopg2 cursor that counts server round trips.
+
+    Every statement, COPY and server-side cursor fetch counts as one; the
+    process-wide total is read with round_trips() (per-stage run metrics).
+    """
+
+    def execute(self, query, vars=None):
+        _count_round_trips()
+        return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        vars_list = list(vars_list)
+        _count_round_trips(len(vars_list))
+        return super().executemany(query, vars_list)
+
+    def copy_expert(self, sql, file, size=8192):
+        _count_round_trips()
+        return super().copy_expert(sql, file, size)
+
+    def fetchmany(self, size=None):
+        if self.name is not None:
+            _count_round_trips()
+        return super().fetchmany() if size is None else super().fetchmany(size)
+
+    def fetchall(self):
+        if self.name is not None:
+            _count_round_trips()
+        return super().fetchall()
+
+
+def round_trips():
+    """Database round trips made through pooled connections in this process."""
+    return _round_trips
+
+
+def _count_round_trips(n=1):
+    global _round_trips
+    with _round_trips_lock:
+        _round_trips += n
+
+
+def database_url():
+    """
+    Read DATABASE_URL from the environment (or .env) in libpq form.
+
+    Returns:
+        str: Connection URL without Prisma-specific query parameters
+    """
+    if load_dotenv is not None:
+        load_dotenv()
+    url = os.environ.get("DATABASE_URL")
+    if not url:
+        raise RuntimeError("DATABASE_URL is not set")
+
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k not in PRISMA_URL_PARAMS]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def get_engine():
+    """Process-wide pooled SQLAlchemy engine (psycopg2 driver)."""
+    global _engine
+    if _engine is None:
+        url = database_url().replace("postgresql://", "postgresql+psycopg2://", 1)
+        _engine = create_engine(
+            url,
+            pool_size=POOL_SIZE,
+            max_overflow=MAX_OVERFLOW,
+            pool_pre_ping=True,
+        )
+    return _engine
+
+
+def dispose_engine():
+    """Close pooled connections (call in forked workers before reuse)."""
+    global _engine
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
+
+
+@contextmanager
+def connection():
+    """
+    Borrow a pooled psycopg2 connection.
+
+    The raw driver connection is yielded so callers can use server-side
+    cursors and COPY. It goes back to the pool on exit (uncommitted work is
+    rolled back; use `with conn:` to commit).
+
+    Usage:
+        with connection() as conn:
+            games = fetch_upcoming_games(conn, days=7)
+    """
+    pooled = get_engine().raw_connection()
+    conn = pooled.driver_connection
+    conn.cursor_factory = CountingCursor
+    try:
+        yield conn
+    finally:
+        pooled.close()
+
+
+def iter_query(conn, sql, params=None, chunk_size=5000, name="ml_stream"):
+    """
+    Stream a query through a server-side cursor in DataFrame chunks.
+
+    Rows are fetched `chunk_size` at a time, so memory stays bounded by the
+    chunk size rather than the result size.
+
+    Args:
+        conn: psycopg2 connection
+        sql: Query text with %(name)s placeholders
+        params: Query parameters
+        chunk_size: Rows per chunk
+        name: Server-side cursor name
+
+    Yields:
+        DataFrame: Up to chunk_size rows with the query's column names
+    """
+    with conn.cursor(name=name) as cursor:
+        cursor.itersize = chunk_size
+        cursor.execute(sql, params)
+        columns = None
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if columns is None and cursor.description is not None:
+                columns = [column.name for column in cursor.description]
+            if not rows:
+                break
+            yield pd.DataFrame.from_records(rows, columns=columns)
+
+
+def fetch_frame(conn, sql, params=None):
+    """
+    Run a small query and return a DataFrame.
+
+    Args:
+        conn: psycopg2 connection
+        sql: Query text with %(name)s placeholders
+        params: Query parameters
+
+    Returns:
+        DataFrame: All rows with the query's column names
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = [column.name for column in cursor.description]
+        return pd.DataFrame.from_records(cursor.fetchall(), columns=columns)
+
+
+def fetch_arrow(conn, sql, params=None, column_types=None):
+    """
+    Run a large query and return an Arrow table, column-wise.
+
+    The result is exported with COPY ... TO STDOUT (CSV) and parsed by
+    Arrow's multithreaded CSV reader straight into typed columns, without
+    building a Python tuple/dict per row.
+
+    Args:
+        conn: psycopg2 connection
+        sql: SELECT with %(name)s placeholders
+        params: Query parameters (bound client-side)
+        column_types: Optional {column: pyarrow type} overrides
+
+    Returns:
+        pyarrow.Table: Query result
+    """
+    with conn.cursor() as cursor:
+        query = cursor.mogrify(sql, params).decode()
+        buffer = io.BytesIO()
+        cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)", buffer)
+    buffer.seek(0)
+    return pacsv.read_csv(
+        buffer,
+        convert_options=pacsv.ConvertOptions(
+            column_types=column_types or {},
+            strings_can_be_null=True,
+        ),
+    )
@@ -0,0 +1,422 @@
+"""
+Queries
+
+Parameterized SQL for the access patterns of the ML scripts. Table and
+column names are quoted because Prisma keeps their camelCase spelling.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+
+import pandas as pd
+import pyarrow as pa
+
+from .connection import fetch_arrow, fetch_frame, iter_query
+
+# ----------------------------------------------------------------------------
+# Game
+# ----------------------------------------------------------------------------
+
+GAME_COLUMNS_SQL = """
+    g."id", g."leagueId", l."abbr" AS "league", g."homeTeamId",
+    g."awayTeamId", g."startTime", g."status"::text AS "status",
+    g."homeScore", g."awayScore", g."venue", g."updatedAt"
+"""
+
+GAMES_BETWEEN = f"""
+    SELECT {GAME_COLUMNS_SQL}
+    FROM "Game" g
+    JOIN "League" l ON l."id" = g."leagueId"
+    WHERE g."startTime" >= %(start)s AND g."startTime" < %(end)s
+    ORDER BY g."startTime", g."id"
+"""
+
+# FINAL games changed after a given time that start before another one:
+# results too late for an incremental team state update
+FINAL_GAMES_UPDATED_SINCE = f"""
+    SELECT {GAME_COLUMNS_SQL}
+    FROM "Game" g
+    JOIN "League" l ON l."id" = g."leagueId"
+    WHERE g."status" = 'FINAL' AND g."startTime" < %(before)s
+      AND g."updatedAt" > %(updated_since)s
+    ORDER BY g."startTime", g."id"
+"""
+
+UPCOMING_GAMES = f"""
+    SELECT {GAME_COLUMNS_SQL}
+    FROM "Game" g
+    JOIN "League" l ON l."id" = g."leagueId"
+    WHERE g."startTime" >= %(now)s AND g."startTime" <= %(until)s
+      AND g."status" = 'SCHEDULED'
+    ORDER BY g."startTime", g."id"
+"""
+
+# Arrow types for columnar game pulls
+GAME_ARROW_TYPES = {
+    "homeScore": pa.float64(),
+    "awayScore": pa.float64(),
+    "startTime": pa.timestamp("ms"),
+    "updatedAt": pa.timestamp("ms"),
+}
+
+# ----------------------------------------------------------------------------
+# OddsSnapshot
+# ----------------------------------------------------------------------------
+
+ODDS_FOR_GAMES_BETWEEN = """
+    SELECT o."gameId", o."marketId", o."bookmakerId", o."timestamp",
+           o."homeOdds", o."awayOdds", o."overOdds", o."underOdds", o."line"
+    FROM "OddsSnapshot" o
+    JOIN "Game" g ON g."id" = o."gameId"
+    WHERE g."startTime" >= %(start)s AND g."startTime" < %(end)s
+    ORDER BY o."gameId", o."marketId", o."bookmakerId", o."timestamp"
+"""
+
+# Snapshots of a set of games, walking the (gameId, marketId, bookmakerId,
+# timestamp) index
+ODDS_FOR_GAMES = """
+    SELECT o."gameId", mk."type"::text AS "market", o."bookmakerId", o."timestamp",
+           o."homeOdds", o."awayOdds", o."overOdds", o."underOdds", o."line"
+    FROM "OddsSnapshot" o
+    JOIN "Market" mk ON mk."id" = o."marketId"
+    WHERE o."gameId" = ANY(%(game_ids)s)
+      AND (%(since)s::timestamp IS NULL OR o."timestamp" > %(since)s)
+    ORDER BY o."gameId", o."marketId", o."bookmakerId", o."timestamp"
+"""
+
+# Snapshots polled in a time window, for the Parquet odds archive
+ODDS_SNAPSHOTS_BETWEEN = """
+    SELECT o."gameId", mk."type"::text AS "market", o."bookmakerId", o."timestamp",
+           o."homeOdds", o."awayOdds", o."overOdds", o."underOdds", o."line",
+           l."abbr" AS "league", g."startTime" AS "gameStartTime"
+    FROM "OddsSnapshot" o
+    JOIN "Market" mk ON mk."id" = o."marketId"
+    JOIN "Game" g ON g."id" = o."gameId"
+    JOIN "League" l ON l."id" = g."leagueId"
+    WHERE o."timestamp" > %(since)s AND o."timestamp" <= %(until)s
+    ORDER BY o."timestamp"
+"""
+
+ODDS_TIME_RANGE = """
+    SELECT MIN(o."timestamp") AS "first", MAX(o."timestamp") AS "last"
+    FROM "OddsSnapshot" o
+    WHERE %(since)s::timestamp IS NULL OR o."timestamp" > %(since)s
+"""
+
+ODDS_ARROW_TYPES = {
+    "timestamp": pa.timestamp("ms"),
+    "gameStartTime": pa.timestamp("ms"),
+    "homeOdds": pa.float64(),
+    "awayOdds": pa.float64(),
+    "overOdds": pa.float64(),
+    "underOdds": pa.float64(),
+    "line": pa.float64(),
+}
+
+# ----------------------------------------------------------------------------
+# MLModel
+# ----------------------------------------------------------------------------
+
+MODEL_COLUMNS_SQL = """
+    m."id", m."version", m."modelType"::text AS model_type,
+    m."status"::text AS status, m."trainedAt" AS trained_at,
+    m."features", m."modelPath" AS model_path, m."configPath" AS config_path,
+    m."updatedAt" AS updated_at
+"""
+
+MODEL_BY_ID = f"""
+    SELECT {MODEL_COLUMNS_SQL}
+    FROM "MLModel" m
+    WHERE m."id" = %(model_id)s
+"""
+
+MODEL_METRIC_STATE = """
+    SELECT m."id", m."modelType"::text AS model_type,
+           m."calibrationPlot" AS calibration_plot
+    FROM "MLModel" m
+    WHERE m."id" = ANY(%(model_ids)s)
+"""
+
+MODELS_BY_STATUS = f"""
+    SELECT {MODEL_COLUMNS_SQL}
+    FROM "MLModel" m
+    WHERE m."status"::text = ANY(%(statuses)s)
+      AND (%(model_type)s::text IS NULL OR m."modelType"::text = %(model_type)s)
+    ORDER BY m."trainedAt" DESC
+"""
+
+# ----------------------------------------------------------------------------
+# MLPrediction
+# ----------------------------------------------------------------------------
+
+# Predictions whose game is FINAL and that are not yet in the model metrics
+UNEVALUATED_PREDICTIONS = """
+    SELECT p."id", p."modelId" AS model_id, p."homeWinProb" AS home_win_prob,
+           p."spreadPred" AS spread_pred, p."totalPred" AS total_pred,
+           g."startTime" AS start_time, g."homeScore" AS home_score,
+           g."awayScore" AS away_score
+    FROM "MLPrediction" p
+    JOIN "Game" g ON g."id" = p."gameId"
+    WHERE p."evaluatedAt" IS NULL
+      AND g."status" = 'FINAL'
+      AND g."homeScore" IS NOT NULL AND g."awayScore" IS NOT NULL
+    ORDER BY p."modelId", g."startTime", g."id"
+"""
+
+UNEVALUATED_ARROW_TYPES = {
+    "home_win_prob": pa.float64(),
+    "spread_pred": pa.float64(),
+    "total_pred": pa.float64(),
+    "start_time": pa.timestamp("ms"),
+    "home_score": pa.float64(),
+    "away_score": pa.float64(),
+}
+
+# Latest prediction per game: the point-in-time cutoff for odds features
+PREDICTION_TIMES = """
+    SELECT p."gameId", MAX(p."predictedAt") AS "predictedAt"
+    FROM "MLPrediction" p
+    WHERE p."gameId" = ANY(%(game_ids)s)
+    GROUP BY p."gameId"
+"""
+
+PREDICTIONS_FOR_GAMES = """
+    SELECT p."modelId", p."gameId", p."homeWinProb", p."awayWinProb",
+           p."spreadPred", p."totalPred", p."spreadLower", p."spreadUpper",
+           p."totalLower", p."totalUpper", p."predictedAt", p."gameStartTime"
+    FROM "MLPrediction" p
+    WHERE p."gameId" = ANY(%(game_ids)s)
+"""
+
+
+def stream_games(conn, start_date, end_date, chunk_size=5000):
+    """
+    Stream games in a date range in (startTime, id) order.
+
+    Args:
+        conn: psycopg2 connection
+        start_date: First day (YYYY-MM-DD), inclusive
+        end_date: Last day (YYYY-MM-DD), inclusive
+        chunk_size: Games per chunk
+
+    Yields:
+        DataFrame: Chunks of Game rows with the league abbreviation
+    """
+    yield from iter_query(
+        conn, GAMES_BETWEEN, _date_range(start_date, end_date), chunk_size, name="games_between"
+    )
+
+
+def fetch_games_arrow(conn, start_date, end_date):
+    """
+    Fetch all games in a date range column-wise.
+
+    Args:
+        conn: psycopg2 connection
+        start_date: First day (YYYY-MM-DD), inclusive
+        end_date: Last day (YYYY-MM-DD), inclusive
+
+    Returns:
+        pyarrow.Table: Game rows in (startTime, id) order
+    """
+    return fetch_arrow(conn, GAMES_BETWEEN, _date_range(start_date, end_date), GAME_ARROW_TYPES)
+
+
+def fetch_final_games_updated_since(conn, updated_since, before):
+    """
+    Fetch FINAL games starting before a time whose row changed after another.
+
+    Args:
+        conn: psycopg2 connection
+        updated_since: Exclusive lower bound on updatedAt (naive UTC)
+        before: Exclusive upper bound on startTime (naive UTC)
+
+    Returns:
+        DataFrame: Game rows in (startTime, id) order
+    """
+    return fetch_frame(
+        conn, FINAL_GAMES_UPDATED_SINCE, {"updated_since": updated_since, "before": before}
+    )
+
+
+def fetch_upcoming_games(conn, days=7, now=None):
+    """
+    Fetch SCHEDULED games starting in the next N days.
+
+    Args:
+        conn: psycopg2 connection
+        days: Window length
+        now: Window start, naive UTC like Game.startTime (default: UTC now)
+
+    Returns:
+        DataFrame: Game rows in (startTime, id) order
+    """
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    return fetch_frame(conn, UPCOMING_GAMES, {"now": now, "until": now + timedelta(days=days)})
+
+
+def fetch_games_on_date(conn, day):
+    """
+    Fetch SCHEDULED games starting on one day.
+
+    Args:
+        conn: psycopg2 connection
+        day: Date (YYYY-MM-DD)
+
+    Returns:
+        DataFrame: Game rows in (startTime, id) order
+    """
+    start = datetime.combine(date.fromisoformat(day), datetime.min.time())
+    return fetch_upcoming_games(conn, days=1, now=start)
+
+
+def fetch_odds_arrow(conn, start_date, end_date):
+    """
+    Fetch odds snapshots for games in a date range column-wise.
+
+    Returns:
+        pyarrow.Table: Snapshots in (gameId, marketId, bookmakerId, timestamp)
+            order
+    """
+    return fetch_arrow(
+        conn, ODDS_FOR_GAMES_BETWEEN, _date_range(start_date, end_date), ODDS_ARROW_TYPES
+    )
+
+
+def stream_odds(conn, game_ids, games_per_chunk=500, since=None):
+    """
+    Stream odds snapshots of a set of games, a batch of games at a time.
+
+    Each batch is one COPY in (gameId, marketId, bookmakerId, timestamp)
+    order, so memory is bounded by the batch and every chunk holds complete
+    games.
+
+    Args:
+        conn: psycopg2 connection
+        game_ids: Game ids
+        games_per_chunk: Games per query
+        since: Only snapshots after this time (e.g. the odds archive
+            watermark)
+
+    Yields:
+        DataFrame: Snapshots with the market type, in index order
+    """
+    game_ids = list(game_ids)
+    since = _timestamp(since)
+    for i in range(0, len(game_ids), games_per_chunk):
+        params = {"game_ids": game_ids[i:i + games_per_chunk], "since": since}
+        yield fetch_arrow(conn, ODDS_FOR_GAMES, params, ODDS_ARROW_TYPES).to_pandas()
+
+
+def fetch_odds_time_range(conn, since=None):
+    """
+    First and last snapshot time, optionally after a watermark.
+
+    Returns:
+        tuple: (first, last) datetimes, both None if there are no snapshots
+    """
+    rows = fetch_frame(conn, ODDS_TIME_RANGE, {"since": _timestamp(since)})
+    first, last = rows.iloc[0]["first"], rows.iloc[0]["last"]
+    return (None, None) if pd.isna(first) else (first, last)
+
+
+def fetch_odds_snapshots_arrow(conn, since, until):
+    """
+    Snapshots with since < timestamp <= until, with league and game start.
+
+    Returns:
+        pyarrow.Table: Snapshots in timestamp order
+    """
+    params = {"since": _timestamp(since), "until": _timestamp(until)}
+    return fetch_arrow(conn, ODDS_SNAPSHOTS_BETWEEN, params, ODDS_ARROW_TYPES)
+
+
+def fetch_model(conn, model_id):
+    """
+    Fetch one MLModel registry row.
+
+    Returns:
+        dict: Model row, or None if not found
+    """
+    rows = fetch_frame(conn, MODEL_BY_ID, {"model_id": model_id})
+    return rows.to_dict("records")[0] if len(rows) else None
+
+
+def fetch_models(conn, statuses, model_type=None):
+    """
+    Fetch MLModel rows with the given statuses, newest first.
+
+    Args:
+        conn: psycopg2 connection
+        statuses: ModelStatus values (e.g. ["ACTIVE"])
+        model_type: Optional ModelType filter
+
+    Returns:
+        list: Model rows (dicts)
+    """
+    params = {"statuses": list(statuses), "model_type": model_type}
+    return fetch_frame(conn, MODELS_BY_STATUS, params).to_dict("records")
+
+
+def fetch_active_model(conn, model_type=None):
+    """
+    Fetch the newest ACTIVE model.
+
+    Returns:
+        dict: Model row, or None if no model is active
+    """
+    models = fetch_models(conn, ["ACTIVE"], model_type)
+    return models[0] if models else None
+
+
+def fetch_model_metric_state(conn, model_ids):
+    """
+    Stored metric state (calibrationPlot JSON) of several models.
+
+    Returns:
+        dict: {model_id: {"model_type", "calibration_plot"}}
+    """
+    rows = fetch_frame(conn, MODEL_METRIC_STATE, {"model_ids": list(model_ids)})
+    return {row.pop("id"): row for row in rows.to_dict("records")}
+
+
+def fetch_unevaluated_predictions(conn):
+    """
+    Predictions of newly FINAL games, column-wise.
+
+    Returns:
+        pyarrow.Table: Predictions with scores in (modelId, startTime) order
+    """
+    return fetch_arrow(conn, UNEVALUATED_PREDICTIONS, None, UNEVALUATED_ARROW_TYPES)
+
+
+def fetch_prediction_times(conn, game_ids):
+    """
+    Latest predictedAt of each game that has a stored prediction.
+
+    Returns:
+        dict: {game_id: predictedAt}
+    """
+    rows = fetch_frame(conn, PREDICTION_TIMES, {"game_ids": list(game_ids)})
+    return dict(zip(rows["gameId"], rows["predictedAt"])) if len(rows) else {}
+
+
+def fetch_predictions(conn, game_ids):
+    """
+    Fetch stored predictions for a set of games.
+
+    Returns:
+        DataFrame: MLPrediction rows
+    """
+    return fetch_frame(conn, PREDICTIONS_FOR_GAMES, {"game_ids": list(game_ids)})
+
+
+def _timestamp(value):
+    """datetime/datetime64 -> naive datetime for query parameters (None passes)."""
+    return None if value is None else pd.Timestamp(value).to_pydatetime()
+
+
+def _date_range(start_date, end_date):
+    return {
+        "start": date.fromisoformat(start_date),
+        "end": date.fromisoformat(end_date) + timedelta(days=1),
+    }
@@ -0,0 +1,209 @@
+"""
+Writers
+
+Bulk writes to the Prisma-managed tables.
+"""
+
+import csv
+import io
+import json
+import sqlite3
+import uuid
+from datetime import datetime, timezone
+
+# Prediction dict key -> MLPrediction column
+PREDICTION_FIELDS = {
+    "model_id": "modelId",
+    "game_id": "gameId",
+    "home_win_prob": "homeWinProb",
+    "away_win_prob": "awayWinProb",
+    "spread_pred": "spreadPred",
+    "total_pred": "totalPred",
+    "spread_lower": "spreadLower",
+    "spread_upper": "spreadUpper",
+    "total_lower": "totalLower",
+    "total_upper": "totalUpper",
+    "predicted_at": "predictedAt",
+    "game_start_time": "gameStartTime",
+    "features": "features",
+}
+PREDICTION_COLUMNS = ["id", *PREDICTION_FIELDS.values(), "createdAt"]
+
+# Columns refreshed when a (modelId, gameId) prediction already exists
+UPDATE_COLUMNS = [c for c in PREDICTION_FIELDS.values() if c not in ("modelId", "gameId")]
+
+# Local stand-in for the MLPrediction table (tests, offline runs)
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS "MLPrediction" (
+    "id"            TEXT PRIMARY KEY,
+    "modelId"       TEXT NOT NULL,
+    "gameId"        TEXT NOT NULL,
+    "homeWinProb"   REAL,
+    "awayWinProb"   REAL,
+    "spreadPred"    REAL,
+    "totalPred"     REAL,
+    "spreadLower"   REAL,
+    "spreadUpper"   REAL,
+    "totalLower"    REAL,
+    "totalUpper"    REAL,
+    "predictedAt"   TEXT NOT NULL,
+    "gameStartTime" TEXT NOT NULL,
+    "features"      TEXT,
+    "evaluatedAt"   TEXT,
+    "createdAt"     TEXT NOT NULL,
+    UNIQUE ("modelId", "gameId")
+);
+"""
+
+
+def upsert_predictions(conn, predictions):
+    """
+    Insert or update MLPrediction rows in one transaction.
+
+    On Postgres the rows are COPYed into a temporary staging table and merged
+    with a single INSERT ... ON CONFLICT ("modelId", "gameId") DO UPDATE, so
+    the cost is one round trip for the whole batch instead of one per row.
+    A sqlite3 connection (see create_sqlite_tables) uses the same upsert
+    through executemany.
+
+    Args:
+        conn: psycopg2 or sqlite3 connection
+        predictions: Iterable of dicts keyed like PREDICTION_FIELDS
+            (predicted_at defaults to now)
+
+    Returns:
+        int: Number of rows written
+    """
+    # Prisma stores DateTime as UTC in timestamp columns without a zone;
+    # predictedAt is the odds cutoff for these games' training rows, so live
+    # runs pass the time their odds features were cut off at
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    rows = [_prediction_row(p, now) for p in predictions]
+    if not rows:
+        return 0
+    if isinstance(conn, sqlite3.Connection):
+        return _upsert_sqlite(conn, rows)
+    return _upsert_postgres(conn, rows)
+
+
+def record_model_metrics(conn, updates, evaluated_ids):
+    """
+    Write refreshed model metrics and mark predictions evaluated, atomically.
+
+    Args:
+        conn: psycopg2 connection
+        updates: Dicts with model_id, log_loss, brier_score, accuracy, mae
+            and calibration_plot (JSON-serializable)
+        evaluated_ids: MLPrediction ids folded into the metrics
+
+    Returns:
+        int: Number of predictions marked evaluated
+    """
+    # updatedAt is left alone: it tracks the model artifact (the model server
+    # reloads when it changes), not its live metrics
+    rows = [
+        {**u, "calibration_plot": json.dumps(u["calibration_plot"], allow_nan=False)}
+        for u in updates
+    ]
+    with conn:
+        with conn.cursor() as cursor:
+            cursor.executemany(
+                'UPDATE "MLModel" SET "logLoss" = %(log_loss)s, '
+                '"brierScore" = %(brier_score)s, "accuracy" = %(accuracy)s, '
+                '"mae" = %(mae)s, "calibrationPlot" = %(calibration_plot)s::jsonb '
+                'WHERE "id" = %(model_id)s',
+                rows,
+            )
+            cursor.execute(
+                'UPDATE "MLPrediction" SET "evaluatedAt" = now() WHERE "id" = ANY(%(ids)s)',
+                {"ids": list(evaluated_ids)},
+            )
+            return cursor.rowcount
+
+
+def set_model_config(conn, version, config_path):
+    """
+    Point an MLModel row's configPath at a config file.
+
+    Args:
+        conn: psycopg2 connection
+        version: MLModel.version (unique)
+        config_path: Path of the JSON config (e.g. tuned hyperparameters)
+
+    Returns:
+        bool: True if a registry row with that version exists
+    """
+    with conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                'UPDATE "MLModel" SET "configPath" = %(path)s, "updatedAt" = now() '
+                'WHERE "version" = %(version)s',
+                {"path": str(config_path), "version": version},
+            )
+            return cursor.rowcount > 0
+
+
+def create_sqlite_tables(conn):
+    """Create the local MLPrediction stand-in on a sqlite3 connection."""
+    conn.executescript(SQLITE_SCHEMA)
+
+
+def _upsert_postgres(conn, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(_csv_value(value) for value in row)
+    buffer.seek(0)
+
+    columns = ", ".join(f'"{c}"' for c in PREDICTION_COLUMNS)
+    updates = ", ".join(f'"{c}" = EXCLUDED."{c}"' for c in UPDATE_COLUMNS)
+    with conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMP TABLE mlprediction_staging '
+                '(LIKE "MLPrediction" INCLUDING DEFAULTS) ON COMMIT DROP'
+            )
+            cursor.copy_expert(
+                f"COPY mlprediction_staging ({columns}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+            cursor.execute(
+                f'INSERT INTO "MLPrediction" ({columns}) '
+                f"SELECT {columns} FROM mlprediction_staging "
+                f'ON CONFLICT ("modelId", "gameId") DO UPDATE SET {updates}'
+            )
+            return cursor.rowcount
+
+
+def _upsert_sqlite(conn, rows):
+    columns = ", ".join(f'"{c}"' for c in PREDICTION_COLUMNS)
+    placeholders = ", ".join("?" * len(PREDICTION_COLUMNS))
+    updates = ", ".join(f'"{c}" = excluded."{c}"' for c in UPDATE_COLUMNS)
+    with conn:
+        conn.executemany(
+            f'INSERT INTO "MLPrediction" ({columns}) VALUES ({placeholders}) '
+            f'ON CONFLICT ("modelId", "gameId") DO UPDATE SET {updates}',
+            [[_sqlite_value(value) for value in row] for row in rows],
+        )
+    return len(rows)
+
+
+def _prediction_row(prediction, now):
+    values = {column: prediction.get(key) for key, column in PREDICTION_FIELDS.items()}
+    if values["predictedAt"] is None:
+        values["predictedAt"] = now
+    if values["features"] is not None:
+        values["features"] = json.dumps(values["features"], default=str)
+    return [uuid.uuid4().hex, *values.values(), now]
+
+
+def _csv_value(value):
+    if value is None:
+        return None  # Written unquoted, which COPY reads as NULL
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _sqlite_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
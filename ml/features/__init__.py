@@ -4,16 +4,48 @@ Feature Engineering Module
 Contains feature extractors for ML models.
 """
 
-from .team_strength import calculate_elo_ratings, calculate_team_stats
-from .schedule import calculate_rest_days, detect_back_to_back
-from .recent_performance import calculate_last_n_games, calculate_win_streak
+from .team_strength import EloEngine, calculate_elo_ratings, calculate_team_stats, elo_sweep
+from .matchup import HeadToHeadIndex, calculate_head_to_head
+from .team_state import TeamState
+from .splits import SPLIT_FILTERS, split_features
+from .opponents import OpponentGraph, opponent_features
+from .schedule import calculate_rest_days, detect_back_to_back, schedule_features
+from .recent_performance import (
+    FormTracker,
+    Momentum,
+    StreakCounter,
+    calculate_last_n_games,
+    calculate_momentum,
+    calculate_win_streak,
+    rolling_last_n_games,
+)
+
+# Bump whenever feature code changes; stored feature rows from other versions
+# are recomputed on the next run.
+FEATURE_VERSION = "4"
 
 __all__ = [
+    "FEATURE_VERSION",
+    "EloEngine",
     "calculate_elo_ratings",
     "calculate_team_stats",
+    "elo_sweep",
+    "SPLIT_FILTERS",
+    "split_features",
+    "OpponentGraph",
+    "opponent_features",
     "calculate_rest_days",
     "detect_back_to_back",
+    "schedule_features",
+    "HeadToHeadIndex",
+    "calculate_head_to_head",
+    "FormTracker",
+    "Momentum",
+    "StreakCounter",
     "calculate_last_n_games",
+    "calculate_momentum",
     "calculate_win_streak",
+    "rolling_last_n_games",
+    "TeamState",
 ]
 
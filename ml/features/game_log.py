@@ -0,0 +1,448 @@
+"""
+Game Log
+
+Columnar views of the Game table shared by the batch feature engines, and
+the append-only history and checkpoint plumbing of the sequential ones
+(EloEngine, FormTracker, HeadToHeadIndex, TeamState).
+"""
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+GAME_COLUMNS = [
+    "id",
+    "leagueId",
+    "homeTeamId",
+    "awayTeamId",
+    "startTime",
+    "status",
+    "homeScore",
+    "awayScore",
+    "venue",
+]
+
+# Games that never happened (no result, no rest/travel impact)
+NOT_PLAYED = ("CANCELLED", "POSTPONED")
+
+# Calendar days are counted in US Eastern time, so a 1pm and a 7:30pm ET
+# game on consecutive days are one day apart
+SCHEDULE_TIMEZONE = "America/New_York"
+
+
+def to_datetime64(value):
+    """Normalize a datetime, ISO string or datetime64 to UTC datetime64[ms]."""
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(value, "ms")
+
+
+def is_completed(game):
+    """True for a FINAL game dict with both scores (NaN counts as missing)."""
+    return (
+        game.get("status", "FINAL") == "FINAL"
+        and not _missing(game.get("homeScore"))
+        and not _missing(game.get("awayScore"))
+    )
+
+
+def grow(array, capacity):
+    """Copy an array into a larger preallocated buffer (first axis)."""
+    grown = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+def late_game_error(game_id, start, last_start, kind, state):
+    """ValueError for a game older than the last one in append-only state."""
+    return ValueError(
+        f"Game {game_id} starts at {start}, before the last {kind} ({last_start}); "
+        f"rebuild {state} instead of updating incrementally"
+    )
+
+
+def save_checkpoint(path, **arrays):
+    """Write arrays to a compressed .npz checkpoint, creating its directory."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(path, **arrays)
+
+
+def load_checkpoint(path):
+    """
+    Read every array of a .npz checkpoint (written by save_checkpoint).
+
+    Returns:
+        dict: {name: ndarray}
+    """
+    with np.load(path, allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+
+class TeamCodes:
+    """
+    Team id <-> dense integer code, in order of first appearance.
+
+    Engines keep their per-team state in arrays indexed by the code and
+    extend them when code() hands out a new one.
+    """
+
+    def __init__(self, team_ids=()):
+        self.team_ids = list(team_ids)
+        self._codes = {team_id: code for code, team_id in enumerate(self.team_ids)}
+
+    def __len__(self):
+        return len(self.team_ids)
+
+    def __contains__(self, team_id):
+        return team_id in self._codes
+
+    def code(self, team_id):
+        """Code of a team, assigning the next one to a new team."""
+        code = self._codes.get(team_id)
+        if code is None:
+            code = len(self.team_ids)
+            self.team_ids.append(team_id)
+            self._codes[team_id] = code
+        return code
+
+    def get(self, team_id, default=None):
+        """Code of a team, or default if it was never seen."""
+        return self._codes.get(team_id, default)
+
+
+class GameHistory:
+    """
+    Append-only per-game arrays, one row per game in (startTime, id) order.
+
+    Every row holds the game's start time and one value (or block) per named
+    column. Columns are preallocated and doubled with grow(), so appending
+    is amortized O(1), and "values recorded for game X" is a dict lookup
+    plus an array index. arrays() / restore() round-trip the history
+    through a checkpoint under the keys game_ids, start and the column
+    names.
+
+    Args:
+        columns: {name: (row shape, dtype)}, e.g. {"pre": ((2,), np.float64)}
+        capacity: Initial number of rows
+        kind: What a row is, for the late-game error ("rated game")
+        state: What must be rebuilt after a late game ("the ratings")
+    """
+
+    def __init__(self, columns, capacity=1024, kind="folded game", state="the state"):
+        self.kind = kind
+        self.state = state
+        self.game_ids = []
+        self._rows = {}
+        self._columns = {"start": np.empty(capacity, dtype="datetime64[ms]")}
+        for name, (shape, dtype) in columns.items():
+            self._columns[name] = np.empty((capacity, *shape), dtype=dtype)
+        self.n = 0
+
+    def __len__(self):
+        return self.n
+
+    def __contains__(self, game_id):
+        return game_id in self._rows
+
+    def __getitem__(self, name):
+        """Filled rows of a column ("start" or a column name); a view."""
+        return self._columns[name][:self.n]
+
+    def row(self, game_id):
+        """Row of a recorded game (KeyError if it is not in the history)."""
+        return self._rows[game_id]
+
+    def pending(self, games):
+        """
+        FINAL games with both scores that are not in the history yet.
+
+        Returns:
+            list: The games in (startTime, id) order
+
+        Raises:
+            ValueError: The first of them starts before the last recorded
+                game, so appending it would break the time order
+        """
+        pending = [g for g in games if g["id"] not in self._rows and is_completed(g)]
+        pending.sort(key=lambda g: (to_datetime64(g["startTime"]), g["id"]))
+        if pending and self.n:
+            first = to_datetime64(pending[0]["startTime"])
+            last = self._columns["start"][self.n - 1]
+            if first < last:
+                raise late_game_error(pending[0]["id"], first, last, self.kind, self.state)
+        return pending
+
+    def append(self, game_id, start, **values):
+        """
+        Record one game.
+
+        Args:
+            game_id: Game id
+            start: Start time
+            **values: One row per column
+
+        Returns:
+            int: The game's row
+        """
+        row = self.n
+        self._reserve(row + 1)
+        self._columns["start"][row] = to_datetime64(start)
+        for name, value in values.items():
+            self._columns[name][row] = value
+        self.game_ids.append(game_id)
+        self._rows[game_id] = row
+        self.n = row + 1
+        return row
+
+    def arrays(self):
+        """The history as checkpoint arrays (views of the filled rows)."""
+        return {
+            "game_ids": np.array(self.game_ids, dtype=str),
+            **{name: column[:self.n] for name, column in self._columns.items()},
+        }
+
+    def restore(self, arrays):
+        """Replace the history with arrays() output (e.g. from load_checkpoint)."""
+        n = len(arrays["game_ids"])
+        self._reserve(n)
+        for name, column in self._columns.items():
+            column[:n] = arrays[name]
+        self.game_ids = arrays["game_ids"].tolist()
+        self._rows = {game_id: row for row, game_id in enumerate(self.game_ids)}
+        self.n = n
+
+    def _reserve(self, rows):
+        capacity = len(self._columns["start"])
+        if rows > capacity:
+            capacity = max(2 * capacity, rows, 1024)
+            self._columns = {
+                name: grow(column, capacity) for name, column in self._columns.items()
+            }
+
+
+def games_frame(games):
+    """
+    Build a columnar, chronologically sorted game table.
+
+    Args:
+        games: List of game dicts or a DataFrame with Game columns
+
+    Returns:
+        DataFrame: One row per game ordered by (startTime, id), with
+            startTime as datetime64[ms] and scores as float (NaN if missing)
+    """
+    df = games.copy() if isinstance(games, pd.DataFrame) else pd.DataFrame(list(games))
+    for column in GAME_COLUMNS:
+        if column not in df.columns:
+            df[column] = None
+
+    df["startTime"] = pd.to_datetime(df["startTime"], utc=True).dt.tz_localize(None)
+    df["startTime"] = df["startTime"].astype("datetime64[ms]")
+    df["homeScore"] = pd.to_numeric(df["homeScore"], errors="coerce").astype(np.float64)
+    df["awayScore"] = pd.to_numeric(df["awayScore"], errors="coerce").astype(np.float64)
+    df["status"] = df["status"].fillna("SCHEDULED")
+
+    df = df.sort_values(["startTime", "id"], kind="mergesort")
+    return df.reset_index(drop=True)
+
+
+def season_of(start_times):
+    """
+    Season label for game start times.
+
+    Seasons are named by the year they start in: games from July onwards
+    belong to that year's season, earlier games to the previous year's
+    (NBA 2023-24 and NFL 2023 are both season 2023).
+
+    Args:
+        start_times: Array-like of datetime64 values
+
+    Returns:
+        ndarray: int32 season years
+    """
+    start = pd.DatetimeIndex(np.asarray(start_times, dtype="datetime64[ms]"))
+    return np.where(start.month >= 7, start.year, start.year - 1).astype(np.int32)
+
+
+def local_day(start_times):
+    """Calendar day number (days since epoch) in SCHEDULE_TIMEZONE."""
+    start = pd.DatetimeIndex(np.asarray(start_times, dtype="datetime64[ms]"))
+    local = start.tz_localize("UTC").tz_convert(SCHEDULE_TIMEZONE).tz_localize(None)
+    return local.to_numpy().astype("datetime64[D]").astype(np.int64)
+
+
+def completed_mask(games_df):
+    """Boolean mask of FINAL games with both scores."""
+    return (
+        (games_df["status"].to_numpy() == "FINAL")
+        & ~np.isnan(games_df["homeScore"].to_numpy())
+        & ~np.isnan(games_df["awayScore"].to_numpy())
+    )
+
+
+def team_appearances(games_df):
+    """
+    Expand a game table into one row per (team, game).
+
+    Args:
+        games_df: Output of games_frame()
+
+    Returns:
+        DataFrame: Columns game_row, team (int code), team_id, opponent
+            (int code), is_home, start (datetime64[ms]), points_for,
+            points_against, completed; ordered by (team, start, game_row)
+    """
+    n = len(games_df)
+    team_codes, team_ids = pd.factorize(
+        np.concatenate([
+            games_df["homeTeamId"].to_numpy(dtype=object),
+            games_df["awayTeamId"].to_numpy(dtype=object),
+        ])
+    )
+    home_code, away_code = team_codes[:n], team_codes[n:]
+    home_score = games_df["homeScore"].to_numpy()
+    away_score = games_df["awayScore"].to_numpy()
+    done = completed_mask(games_df)
+    start = games_df["startTime"].to_numpy()
+    rows = np.arange(n)
+
+    log = pd.DataFrame({
+        "game_row": np.concatenate([rows, rows]),
+        "team": np.concatenate([home_code, away_code]).astype(np.int32),
+        "opponent": np.concatenate([away_code, home_code]).astype(np.int32),
+        "is_home": np.concatenate([np.ones(n, bool), np.zeros(n, bool)]),
+        "start": np.concatenate([start, start]),
+        "points_for": np.concatenate([home_score, away_score]),
+        "points_against": np.concatenate([away_score, home_score]),
+        "completed": np.concatenate([done, done]),
+    })
+    order = np.lexsort((log["game_row"].to_numpy(), log["start"].to_numpy(), log["team"].to_numpy()))
+    log = log.iloc[order].reset_index(drop=True)
+    log.insert(2, "team_id", np.asarray(team_ids, dtype=object)[log["team"].to_numpy()])
+    return log
+
+
+def prior_completed_index(log, group=None):
+    """
+    Locate each appearance's history among the team's completed games.
+
+    Args:
+        log: Output of team_appearances()
+        group: Optional array aligned with log rows that never decreases over
+            a team's games (e.g. season); the history then restarts whenever
+            it changes
+
+    Returns:
+        tuple: (completed_positions, pos, team_start) where
+            completed_positions indexes the completed rows of the log, and for
+            every log row, completed rows [team_start, pos) are the team's
+            completed games (in the same group) that started strictly before it
+    """
+    team = log["team"].to_numpy().astype(np.int64)
+    if group is not None:
+        group_codes, group = np.unique(np.asarray(group), return_inverse=True)
+        team = team * len(group_codes) + group
+    _, time_rank = np.unique(log["start"].to_numpy(), return_inverse=True)
+    stride = int(time_rank.max(initial=0)) + 1
+    keys = team * stride + time_rank
+
+    completed_positions = np.flatnonzero(log["completed"].to_numpy())
+    completed_keys = keys[completed_positions]
+    pos = np.searchsorted(completed_keys, keys, side="left")
+    team_start = np.searchsorted(completed_keys, team * stride, side="left")
+    return completed_positions, pos, team_start
+
+
+def as_of_sums(log, values, group=None):
+    """
+    Sum columns over each appearance's earlier completed games.
+
+    The grouped cumulative-aggregate kernel behind the split features: each
+    column is prefix-summed once over the completed rows of the log and every
+    appearance reads its sum as the difference of two prefix sums, so the
+    whole table costs O(rows) per column. Filtered splits (home games, close
+    games, ...) are expressed by zeroing the values of excluded games and
+    summing the filter mask itself as the game count.
+
+    Args:
+        log: Output of team_appearances()
+        values: {name: array aligned with log rows}; only completed rows are
+            read
+        group: Optional grouping within each team (see prior_completed_index)
+
+    Returns:
+        dict: {name: float64 array aligned with log rows}
+    """
+    completed, pos, team_start = prior_completed_index(log, group)
+    sums = {}
+    for name, column in values.items():
+        cs = np.zeros(len(completed) + 1, dtype=np.float64)
+        np.cumsum(np.asarray(column, dtype=np.float64)[completed], out=cs[1:])
+        sums[name] = cs[pos] - cs[team_start]
+    return sums
+
+
+def scatter_sides(log, values, n_games):
+    """
+    Split per-appearance values back into home/away arrays per game.
+
+    Args:
+        log: Output of team_appearances()
+        values: Array aligned with log rows
+        n_games: Number of games in the source table
+
+    Returns:
+        tuple: (home_values, away_values), each aligned with game rows
+    """
+    values = np.asarray(values)
+    home = np.empty(n_games, dtype=values.dtype)
+    away = np.empty(n_games, dtype=values.dtype)
+    is_home = log["is_home"].to_numpy()
+    game_row = log["game_row"].to_numpy()
+    home[game_row[is_home]] = values[is_home]
+    away[game_row[~is_home]] = values[~is_home]
+    return home, away
+
+
+def history_tail(games_df, depth, lookback_days=0):
+    """
+    Games needed to continue per-team windows of up to `depth` games.
+
+    Returns the rows of games_df that fall on one of the last `depth` + 1
+    start times of either participating team, counted separately over
+    completed games (rolling results) and over played games (schedule).
+    Games in the last `lookback_days` are always kept, for day-based
+    windows. Prepending these to the next chunk of games lets rolling and
+    schedule features continue across chunk boundaries without keeping the
+    full history in memory.
+
+    Args:
+        games_df: Output of games_frame()
+        depth: Largest per-team window (in games) that must be continued
+        lookback_days: Largest day-based window that must be continued
+
+    Returns:
+        DataFrame: Subset of games_df in its original order
+    """
+    log = team_appearances(games_df)
+    played = ~games_df["status"].isin(NOT_PLAYED).to_numpy()[log["game_row"].to_numpy()]
+
+    keep = []
+    for mask in (log["completed"].to_numpy(), played):
+        subset = log[mask]
+        # Dense rank over start times: the next chunk may start at the same
+        # time as this chunk's last game, so keep one extra start time
+        from_end = subset.groupby("team", sort=False)["start"].rank(method="dense", ascending=False)
+        keep.append(subset["game_row"].to_numpy()[from_end.to_numpy() <= depth + 1])
+
+    start = games_df["startTime"].to_numpy()
+    if len(start) and lookback_days:
+        recent = start >= start.max() - np.timedelta64(lookback_days, "D")
+        keep.append(np.flatnonzero(recent))
+    return games_df.iloc[np.unique(np.concatenate(keep))].reset_index(drop=True)
+
+
+def _missing(score):
+    return score is None or score != score  # None or NaN
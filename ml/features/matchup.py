@@ -0,0 +1,303 @@
+"""
+Matchup Features
+
+Head-to-head history between the two teams of a game.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .game_log import (
+    grow,
+    is_completed,
+    late_game_error,
+    load_checkpoint,
+    save_checkpoint,
+    to_datetime64,
+)
+
+H2H_LAST_MEETINGS = 5
+H2H_STATS = ("games", "win_pct", "margin")
+
+
+class HeadToHeadIndex:
+    """
+    Time-sorted meeting history per unordered team pair.
+
+    Every FINAL game is appended once to its pair's history (pairs are keyed
+    by the sorted team ids, margins are stored from the first team's view),
+    together with running totals. "Last k meetings before t" and "record as
+    of t" are then a binary search plus an O(1) difference of running
+    totals, instead of a scan over all games. The index is extended
+    incrementally with newly FINAL games and can be checkpointed like
+    EloEngine.
+
+    Usage:
+        h2h = HeadToHeadIndex()
+        h2h.update(games)
+        h2h.record_before("lakers", "celtics", start_time)
+        h2h.save("models/h2h.npz")
+    """
+
+    def __init__(self):
+        self._pair_codes = {}
+        self._pairs = []
+        self._game_ids = set()
+
+    # ------------------------------------------------------------------
+    # Updating
+    # ------------------------------------------------------------------
+
+    def update(self, games):
+        """
+        Add FINAL games that are not yet indexed.
+
+        Games must not start before the last indexed meeting of the same
+        pair (feed them in chronological order).
+
+        Returns:
+            int: Number of newly indexed games
+        """
+        pending = [
+            g for g in games
+            if g["id"] not in self._game_ids and is_completed(g)
+        ]
+        pending.sort(key=lambda g: (to_datetime64(g["startTime"]), g["id"]))
+
+        for game in pending:
+            first, second = _pair_key(game["homeTeamId"], game["awayTeamId"])
+            margin = game["homeScore"] - game["awayScore"]
+            if game["homeTeamId"] != first:
+                margin = -margin
+            history = self._history(first, second, create=True)
+            history.append(game["id"], to_datetime64(game["startTime"]), margin)
+            self._game_ids.add(game["id"])
+        return len(pending)
+
+    def _history(self, team_a, team_b, create=False):
+        key = _pair_key(team_a, team_b)
+        code = self._pair_codes.get(key)
+        if code is None:
+            if not create:
+                return None
+            code = len(self._pairs)
+            self._pair_codes[key] = code
+            self._pairs.append(_PairHistory(key))
+        return self._pairs[code]
+
+    def __len__(self):
+        return len(self._game_ids)
+
+    def __contains__(self, game_id):
+        return game_id in self._game_ids
+
+    def reset(self):
+        """Forget every indexed game."""
+        self.__init__()
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def last_meetings(self, team_a, team_b, before, k=H2H_LAST_MEETINGS):
+        """
+        The last k meetings that started strictly before a time.
+
+        Returns:
+            DataFrame: game_id, startTime and margin (team_a's points minus
+                team_b's), oldest first
+        """
+        history = self._history(team_a, team_b)
+        if history is None:
+            return pd.DataFrame({"game_id": [], "startTime": [], "margin": []})
+        hi = history.position(to_datetime64(before))
+        lo = max(0, hi - k)
+        sign = 1.0 if _pair_key(team_a, team_b)[0] == team_a else -1.0
+        return pd.DataFrame({
+            "game_id": history.game_ids[lo:hi],
+            "startTime": history.start[lo:hi],
+            "margin": sign * history.margin[lo:hi],
+        })
+
+    def record_before(self, team_a, team_b, before, k=None):
+        """
+        Head-to-head record as of a time (meetings strictly before it).
+
+        Args:
+            team_a: Team whose perspective is reported
+            team_b: Opponent
+            before: Time (datetime or datetime64)
+            k: Only the last k meetings (default: all)
+
+        Returns:
+            dict: games, wins, losses, margin (average, NaN without meetings)
+                for team_a
+        """
+        history = self._history(team_a, team_b)
+        if history is None:
+            return {"games": 0, "wins": 0, "losses": 0, "margin": np.nan}
+        hi = history.position(to_datetime64(before))
+        lo = 0 if k is None else max(0, hi - k)
+        wins_first, wins_second, margin = history.cumulative[hi] - history.cumulative[lo]
+        if _pair_key(team_a, team_b)[0] != team_a:
+            wins_first, wins_second, margin = wins_second, wins_first, -margin
+        games = hi - lo
+        return {
+            "games": games,
+            "wins": int(wins_first),
+            "losses": int(wins_second),
+            "margin": margin / games if games else np.nan,
+        }
+
+    def features(self, games_df, k=H2H_LAST_MEETINGS):
+        """
+        Pre-game head-to-head features for every game of a frame.
+
+        Queries are vectorized per pair (one searchsorted per pair), and
+        only meetings that started strictly before each game count. Call
+        update() first so the index covers the games' history.
+
+        Args:
+            games_df: Output of games_frame()
+            k: Window for the last-meetings features
+
+        Returns:
+            DataFrame: "id" plus h2h_{stat} (all meetings) and
+                h2h_l{k}_{stat} columns, from the home team's view
+        """
+        n = len(games_df)
+        out = {"id": games_df["id"].to_numpy()}
+        columns = {
+            f"h2h{window}_{stat}": np.full(n, np.nan)
+            for window in ("", f"_l{k}") for stat in H2H_STATS
+        }
+
+        home = games_df["homeTeamId"].to_numpy(dtype=object)
+        away = games_df["awayTeamId"].to_numpy(dtype=object)
+        start = games_df["startTime"].to_numpy(dtype="datetime64[ms]")
+        flip = np.array([h > a for h, a in zip(home, away)], dtype=bool)  # home is second
+        first = np.where(flip, away, home)
+        second = np.where(flip, home, away)
+        rows_by_pair = pd.DataFrame({"first": first, "second": second}).groupby(
+            ["first", "second"], sort=False
+        ).indices
+
+        for (team_a, team_b), rows in rows_by_pair.items():
+            history = self._history(team_a, team_b)
+            if history is None:
+                hi = np.zeros(len(rows), dtype=np.int64)
+                cumulative = np.zeros((1, 3))
+            else:
+                hi = np.searchsorted(history.start[:history.n], start[rows], side="left")
+                cumulative = history.cumulative
+            sign = np.where(flip[rows], -1.0, 1.0)
+            for window, lo in (("", np.zeros_like(hi)), (f"_l{k}", np.maximum(hi - k, 0))):
+                totals = cumulative[hi] - cumulative[lo]
+                games = (hi - lo).astype(np.float64)
+                home_wins = np.where(flip[rows], totals[:, 1], totals[:, 0])
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    columns[f"h2h{window}_games"][rows] = games
+                    columns[f"h2h{window}_win_pct"][rows] = home_wins / games
+                    columns[f"h2h{window}_margin"][rows] = sign * totals[:, 2] / games
+
+        out.update(columns)
+        return pd.DataFrame(out)
+
+    # ------------------------------------------------------------------
+    # Checkpoints
+    # ------------------------------------------------------------------
+
+    def save(self, path):
+        """Write all pair histories to a compressed .npz checkpoint."""
+        pairs = self._pairs
+        save_checkpoint(
+            path,
+            pair_first=np.array([p.key[0] for p in pairs], dtype=str),
+            pair_second=np.array([p.key[1] for p in pairs], dtype=str),
+            pair_sizes=np.array([p.n for p in pairs], dtype=np.int64),
+            game_ids=np.array([g for p in pairs for g in p.game_ids], dtype=str),
+            start=np.concatenate([p.start[:p.n] for p in pairs] or [np.empty(0, "datetime64[ms]")]),
+            margin=np.concatenate([p.margin[:p.n] for p in pairs] or [np.empty(0)]),
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Restore an index from a checkpoint written by save()."""
+        index = cls()
+        data = load_checkpoint(path)
+        offsets = np.concatenate([[0], np.cumsum(data["pair_sizes"])])
+        game_ids = data["game_ids"].tolist()
+        for i, (first, second) in enumerate(zip(data["pair_first"].tolist(),
+                                               data["pair_second"].tolist())):
+            history = index._history(first, second, create=True)
+            lo, hi = offsets[i], offsets[i + 1]
+            history.extend(game_ids[lo:hi], data["start"][lo:hi], data["margin"][lo:hi])
+            index._game_ids.update(game_ids[lo:hi])
+        return index
+
+
+class _PairHistory:
+    """Growable meeting arrays of one pair, with running totals."""
+
+    def __init__(self, key, capacity=8):
+        self.key = key
+        self.game_ids = []
+        self.start = np.empty(capacity, dtype="datetime64[ms]")
+        self.margin = np.empty(capacity, dtype=np.float64)
+        # Row i: (first team wins, second team wins, margin sum) over meetings [0, i)
+        self.cumulative = np.zeros((capacity + 1, 3))
+        self.n = 0
+
+    def position(self, before):
+        """Number of meetings that started strictly before a time."""
+        return int(np.searchsorted(self.start[:self.n], before, side="left"))
+
+    def append(self, game_id, start, margin):
+        if self.n and start < self.start[self.n - 1]:
+            raise late_game_error(
+                game_id, start, self.start[self.n - 1],
+                f"indexed meeting of {self.key}", "the index",
+            )
+        self.extend([game_id], np.array([start], dtype="datetime64[ms]"), np.array([margin]))
+
+    def extend(self, game_ids, start, margin):
+        count = len(game_ids)
+        if self.n + count > len(self.start):
+            capacity = max(2 * len(self.start), self.n + count)
+            self.start = grow(self.start, capacity)
+            self.margin = grow(self.margin, capacity)
+            self.cumulative = grow(self.cumulative, capacity + 1)
+        n = self.n
+        margin = np.asarray(margin, dtype=np.float64)
+        self.game_ids.extend(game_ids)
+        self.start[n:n + count] = start
+        self.margin[n:n + count] = margin
+        steps = np.stack([margin > 0, margin < 0, margin], axis=1).astype(np.float64)
+        self.cumulative[n + 1:n + count + 1] = self.cumulative[n] + np.cumsum(steps, axis=0)
+        self.n = n + count
+
+
+def calculate_head_to_head(games, team_a, team_b, before, k=None):
+    """
+    Head-to-head record of team_a against team_b before a time.
+
+    Args:
+        games: Historical games (any order)
+        team_a: Team whose perspective is reported
+        team_b: Opponent
+        before: Only meetings that started strictly before this time count
+        k: Only the last k meetings (default: all)
+
+    Returns:
+        dict: games, wins, losses, margin (average) for team_a
+    """
+    index = HeadToHeadIndex()
+    index.update(
+        g for g in games
+        if {g["homeTeamId"], g["awayTeamId"]} == {team_a, team_b}
+    )
+    return index.record_before(team_a, team_b, before, k)
+
+
+def _pair_key(team_a, team_b):
+    return (team_a, team_b) if team_a <= team_b else (team_b, team_a)
@@ -0,0 +1,247 @@
+"""
+Odds Features
+
+Point-in-time market features from OddsSnapshot history.
+"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+# Market type -> column prefix; moneyline prices become the vig-free home
+# win probability, spread and total markets use the posted line
+MARKETS = {
+    "MONEYLINE": "ml_home_prob",
+    "SPREAD": "spread_line",
+    "TOTAL": "total_line",
+}
+ODDS_STATS = ("open", "current", "books", "dispersion", "velocity")
+ODDS_FEATURE_COLUMNS = [f"{prefix}_{stat}" for prefix in MARKETS.values() for stat in ODDS_STATS]
+# Closing lines are only known once the game starts: evaluation labels
+# (closing line value), never model inputs
+CLOSING_LINE_COLUMNS = [f"{prefix}_close" for prefix in MARKETS.values()]
+
+ODDS_LEAD_HOURS = 1.0  # Default prediction time for games without a stored prediction
+VELOCITY_HOURS = 24.0
+
+_HOUR_MS = 3_600_000
+
+
+def implied_probability(american_odds):
+    """
+    Implied probability of American odds (-150 -> 0.6, +130 -> 0.435).
+
+    Args:
+        american_odds: Scalar or array of American odds
+
+    Returns:
+        ndarray: Probabilities (NaN where odds are missing)
+    """
+    odds = np.asarray(american_odds, dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(odds < 0, -odds / (100.0 - odds), 100.0 / (odds + 100.0))
+
+
+def market_values(odds):
+    """
+    One comparable number per snapshot.
+
+    Args:
+        odds: OddsSnapshot rows with gameId, market (MarketType), bookmakerId,
+            timestamp, homeOdds, awayOdds and line
+
+    Returns:
+        DataFrame: gameId, market, bookmakerId, timestamp (datetime64[ms])
+            and value; snapshots without a usable price are dropped
+    """
+    market = odds["market"].to_numpy(dtype=object)
+    home = implied_probability(odds["homeOdds"])
+    away = implied_probability(odds["awayOdds"])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        home_prob = home / (home + away)  # Remove the bookmaker margin
+    line = pd.to_numeric(odds["line"], errors="coerce").to_numpy(dtype=np.float64)
+
+    values = pd.DataFrame({
+        "gameId": odds["gameId"].to_numpy(),
+        "market": market,
+        "bookmakerId": odds["bookmakerId"].to_numpy(),
+        "timestamp": _to_ms(odds["timestamp"]),
+        "value": np.where(market == "MONEYLINE", home_prob, line),
+    })
+    return values[np.isfinite(values["value"].to_numpy())].reset_index(drop=True)
+
+
+def prediction_cutoffs(games, prediction_times=None, lead_hours=ODDS_LEAD_HOURS, now=None):
+    """
+    Latest snapshot time each game's odds features may use.
+
+    A game's cutoff is its stored MLPrediction.predictedAt (capped at the
+    start), or `lead_hours` before the start for games that were never
+    predicted, and never later than now. A re-prediction overwrites
+    predictedAt together with the outputs, and a live run cuts the odds off
+    at the predictedAt it stores (add_odds_features(predicted_at=...)), so
+    training rows see the market the latest stored prediction was made
+    from.
+
+    Args:
+        games: DataFrame with id and startTime
+        prediction_times: Optional {game_id: predictedAt}
+        lead_hours: Hours before the start used without a prediction
+        now: Current time (default: UTC now)
+
+    Returns:
+        ndarray: datetime64[ms] cutoffs aligned with games
+    """
+    start = _to_ms(games["startTime"])
+    cutoff = start - np.timedelta64(int(lead_hours * _HOUR_MS), "ms")
+    if prediction_times:
+        predicted = pd.Series(prediction_times, dtype=object).reindex(games["id"].to_numpy())
+        predicted = _to_ms(predicted)
+        known = ~np.isnat(predicted)
+        cutoff[known] = np.minimum(predicted[known], start[known])
+    return np.minimum(cutoff, _now_ms(now))
+
+
+def odds_features(odds, games, cutoffs, velocity_hours=VELOCITY_HOURS, now=None):
+    """
+    Opening, current, consensus and movement features per game and market.
+
+    Snapshots are grouped into (game, market, bookmaker) series sorted by
+    time, and every lookup is a vectorized as-of join: one searchsorted over
+    the sorted series for all games at once. Only snapshots at or before a
+    game's cutoff are used, except for the closing line label.
+
+    Per market:
+        open: Earliest posted value
+        current: Consensus (mean over books) of each book's latest value
+        books: Number of books with a value
+        dispersion: Standard deviation of the books' latest values
+        velocity: Consensus change per hour over the last `velocity_hours`
+            (since the open if the market is younger)
+        close: Consensus at the start (NaN until the game has started)
+
+    Args:
+        odds: OddsSnapshot rows (see market_values); any order
+        games: DataFrame with id and startTime
+        cutoffs: datetime64 cutoffs aligned with games (prediction_cutoffs)
+        velocity_hours: Window for line movement
+        now: Current time for the closing line (default: UTC now)
+
+    Returns:
+        DataFrame: "id" plus ODDS_FEATURE_COLUMNS and CLOSING_LINE_COLUMNS,
+            aligned with games
+    """
+    n = len(games)
+    n_markets = len(MARKETS)
+    result = {"id": games["id"].to_numpy()}
+    empty = {column: np.full(n, np.nan) for column in ODDS_FEATURE_COLUMNS + CLOSING_LINE_COLUMNS}
+
+    values = market_values(odds)
+    game_row = pd.Index(games["id"]).get_indexer(values["gameId"])
+    market_code = pd.Categorical(values["market"], categories=list(MARKETS)).codes
+    keep = (game_row >= 0) & (market_code >= 0)
+    if not keep.any():
+        for prefix in MARKETS.values():
+            empty[f"{prefix}_books"] = np.zeros(n)
+        result.update(empty)
+        return pd.DataFrame(result)[["id"] + ODDS_FEATURE_COLUMNS + CLOSING_LINE_COLUMNS]
+
+    # Series = (game, market); groups = (game, market, bookmaker), sorted by time
+    series = game_row[keep].astype(np.int64) * n_markets + market_code[keep]
+    book = pd.factorize(values["bookmakerId"].to_numpy()[keep])[0]
+    time = values["timestamp"].to_numpy()[keep].astype(np.int64)
+    value = values["value"].to_numpy()[keep]
+    order = np.lexsort((time, book, series))
+    series, book, time, value = series[order], book[order], time[order], value[order]
+
+    new_group = np.ones(len(series), dtype=bool)
+    new_group[1:] = (series[1:] != series[:-1]) | (book[1:] != book[:-1])
+    group = np.cumsum(new_group) - 1
+    group_first = np.flatnonzero(new_group)
+    group_series = series[group_first]
+
+    cutoff = np.repeat(np.asarray(cutoffs, dtype="datetime64[ms]").astype(np.int64), n_markets)
+    start = np.repeat(_to_ms(games["startTime"]).astype(np.int64), n_markets)
+    window = int(velocity_hours * _HOUR_MS)
+    size = n * n_markets
+
+    def consensus(limit):
+        # Each book's latest value at or before limit[series]
+        last = _as_of(group, time, group_series, limit[group_series])
+        has = last >= 0
+        counts = np.bincount(group_series[has], minlength=size).astype(np.float64)
+        total = np.bincount(group_series[has], value[last[has]], minlength=size)
+        squares = np.bincount(group_series[has], value[last[has]] ** 2, minlength=size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / counts
+            spread = np.sqrt(np.maximum(squares / counts - mean ** 2, 0.0))
+        return mean, spread, counts
+
+    current, dispersion, books = consensus(cutoff)
+    lagged, _, lagged_books = consensus(cutoff - window)
+
+    # Opening: the earliest snapshot over all books, if posted by the cutoff
+    first_order = np.lexsort((time[group_first], group_series))
+    first = group_first[first_order]
+    is_series_first = np.ones(len(first), dtype=bool)
+    is_series_first[1:] = group_series[first_order][1:] != group_series[first_order][:-1]
+    first = first[is_series_first]
+    open_value = np.full(size, np.nan)
+    open_time = np.full(size, np.iinfo(np.int64).max)
+    open_value[series[first]] = value[first]
+    open_time[series[first]] = time[first]
+    opened = open_time <= cutoff
+    open_value[~opened] = np.nan
+
+    has_lag = lagged_books > 0
+    base = np.where(has_lag, lagged, open_value)
+    hours = np.where(has_lag, window, cutoff - np.minimum(open_time, cutoff)) / _HOUR_MS
+    with np.errstate(invalid="ignore", divide="ignore"):
+        velocity = np.where(hours > 0, (current - base) / hours, np.nan)
+
+    close = consensus(start)[0]
+    close[start > _now_ms(now).astype(np.int64)] = np.nan
+
+    stats = {
+        "open": open_value,
+        "current": current,
+        "books": books,
+        "dispersion": np.where(books > 0, dispersion, np.nan),
+        "velocity": velocity,
+        "close": close,
+    }
+    for m, prefix in enumerate(MARKETS.values()):
+        for stat, column in stats.items():
+            result[f"{prefix}_{stat}"] = column[m::n_markets]
+    return pd.DataFrame(result)[["id"] + ODDS_FEATURE_COLUMNS + CLOSING_LINE_COLUMNS]
+
+
+def _as_of(group, time, group_series, limit):
+    """
+    Index of each group's last row with time <= limit, or -1.
+
+    Rows are sorted by (group, time). Times and limits are ranked together
+    so a (group, rank) composite key fits in int64 and one searchsorted
+    answers every group.
+    """
+    _, rank = np.unique(np.concatenate([time, limit]), return_inverse=True)
+    stride = int(rank.max(initial=0)) + 1
+    row_keys = group.astype(np.int64) * stride + rank[:len(time)]
+    groups = np.arange(len(group_series), dtype=np.int64)
+    query = groups * stride + rank[len(time):]
+    last = np.searchsorted(row_keys, query, side="right") - 1
+    valid = last >= 0
+    valid[valid] = group[last[valid]] == groups[valid]
+    return np.where(valid, last, -1)
+
+
+def _to_ms(values):
+    """datetime64[ms] array from datetimes/strings/Series (UTC, tz-naive)."""
+    times = pd.to_datetime(pd.Series(values), utc=True, errors="coerce")
+    return times.dt.tz_localize(None).to_numpy(dtype="datetime64[ms]")
+
+
+def _now_ms(now=None):
+    now = now or datetime.now(timezone.utc)
+    return _to_ms([now])[0]
@@ -0,0 +1,267 @@
+"""
+Opponent Features
+
+Strength of schedule and opponent-adjusted (SRS-style) ratings.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.linalg import lsqr
+
+from .game_log import (
+    NOT_PLAYED,
+    completed_mask,
+    games_frame,
+    local_day,
+    season_of,
+    to_datetime64,
+)
+
+OPPONENT_STATS = ("srs", "adj_offense", "adj_defense", "sos", "remaining_sos")
+
+RATING_PRIOR_GAMES = 2.0  # pseudo-games at league average shrinking each rating
+RATING_TOLERANCE = 1e-8   # lsqr atol/btol
+
+
+class OpponentGraph:
+    """
+    Team x game opponent incidence for one league's games.
+
+    incidence[t, g] = 1 when team t plays game g, with games (columns) in
+    games_frame() order. A team's opponent in a game is the game's two
+    teams minus itself, so opponent rating sums over any set of games are
+    one sparse product: incidence @ (r[home] + r[away]) - games played * r.
+    Columns are in time order, so "before a date" and "from a date on" are
+    column ranges.
+
+    Opponent-adjusted ratings solve, for every completed game,
+
+        home_score - mean = offense[home] - defense[away] + hca / 2
+        away_score - mean = offense[away] - defense[home] - hca / 2
+
+    in the least-squares sense with scipy's iterative lsqr, plus
+    RATING_PRIOR_GAMES pseudo-games pulling each rating to 0 (league
+    average). srs = offense + defense is the expected margin against an
+    average team on a neutral site. The design rows are built once; the
+    ratings as of any date use a prefix of them, warm-started from the
+    previous solution.
+    """
+
+    def __init__(self, games, prior_games=RATING_PRIOR_GAMES):
+        self.games = games_frame(games)
+        n = len(self.games)
+        codes, team_ids = pd.factorize(np.concatenate([
+            self.games["homeTeamId"].to_numpy(dtype=object),
+            self.games["awayTeamId"].to_numpy(dtype=object),
+        ]))
+        self.team_ids = list(team_ids)
+        self.home, self.away = codes[:n], codes[n:]
+        self.start = self.games["startTime"].to_numpy()
+        self.completed = completed_mask(self.games)
+        self.played = ~self.games["status"].isin(NOT_PLAYED).to_numpy()
+
+        n_teams = len(self.team_ids)
+        self.incidence = sparse.csc_matrix(
+            (np.ones(2 * n), (codes, np.tile(np.arange(n), 2))), shape=(n_teams, n)
+        )
+        self._design, self._points = self._build_design(prior_games)
+        self._completed_before = np.concatenate([[0], np.cumsum(self.completed)])
+
+    def __len__(self):
+        return len(self.games)
+
+    def strength_of_schedule(self, ratings, as_of=None, default=np.nan):
+        """
+        Past and remaining strength of schedule of every team.
+
+        Args:
+            ratings: {team_id: rating} (Elo, srs, ...) or an array aligned
+                with team_ids
+            as_of: Completed games before this time are past, played games
+                from it on are remaining (default: completed vs not yet)
+            default: Rating of teams missing from a ratings dict
+
+        Returns:
+            DataFrame: team_id, games, sos, remaining_games, remaining_sos
+                (mean opponent rating; NaN without games)
+        """
+        r = self._rating_vector(ratings, default)
+        if as_of is None:
+            past = self.completed
+            remaining = self.played & ~self.completed
+        else:
+            split = np.searchsorted(self.start, to_datetime64(as_of), side="left")
+            before = np.arange(len(self)) < split
+            past = self.completed & before
+            remaining = self.played & ~before
+        games, sos, remaining_games, remaining_sos = self._opponent_means(r, past, remaining)
+        return pd.DataFrame({
+            "team_id": self.team_ids,
+            "games": games,
+            "sos": sos,
+            "remaining_games": remaining_games,
+            "remaining_sos": remaining_sos,
+        })
+
+    def adjusted_ratings(self, as_of=None):
+        """
+        Opponent-adjusted offense, defense and srs of every team.
+
+        Args:
+            as_of: Use completed games that started before this time
+                (default: all completed games)
+
+        Returns:
+            DataFrame: team_id, adj_offense, adj_defense, srs; the fitted
+                home-court advantage is in .attrs["home_advantage"]
+        """
+        n_games = len(self) if as_of is None else np.searchsorted(
+            self.start, to_datetime64(as_of), side="left"
+        )
+        x = self._solve(self._completed_before[n_games])
+        offense, defense, hca = self._split(x)
+        table = pd.DataFrame({
+            "team_id": self.team_ids,
+            "adj_offense": offense,
+            "adj_defense": defense,
+            "srs": offense + defense,
+        })
+        table.attrs["home_advantage"] = hca
+        return table
+
+    def daily_features(self):
+        """
+        OPPONENT_STATS for both teams of every game, as of the game's day.
+
+        Ratings and strength of schedule use only games completed on earlier
+        calendar days (SCHEDULE_TIMEZONE), so every game of a day sees the
+        same, pre-slate values. Each day costs one warm-started lsqr solve
+        and one sparse product; remaining_sos covers the team's played games
+        from that day on, rated by the current srs.
+
+        Returns:
+            dict: {f"{side}_{stat}": float64 array aligned with games}
+        """
+        n = len(self)
+        out = {f"{side}_{stat}": np.full(n, np.nan) for side in ("home", "away") for stat in OPPONENT_STATS}
+        if not n:
+            return out
+
+        day = local_day(self.start)
+        first = np.flatnonzero(np.concatenate([[True], day[1:] != day[:-1]]))
+        last = np.concatenate([first[1:], [n]])
+        index = np.arange(n)
+
+        x, solved = None, -1
+        for lo, hi in zip(first, last):
+            known = self._completed_before[lo]
+            if known != solved:
+                x, solved = self._solve(known, x0=x), known
+            offense, defense, _ = self._split(x)
+            srs = offense + defense
+            _, sos, _, remaining_sos = self._opponent_means(
+                srs, self.completed & (index < lo), self.played & (index >= lo)
+            )
+            stats = {
+                "srs": srs, "adj_offense": offense, "adj_defense": defense,
+                "sos": sos, "remaining_sos": remaining_sos,
+            }
+            for side, teams in (("home", self.home[lo:hi]), ("away", self.away[lo:hi])):
+                for stat, values in stats.items():
+                    out[f"{side}_{stat}"][lo:hi] = values[teams]
+        return out
+
+    def _opponent_means(self, r, past, remaining):
+        """Games and mean opponent rating over two game masks (one product)."""
+        total = r[self.home] + r[self.away]
+        weights = np.column_stack([
+            np.where(past, total, 0.0), past,
+            np.where(remaining, total, 0.0), remaining,
+        ]).astype(np.float64)
+        sums = self.incidence @ weights
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sos = (sums[:, 0] - sums[:, 1] * r) / sums[:, 1]
+            remaining_sos = (sums[:, 2] - sums[:, 3] * r) / sums[:, 3]
+        return sums[:, 1], sos, sums[:, 3], remaining_sos
+
+    def _build_design(self, prior_games):
+        """Prior rows then two rows per completed game, in game order (CSR)."""
+        n_teams = len(self.team_ids)
+        home, away = self.home[self.completed], self.away[self.completed]
+        m = len(home)
+        weight = np.sqrt(prior_games)
+        prior = sparse.hstack([
+            weight * sparse.identity(2 * n_teams), sparse.csr_matrix((2 * n_teams, 1))
+        ])
+
+        # Row 2i: home points, row 2i + 1: away points of the i-th completed game
+        rows = np.repeat(np.arange(2 * m), 3)
+        scorer = np.column_stack([home, away]).ravel()
+        defender = np.column_stack([away, home]).ravel()
+        cols = np.column_stack([scorer, n_teams + defender, np.full(2 * m, 2 * n_teams)]).ravel()
+        hca = np.tile([0.5, -0.5], m)
+        vals = np.column_stack([np.ones(2 * m), -np.ones(2 * m), hca]).ravel()
+        games = sparse.csr_matrix((vals, (rows, cols)), shape=(2 * m, 2 * n_teams + 1))
+
+        points = np.column_stack([
+            self.games["homeScore"].to_numpy()[self.completed],
+            self.games["awayScore"].to_numpy()[self.completed],
+        ]).ravel()
+        return sparse.vstack([prior, games]).tocsr(), points
+
+    def _solve(self, n_completed, x0=None):
+        """Least-squares ratings from the first n_completed completed games."""
+        n_prior = 2 * len(self.team_ids)
+        size = n_prior + 1
+        if n_completed == 0:
+            return np.zeros(size)
+        points = self._points[:2 * n_completed]
+        target = np.concatenate([np.zeros(n_prior), points - points.mean()])
+        design = self._design[:n_prior + 2 * n_completed]
+        return lsqr(design, target, atol=RATING_TOLERANCE, btol=RATING_TOLERANCE, x0=x0)[0]
+
+    def _split(self, x):
+        n_teams = len(self.team_ids)
+        return x[:n_teams], x[n_teams:2 * n_teams], float(x[-1])
+
+    def _rating_vector(self, ratings, default):
+        if isinstance(ratings, dict):
+            return np.array([ratings.get(t, default) for t in self.team_ids], dtype=np.float64)
+        if isinstance(ratings, pd.Series):
+            return ratings.reindex(self.team_ids).fillna(default).to_numpy(np.float64)
+        return np.asarray(ratings, dtype=np.float64)
+
+
+def opponent_features(games):
+    """
+    Opponent-adjusted ratings and strength of schedule for every game.
+
+    Builds one OpponentGraph per league and season and evaluates it as of
+    each game day (OpponentGraph.daily_features), so the values are safe to
+    use as pre-game features.
+
+    Args:
+        games: List of game dicts or a DataFrame with Game columns
+
+    Returns:
+        DataFrame: One row per game in games_frame() order, with an "id"
+            column and {home,away}_{stat} columns for every stat in
+            OPPONENT_STATS
+    """
+    games_df = games_frame(games)
+    n = len(games_df)
+    league = games_df["league"] if "league" in games_df else games_df["leagueId"]
+    partitions = pd.DataFrame({
+        "league": league.to_numpy(),
+        "season": season_of(games_df["startTime"]),
+    }).groupby(["league", "season"], sort=True, dropna=False).indices
+
+    out = {f"{side}_{stat}": np.full(n, np.nan) for side in ("home", "away") for stat in OPPONENT_STATS}
+    for rows in partitions.values():
+        for name, values in OpponentGraph(games_df.iloc[rows]).daily_features().items():
+            out[name][rows] = values
+
+    out = pd.DataFrame(out)
+    out.insert(0, "id", games_df["id"].to_numpy())
+    return out
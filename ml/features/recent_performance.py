@@ -4,114 +4,473 @@ Recent Performance Features
 Last N games, win streaks, momentum indicators.
 """
 
+import numpy as np
+import pandas as pd
 
-def calculate_last_n_games(games, n=10):
+from .game_log import (
+    GameHistory,
+    TeamCodes,
+    games_frame,
+    is_completed,
+    load_checkpoint,
+    prior_completed_index,
+    save_checkpoint,
+    scatter_sides,
+    team_appearances,
+)
+from .splits import split_stats
+
+
+RECENT_STATS = ("games", "wins", "losses", "ppg", "opp_ppg", "point_diff", "win_pct")
+FORM_STATS = ("streak", "ew_point_diff", "win_trend", "momentum")
+
+MOMENTUM_HALFLIFE = 5.0      # games
+MOMENTUM_DIFF_SCALE = 10.0   # points; tanh scale for the point differential
+
+
+def calculate_last_n_games(games, n=10, team_id=None):
     """
     Calculate statistics from last N games.
     
     Args:
         games: Historical games (chronologically ordered)
         n: Number of games to consider
+        team_id: Team to report on (default: the team present in every game)
     
     Returns:
         dict: Recent performance stats
     """
-    # TODO: From last N games, calculate:
-    # - Wins/losses
-    # - Points scored (average)
-    # - Points allowed (average)
-    # - Point differential
-    # - Win percentage
-    # - Offensive/defensive efficiency
-    
-    print(f"📈 Calculating last {n} games (STUB)")
+    if team_id is None:
+        team_id = _common_team(games)
+
+    completed = [
+        g for g in games
+        if g.get("status", "FINAL") == "FINAL"
+        and g.get("homeScore") is not None
+        and g.get("awayScore") is not None
+    ][-n:]
+
+    wins = losses = points_for = points_against = 0
+    for game in completed:
+        if game["homeTeamId"] == team_id:
+            scored, allowed = game["homeScore"], game["awayScore"]
+        else:
+            scored, allowed = game["awayScore"], game["homeScore"]
+        wins += scored > allowed
+        losses += scored < allowed
+        points_for += scored
+        points_against += allowed
+
+    count = len(completed)
+    if count == 0:
+        return {"games": 0, "wins": 0, "losses": 0, "ppg": None,
+                "opp_ppg": None, "point_diff": None, "win_pct": None}
     return {
-        "wins": 6,
-        "losses": 4,
-        "ppg": 112.0,
-        "opp_ppg": 108.0,
-        "point_diff": 4.0,
-        "win_pct": 0.6,
+        "games": count,
+        "wins": wins,
+        "losses": losses,
+        "ppg": points_for / count,
+        "opp_ppg": points_against / count,
+        "point_diff": (points_for - points_against) / count,
+        "win_pct": wins / count,
+    }
+
+
+def rolling_last_n_games(games, windows=(5, 10)):
+    """
+    Last-N-games stats for both teams of every game, for several N at once.
+
+    Each window covers the team's last N FINAL games that started strictly
+    before the game itself, so the values are safe to use as pre-game
+    features. All teams and windows are computed in one vectorized pass using
+    per-team prefix sums.
+
+    Args:
+        games: List of game dicts or a DataFrame with Game columns
+        windows: Window sizes (e.g. 5, 10)
+
+    Returns:
+        DataFrame: One row per game in games_frame() order, with an "id"
+            column and {home,away}_l{n}_{stat} columns for every stat in
+            RECENT_STATS (averages are NaN when the team has no history)
+    """
+    games_df = games_frame(games)
+    log = team_appearances(games_df)
+    completed, pos, team_start = prior_completed_index(log)
+
+    scored = log["points_for"].to_numpy()[completed]
+    allowed = log["points_against"].to_numpy()[completed]
+    cumulative = {
+        "wins": _prefix_sum(scored > allowed),
+        "losses": _prefix_sum(scored < allowed),
+        "points_for": _prefix_sum(scored),
+        "points_against": _prefix_sum(allowed),
     }
 
+    out = {"id": games_df["id"].to_numpy()}
+    n_games = len(games_df)
+    available = pos - team_start
+    for n in windows:
+        lo = pos - np.minimum(available, n)
+        count = (pos - lo).astype(np.float64)
+        sums = {name: cs[pos] - cs[lo] for name, cs in cumulative.items()}
+        with np.errstate(invalid="ignore", divide="ignore"):
+            stats = {
+                "games": count,
+                "wins": sums["wins"],
+                "losses": sums["losses"],
+                "ppg": sums["points_for"] / count,
+                "opp_ppg": sums["points_against"] / count,
+                "point_diff": (sums["points_for"] - sums["points_against"]) / count,
+                "win_pct": sums["wins"] / count,
+            }
+        for stat in RECENT_STATS:
+            home, away = scatter_sides(log, stats[stat], n_games)
+            out[f"home_l{n}_{stat}"] = home
+            out[f"away_l{n}_{stat}"] = away
+
+    return pd.DataFrame(out)
+
 
-def calculate_win_streak(games):
+def calculate_win_streak(games, team_id=None):
     """
     Calculate current win/loss streak.
     
     Args:
         games: Historical games (most recent first)
+        team_id: Team to report on (default: the team present in every game)
     
     Returns:
-        int: Streak length (positive = wins, negative = losses)
+        int: Streak length (positive = wins, negative = losses, 0 after a tie)
     """
-    # TODO: Count consecutive wins or losses
-    # - Start from most recent game
-    # - Count until streak breaks
-    # - Return positive for wins, negative for losses
-    
-    print("🔥 Calculating win streak (STUB)")
-    return 3  # Example: 3-game win streak
+    if team_id is None:
+        team_id = _common_team(games)
+
+    streak = StreakCounter()
+    for game in reversed(list(games)):
+        if is_completed(game):
+            streak.update(0, _margin(game, team_id))
+    return streak.value(0)
 
 
-def calculate_momentum(recent_games):
+def calculate_momentum(recent_games, team_id=None, halflife=MOMENTUM_HALFLIFE):
     """
     Calculate team momentum indicator.
     
     Args:
-        recent_games: Last 5-10 games
+        recent_games: Recent games (chronologically ordered)
+        team_id: Team to report on (default: the team present in every game)
+        halflife: Games after which a result's weight halves
     
     Returns:
-        float: Momentum score (-1 to 1)
+        float: Momentum score (-1 to 1, 0 without completed games)
     """
-    # TODO: Consider:
-    # - Win/loss trend (improving or declining)
-    # - Point differential trend
-    # - Performance against quality opponents
-    # - Recent vs older games (weighted)
-    
-    print("⚡ Calculating momentum (STUB)")
-    return 0.5
+    if team_id is None:
+        team_id = _common_team(recent_games)
+
+    momentum = Momentum(halflife)
+    for game in recent_games:
+        if is_completed(game):
+            momentum.update(0, _margin(game, team_id))
+    return momentum.value(0)
+
+
+class StreakCounter:
+    """
+    Online win/loss streak per team code.
+
+    Each result is folded in O(1): a win extends a winning streak or starts a
+    new one at +1, a loss likewise towards negative values, and a tie resets
+    the streak to 0.
+    """
+
+    def __init__(self, n_teams=0):
+        self._streak = np.zeros(n_teams, dtype=np.int32)
+
+    def update(self, team, margin):
+        """Fold in one result (margin = points for - points against)."""
+        self._reserve(team)
+        current = self._streak[team]
+        if margin > 0:
+            self._streak[team] = current + 1 if current > 0 else 1
+        elif margin < 0:
+            self._streak[team] = current - 1 if current < 0 else -1
+        else:
+            self._streak[team] = 0
+
+    def value(self, team):
+        """Current streak of a team (0 if never seen)."""
+        return int(self._streak[team]) if team < len(self._streak) else 0
+
+    def snapshot(self):
+        """State as a dict of arrays (copies)."""
+        return {"streak": self._streak.copy()}
+
+    def restore(self, state):
+        """Replace the state with a snapshot()."""
+        self._streak = np.asarray(state["streak"], dtype=np.int32).copy()
+
+    def _reserve(self, team):
+        if team >= len(self._streak):
+            self._streak = np.concatenate([
+                self._streak, np.zeros(team + 1 - len(self._streak), dtype=np.int32)
+            ])
+
+
+class Momentum:
+    """
+    Online exponentially weighted momentum per team code.
+
+    Keeps bias-corrected exponentially weighted means of the point
+    differential and of the win trend (+1 win, 0 tie, -1 loss), each updated
+    in O(1) per result. Momentum blends the two into [-1, 1]:
+    0.5 * win_trend + 0.5 * tanh(point_diff / diff_scale).
+    """
+
+    def __init__(self, halflife=MOMENTUM_HALFLIFE, diff_scale=MOMENTUM_DIFF_SCALE, n_teams=0):
+        self.halflife = float(halflife)
+        self.diff_scale = float(diff_scale)
+        self.alpha = 1.0 - 0.5 ** (1.0 / self.halflife)
+        self._state = np.zeros((n_teams, 3), dtype=np.float64)  # diff, trend, weight
 
+    def update(self, team, margin):
+        """Fold in one result (margin = points for - points against)."""
+        self._reserve(team)
+        decay = 1.0 - self.alpha
+        state = self._state[team]
+        state *= decay
+        state += (self.alpha * margin, self.alpha * np.sign(margin), self.alpha)
 
-def calculate_home_away_splits(games, location="home"):
+    def point_diff(self, team):
+        """Weighted point differential (NaN if never seen)."""
+        return self._mean(team, 0)
+
+    def win_trend(self, team):
+        """Weighted win trend in [-1, 1] (NaN if never seen)."""
+        return self._mean(team, 1)
+
+    def value(self, team):
+        """Momentum in [-1, 1] (0 if never seen)."""
+        if team >= len(self._state) or self._state[team, 2] == 0:
+            return 0.0
+        return float(
+            0.5 * self.win_trend(team)
+            + 0.5 * np.tanh(self.point_diff(team) / self.diff_scale)
+        )
+
+    def snapshot(self):
+        """State as a dict of arrays (copies)."""
+        return {
+            "momentum_params": np.array([self.halflife, self.diff_scale]),
+            "momentum_state": self._state.copy(),
+        }
+
+    def restore(self, state):
+        """Replace the parameters and state with a snapshot()."""
+        self.halflife, self.diff_scale = np.asarray(state["momentum_params"]).tolist()
+        self.alpha = 1.0 - 0.5 ** (1.0 / self.halflife)
+        self._state = np.asarray(state["momentum_state"], dtype=np.float64).copy()
+
+    def _mean(self, team, column):
+        if team >= len(self._state) or self._state[team, 2] == 0:
+            return float("nan")
+        return float(self._state[team, column] / self._state[team, 2])
+
+    def _reserve(self, team):
+        if team >= len(self._state):
+            self._state = np.concatenate([
+                self._state, np.zeros((team + 1 - len(self._state), 3))
+            ])
+
+
+class FormTracker:
+    """
+    Streak and momentum for every team, maintained game by game.
+
+    Works like EloEngine: FINAL games are folded in once in chronological
+    order, each team's pre-game form is recorded per game in preallocated
+    arrays (O(1) lookups), and the state can be checkpointed and extended with
+    newly FINAL games. Live serving reads current() for teams' next games.
+
+    Usage:
+        form = FormTracker()
+        form.update(games)
+        home_form, away_form = form.pre_game_form(game_id)
+        form.save("models/form.npz")
+    """
+
+    def __init__(self, halflife=MOMENTUM_HALFLIFE, diff_scale=MOMENTUM_DIFF_SCALE, capacity=1024):
+        self.streak = StreakCounter()
+        self.momentum = Momentum(halflife, diff_scale)
+        self._teams = TeamCodes()
+
+        # Per-game history (row i = i-th folded game): home, away form
+        self._history = GameHistory(
+            {"pre": ((2, len(FORM_STATS)), np.float64)},
+            capacity,
+            kind="folded game",
+            state="the form state",
+        )
+
+    @property
+    def team_ids(self):
+        """Team ids in code order."""
+        return self._teams.team_ids
+
+    @property
+    def game_ids(self):
+        """Folded game ids in folding order."""
+        return self._history.game_ids
+
+    def update(self, games):
+        """
+        Fold in games that are not yet in the history.
+
+        Only FINAL games with both scores are used, already-seen games are
+        skipped, and games must not start before the last folded game.
+
+        Args:
+            games: Iterable of game dicts (id, homeTeamId, awayTeamId,
+                startTime, status, homeScore, awayScore)
+
+        Returns:
+            int: Number of newly folded games
+        """
+        pending = self._history.pending(games)
+        for game in pending:
+            self._fold(game)
+        return len(pending)
+
+    def _fold(self, game):
+        home = self._teams.code(game["homeTeamId"])
+        away = self._teams.code(game["awayTeamId"])
+        self._history.append(
+            game["id"], game["startTime"], pre=(self._form(home), self._form(away))
+        )
+
+        margin = game["homeScore"] - game["awayScore"]
+        for team, team_margin in ((home, margin), (away, -margin)):
+            self.streak.update(team, team_margin)
+            self.momentum.update(team, team_margin)
+
+    def _form(self, team):
+        return (
+            self.streak.value(team),
+            self.momentum.point_diff(team),
+            self.momentum.win_trend(team),
+            self.momentum.value(team),
+        )
+
+    def __len__(self):
+        return len(self._history)
+
+    def __contains__(self, game_id):
+        return game_id in self._history
+
+    def reset(self):
+        """Forget every folded game, keeping the parameters."""
+        self.__init__(self.momentum.halflife, self.momentum.diff_scale)
+
+    def current(self, team_id):
+        """
+        A team's form going into its next game.
+
+        Returns:
+            tuple: Values in FORM_STATS order (streak 0, averages NaN and
+                momentum 0 for unseen teams)
+        """
+        code = self._teams.get(team_id)
+        return self._form(len(self._teams) if code is None else code)
+
+    def pre_game_form(self, game_id):
+        """
+        Form going into a folded game.
+
+        Returns:
+            tuple: (home_form, away_form), each in FORM_STATS order
+        """
+        home, away = self._history["pre"][self._history.row(game_id)].tolist()
+        return tuple(home), tuple(away)
+
+    def save(self, path):
+        """Write the accumulator state and history to a .npz checkpoint."""
+        save_checkpoint(
+            path,
+            team_ids=np.array(self.team_ids, dtype=str),
+            **self._history.arrays(),
+            **self.streak.snapshot(),
+            **self.momentum.snapshot(),
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Restore a tracker from a checkpoint written by save()."""
+        data = load_checkpoint(path)
+        tracker = cls(capacity=max(len(data["game_ids"]), 1024))
+        tracker.streak.restore(data)
+        tracker.momentum.restore(data)
+        tracker._teams = TeamCodes(data["team_ids"].tolist())
+        tracker._history.restore(data)
+        return tracker
+
+
+def calculate_home_away_splits(games, location="home", team_id=None):
     """
     Calculate home/away performance splits.
     
     Args:
         games: Historical games
         location: "home" or "away"
+        team_id: Team to report on (default: the team present in every game)
     
     Returns:
-        dict: Performance at specified location
+        dict: Performance at specified location (SPLIT_STATS)
     """
-    # TODO: Filter games by location
-    # Calculate all standard metrics split by home/away
-    
-    print(f"🏠 Calculating {location} splits (STUB)")
-    return {
-        "win_pct": 0.6,
-        "ppg": 115.0,
-        "opp_ppg": 107.0,
-    }
+    if location not in ("home", "away"):
+        raise ValueError(f"location must be 'home' or 'away', got {location!r}")
+    if team_id is None:
+        team_id = _common_team(games)
+    return split_stats(games, team_id, location)
 
 
-def calculate_clutch_performance(games):
+def calculate_clutch_performance(games, team_id=None):
     """
     Calculate performance in close games.
     
     Args:
         games: Historical games
+        team_id: Team to report on (default: the team present in every game)
     
     Returns:
-        dict: Clutch stats
+        dict: Clutch stats for games decided by CLOSE_GAME_MARGIN points or less
     """
-    # TODO: Filter to close games (margin <= 5 points)
-    # Calculate win rate and performance in clutch situations
-    
-    print("🎯 Calculating clutch performance (STUB)")
+    if team_id is None:
+        team_id = _common_team(games)
+    close = split_stats(games, team_id, "close")
     return {
-        "close_game_win_pct": 0.55,
-        "close_games": 20,
+        "close_game_win_pct": close["win_pct"],
+        "close_games": close["games"],
     }
 
+
+def _common_team(games):
+    teams = None
+    for game in games:
+        playing = {game["homeTeamId"], game["awayTeamId"]}
+        teams = playing if teams is None else teams & playing
+    if not teams or len(teams) != 1:
+        raise ValueError("team_id is required when games do not share exactly one team")
+    return teams.pop()
+
+
+def _margin(game, team_id):
+    if game["homeTeamId"] == team_id:
+        return game["homeScore"] - game["awayScore"]
+    return game["awayScore"] - game["homeScore"]
+
+
+def _prefix_sum(values):
+    """Cumulative sum with a leading zero, so sum(values[a:b]) = cs[b] - cs[a]."""
+    cs = np.zeros(len(values) + 1, dtype=np.float64)
+    np.cumsum(values, out=cs[1:])
+    return cs
@@ -4,6 +4,26 @@ Schedule Features
 Rest days, back-to-back games, travel distance.
 """
 
+import csv
+import math
+
+import numpy as np
+import pandas as pd
+
+from .game_log import NOT_PLAYED, games_frame, local_day, scatter_sides, team_appearances
+
+EARTH_RADIUS_MILES = 3958.8
+
+SCHEDULE_STATS = (
+    "rest_days",
+    "back_to_back",
+    "games_last_4_days",
+    "games_last_6_days",
+    "three_in_four",
+    "four_in_six",
+    "travel_miles",
+)
+
 
 def calculate_rest_days(game_date, previous_game_date):
     """
@@ -14,15 +34,12 @@ def calculate_rest_days(game_date, previous_game_date):
         previous_game_date: Date of previous game
     
     Returns:
-        int: Days of rest (0 = back-to-back)
+        int: Days of rest (0 = back-to-back), None if there is no previous game
     """
-    # TODO: Calculate date difference
-    # - 0 days = back-to-back
-    # - 1 day = 1 day rest
-    # - etc.
-    
-    print("⏰ Calculating rest days (STUB)")
-    return 2
+    if previous_game_date is None:
+        return None
+    days = local_day(np.array([game_date])) - local_day(np.array([previous_game_date]))
+    return max(int(days[0]) - 1, 0)
 
 
 def detect_back_to_back(game_date, previous_game_date):
@@ -40,43 +57,171 @@ def detect_back_to_back(game_date, previous_game_date):
     return rest_days == 0
 
 
-def calculate_travel_distance(team_id, previous_venue, current_venue):
+def calculate_travel_distance(team_id, previous_venue, current_venue, venue_coordinates=None):
     """
     Calculate travel distance between games.
     
     Args:
         team_id: Team identifier
-        previous_venue: Previous game city
-        current_venue: Current game city
+        previous_venue: Previous game venue (key into venue_coordinates)
+        current_venue: Current game venue
+        venue_coordinates: {venue: (latitude, longitude)}
     
     Returns:
-        float: Distance in miles
+        float: Great-circle distance in miles (None if a venue is unknown)
     """
-    # TODO: Use city coordinates to calculate distance
-    # - Store city lat/long in database
-    # - Calculate great circle distance
-    # - Consider time zones
-    
-    print(f"✈️  Calculating travel for {team_id} (STUB)")
-    return 0.0
+    coordinates = venue_coordinates or {}
+    if previous_venue not in coordinates or current_venue not in coordinates:
+        return None
+    (lat1, lon1), (lat2, lon2) = coordinates[previous_venue], coordinates[current_venue]
+    return float(great_circle_miles(lat1, lon1, lat2, lon2))
+
+
+def great_circle_miles(lat1, lon1, lat2, lon2):
+    """Haversine distance in miles; works elementwise on arrays."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=np.float64)) for x in (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(a))
+
+
+def load_venue_coordinates(path):
+    """
+    Load the venue coordinate table.
+
+    Args:
+        path: CSV with columns venue, latitude, longitude. Keys are Game.venue
+            values; team ids may also be listed and are used for games
+            without a venue (the home team's arena).
+
+    Returns:
+        dict: {venue: (latitude, longitude)}
+    """
+    with open(path, newline="") as f:
+        return {
+            row["venue"]: (float(row["latitude"]), float(row["longitude"]))
+            for row in csv.DictReader(f)
+        }
+
+
+def schedule_features(games, venue_coordinates=None):
+    """
+    Rest, schedule density and travel for both teams of every game.
 
+    All team-game appearances are sorted once; each team's previous game and
+    the number of games in trailing 4/6 day windows (including this game)
+    come from shifted arrays and binary searches, with no per-team loops.
+    Cancelled and postponed games are ignored and get NaN.
 
-def calculate_schedule_strength(upcoming_games):
+    Args:
+        games: List of game dicts or a DataFrame with Game columns. If the
+            frame has latitude/longitude columns they are used as the game
+            location; otherwise the venue (or home team id when the venue is
+            missing) is looked up in venue_coordinates.
+        venue_coordinates: {venue: (latitude, longitude)} for travel
+
+    Returns:
+        DataFrame: One row per game in games_frame() order, with an "id"
+            column and {home,away}_{stat} columns for SCHEDULE_STATS
+    """
+    games_df = games_frame(games)
+    n_games = len(games_df)
+    played = ~games_df["status"].isin(NOT_PLAYED).to_numpy()
+    played_rows = np.flatnonzero(played)
+    sub = games_df.iloc[played_rows].reset_index(drop=True)
+
+    log = team_appearances(sub)
+    team = log["team"].to_numpy().astype(np.int64)
+    day = local_day(log["start"].to_numpy())
+    same_team = np.r_[False, team[1:] == team[:-1]]
+
+    # Rest days since the previous appearance
+    prev_day = np.r_[0, day[:-1]]
+    rest = np.where(same_team, np.maximum(day - prev_day - 1, 0), np.nan)
+
+    # Appearances within the trailing 4 and 6 calendar days
+    offset = day - day.min(initial=0)
+    stride = int(offset.max(initial=0)) + 7
+    keys = team * stride + offset
+    upto = np.arange(1, len(keys) + 1)  # Up to and including this game, never later ones
+    last_4 = upto - np.searchsorted(keys, keys - 3, side="left")
+    last_6 = upto - np.searchsorted(keys, keys - 5, side="left")
+
+    # Travel from the previous game location
+    lat, lon = game_locations(sub, venue_coordinates)
+    game_row = log["game_row"].to_numpy()
+    lat, lon = lat[game_row], lon[game_row]
+    travel = great_circle_miles(np.r_[np.nan, lat[:-1]], np.r_[np.nan, lon[:-1]], lat, lon)
+    travel = np.where(same_team, travel, np.nan)
+
+    stats = {
+        "rest_days": rest,
+        "back_to_back": np.where(same_team, rest == 0, np.nan),
+        "games_last_4_days": last_4.astype(np.float64),
+        "games_last_6_days": last_6.astype(np.float64),
+        "three_in_four": (last_4 >= 3).astype(np.float64),
+        "four_in_six": (last_6 >= 4).astype(np.float64),
+        "travel_miles": travel,
+    }
+
+    out = {"id": games_df["id"].to_numpy()}
+    for stat in SCHEDULE_STATS:
+        home, away = scatter_sides(log, stats[stat], len(sub))
+        for side, values in (("home", home), ("away", away)):
+            column = np.full(n_games, np.nan)
+            column[played_rows] = values
+            out[f"{side}_{stat}"] = column
+    return pd.DataFrame(out)
+
+
+def calculate_schedule_strength(upcoming_games, ratings, team_id, default=1500.0):
     """
     Calculate upcoming schedule difficulty.
     
     Args:
         upcoming_games: Next N games
+        ratings: {team_id: rating} (e.g. EloEngine.ratings())
+        team_id: Team whose schedule is rated
+        default: Rating of opponents missing from ratings
     
     Returns:
-        float: Schedule strength score
+        float: Mean opponent rating over the played games (None if there are
+            none)
+
+    Use opponents.OpponentGraph for past and remaining SOS of every team of
+    a league at once.
     """
-    # TODO: Consider:
-    # - Opponent strength
-    # - Rest days between games
-    # - Home/away balance
-    # - Travel distance
-    
-    print("📅 Calculating schedule strength (STUB)")
-    return 0.5
+    opponents = [
+        g["awayTeamId"] if g["homeTeamId"] == team_id else g["homeTeamId"]
+        for g in upcoming_games
+        if team_id in (g["homeTeamId"], g["awayTeamId"])
+        and g.get("status") not in NOT_PLAYED
+    ]
+    if not opponents:
+        return None
+    return float(np.mean([ratings.get(t, default) for t in opponents]))
+
 
+def game_locations(games_df, venue_coordinates):
+    """
+    Latitude/longitude of every game.
+
+    Uses latitude/longitude columns when present, otherwise looks up the
+    venue (or the home team id when the venue is missing).
+
+    Returns:
+        tuple: (latitude, longitude) float64 arrays, NaN when unknown
+    """
+    if "latitude" in games_df and "longitude" in games_df:
+        return (
+            games_df["latitude"].to_numpy(dtype=np.float64),
+            games_df["longitude"].to_numpy(dtype=np.float64),
+        )
+    coordinates = venue_coordinates or {}
+    keys = games_df["venue"].where(games_df["venue"].notna(), games_df["homeTeamId"])
+    located = [coordinates.get(key, (math.nan, math.nan)) for key in keys]
+    lat = np.array([c[0] for c in located], dtype=np.float64)
+    lon = np.array([c[1] for c in located], dtype=np.float64)
+    return lat, lon
@@ -0,0 +1,157 @@
+"""
+Split Features
+
+Season-to-date team aggregates (overall, home, away, close games).
+"""
+
+import numpy as np
+import pandas as pd
+
+from .game_log import as_of_sums, games_frame, scatter_sides, season_of, team_appearances
+
+
+SPLIT_STATS = (
+    "games", "wins", "losses", "win_pct", "ppg", "opp_ppg", "point_diff",
+    "offensive_rating", "defensive_rating", "pace",
+)
+CLOSE_GAME_MARGIN = 5  # points; final margin of a close ("clutch") game
+
+# Split name -> boolean mask over team_appearances() rows. A new split only
+# needs an entry here; the mask is read on completed games only.
+SPLIT_FILTERS = {
+    "all": lambda log: np.ones(len(log), dtype=bool),
+    "home": lambda log: log["is_home"].to_numpy(),
+    "away": lambda log: ~log["is_home"].to_numpy(),
+    "close": lambda log: np.abs(
+        log["points_for"].to_numpy() - log["points_against"].to_numpy()
+    ) <= CLOSE_GAME_MARGIN,
+}
+
+
+def split_features(games, splits=("all", "home", "away", "close"), by_season=True):
+    """
+    Split aggregates for both teams of every game, as of the game.
+
+    Each value covers the team's FINAL games that started strictly before
+    the game itself (within its season when by_season), so the values are
+    safe to use as pre-game features. All teams and splits are computed in
+    one pass of grouped prefix sums (game_log.as_of_sums).
+
+    Offensive/defensive rating (points per 100 possessions) and pace need a
+    `possessions` column (per team per game), which the Game table does not
+    carry yet; without it they are NaN.
+
+    Args:
+        games: List of game dicts or a DataFrame with Game columns
+        splits: Names from SPLIT_FILTERS
+        by_season: Restart the aggregates every season (season_of)
+
+    Returns:
+        DataFrame: One row per game in games_frame() order, with an "id"
+            column and {home,away}_{split}_{stat} columns for every stat in
+            SPLIT_STATS (averages are NaN when the split has no games)
+    """
+    games_df = games_frame(games)
+    log = _split_log(games_df)
+    group = season_of(log["start"].to_numpy()) if by_season else None
+
+    values = {}
+    for split in splits:
+        mask = SPLIT_FILTERS[split](log)
+        for name, column in _split_values(log, mask).items():
+            values[(split, name)] = column
+    sums = as_of_sums(log, values, group)
+
+    out = {"id": games_df["id"].to_numpy()}
+    n_games = len(games_df)
+    for split in splits:
+        stats = _split_stats({name: sums[(split, name)] for name in _SUMS})
+        for stat in SPLIT_STATS:
+            home, away = scatter_sides(log, stats[stat], n_games)
+            out[f"home_{split}_{stat}"] = home
+            out[f"away_{split}_{stat}"] = away
+
+    return pd.DataFrame(out)
+
+
+def split_stats(games, team_id, split="all"):
+    """
+    Aggregate one team's FINAL games in a split.
+
+    Args:
+        games: Historical games (list of dicts or DataFrame)
+        team_id: Team to report on
+        split: Name from SPLIT_FILTERS
+
+    Returns:
+        dict: {stat: value} for every stat in SPLIT_STATS (averages are None
+            when the split has no games)
+    """
+    log = _split_log(games_frame(games))
+    rows = (log["team_id"].to_numpy() == team_id) & log["completed"].to_numpy()
+    mask = SPLIT_FILTERS[split](log)
+    totals = {
+        name: np.float64(column[rows].sum())
+        for name, column in _split_values(log, mask).items()
+    }
+    stats = _split_stats(totals)
+    return {
+        stat: int(stats[stat]) if stat in _COUNTS
+        else None if np.isnan(stats[stat]) else float(stats[stat])
+        for stat in SPLIT_STATS
+    }
+
+
+_SUMS = (
+    "games", "wins", "losses", "points_for", "points_against",
+    "rated_games", "possessions", "rated_points_for", "rated_points_against",
+)
+_COUNTS = ("games", "wins", "losses")
+
+
+def _split_log(games_df):
+    log = team_appearances(games_df)
+    if "possessions" in games_df.columns:
+        possessions = pd.to_numeric(games_df["possessions"], errors="coerce").to_numpy(np.float64)
+    else:
+        possessions = np.full(len(games_df), np.nan)
+    log["possessions"] = possessions[log["game_row"].to_numpy()]
+    return log
+
+
+def _split_values(log, mask):
+    """Per-appearance columns to sum for one split (zero outside the mask)."""
+    scored = log["points_for"].to_numpy()
+    allowed = log["points_against"].to_numpy()
+    possessions = log["possessions"].to_numpy()
+    rated = mask & (possessions > 0)
+    return {
+        "games": mask,
+        "wins": mask & (scored > allowed),
+        "losses": mask & (scored < allowed),
+        "points_for": np.where(mask, scored, 0.0),
+        "points_against": np.where(mask, allowed, 0.0),
+        "rated_games": rated,
+        "possessions": np.where(rated, possessions, 0.0),
+        "rated_points_for": np.where(rated, scored, 0.0),
+        "rated_points_against": np.where(rated, allowed, 0.0),
+    }
+
+
+def _split_stats(sums):
+    """Turn summed split columns (arrays or scalars) into SPLIT_STATS."""
+    count = sums["games"]
+    possessions = sums["possessions"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "games": count,
+            "wins": sums["wins"],
+            "losses": sums["losses"],
+            "win_pct": sums["wins"] / count,
+            "ppg": sums["points_for"] / count,
+            "opp_ppg": sums["points_against"] / count,
+            "point_diff": (sums["points_for"] - sums["points_against"]) / count,
+            "offensive_rating": 100.0 * sums["rated_points_for"] / possessions,
+            "defensive_rating": 100.0 * sums["rated_points_against"] / possessions,
+            "pace": possessions / sums["rated_games"],
+        }
@@ -0,0 +1,489 @@
+"""
+Team State
+
+Materialized "as of now" state per team for serving-time feature extraction.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .game_log import (
+    NOT_PLAYED,
+    TeamCodes,
+    completed_mask,
+    games_frame,
+    late_game_error,
+    load_checkpoint,
+    local_day,
+    save_checkpoint,
+    season_of,
+)
+from .matchup import H2H_LAST_MEETINGS, HeadToHeadIndex
+from .recent_performance import (
+    FORM_STATS,
+    MOMENTUM_DIFF_SCALE,
+    MOMENTUM_HALFLIFE,
+    RECENT_STATS,
+    Momentum,
+    StreakCounter,
+)
+from .schedule import SCHEDULE_STATS, game_locations, great_circle_miles
+from .team_strength import elo_delta
+
+SEASON_STATS = (
+    "games", "wins", "losses", "points_for", "points_against",
+    "home_games", "home_wins", "away_games", "away_wins",
+)
+APPEARANCE_DAYS = 16  # Recent appearance days kept per team (the density windows need 6 days)
+FOLDED_ID_DAYS = 7    # Folded game ids remembered behind the watermark
+
+_NO_DAY = np.iinfo(np.int64).min // 2
+
+
+class TeamState:
+    """
+    Every team's feature state as of the last folded game.
+
+    Holds per team: ELO rating, streak and momentum, the last max(windows)
+    completed results, recent appearance days and the last game's
+    date/venue/location, and current-season aggregates. FINAL games are
+    folded in once, in (startTime, id) order, in O(1) per game, so the state
+    is advanced daily with only the newly FINAL games and stays O(teams) in
+    size (no per-game history, unlike EloEngine/FormTracker).
+
+    features() then builds rows for upcoming games from the state alone,
+    with the same columns and values as compute_game_features over the full
+    history (see extract_features.verify_team_state). Head-to-head features
+    come from a HeadToHeadIndex, which is keyed by team pair.
+
+    Past games that never went FINAL (still IN_PROGRESS or not updated)
+    count as schedule appearances in the batch extractor but are unknown to
+    the state; they are expected to be rare on a daily cadence.
+
+    Usage:
+        state = TeamState.load("models/team_state.npz")
+        state.update(new_games, venue_coordinates)
+        rows = state.features(upcoming_games, h2h, venue_coordinates)
+        state.save("models/team_state.npz")
+    """
+
+    def __init__(
+        self,
+        initial_rating=1500.0,
+        k_factor=20.0,
+        windows=(5, 10),
+        halflife=MOMENTUM_HALFLIFE,
+        diff_scale=MOMENTUM_DIFF_SCALE,
+    ):
+        self.initial_rating = float(initial_rating)
+        self.k_factor = float(k_factor)
+        self.windows = tuple(int(n) for n in windows)
+        self.depth = max(self.windows)
+        self.streak = StreakCounter()
+        self.momentum = Momentum(halflife, diff_scale)
+
+        self._teams = TeamCodes()
+
+        # Per-team state (row = team code)
+        self._elo = np.empty(0, dtype=np.float64)
+        self._recent = np.empty((0, self.depth, 2), dtype=np.float64)  # points for/against, oldest first
+        self._recent_count = np.empty(0, dtype=np.int64)
+        self._days = np.empty((0, APPEARANCE_DAYS), dtype=np.int64)      # oldest first
+        self._appearances = np.empty(0, dtype=np.int64)
+        self._last_start = np.empty(0, dtype="datetime64[ms]")
+        self._last_location = np.empty((0, 2), dtype=np.float64)
+        self._last_game = []
+        self._last_venue = []
+        self._season = np.empty(0, dtype=np.int32)
+        self._season_stats = np.empty((0, len(SEASON_STATS)), dtype=np.float64)
+
+        self.watermark = None  # Start time of the last folded game
+        self.synced_at = None  # Latest Game.updatedAt of the games fed to update()
+        self._folded = {}      # Recently folded game id -> start time
+
+    # ------------------------------------------------------------------
+    # Updating
+    # ------------------------------------------------------------------
+
+    def update(self, games, venue_coordinates=None):
+        """
+        Fold in FINAL games that are not yet in the state.
+
+        Games already folded are skipped, so overlapping game lists can be
+        fed on every run; games more than FOLDED_ID_DAYS before the
+        watermark are assumed folded. A FINAL game that starts before the
+        watermark but was never folded raises ValueError: rebuild the state
+        from the full history instead. Results that arrive later than that
+        are caught by their Game.updatedAt: synced_at records the latest
+        one seen, and any older FINAL game updated after it means the state
+        is stale (see daily_predictions.advance_team_state).
+
+        Args:
+            games: List of game dicts or a DataFrame with Game columns
+            venue_coordinates: {venue: (latitude, longitude)} for travel
+
+        Returns:
+            int: Number of newly folded games
+        """
+        games_df = games_frame(games)
+        start = games_df["startTime"].to_numpy()
+        if "updatedAt" in games_df:
+            updated = pd.to_datetime(games_df["updatedAt"], utc=True).dt.tz_localize(None)
+            updated = updated.to_numpy(dtype="datetime64[ms]")
+            updated = updated[~np.isnat(updated)]
+            if len(updated) and (self.synced_at is None or updated.max() > self.synced_at):
+                self.synced_at = updated.max()
+        pending = games_df["status"].to_numpy() == "FINAL"
+        pending &= ~games_df["id"].isin(self._folded.keys()).to_numpy()
+        if self.watermark is not None:
+            pending &= start >= self.watermark - np.timedelta64(FOLDED_ID_DAYS, "D")
+            late = np.flatnonzero(pending & (start < self.watermark))
+            if len(late):
+                raise late_game_error(
+                    games_df["id"].to_numpy()[late[0]], start[late[0]], self.watermark,
+                    "folded game", "the team state from the full history",
+                )
+
+        new = games_df[pending].reset_index(drop=True)
+        if new.empty:
+            return 0
+        lat, lon = game_locations(new, venue_coordinates)
+        day = local_day(new["startTime"].to_numpy())
+        season = season_of(new["startTime"])
+        done = completed_mask(new)
+        for i, game in enumerate(new.to_dict("records")):
+            self._fold(game, done[i], day[i], season[i], lat[i], lon[i])
+
+        self.watermark = new["startTime"].to_numpy()[-1]
+        horizon = self.watermark - np.timedelta64(FOLDED_ID_DAYS, "D")
+        self._folded = {g: t for g, t in self._folded.items() if t >= horizon}
+        return len(new)
+
+    def _fold(self, game, completed, day, season, lat, lon):
+        home = self._team_code(game["homeTeamId"])
+        away = self._team_code(game["awayTeamId"])
+        start = np.datetime64(game["startTime"], "ms")
+
+        if completed:
+            home_score, away_score = game["homeScore"], game["awayScore"]
+            delta = elo_delta(
+                self._elo[home], self._elo[away], home_score, away_score, self.k_factor
+            )
+            self._elo[home] = self._elo[home] + delta
+            self._elo[away] = self._elo[away] - delta
+            margin = home_score - away_score
+            for team, scored, allowed, team_margin, is_home in (
+                (home, home_score, away_score, margin, True),
+                (away, away_score, home_score, -margin, False),
+            ):
+                self.streak.update(team, team_margin)
+                self.momentum.update(team, team_margin)
+                self._recent[team, :-1] = self._recent[team, 1:]
+                self._recent[team, -1] = (scored, allowed)
+                self._recent_count[team] = min(self._recent_count[team] + 1, self.depth)
+                self._add_season_result(team, season, scored, allowed, is_home)
+
+        for team in (home, away):
+            self._days[team, :-1] = self._days[team, 1:]
+            self._days[team, -1] = day
+            self._appearances[team] += 1
+            self._last_start[team] = start
+            self._last_location[team] = (lat, lon)
+            self._last_game[team] = game["id"]
+            self._last_venue[team] = game["venue"] if isinstance(game["venue"], str) else ""
+        self._folded[game["id"]] = start
+
+    def _add_season_result(self, team, season, scored, allowed, is_home):
+        if self._season[team] != season:
+            self._season[team] = season
+            self._season_stats[team] = 0.0
+        won, lost = scored > allowed, scored < allowed
+        side = (1.0, won, 0.0, 0.0) if is_home else (0.0, 0.0, 1.0, won)
+        self._season_stats[team] += (1.0, won, lost, scored, allowed, *side)
+
+    def _team_code(self, team_id):
+        code = self._teams.code(team_id)
+        if code == len(self._elo):
+            self._elo = np.append(self._elo, self.initial_rating)
+            self._recent = np.concatenate([self._recent, np.zeros((1, self.depth, 2))])
+            self._recent_count = np.append(self._recent_count, 0)
+            self._days = np.concatenate([self._days, np.full((1, APPEARANCE_DAYS), _NO_DAY)])
+            self._appearances = np.append(self._appearances, 0)
+            self._last_start = np.append(self._last_start, np.datetime64("NaT", "ms"))
+            self._last_location = np.concatenate([self._last_location, np.full((1, 2), np.nan)])
+            self._last_game.append("")
+            self._last_venue.append("")
+            self._season = np.append(self._season, np.int32(-1))
+            self._season_stats = np.concatenate(
+                [self._season_stats, np.zeros((1, len(SEASON_STATS)))]
+            )
+        return code
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    @property
+    def team_ids(self):
+        """Team ids in code order."""
+        return self._teams.team_ids
+
+    def __len__(self):
+        return len(self._teams)
+
+    def __contains__(self, team_id):
+        return team_id in self._teams
+
+    def table(self):
+        """
+        The snapshot as one row per team.
+
+        Returns:
+            DataFrame: team_id, elo, FORM_STATS, last_game_id, last_start,
+                last_venue, season and the season aggregates (SEASON_STATS)
+        """
+        codes = np.arange(len(self.team_ids))
+        form = np.array([self._form(code) for code in codes]).reshape(len(codes), len(FORM_STATS))
+        table = pd.DataFrame({
+            "team_id": self.team_ids,
+            "elo": self._elo,
+            **{stat: form[:, i] for i, stat in enumerate(FORM_STATS)},
+            "last_game_id": self._last_game,
+            "last_start": self._last_start,
+            "last_venue": self._last_venue,
+            "season": self._season,
+        })
+        for i, stat in enumerate(SEASON_STATS):
+            table[f"season_{stat}"] = self._season_stats[:, i]
+        return table
+
+    def features(self, games, h2h=None, venue_coordinates=None, k=H2H_LAST_MEETINGS):
+        """
+        Feature rows for games after the watermark, from the state alone.
+
+        Games in the slate only affect each other through the schedule
+        features (rest, density, travel), which are chained through the
+        slate in order; results come from the folded games.
+
+        Args:
+            games: Upcoming games (list of dicts or DataFrame), all starting
+                after the last folded game and not yet FINAL
+            h2h: HeadToHeadIndex with the same FINAL games (default: empty)
+            venue_coordinates: {venue: (latitude, longitude)} for travel
+            k: Last-meetings window of the head-to-head features
+
+        Returns:
+            DataFrame: Same columns as compute_game_features, in
+                games_frame() order
+        """
+        games_df = games_frame(games)
+        start = games_df["startTime"].to_numpy()
+        if self.watermark is not None and len(start) and start.min() <= self.watermark:
+            raise ValueError(
+                f"Games must start after the last folded game ({self.watermark})"
+            )
+        done = completed_mask(games_df)
+        if done.any():
+            raise ValueError("Fold FINAL games into the state with update() first")
+
+        n = len(games_df)
+        home_score = games_df["homeScore"].to_numpy()
+        away_score = games_df["awayScore"].to_numpy()
+        league = games_df["league"] if "league" in games_df else games_df["leagueId"]
+        features = pd.DataFrame({
+            "id": games_df["id"].to_numpy(),
+            "league": league.to_numpy(),
+            "season": season_of(games_df["startTime"]),
+            "startTime": start,
+            "homeTeamId": games_df["homeTeamId"].to_numpy(),
+            "awayTeamId": games_df["awayTeamId"].to_numpy(),
+            "status": games_df["status"].to_numpy(),
+            "home_win": np.where(done, (home_score > away_score).astype(np.float64), np.nan),
+            "spread": np.where(done, away_score - home_score, np.nan),
+            "total": np.where(done, home_score + away_score, np.nan),
+        })
+
+        codes = {
+            side: np.array([self._teams.get(t, -1) for t in games_df[column]], dtype=np.int64)
+            for side, column in (("home", "homeTeamId"), ("away", "awayTeamId"))
+        }
+        ratings = np.append(self._elo, self.initial_rating)  # Last slot: unseen teams
+        elo = {side: ratings[code] for side, code in codes.items()}
+        features["home_elo"] = elo["home"]
+        features["away_elo"] = elo["away"]
+        features["elo_diff"] = elo["home"] - elo["away"]
+
+        form = {
+            side: np.array([self._form(c) for c in code], dtype=np.float64).reshape(n, len(FORM_STATS))
+            for side, code in codes.items()
+        }
+        for i, stat in enumerate(FORM_STATS):
+            features[f"home_{stat}"] = form["home"][:, i]
+            features[f"away_{stat}"] = form["away"][:, i]
+
+        h2h = h2h if h2h is not None else HeadToHeadIndex()
+        matchup = h2h.features(games_df, k)
+        recent = self._recent_features(codes)
+        schedule = self._schedule_features(games_df, codes, venue_coordinates)
+        return pd.concat(
+            [features, matchup.drop(columns="id"), recent, schedule], axis=1
+        )
+
+    def _form(self, code):
+        # Unseen teams (code -1) map past the end of the accumulators
+        code = len(self.team_ids) if code < 0 else code
+        return (
+            self.streak.value(code),
+            self.momentum.point_diff(code),
+            self.momentum.win_trend(code),
+            self.momentum.value(code),
+        )
+
+    def _recent_features(self, codes):
+        """{home,away}_l{n}_{stat} columns in rolling_last_n_games order."""
+        out = {}
+        for n in self.windows:
+            stats = {}
+            for side, code in codes.items():
+                known = code >= 0
+                count = np.zeros(len(code))
+                scored = np.zeros(len(code))
+                allowed = np.zeros(len(code))
+                wins = np.zeros(len(code))
+                losses = np.zeros(len(code))
+                if known.any():
+                    team = code[known]
+                    count[known] = np.minimum(self._recent_count[team], n)
+                    window = self._recent[team, self.depth - n:]
+                    # Zero-filled slots before a team's first result add nothing
+                    scored[known] = window[:, :, 0].sum(axis=1)
+                    allowed[known] = window[:, :, 1].sum(axis=1)
+                    wins[known] = (window[:, :, 0] > window[:, :, 1]).sum(axis=1)
+                    losses[known] = (window[:, :, 0] < window[:, :, 1]).sum(axis=1)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    stats[side] = {
+                        "games": count,
+                        "wins": wins,
+                        "losses": losses,
+                        "ppg": scored / count,
+                        "opp_ppg": allowed / count,
+                        "point_diff": (scored - allowed) / count,
+                        "win_pct": wins / count,
+                    }
+            for stat in RECENT_STATS:
+                out[f"home_l{n}_{stat}"] = stats["home"][stat]
+                out[f"away_l{n}_{stat}"] = stats["away"][stat]
+        return pd.DataFrame(out)
+
+    def _schedule_features(self, games_df, codes, venue_coordinates):
+        """{home,away}_{stat} columns for SCHEDULE_STATS, chained through the slate."""
+        n = len(games_df)
+        played = ~games_df["status"].isin(NOT_PLAYED).to_numpy()
+        day = local_day(games_df["startTime"].to_numpy())
+        lat, lon = game_locations(games_df, venue_coordinates)
+
+        # Slate appearances extend copies of the teams' recent days/locations
+        days = {}
+        location = {}
+        stats = {stat: np.full((n, 2), np.nan) for stat in SCHEDULE_STATS}
+        previous = np.full((n, 2, 2), np.nan)
+        has_previous = np.zeros((n, 2), dtype=bool)
+        for i in np.flatnonzero(played):
+            for s, (team_id, code) in enumerate((
+                (games_df["homeTeamId"].iat[i], codes["home"][i]),
+                (games_df["awayTeamId"].iat[i], codes["away"][i]),
+            )):
+                if team_id not in days:
+                    known = code >= 0 and self._appearances[code] > 0
+                    days[team_id] = list(self._days[code]) if known else []
+                    location[team_id] = tuple(self._last_location[code]) if known else None
+                team_days = [d for d in days[team_id] if d != _NO_DAY]
+                if team_days:
+                    rest = max(day[i] - team_days[-1] - 1, 0)
+                    stats["rest_days"][i, s] = rest
+                    stats["back_to_back"][i, s] = rest == 0
+                    previous[i, s] = location[team_id]
+                    has_previous[i, s] = True
+                last_4 = 1 + sum(d >= day[i] - 3 for d in team_days)
+                last_6 = 1 + sum(d >= day[i] - 5 for d in team_days)
+                stats["games_last_4_days"][i, s] = last_4
+                stats["games_last_6_days"][i, s] = last_6
+                stats["three_in_four"][i, s] = last_4 >= 3
+                stats["four_in_six"][i, s] = last_6 >= 4
+                days[team_id] = (team_days + [day[i]])[-APPEARANCE_DAYS:]
+                location[team_id] = (lat[i], lon[i])
+
+        travel = great_circle_miles(
+            previous[:, :, 0].ravel(), previous[:, :, 1].ravel(),
+            np.repeat(lat, 2), np.repeat(lon, 2),
+        ).reshape(n, 2)
+        stats["travel_miles"] = np.where(has_previous, travel, np.nan)
+
+        out = {}
+        for stat in SCHEDULE_STATS:
+            out[f"home_{stat}"] = stats[stat][:, 0]
+            out[f"away_{stat}"] = stats[stat][:, 1]
+        return pd.DataFrame(out)
+
+    # ------------------------------------------------------------------
+    # Checkpoints
+    # ------------------------------------------------------------------
+
+    def save(self, path):
+        """Write the snapshot to a compressed .npz checkpoint."""
+        save_checkpoint(
+            path,
+            params=np.array([self.initial_rating, self.k_factor]),
+            windows=np.array(self.windows, dtype=np.int64),
+            team_ids=np.array(self.team_ids, dtype=str),
+            elo=self._elo,
+            recent=self._recent,
+            recent_count=self._recent_count,
+            days=self._days,
+            appearances=self._appearances,
+            last_start=self._last_start,
+            last_location=self._last_location,
+            last_game=np.array(self._last_game, dtype=str),
+            last_venue=np.array(self._last_venue, dtype=str),
+            season=self._season,
+            season_stats=self._season_stats,
+            watermark=np.array(
+                [np.datetime64("NaT") if self.watermark is None else self.watermark],
+                dtype="datetime64[ms]",
+            ),
+            synced_at=np.array(
+                [np.datetime64("NaT") if self.synced_at is None else self.synced_at],
+                dtype="datetime64[ms]",
+            ),
+            folded_ids=np.array(list(self._folded), dtype=str),
+            folded_start=np.array(list(self._folded.values()), dtype="datetime64[ms]"),
+            **self.streak.snapshot(),
+            **self.momentum.snapshot(),
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Restore a snapshot written by save()."""
+        data = load_checkpoint(path)
+        initial_rating, k_factor = data["params"].tolist()
+        state = cls(initial_rating, k_factor, data["windows"].tolist())
+        state.streak.restore(data)
+        state.momentum.restore(data)
+        state._teams = TeamCodes(data["team_ids"].tolist())
+        state._elo = data["elo"].astype(np.float64)
+        state._recent = data["recent"].astype(np.float64)
+        state._recent_count = data["recent_count"].astype(np.int64)
+        state._days = data["days"].astype(np.int64)
+        state._appearances = data["appearances"].astype(np.int64)
+        state._last_start = data["last_start"].astype("datetime64[ms]")
+        state._last_location = data["last_location"].astype(np.float64)
+        state._last_game = data["last_game"].tolist()
+        state._last_venue = data["last_venue"].tolist()
+        state._season = data["season"].astype(np.int32)
+        state._season_stats = data["season_stats"].astype(np.float64)
+        watermark = data["watermark"][0]
+        state.watermark = None if np.isnat(watermark) else watermark
+        synced_at = data.get("synced_at", [np.datetime64("NaT")])[0]
+        state.synced_at = None if np.isnat(synced_at) else synced_at
+        state._folded = dict(zip(data["folded_ids"].tolist(), data["folded_start"]))
+        return state
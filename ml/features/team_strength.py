@@ -4,6 +4,266 @@ Team Strength Features
 ELO ratings, win rates, offensive/defensive ratings.
 """
 
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+from .game_log import (
+    GameHistory,
+    TeamCodes,
+    completed_mask,
+    games_frame,
+    load_checkpoint,
+    save_checkpoint,
+    season_of,
+    to_datetime64,
+)
+from .splits import split_stats
+
+# Parameter grid scored by elo_sweep (the first values reproduce EloEngine
+# defaults except for K)
+ELO_SWEEP_GRID = {
+    "k_factor": (10.0, 15.0, 20.0, 25.0, 30.0, 35.0, 40.0),
+    "home_advantage": (0.0, 25.0, 50.0, 75.0, 100.0),
+    "margin_multiplier": (False, True),
+    "season_regression": (0.0, 0.25, 0.5),
+}
+
+
+def expected_score(rating_a, rating_b):
+    """
+    Expected score (win probability) of A against B.
+
+    Args:
+        rating_a: ELO rating of team A
+        rating_b: ELO rating of team B
+
+    Returns:
+        float: 1 / (1 + 10^((rating_b - rating_a) / 400))
+    """
+    return 1.0 / (1.0 + 10.0 ** ((rating_b - rating_a) / 400.0))
+
+
+def elo_delta(home_rating, away_rating, home_score, away_score, k_factor):
+    """
+    Rating points the home team gains from one result (the away team loses
+    the same amount).
+
+    Returns:
+        float: k * (actual - expected), with a tie scoring 0.5
+    """
+    expected_home = expected_score(home_rating, away_rating)
+    if home_score > away_score:
+        actual_home = 1.0
+    elif home_score < away_score:
+        actual_home = 0.0
+    else:
+        actual_home = 0.5
+    return k_factor * (actual_home - expected_home)
+
+
+class EloEngine:
+    """
+    Single-pass ELO engine with array-backed rating history.
+
+    Games are replayed once in chronological order. For every rated game the
+    engine records both teams' ratings before and after the game in
+    preallocated NumPy arrays (a game_log.GameHistory), so "rating as of
+    game X" is an O(1) lookup
+    instead of a replay. Current ratings and history can be checkpointed to
+    disk and later extended with newly FINAL games.
+
+    Usage:
+        engine = EloEngine(k_factor=20)
+        engine.update(games)
+        home_elo, away_elo = engine.pre_game_ratings(game_id)
+        engine.save("models/elo_nba.npz")
+    """
+
+    def __init__(self, initial_rating=1500.0, k_factor=20.0, capacity=1024):
+        self.initial_rating = float(initial_rating)
+        self.k_factor = float(k_factor)
+
+        self._teams = TeamCodes()
+        self._ratings = np.empty(0, dtype=np.float64)
+
+        # Per-game history (row i = i-th rated game), home and away columns
+        self._history = GameHistory(
+            {
+                "teams": ((2,), np.int32),
+                "pre": ((2,), np.float64),
+                "post": ((2,), np.float64),
+            },
+            capacity,
+            kind="rated game",
+            state="the ratings",
+        )
+
+    @property
+    def team_ids(self):
+        """Team ids in code order."""
+        return self._teams.team_ids
+
+    @property
+    def game_ids(self):
+        """Rated game ids in rating order."""
+        return self._history.game_ids
+
+    # ------------------------------------------------------------------
+    # Updating
+    # ------------------------------------------------------------------
+
+    def update(self, games):
+        """
+        Rate games that are not yet in the history.
+
+        Only FINAL games with both scores are rated. Games already in the
+        history are skipped, so the same (overlapping) game list can be fed
+        on every run. Games must not start before the last rated game.
+
+        Args:
+            games: Iterable of game dicts (id, homeTeamId, awayTeamId,
+                startTime, status, homeScore, awayScore)
+
+        Returns:
+            int: Number of newly rated games
+        """
+        pending = self._history.pending(games)
+        for game in pending:
+            self._rate(game)
+        return len(pending)
+
+    def _rate(self, game):
+        home = self._team_code(game["homeTeamId"])
+        away = self._team_code(game["awayTeamId"])
+        home_pre = self._ratings[home]
+        away_pre = self._ratings[away]
+
+        delta = elo_delta(home_pre, away_pre, game["homeScore"], game["awayScore"], self.k_factor)
+        self._ratings[home] = home_pre + delta
+        self._ratings[away] = away_pre - delta
+
+        self._history.append(
+            game["id"],
+            game["startTime"],
+            teams=(home, away),
+            pre=(home_pre, away_pre),
+            post=(home_pre + delta, away_pre - delta),
+        )
+
+    def _team_code(self, team_id):
+        code = self._teams.code(team_id)
+        if code == len(self._ratings):
+            self._ratings = np.append(self._ratings, self.initial_rating)
+        return code
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def __len__(self):
+        return len(self._history)
+
+    def __contains__(self, game_id):
+        return game_id in self._history
+
+    def reset(self):
+        """Forget every rated game, keeping the parameters."""
+        self.__init__(self.initial_rating, self.k_factor)
+
+    def rating(self, team_id):
+        """Current rating of a team (initial rating if never seen)."""
+        code = self._teams.get(team_id)
+        return self.initial_rating if code is None else float(self._ratings[code])
+
+    def ratings(self):
+        """
+        Current ratings for all teams.
+
+        Returns:
+            dict: {team_id: elo_rating}
+        """
+        return dict(zip(self.team_ids, self._ratings.tolist()))
+
+    def pre_game_ratings(self, game_id):
+        """
+        Ratings going into a game.
+
+        Rated games return the recorded pre-game ratings. Games that have not
+        been rated yet (e.g. SCHEDULED) are not in the history; use
+        rating(team_id) for those.
+
+        Returns:
+            tuple: (home_elo, away_elo)
+        """
+        home, away = self._history["pre"][self._history.row(game_id)].tolist()
+        return home, away
+
+    def post_game_ratings(self, game_id):
+        """
+        Ratings after a rated game.
+
+        Returns:
+            tuple: (home_elo, away_elo)
+        """
+        home, away = self._history["post"][self._history.row(game_id)].tolist()
+        return home, away
+
+    def rating_before(self, game_id, team_id):
+        """Rating of one team going into a rated game."""
+        row = self._history.row(game_id)
+        teams = self._history["teams"][row]
+        side = 0 if self.team_ids[teams[0]] == team_id else 1
+        if self.team_ids[teams[side]] != team_id:
+            raise KeyError(f"Team {team_id} did not play in game {game_id}")
+        return float(self._history["pre"][row, side])
+
+    def history(self):
+        """
+        Rating history as arrays (views, do not modify).
+
+        Returns:
+            dict: game_ids, start_times, home/away team codes, pre-game and
+                post-game ratings, in rating order
+        """
+        history = self._history
+        return {
+            "game_ids": history.game_ids,
+            "start_times": history["start"],
+            "home_team": history["teams"][:, 0],
+            "away_team": history["teams"][:, 1],
+            "home_pre": history["pre"][:, 0],
+            "away_pre": history["pre"][:, 1],
+            "home_post": history["post"][:, 0],
+            "away_post": history["post"][:, 1],
+        }
+
+    # ------------------------------------------------------------------
+    # Checkpoints
+    # ------------------------------------------------------------------
+
+    def save(self, path):
+        """Write ratings and history to a compressed .npz checkpoint."""
+        save_checkpoint(
+            path,
+            params=np.array([self.initial_rating, self.k_factor]),
+            team_ids=np.array(self.team_ids, dtype=str),
+            ratings=self._ratings,
+            **self._history.arrays(),
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Restore an engine from a checkpoint written by save()."""
+        data = load_checkpoint(path)
+        initial_rating, k_factor = data["params"].tolist()
+        engine = cls(initial_rating, k_factor, capacity=max(len(data["game_ids"]), 1024))
+        engine._teams = TeamCodes(data["team_ids"].tolist())
+        engine._ratings = data["ratings"].astype(np.float64)
+        engine._history.restore(data)
+        return engine
+
 
 def calculate_elo_ratings(games, initial_rating=1500, k_factor=20):
     """
@@ -16,16 +276,110 @@ def calculate_elo_ratings(games, initial_rating=1500, k_factor=20):
     
     Returns:
         dict: {team_id: elo_rating}
+
+    Use EloEngine directly to keep the per-game rating history or to update
+    ratings incrementally from a checkpoint.
     """
-    # TODO: Implement ELO system
-    # - Initialize all teams at 1500
-    # - For each game (chronologically):
-    #     - Calculate expected win prob: 1 / (1 + 10^((elo_B - elo_A) / 400))
-    #     - Update: new_elo_A = old_elo_A + K * (actual - expected)
-    # - Store history for lookback
-    
-    print("📊 Calculating ELO ratings (STUB)")
-    return {}
+    engine = EloEngine(initial_rating, k_factor)
+    engine.update(games)
+    return engine.ratings()
+
+
+def elo_sweep(games, grid=None, initial_rating=1500.0, score_from=None):
+    """
+    Score many ELO parameter combinations in one pass over the games.
+
+    Ratings are a (teams x combinations) matrix: every game updates one row
+    pair for all combinations at once, so the cost is one replay no matter
+    how large the grid is. Besides K, each combination sets:
+
+    - home_advantage: rating points added to the home team when computing
+      the expected score
+    - margin_multiplier: scale K by ln(margin + 1) * 2.2 / (0.001 * winner's
+      rating edge + 2.2), which damps blowouts by heavy favourites (ties
+      count as a 1-point margin)
+    - season_regression: fraction of the distance to initial_rating removed
+      from a team's rating before its first game of a new season
+
+    The combination home_advantage=0, margin_multiplier=False,
+    season_regression=0 is exactly EloEngine(initial_rating, k_factor).
+
+    Args:
+        games: One league's games (list of dicts or DataFrame)
+        grid: {parameter: values} overriding ELO_SWEEP_GRID entries
+        initial_rating: Starting (and regression target) rating
+        score_from: Only games starting at or after this time are scored
+            (earlier games just warm the ratings up)
+
+    Returns:
+        DataFrame: One row per combination with the parameter columns,
+            games (scored), log_loss, brier_score and accuracy (ties
+            excluded) of the pre-game home win probability, best log loss
+            first
+    """
+    grid = {**ELO_SWEEP_GRID, **(grid or {})}
+    combos = pd.DataFrame(list(product(*grid.values())), columns=list(grid))
+    k_factor = combos["k_factor"].to_numpy(np.float64)
+    home_advantage = combos["home_advantage"].to_numpy(np.float64)
+    margin_multiplier = combos["margin_multiplier"].to_numpy(bool)
+    regression = combos["season_regression"].to_numpy(np.float64)
+
+    games_df = games_frame(games)
+    games_df = games_df[completed_mask(games_df)]
+    codes, team_ids = pd.factorize(np.concatenate([
+        games_df["homeTeamId"].to_numpy(dtype=object),
+        games_df["awayTeamId"].to_numpy(dtype=object),
+    ]))
+    n = len(games_df)
+    home_codes, away_codes = codes[:n], codes[n:]
+    margins = (games_df["homeScore"] - games_df["awayScore"]).to_numpy()
+    seasons = season_of(games_df["startTime"])
+    scored = np.ones(n, dtype=bool)
+    if score_from is not None:
+        scored = games_df["startTime"].to_numpy() >= to_datetime64(score_from)
+
+    ratings = np.full((len(team_ids), len(combos)), float(initial_rating))
+    team_season = np.full(len(team_ids), np.iinfo(np.int32).min)
+    log_loss = np.zeros(len(combos))
+    brier = np.zeros(len(combos))
+    correct = np.zeros(len(combos))
+    decided = 0
+
+    for home, away, margin, season, score in zip(home_codes, away_codes, margins, seasons, scored):
+        for team in (home, away):
+            if team_season[team] != season:
+                if team_season[team] != np.iinfo(np.int32).min:
+                    ratings[team] -= regression * (ratings[team] - initial_rating)
+                team_season[team] = season
+
+        home_pre, away_pre = ratings[home], ratings[away]
+        expected = 1.0 / (1.0 + 10.0 ** ((away_pre - home_pre - home_advantage) / 400.0))
+        actual = 1.0 if margin > 0 else 0.0 if margin < 0 else 0.5
+
+        scale = np.ones(len(combos))
+        edge = (home_pre + home_advantage - away_pre) * np.sign(margin)
+        scale[margin_multiplier] = (
+            np.log(max(abs(margin), 1.0) + 1.0) * 2.2 / (0.001 * edge[margin_multiplier] + 2.2)
+        )
+        delta = k_factor * scale * (actual - expected)
+        ratings[home] = home_pre + delta
+        ratings[away] = away_pre - delta
+
+        if score:
+            p = np.clip(expected, 1e-15, 1 - 1e-15)
+            log_loss -= actual * np.log(p) + (1.0 - actual) * np.log(1.0 - p)
+            brier += (expected - actual) ** 2
+            if actual != 0.5:
+                correct += (expected > 0.5) == (actual == 1.0)
+                decided += 1
+
+    count = int(scored.sum())
+    with np.errstate(invalid="ignore", divide="ignore"):
+        combos["games"] = count
+        combos["log_loss"] = log_loss / count
+        combos["brier_score"] = brier / count
+        combos["accuracy"] = correct / decided
+    return combos.sort_values(["log_loss", "brier_score"], kind="mergesort").reset_index(drop=True)
 
 
 def calculate_team_stats(games, team_id):
@@ -37,41 +391,30 @@ def calculate_team_stats(games, team_id):
         team_id: Team identifier
     
     Returns:
-        dict: Team statistics
+        dict: Team statistics (games, wins, losses, win_pct, ppg, opp_ppg,
+            point_diff, offensive_rating, defensive_rating, pace); ratings
+            and pace need a possessions column and are None without it
+
+    Use splits.split_features for the values as of every game.
     """
-    # TODO: Calculate:
-    # - Win percentage
-    # - Points per game
-    # - Points allowed per game
-    # - Point differential
-    # - Offensive rating (points per 100 possessions)
-    # - Defensive rating (points allowed per 100 possessions)
-    # - Pace (possessions per game)
-    
-    print(f"📊 Calculating team stats for {team_id} (STUB)")
-    return {
-        "win_pct": 0.5,
-        "ppg": 110.0,
-        "opp_ppg": 108.0,
-        "point_diff": 2.0,
-        "offensive_rating": 112.0,
-        "defensive_rating": 110.0,
-        "pace": 100.0,
-    }
-
-
-def calculate_strength_of_schedule(team_id, opponent_elos):
+    return split_stats(games, team_id)
+
+
+def calculate_strength_of_schedule(team_id, opponent_elos, initial_rating=1500.0):
     """
     Calculate strength of schedule based on opponent ELOs.
     
     Args:
         team_id: Team identifier
         opponent_elos: List of opponent ELO ratings
+        initial_rating: Value when there are no opponents (league average)
     
     Returns:
         float: Average opponent ELO
-    """
-    # TODO: Calculate average opponent strength
-    print(f"📊 Calculating SOS for {team_id} (STUB)")
-    return 1500.0
 
+    Use opponents.OpponentGraph to compute past and remaining SOS for every
+    team of a league at once.
+    """
+    if len(opponent_elos) == 0:
+        return float(initial_rating)
+    return float(np.mean(opponent_elos))
@@ -0,0 +1,14 @@
+"""
+Monitoring Module
+
+Per-stage run metrics and profiling hooks for the ML scripts.
+"""
+
+from .run_metrics import DEFAULT_METRICS_PATH, RunRecorder, add_run_arguments, stage
+
+__all__ = [
+    "DEFAULT_METRICS_PATH",
+    "RunRecorder",
+    "add_run_arguments",
+    "stage",
+]
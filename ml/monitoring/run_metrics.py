@@ -0,0 +1,199 @@
+"""
+Run Metrics
+
+Per-stage wall time, CPU time, memory, row counts and database round trips
+for the ML scripts, appended as JSON lines so pipeline performance can be
+trended across cron runs.
+"""
+
+import cProfile
+import json
+import os
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+from db.connection import round_trips
+
+DEFAULT_METRICS_PATH = "logs/pipeline_metrics.jsonl"
+
+_active = None
+
+
+class Stage:
+    """
+    Mutable record of one running stage.
+
+    Set rows_in/rows_out (and any extra fields via note()) inside the
+    `with` block; they are written when the stage ends.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.rows_in = None
+        self.rows_out = None
+        self.extra = {}
+
+    def note(self, **fields):
+        """Attach extra JSON-serializable fields to the stage record."""
+        self.extra.update(fields)
+
+
+class RunRecorder:
+    """
+    Collects stage records for one script run.
+
+    While a recorder is active, stage() blocks anywhere in the process
+    (including library code such as extract_features) are recorded, nested
+    stages as "outer/inner". Each finished stage appends one JSON line; the
+    run itself is closed with a "total" line. With a profile path, the run
+    is also profiled with cProfile (open the .prof file with pstats or
+    snakeviz).
+
+    Usage:
+        with RunRecorder("daily_predictions") as run:
+            with stage("fetch_upcoming_games") as s:
+                games = fetch_upcoming_games()
+                s.rows_out = len(games)
+    """
+
+    def __init__(self, script, metrics_path=DEFAULT_METRICS_PATH, profile_path=None):
+        self.script = script
+        self.metrics_path = Path(metrics_path) if metrics_path else None
+        self.profile_path = Path(profile_path) if profile_path else None
+        self.run_id = uuid.uuid4().hex[:12]
+        self._stack = []
+        self._profiler = None
+        self._start = None
+
+    def __enter__(self):
+        global _active
+        if _active is not None:
+            raise RuntimeError("A RunRecorder is already active in this process")
+        _active = self
+        self._start = _snapshot()
+        if self.profile_path is not None:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        global _active
+        if self._profiler is not None:
+            self._profiler.disable()
+            self.profile_path.parent.mkdir(parents=True, exist_ok=True)
+            self._profiler.dump_stats(self.profile_path)
+        self._write("total", self._start, Stage("total"), "error" if exc_type else "ok")
+        _active = None
+        return False
+
+    @contextmanager
+    def stage(self, name):
+        """Record one stage (see the module-level stage())."""
+        record = Stage("/".join([*self._stack, name]))
+        self._stack.append(name)
+        start = _snapshot()
+        status = "error"
+        try:
+            yield record
+            status = "ok"
+        finally:
+            self._stack.pop()
+            self._write(record.name, start, record, status)
+
+    def _write(self, name, start, record, status):
+        if self.metrics_path is None:
+            return
+        end = _snapshot()
+        line = {
+            "run_id": self.run_id,
+            "script": self.script,
+            "stage": name,
+            "status": status,
+            "started_at": start["started_at"],
+            "wall_s": round(end["wall"] - start["wall"], 6),
+            "cpu_s": round(end["cpu"] - start["cpu"], 6),
+            "child_cpu_s": _delta(start["child_cpu"], end["child_cpu"]),
+            "rss_mb": end["rss_mb"],
+            "peak_rss_mb": end["peak_rss_mb"],
+            "rows_in": record.rows_in,
+            "rows_out": record.rows_out,
+            "db_round_trips": end["db_round_trips"] - start["db_round_trips"],
+            **record.extra,
+        }
+        self.metrics_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.metrics_path, "a") as f:
+            f.write(json.dumps(line, default=str) + "\n")
+
+
+@contextmanager
+def stage(name):
+    """
+    Record a stage of the active run; a no-op without a RunRecorder.
+
+    Usage:
+        with stage("odds") as s:
+            s.rows_in = len(features)
+            features = add_odds_features(conn, features)
+    """
+    if _active is None:
+        yield Stage(name)
+    else:
+        with _active.stage(name) as record:
+            yield record
+
+
+def add_run_arguments(parser):
+    """Add the shared --metrics / --profile options to a script's parser."""
+    parser.add_argument(
+        "--metrics",
+        default=os.environ.get("ML_METRICS_PATH", DEFAULT_METRICS_PATH),
+        help="Append per-stage run metrics (JSON lines) to this file; '' disables"
+    )
+    parser.add_argument(
+        "--profile",
+        default=None,
+        help="Write a cProfile dump of the run (.prof, for pstats/snakeviz)"
+    )
+    return parser
+
+
+def _snapshot():
+    snapshot = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "wall": time.perf_counter(),
+        "cpu": time.process_time(),
+        "child_cpu": None,
+        "rss_mb": _current_rss_mb(),
+        "peak_rss_mb": None,
+        "db_round_trips": round_trips(),
+    }
+    if resource is not None:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        snapshot["child_cpu"] = children.ru_utime + children.ru_stime
+        # Peak RSS is a process-lifetime high-water mark (KiB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_mb = round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+        snapshot["peak_rss_mb"] = max(peak_mb, snapshot["rss_mb"] or 0.0)
+    return snapshot
+
+
+def _current_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return round(pages * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+
+
+def _delta(start, end):
+    return None if start is None or end is None else round(end - start, 6)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Odds Compaction Script
+
+Appends new OddsSnapshot rows to the Parquet odds archive read by the
+feature pipeline. Only snapshots past the archive's watermark are exported,
+one time window at a time; unchanged consecutive prices are dropped.
+
+Usage:
+    python compact_odds.py
+    python compact_odds.py --archive data/odds_archive --window-days 3
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from db import connection, fetch_odds_snapshots_arrow, fetch_odds_time_range  # noqa: E402
+from storage import OddsArchive  # noqa: E402
+
+DEFAULT_ARCHIVE = "data/odds_archive"
+DEFAULT_WINDOW_DAYS = 7
+
+
+def compact_odds(archive_path: str = DEFAULT_ARCHIVE, window_days: int = DEFAULT_WINDOW_DAYS):
+    """
+    Export snapshots newer than the archive watermark.
+
+    Args:
+        archive_path: OddsArchive root directory
+        window_days: Days of snapshots exported per query (bounds memory)
+
+    Returns:
+        int: Snapshots written to the archive
+    """
+    archive = OddsArchive(archive_path)
+    watermark = archive.watermark
+    print(f"🗜️  Compacting odds into {archive_path}")
+    print(f"   Watermark: {watermark if watermark is not None else 'none (full export)'}")
+
+    written = exported = 0
+    with connection() as conn:
+        first, last = fetch_odds_time_range(conn, since=watermark)
+        if first is None:
+            print("   No new snapshots")
+            return 0
+
+        if watermark is not None:
+            since = pd.Timestamp(watermark)
+        else:
+            since = pd.Timestamp(first) - pd.Timedelta(1, "ms")
+        last = pd.Timestamp(last)
+        while since < last:
+            until = min(since + pd.Timedelta(days=window_days), last)
+            snapshots = fetch_odds_snapshots_arrow(conn, since, until).to_pandas()
+            exported += len(snapshots)
+            written += archive.append(snapshots)
+            print(f"   ... {until:%Y-%m-%d %H:%M} ({exported} exported, {written} kept)")
+            since = until
+
+    print("✅ Odds archive updated")
+    print(f"   Kept {written} of {exported} snapshots")
+    print(f"   Watermark: {archive.watermark}")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Append new odds snapshots to the Parquet archive")
+    parser.add_argument(
+        "--archive",
+        default=DEFAULT_ARCHIVE,
+        help="Archive directory (partitioned by league/date)"
+    )
+    parser.add_argument(
+        "--window-days",
+        type=int,
+        default=DEFAULT_WINDOW_DAYS,
+        help="Days of snapshots exported per query"
+    )
+
+    args = parser.parse_args()
+    compact_odds(args.archive, args.window_days)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,54 +7,128 @@ Designed to be run via cron job at 6 AM ET.
 
 Usage:
     python daily_predictions.py
+    python daily_predictions.py --profile logs/daily_predictions.prof
     
 Cron:
     0 6 * * * cd /path/to/Sports_AI/ml && python scripts/daily_predictions.py >> logs/predictions.log 2>&1
+
+Every ACTIVE model (one per ModelType) and every EVALUATING model scored in
+shadow on the same slate gets its own MLPrediction rows, so a candidate's
+live metrics can be compared with the ACTIVE model of its type.
+
+Per-step timings, memory, row counts and DB round trips are appended to
+logs/pipeline_metrics.jsonl (--metrics).
 """
 
+import argparse
+import math
 import sys
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
 from pathlib import Path
 
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from db import (  # noqa: E402
+    connection,
+    fetch_final_games_updated_since,
+    fetch_games_arrow,
+    fetch_model_metric_state,
+    fetch_models,
+    fetch_unevaluated_predictions,
+    fetch_upcoming_games as fetch_upcoming_games_query,
+    record_model_metrics,
+    stream_games,
+    upsert_predictions,
+)
+from extract_features import HISTORY_START, RECENT_WINDOWS, add_odds_features  # noqa: E402
+from features import FEATURE_VERSION, HeadToHeadIndex, TeamState  # noqa: E402
+from features.schedule import load_venue_coordinates  # noqa: E402
+from features.game_log import games_frame, late_game_error  # noqa: E402
+from features.team_state import FOLDED_ID_DAYS  # noqa: E402
+from monitoring import RunRecorder, add_run_arguments, stage  # noqa: E402
+from serving import (  # noqa: E402
+    ModelCache,
+    PredictionClient,
+    ServedModel,
+    ServerUnavailable,
+    score_models,
+)
+from storage import FeatureStore, OddsArchive  # noqa: E402
+from training import MetricsAccumulator  # noqa: E402
+
+FEATURE_STORE_PATH = "data/feature_store.sqlite"
+TEAM_STATE_PATH = "models/team_state.npz"
+H2H_CHECKPOINT_PATH = "models/h2h.npz"
+ODDS_ARCHIVE_PATH = "data/odds_archive"
+VENUES_PATH = "data/venues.csv"
 
-def main():
+
+def main(argv=None):
     """Run daily prediction pipeline."""
+    parser = argparse.ArgumentParser(description="Daily prediction job")
+    add_run_arguments(parser)
+    args = parser.parse_args(argv)
+
     print(f"{'='*60}")
     print(f"🔮 Daily Predictions Job")
     print(f"   Started at: {datetime.now().isoformat()}")
     print(f"{'='*60}\n")
     
     try:
-        # Step 1: Check for upcoming games (next 7 days)
-        print("📅 Step 1: Fetching upcoming games...")
-        upcoming_games = fetch_upcoming_games(days=7)
-        print(f"   Found {len(upcoming_games)} upcoming games\n")
-        
-        # Step 2: Get active model
-        print("🤖 Step 2: Loading active model...")
-        active_model = get_active_model()
-        print(f"   Using model: {active_model.get('version', 'unknown')}\n")
-        
-        # Step 3: Extract features
-        print("🔧 Step 3: Extracting features...")
-        features = extract_features_for_games(upcoming_games)
-        print(f"   Extracted {len(features)} feature sets\n")
-        
-        # Step 4: Generate predictions
-        print("🎯 Step 4: Generating predictions...")
-        predictions = generate_batch_predictions(active_model, features)
-        print(f"   Generated {len(predictions)} predictions\n")
-        
-        # Step 5: Store predictions
-        print("💾 Step 5: Storing predictions...")
-        store_predictions(predictions)
-        print(f"   Stored successfully\n")
-        
-        # Step 6: Update model metrics (for completed games)
-        print("📊 Step 6: Updating model metrics...")
-        update_model_performance()
-        print(f"   Metrics updated\n")
-        
+        with RunRecorder("daily_predictions", args.metrics, args.profile):
+            # Step 1: Check for upcoming games (next 7 days)
+            print("📅 Step 1: Fetching upcoming games...")
+            with stage("fetch_upcoming_games") as step:
+                upcoming_games = fetch_upcoming_games(days=7)
+                step.rows_out = len(upcoming_games)
+            print(f"   Found {len(upcoming_games)} upcoming games\n")
+
+            # Step 2: Get the ACTIVE model of every type and the shadow models
+            print("🤖 Step 2: Loading active models...")
+            with stage("get_active_model") as step:
+                active_models = get_active_models()
+                shadow_models = get_shadow_models()
+                step.rows_out = len(active_models) + len(shadow_models)
+            for model_type, model in sorted(active_models.items()):
+                print(f"   Using {model_type} model: {model['version']}")
+            for shadow in shadow_models:
+                if shadow.model_type not in active_models:
+                    print(f"   ⚠️  Shadow model {shadow.row['version']} has no ACTIVE "
+                          f"{shadow.model_type} model to compare with")
+            print(f"   Shadow models: {len(shadow_models)}\n")
+
+            # Step 3: Extract features (odds as of the stored predictedAt)
+            print("🔧 Step 3: Extracting features...")
+            predicted_at = datetime.now(timezone.utc).replace(tzinfo=None)
+            with stage("extract_features") as step:
+                step.rows_in = len(upcoming_games)
+                features = extract_features_for_games(upcoming_games, predicted_at)
+                step.rows_out = len(features)
+            print(f"   Extracted {len(features)} feature sets\n")
+
+            # Step 4: Generate predictions
+            print("🎯 Step 4: Generating predictions...")
+            with stage("generate_predictions") as step:
+                step.rows_in = len(features)
+                predictions = generate_batch_predictions(features, shadow_models)
+                step.rows_out = len(predictions)
+            print(f"   Generated {len(predictions)} predictions\n")
+
+            # Step 5: Store predictions
+            print("💾 Step 5: Storing predictions...")
+            with stage("store_predictions") as step:
+                step.rows_in = len(predictions)
+                store_predictions(predictions, predicted_at)
+            print(f"   Stored successfully\n")
+
+            # Step 6: Update model metrics (for completed games)
+            print("📊 Step 6: Updating model metrics...")
+            with stage("update_model_performance") as step:
+                step.rows_out = update_model_performance()
+            print(f"   Metrics updated\n")
+
         print(f"{'='*60}")
         print(f"✅ Daily predictions complete!")
         print(f"   Finished at: {datetime.now().isoformat()}")
@@ -70,101 +144,321 @@ def main():
 
 def fetch_upcoming_games(days=7):
     """Fetch games scheduled in the next N days."""
-    # TODO: Connect to database
-    # db = connect_to_postgres()
-    # end_date = datetime.now() + timedelta(days=days)
-    # games = db.query("""
-    #     SELECT * FROM Game
-    #     WHERE startTime >= NOW()
-    #     AND startTime <= %s
-    #     AND status = 'SCHEDULED'
-    # """, (end_date,))
-    
-    print("   (STUB: Would fetch from database)")
-    return []
-
-
-def get_active_model():
-    """Get the currently active model from registry."""
-    # TODO: Query database
-    # model = db.query("""
-    #     SELECT * FROM MLModel
-    #     WHERE status = 'ACTIVE'
-    #     ORDER BY trainedAt DESC
-    #     LIMIT 1
-    # """)
-    
-    print("   (STUB: Would fetch from model registry)")
-    return {
-        "id": "model-123",
-        "version": "v1.0.0",
-        "model_type": "WIN_PROBABILITY",
-    }
+    with connection() as conn:
+        games = fetch_upcoming_games_query(conn, days=days)
+    return games.to_dict("records")
 
 
-def extract_features_for_games(games):
-    """Extract features for each upcoming game."""
-    # TODO: For each game:
-    # - Calculate ELO ratings (current)
-    # - Calculate rest days
-    # - Get recent performance (last 10 games)
-    # - Get home/away splits
-    # - Calculate matchup history
-    # - Get injury impact (placeholder)
-    
-    print("   (STUB: Would extract features)")
-    return []
+def get_active_models():
+    """
+    Get the ACTIVE model of every type from the registry.
 
+    Returns:
+        dict: {model_type: model row}, the newest ACTIVE row per type (the
+            one the model server serves)
+    """
+    with connection() as conn:
+        rows = fetch_models(conn, ["ACTIVE"])  # newest first
+    if not rows:
+        raise RuntimeError("No ACTIVE model in the registry")
+    models = {}
+    for row in rows:
+        models.setdefault(row["model_type"], row)
+    return models
 
-def generate_batch_predictions(model, features):
-    """Generate predictions for all games."""
-    # TODO: Load model from disk
-    # model_obj = load_model(model['model_path'])
-    
-    # TODO: Generate predictions
-    # predictions = model_obj.predict(features)
-    
-    print("   (STUB: Would generate predictions)")
-    return []
-
-
-def store_predictions(predictions):
-    """Store predictions in database."""
-    # TODO: Insert into MLPrediction table
-    # for pred in predictions:
-    #     db.mlprediction.create({
-    #         'model_id': pred['model_id'],
-    #         'game_id': pred['game_id'],
-    #         'home_win_prob': pred['home_win_prob'],
-    #         'away_win_prob': pred['away_win_prob'],
-    #         'spread_pred': pred['spread_pred'],
-    #         'total_pred': pred['total_pred'],
-    #         'predicted_at': datetime.now(),
-    #     })
-    
-    print("   (STUB: Would store in database)")
+
+def extract_features_for_games(games, predicted_at=None):
+    """
+    Extract features for each upcoming game.
+
+    Features come from the materialized team state (models/team_state.npz):
+    only games that went FINAL since its watermark are read from the Game
+    table and folded in, and the slate is featurized from a few hundred team
+    rows instead of each team's history. The rows are identical to the batch
+    extractor's (extract_features.py --verify-team-state) and are written to
+    the feature store, so training later reads what was served.
+
+    Odds features are cut off at `predicted_at` (default: UTC now), the
+    time the predictions are stored with (store_predictions), so training
+    rows of these games later see the same snapshots.
+    """
+    if not games:
+        return []
+    if predicted_at is None:
+        predicted_at = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    upcoming = games_frame(games)
+    end = upcoming["startTime"].max().date()
+    venues = load_venue_coordinates(VENUES_PATH) if Path(VENUES_PATH).exists() else None
+
+    state_path = Path(TEAM_STATE_PATH)
+    h2h_path = Path(H2H_CHECKPOINT_PATH)
+    state = h2h = None
+    if state_path.exists() and h2h_path.exists():
+        state = TeamState.load(state_path)
+        h2h = HeadToHeadIndex.load(h2h_path)
+
+    with stage("advance_team_state") as step, connection() as conn:
+        if state is not None and state.watermark is not None:
+            try:
+                step.rows_out = advance_team_state(conn, state, h2h, end, venues)
+                print(f"   Folded {step.rows_out} newly FINAL games into the team state")
+            except ValueError as e:
+                print(f"   {e}")
+                state = None
+        else:
+            state = None
+        if state is None:
+            print("   Building team state from the full game history")
+            state, h2h = build_team_state(conn, end, venues)
+            step.note(rebuilt=True)
+            print(f"   Team state: {len(state)} teams, {len(h2h)} FINAL games")
+
+    with stage("team_state_features") as step, \
+            FeatureStore(FEATURE_STORE_PATH, FEATURE_VERSION) as store:
+        step.rows_in = len(upcoming)
+        features = state.features(upcoming, h2h, venues)
+        store.write(features, store.fingerprints(upcoming))
+        step.rows_out = len(features)
+
+    # Odds as of predicted_at: the cutoff the stored predictions will carry
+    with stage("odds") as step, connection() as conn:
+        step.rows_in = len(features)
+        features = add_odds_features(
+            conn, features, archive=OddsArchive(ODDS_ARCHIVE_PATH), predicted_at=predicted_at
+        )
+
+    state.save(state_path)
+    h2h.save(h2h_path)
+    return features.to_dict("records")
+
+
+def advance_team_state(conn, state, h2h, end, venue_coordinates=None):
+    """
+    Fold the games that went FINAL since the checkpoint into state and h2h.
+
+    Games are re-read from FOLDED_ID_DAYS before the watermark, the window
+    in which TeamState.update still recognizes folded games, so a result
+    that arrives up to that late is folded or rejected rather than silently
+    skipped. Older FINAL games are checked through Game.updatedAt: one
+    changed after the state last read the table (TeamState.synced_at)
+    invalidates the snapshot.
+
+    Args:
+        conn: psycopg2 connection
+        state: TeamState with a watermark
+        h2h: HeadToHeadIndex checkpointed with it
+        end: Last day to read (date)
+        venue_coordinates: {venue: (latitude, longitude)} for travel
+
+    Returns:
+        int: Number of newly folded games
+
+    Raises:
+        ValueError: A result arrived too late; rebuild from the full history
+    """
+    horizon = state.watermark - np.timedelta64(FOLDED_ID_DAYS, "D")
+    if state.synced_at is None:
+        raise ValueError("Team state has no Game.updatedAt watermark; rebuilding it")
+    late = fetch_final_games_updated_since(conn, state.synced_at.item(), horizon.item())
+    if len(late):
+        raise late_game_error(
+            late["id"].iloc[0], late["startTime"].iloc[0], state.watermark,
+            "folded game", "the team state from the full history",
+        )
+
+    since = horizon.astype("datetime64[D]").item().isoformat()
+    recent = fetch_games_arrow(conn, since, end.isoformat()).to_pandas()
+    folded = state.update(recent, venue_coordinates)
+    h2h.update(recent.to_dict("records"))
+    return folded
+
+
+def build_team_state(conn, end, venue_coordinates=None):
+    """
+    Build the team state and head-to-head index from the full Game table.
+
+    Only needed once (or after a late result invalidates the snapshot); the
+    games are streamed in chunks.
+
+    Returns:
+        tuple: (TeamState, HeadToHeadIndex)
+    """
+    state = TeamState(windows=RECENT_WINDOWS)
+    h2h = HeadToHeadIndex()
+    for chunk in stream_games(conn, HISTORY_START, end.isoformat()):
+        state.update(chunk, venue_coordinates)
+        h2h.update(chunk.to_dict("records"))
+    return state, h2h
+
+
+def get_shadow_models():
+    """
+    Load every EVALUATING model for shadow scoring.
+
+    Models whose artifact cannot be loaded are skipped with a warning, so a
+    broken candidate never blocks the production predictions.
+
+    Returns:
+        list: ServedModel instances
+    """
+    with connection() as conn:
+        rows = fetch_models(conn, ["EVALUATING"])
+
+    models = []
+    for row in rows:
+        try:
+            models.append(ServedModel.load(row))
+        except Exception as e:
+            print(f"   ⚠️  Skipping shadow model {row['version']}: {e}")
+    return models
+
+
+def generate_batch_predictions(features, shadow_models=()):
+    """
+    Generate predictions for all games.
+
+    Scoring goes to the local model server (serve_models.py), which keeps the
+    ACTIVE model of every type warm; if it is not running, the ACTIVE models
+    are loaded in this process instead. Every ACTIVE model gets one row per
+    game attributed to itself, holding only its own outputs, so each
+    model's live metrics are computed from its own predictions.
+
+    Each shadow model adds rows the same way, next to the ACTIVE model of
+    its type. Shadow models (and in-process ACTIVE models) score one shared
+    feature matrix on a thread pool (serving.score_models), so a shadow
+    model costs only its inference time; one that fails is skipped.
+
+    Returns:
+        list: Prediction dicts (see upsert_predictions)
+    """
+    if not features:
+        return []
+
+    shadow_models = list(shadow_models)
+    scored = []
+    served = []
+    try:
+        scored = PredictionClient().predict_by_model(features)
+    except ServerUnavailable as e:
+        print(f"   {e}; loading models in-process")
+        cache = ModelCache()
+        with connection() as conn:
+            cache.refresh(conn)
+        served = cache.served()
+
+    def skip_shadow(served_model, error):
+        if served_model not in shadow_models:
+            raise error
+        print(f"   ⚠️  Shadow model {served_model.row['version']} failed: {error}")
+
+    outputs = score_models(served + shadow_models, features, on_error=skip_shadow)
+    scored += [
+        (served_model.row, values)
+        for served_model, values in zip(served + shadow_models, outputs)
+        if values is not None
+    ]
+    return [
+        {
+            **fields,
+            "model_id": model["id"],
+            "game_id": row["id"],
+            "game_start_time": row["startTime"],
+        }
+        for model, values in scored
+        for row, fields in zip(features, values)
+    ]
+
+
+def store_predictions(predictions, predicted_at=None):
+    """
+    Store predictions in the MLPrediction table with one bulk upsert.
+
+    Args:
+        predictions: Prediction dicts (see generate_batch_predictions)
+        predicted_at: Odds cutoff of their features (extract_features_for_games);
+            stored as predictedAt, the cutoff training later uses
+    """
+    if not predictions:
+        print("   No predictions to store")
+        return
+    if predicted_at is not None:
+        predictions = [{**p, "predicted_at": predicted_at} for p in predictions]
+
+    with connection() as conn:
+        written = upsert_predictions(conn, predictions)
+    print(f"   Upserted {written} rows")
 
 
 def update_model_performance():
-    """Update model performance metrics for completed games."""
-    # TODO: Get predictions for completed games
-    # completed = db.query("""
-    #     SELECT p.*, g.*
-    #     FROM MLPrediction p
-    #     JOIN Game g ON p.gameId = g.id
-    #     WHERE g.status = 'FINAL'
-    #     AND p.evaluatedAt IS NULL
-    # """)
-    
-    # TODO: Calculate actual vs predicted
-    # - Log loss
-    # - Brier score
-    # - MAE for spread/total
-    # - Calibration metrics
-    
-    # TODO: Update MLModel table with rolling metrics
-    
-    print("   (STUB: Would update metrics)")
+    """
+    Update model performance metrics for completed games.
+
+    Only predictions whose game went FINAL since the last run are read. They
+    are folded into each model's MetricsAccumulator (restored from
+    MLModel.calibrationPlot), the metric columns are set to the rolling-window
+    values, and the predictions are marked evaluated in the same
+    transaction, so the cost grows with new games, not with the table.
+
+    Returns:
+        int: Number of predictions evaluated
+    """
+    with connection() as conn:
+        new = fetch_unevaluated_predictions(conn).to_pandas()
+        if new.empty:
+            print("   No newly completed games")
+            return 0
+
+        states = fetch_model_metric_state(conn, new["model_id"].unique())
+        updates = []
+        evaluated_ids = []
+        for model_id, rows in new.groupby("model_id", sort=False):
+            state = states.get(model_id)
+            if state is None:
+                continue  # Left unevaluated until the model has a state row
+            stored = (state["calibration_plot"] or {}).get("accumulator")
+            acc = MetricsAccumulator.from_dict(stored) if stored else MetricsAccumulator()
+
+            home, away = rows["home_score"].to_numpy(), rows["away_score"].to_numpy()
+            acc.update(
+                rows["start_time"].to_numpy(),
+                home_win_prob=rows["home_win_prob"].to_numpy(),
+                home_win=(home > away).astype(float),
+                spread_pred=rows["spread_pred"].to_numpy(),
+                spread=away - home,
+                total_pred=rows["total_pred"].to_numpy(),
+                total=home + away,
+            )
+            updates.append(_metric_update(model_id, state["model_type"], acc))
+            evaluated_ids += rows["id"].tolist()
+
+        evaluated = record_model_metrics(conn, updates, evaluated_ids)
+
+    print(f"   Evaluated {evaluated} predictions for {len(updates)} models")
+    return evaluated
+
+
+def _metric_update(model_id, model_type, acc):
+    """MLModel column values and calibrationPlot JSON for one accumulator."""
+    rolling = acc.rolling_metrics()
+    mae = rolling["total_mae"] if model_type == "TOTAL" else rolling["spread_mae"]
+    return {
+        "model_id": model_id,
+        "log_loss": _finite(rolling["log_loss"]),
+        "brier_score": _finite(rolling["brier_score"]),
+        "accuracy": _finite(rolling["accuracy"]),
+        "mae": _finite(mae),
+        "calibration_plot": {
+            "bins": acc.calibration(),
+            "rolling": {k: _finite(v) for k, v in rolling.items()},
+            "cumulative": {k: _finite(v) for k, v in acc.metrics().items()},
+            "accumulator": acc.to_dict(),
+        },
+    }
+
+
+def _finite(value):
+    return float(value) if value is not None and math.isfinite(value) else None
 
 
 if __name__ == "__main__":
@@ -2,14 +2,33 @@
 """
 Model Evaluation Script
 
-Evaluates trained models on test data.
-This is a STUB - full implementation pending.
+Evaluates registry models on a feature table and scores walk-forward
+backtest runs from their cached fold predictions.
 
 Usage:
     python evaluate.py --model-id <model-id> --test-data data/test.parquet
+    python evaluate.py --backtest data/backtest/runs/<run-id>
+    python evaluate.py --backtest data/backtest/runs/<run-a> data/backtest/runs/<run-b> \
+        --group-by league month
 """
 
 import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from db import connection, fetch_model  # noqa: E402
+from serving.models import ServedModel  # noqa: E402
+from training import (  # noqa: E402
+    TARGETS,
+    FeatureMatrix,
+    calculate_metrics as model_metrics,
+    calibration_curve,
+    score_backtest,
+)
 
 
 def evaluate_model(model_id: str, test_data_path: str):
@@ -22,76 +41,88 @@ def evaluate_model(model_id: str, test_data_path: str):
     """
     print(f"📊 Evaluating model: {model_id}")
     
-    # TODO: Load model from registry
-    # model_info = db.query("SELECT * FROM MLModel WHERE id = %s", (model_id,))
-    # model = load_model(model_info.model_path)
-    
-    # TODO: Load test data
-    # X_test, y_test = load_features(test_data_path)
-    
-    # TODO: Generate predictions
-    # y_pred = model.predict_proba(X_test)
-    
-    # TODO: Calculate metrics
-    metrics = calculate_metrics([], [])  # Placeholder
+    with connection() as conn:
+        model_info = fetch_model(conn, model_id)
+    if model_info is None:
+        raise RuntimeError(f"Model not found: {model_id}")
+    print(f"   Version: {model_info['version']} ({model_info['model_type']})")
+
+    model = ServedModel.load(model_info)
+
+    matrix = FeatureMatrix.build(test_data_path)
+    y_test = matrix.target(TARGETS[model.model_type])
+    rows = np.flatnonzero(~np.isnan(y_test))
+    X_test = matrix.rows(rows, model.feature_names or None)
+    print(f"   Test games: {len(rows)}")
+
+    y_pred = model.predict(X_test)
+    metrics = calculate_metrics(y_test[rows], y_pred, model.model_type)
     
     print("\n📈 Test Set Metrics:")
     for metric_name, value in metrics.items():
         print(f"   {metric_name}: {value:.4f}")
     
-    # TODO: Generate calibration plot
-    # plot_calibration(y_test, y_pred, save_path=f'plots/calibration_{model_id}.png')
-    
+    if model.model_type == "WIN_PROBABILITY":
+        save_path = f"plots/calibration_{model_id}.png"
+        plot_calibration(y_test[rows], y_pred, save_path=save_path)
+        print(f"   Calibration plot: {save_path}")
+
     # TODO: Feature importance
     # plot_feature_importance(model, save_path=f'plots/features_{model_id}.png')
     
     print(f"\n✅ Evaluation complete")
 
 
-def calculate_metrics(y_true, y_pred):
-    """Calculate all evaluation metrics."""
-    metrics = {}
-    
-    # TODO: Classification metrics
-    # from sklearn.metrics import log_loss, brier_score_loss, accuracy_score
-    # metrics['log_loss'] = log_loss(y_true, y_pred)
-    # metrics['brier_score'] = brier_score_loss(y_true, y_pred[:, 1])
-    # metrics['accuracy'] = accuracy_score(y_true, y_pred.argmax(axis=1))
-    
-    # TODO: Regression metrics (for spread/total)
-    # from sklearn.metrics import mean_absolute_error, mean_squared_error
-    # metrics['mae'] = mean_absolute_error(y_true, y_pred)
-    # metrics['rmse'] = np.sqrt(mean_squared_error(y_true, y_pred))
-    
-    # Placeholder
-    metrics = {
-        "log_loss": 0.0,
-        "brier_score": 0.0,
-        "accuracy": 0.0,
-        "calibration_error": 0.0,
-    }
-    
+def evaluate_backtest(run_dirs, group_by=("test_season",)):
+    """
+    Score walk-forward backtest runs from their cached fold predictions.
+
+    Nothing is retrained, so metric or calibration changes can be checked
+    against existing runs in seconds. Several runs (model versions) are
+    scored together in one pass.
+
+    Args:
+        run_dirs: Run directories written by train.py --backtest
+        group_by: Report per test_season, league and/or month
+    """
+    print(f"📊 Scoring {len(run_dirs)} backtest run(s)")
+    metrics = score_backtest(run_dirs, by=group_by)
+    print(metrics.to_string(index=False, float_format="%.4f"))
     return metrics
 
 
+def calculate_metrics(y_true, y_pred, model_type="WIN_PROBABILITY"):
+    """
+    Calculate all evaluation metrics.
+
+    Returns:
+        dict: log_loss, brier_score, accuracy, calibration_error (ECE) and
+            mce for win probabilities; mae, rmse for spread/total
+    """
+    return model_metrics(model_type, y_true, y_pred)
+
+
 def plot_calibration(y_true, y_pred, save_path: str):
     """Generate calibration plot."""
     print(f"📊 Generating calibration plot...")
     
-    # TODO: Calculate calibration curve
-    # from sklearn.calibration import calibration_curve
-    # prob_true, prob_pred = calibration_curve(y_true, y_pred, n_bins=10)
-    
-    # TODO: Plot
-    # plt.figure(figsize=(10, 6))
-    # plt.plot(prob_pred, prob_true, marker='o')
-    # plt.plot([0, 1], [0, 1], linestyle='--', color='gray')
-    # plt.xlabel('Predicted Probability')
-    # plt.ylabel('Actual Outcome Rate')
-    # plt.title('Calibration Plot')
-    # plt.savefig(save_path)
-    
-    pass
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    bins = calibration_curve(y_true, y_pred)
+    bins = bins[bins["count"] > 0]
+
+    Path(save_path).parent.mkdir(parents=True, exist_ok=True)
+    plt.figure(figsize=(10, 6))
+    plt.plot(bins["predicted"], bins["observed"], marker='o')
+    plt.plot([0, 1], [0, 1], linestyle='--', color='gray')
+    plt.xlabel('Predicted Probability')
+    plt.ylabel('Actual Outcome Rate')
+    plt.title('Calibration Plot')
+    plt.savefig(save_path)
+    plt.close()
+    return bins
 
 
 def plot_feature_importance(model, save_path: str):
@@ -116,18 +147,34 @@ def main():
     parser = argparse.ArgumentParser(description="Evaluate ML model")
     parser.add_argument(
         "--model-id",
-        required=True,
         help="ID of model in registry"
     )
     parser.add_argument(
         "--test-data",
-        required=True,
         help="Path to test data"
     )
+    parser.add_argument(
+        "--backtest",
+        nargs="+",
+        default=None,
+        help="Backtest run directories to re-score from cached fold predictions"
+    )
+    parser.add_argument(
+        "--group-by",
+        nargs="+",
+        default=["test_season"],
+        choices=["test_season", "league", "month"],
+        help="Backtest report groups"
+    )
     
     args = parser.parse_args()
     
-    evaluate_model(args.model_id, args.test_data)
+    if args.backtest:
+        evaluate_backtest(args.backtest, args.group_by)
+    elif args.model_id and args.test_data:
+        evaluate_model(args.model_id, args.test_data)
+    else:
+        parser.error("--model-id and --test-data are required (or use --backtest)")
     
     print("\n✨ Evaluation complete!")
 
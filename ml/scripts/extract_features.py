@@ -3,91 +3,846 @@
 Feature Extraction Script
 
 Extracts features from the database for model training.
-This is a STUB - full implementation pending.
 
 Usage:
     python extract_features.py --start-date 2021-10-01 --end-date 2024-12-01
+    python extract_features.py --start-date 2015-10-01 --end-date 2024-12-01 \
+        --stream --output data/features
+    python extract_features.py --start-date 2021-10-01 --end-date 2024-12-01 \
+        --store data/feature_store.sqlite
+    python extract_features.py --start-date 2015-10-01 --end-date 2024-12-01 --workers 16
+    python extract_features.py --start-date 2021-10-01 --end-date 2024-12-01 \
+        --elo-checkpoint models/elo.npz --form-checkpoint models/form.npz \
+        --h2h-checkpoint models/h2h.npz
+    python extract_features.py --start-date 2021-10-01 --end-date 2024-12-01 --skip-odds
+    python extract_features.py --start-date 2021-10-01 --end-date 2024-12-01 \
+        --odds-archive data/odds_archive
+    python extract_features.py --start-date 2021-10-01 --end-date 2024-12-01 \
+        --profile logs/extract_features.prof
+    python extract_features.py --start-date 2015-10-01 --end-date 2024-12-01 \
+        --team-state models/team_state.npz --verify-team-state
 """
 
 import argparse
-from datetime import datetime
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 
-def extract_features(start_date: str, end_date: str, output_path: str):
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from db import (  # noqa: E402
+    connection,
+    fetch_games_arrow,
+    fetch_prediction_times,
+    stream_games,
+    stream_odds,
+)
+from features import (  # noqa: E402
+    FEATURE_VERSION,
+    EloEngine,
+    FormTracker,
+    HeadToHeadIndex,
+    rolling_last_n_games,
+)
+from features.matchup import H2H_LAST_MEETINGS  # noqa: E402
+from features.odds import (  # noqa: E402
+    CLOSING_LINE_COLUMNS,
+    ODDS_FEATURE_COLUMNS,
+    odds_features,
+    prediction_cutoffs,
+)
+from features.recent_performance import FORM_STATS  # noqa: E402
+from features.team_state import TeamState  # noqa: E402
+from features.schedule import (  # noqa: E402
+    game_locations,
+    load_venue_coordinates,
+    schedule_features,
+)
+from features.game_log import (  # noqa: E402
+    NOT_PLAYED,
+    completed_mask,
+    games_frame,
+    history_tail,
+    season_of,
+)
+from monitoring import RunRecorder, add_run_arguments, stage  # noqa: E402
+from storage import FeatureStore, OddsArchive  # noqa: E402
+
+RECENT_WINDOWS = (5, 10)
+SCHEDULE_CONTEXT_DAYS = 7  # Covers the 6-day density window in any timezone
+DEFAULT_CHUNK_SIZE = 5_000
+DEFAULT_ROW_GROUP_SIZE = 50_000
+ODDS_GAMES_PER_CHUNK = 500
+DEFAULT_ODDS_ARCHIVE = "data/odds_archive"
+HISTORY_START = "1900-01-01"  # Engine replays read the whole Game table
+
+
+def extract_features(
+    start_date: str,
+    end_date: str,
+    output_path: str,
+    stream: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    elo_checkpoint: str = None,
+    store_path: str = None,
+    workers: int = 1,
+    venues_path: str = None,
+    form_checkpoint: str = None,
+    h2h_checkpoint: str = None,
+    odds: bool = True,
+    odds_archive: str = DEFAULT_ODDS_ARCHIVE,
+    team_state: str = None,
+    verify_state: bool = False,
+):
     """
     Extract features for games in the specified date range.
-    
+
     Args:
         start_date: Start date (YYYY-MM-DD)
         end_date: End date (YYYY-MM-DD)
-        output_path: Path to save features
+        output_path: Path to save features (a directory in stream mode)
+        stream: Process games in chunks and write partitioned Parquet
+        chunk_size: Games fetched per chunk
+        row_group_size: Rows per Parquet row group in stream mode
+        elo_checkpoint: Optional EloEngine checkpoint to resume from and update
+        store_path: Optional feature store; only stale games are recomputed
+            and the output is read back from the store
+        workers: Worker processes for per league/season feature stages
+        venues_path: Optional venue coordinate CSV for travel distance
+        form_checkpoint: Optional FormTracker checkpoint to resume from and
+            update
+        h2h_checkpoint: Optional HeadToHeadIndex checkpoint to resume from
+            and update
+        odds: Join point-in-time odds features from OddsSnapshot
+        odds_archive: Compacted odds archive (compact_odds.py) read before
+            the database; only newer snapshots are queried
+        team_state: Optional TeamState snapshot to resume from and advance
+            with the range's FINAL games (daily_predictions serves from it)
+        verify_state: Check TeamState features for the range's unplayed
+            games against the batch extractor (not in stream mode)
     """
     print(f"🔄 Extracting features from {start_date} to {end_date}")
-    
-    # TODO: Connect to database
-    # db = connect_to_postgres()
-    
-    # TODO: Fetch games
-    # games = db.query("""
-    #     SELECT * FROM Game 
-    #     WHERE startTime >= %s AND startTime <= %s
-    # """, (start_date, end_date))
-    
-    # TODO: Calculate features for each game
-    features = []
-    
-    # Feature categories to implement:
-    # 1. Team strength (ELO, win rate, ratings)
-    # 2. Schedule (rest days, back-to-back)
-    # 3. Recent performance (last 5/10 games)
-    # 4. Matchup history
-    # 5. Situational (home/away)
-    # 6. Injury impact (placeholder)
-    
+
+    elo = _load_elo(elo_checkpoint)
+    form = _load_form(form_checkpoint)
+    h2h = _load_h2h(h2h_checkpoint)
+    state = _load_team_state(team_state)
+    venues = load_venue_coordinates(venues_path) if venues_path else None
+    archive = OddsArchive(odds_archive) if odds_archive else None
+    builder = FeatureBuilder(
+        elo, workers=workers, venue_coordinates=venues, form=form, h2h=h2h
+    )
+    total = 0
+
+    with connection() as conn:
+        if stream:
+            writer = PartitionedParquetWriter(output_path, row_group_size)
+            chunks = 0
+            try:
+                with stage("stream") as step:
+                    for chunk in stream_games(conn, start_date, end_date, chunk_size):
+                        features = builder.build(chunk)
+                        if team_state:
+                            state.update(chunk, venues)
+                        if odds:
+                            features = add_odds_features(conn, features, archive=archive)
+                        writer.write(features)
+                        total += len(features)
+                        chunks += 1
+                        print(f"   ... {total} games")
+                    step.rows_out = total
+                    step.note(chunks=chunks)
+            except BaseException:
+                writer.abort()  # Leave the existing partitions as they were
+                raise
+            writer.close()
+        else:
+            with stage("fetch_games") as step:
+                games = games_frame(fetch_games_arrow(conn, start_date, end_date).to_pandas())
+                step.rows_out = len(games)
+            if verify_state:
+                with stage("verify_team_state"):
+                    mismatched = verify_team_state(games, venues)
+                if mismatched:
+                    raise RuntimeError(f"TeamState differs from the batch features: {mismatched}")
+                print("   TeamState matches the batch features bit for bit")
+            if team_state:
+                state.update(games, venues)
+            with stage("features") as step:
+                step.rows_in = len(games)
+                if store_path:
+                    with FeatureStore(store_path, FEATURE_VERSION) as store:
+                        refreshed = refresh_feature_store(
+                            store, games, elo, workers=workers, venue_coordinates=venues,
+                            form=form, h2h=h2h,
+                            history=lambda: games_frame(
+                                fetch_games_arrow(conn, HISTORY_START, end_date).to_pandas()
+                            ),
+                        )
+                        print(f"   Recomputed {refreshed} stale games")
+                        features = store.read(games["id"])
+                    step.note(recomputed=refreshed)
+                else:
+                    features = builder.build(games)
+                step.rows_out = len(features)
+            if odds:
+                with stage("odds") as step:
+                    step.rows_in = len(features)
+                    features = add_odds_features(conn, features, archive=archive)
+            total = len(features)
+            with stage("write") as step:
+                features.to_parquet(output_path, index=False)
+                step.rows_out = total
+
+    with stage("save_checkpoints"):
+        if elo_checkpoint:
+            elo.save(elo_checkpoint)
+        if form_checkpoint:
+            form.save(form_checkpoint)
+        if h2h_checkpoint:
+            h2h.save(h2h_checkpoint)
+        if team_state:
+            state.save(team_state)
+
     print("✅ Features extracted")
-    print(f"   Total games: {len(features)}")
+    print(f"   Total games: {total}")
     print(f"   Saved to: {output_path}")
-    
-    # TODO: Save to parquet
-    # df.to_parquet(output_path)
-
-
-def calculate_elo_ratings():
-    """Calculate ELO ratings for all teams."""
-    print("📊 Calculating ELO ratings...")
-    
-    # TODO: Implement ELO system
-    # - Initial rating: 1500
-    # - K-factor: 20-40 depending on league
-    # - Update after each game
-    # - Store in database or cache
-    
-    pass
-
-
-def calculate_rest_days():
-    """Calculate rest days since last game."""
-    print("⏰ Calculating rest days...")
-    
-    # TODO: For each team in each game
-    # - Find their previous game
-    # - Calculate days between
-    # - Flag back-to-back (0 days)
-    
-    pass
-
-
-def calculate_recent_performance():
-    """Calculate last N games performance."""
-    print("📈 Calculating recent performance...")
-    
-    # TODO: For each team in each game
-    # - Get last 5/10 games before this game
-    # - Calculate: wins, PPG, opponent PPG, point diff
-    # - Split by home/away
-    
-    pass
+
+
+class FeatureBuilder:
+    """
+    Builds feature rows chunk by chunk, carrying state across chunks.
+
+    Elo ratings, streak/momentum and head-to-head history live in an
+    EloEngine, a FormTracker and a HeadToHeadIndex that are updated in
+    place. For rolling windows the builder keeps only each team's last few
+    completed games (history_tail) and prepends them to the next chunk, so
+    chunks can be any size without changing the output.
+    """
+
+    def __init__(
+        self, elo=None, windows=RECENT_WINDOWS, workers=1, venue_coordinates=None, form=None,
+        h2h=None,
+    ):
+        self.elo = elo if elo is not None else EloEngine()
+        self.form = form if form is not None else FormTracker()
+        self.h2h = h2h if h2h is not None else HeadToHeadIndex()
+        self.windows = tuple(windows)
+        self.workers = workers
+        self.venue_coordinates = venue_coordinates
+        self.context = None
+
+    def build(self, chunk):
+        """
+        Compute features for the games in one chunk.
+
+        Args:
+            chunk: DataFrame of Game rows, later than all previous chunks
+
+        Returns:
+            DataFrame: One feature row per game in the chunk
+        """
+        chunk = games_frame(chunk)
+        if self.context is None or self.context.empty:
+            frame = chunk
+        else:
+            frame = games_frame(pd.concat([self.context, chunk], ignore_index=True))
+
+        features = compute_game_features(
+            frame, self.elo, self.windows, self.workers, self.venue_coordinates, self.form,
+            self.h2h,
+        )
+        self.context = history_tail(frame, max(self.windows), SCHEDULE_CONTEXT_DAYS)
+        features = features[features["id"].isin(chunk["id"]).to_numpy()]
+        return features.reset_index(drop=True)
+
+
+def refresh_feature_store(
+    store, games_df, elo, windows=RECENT_WINDOWS, workers=1, venue_coordinates=None, form=None,
+    h2h=None, history=None,
+):
+    """
+    Recompute and persist features for stale games only.
+
+    Games are stale when they are new, their status/scores changed, their
+    stored row is from another FEATURE_VERSION, or an earlier stale game
+    feeds into them. Fresh rows are left untouched.
+
+    The engines only ever append games, so a game whose result changed after
+    it was folded into elo, form or h2h (a score correction) cannot be
+    recomputed from them. The engines are then reset and replayed from the
+    full history up to the first stale game before the stale games are
+    recomputed, so the run still finishes and the updated engines match a
+    from-scratch build.
+
+    Args:
+        store: FeatureStore
+        games_df: Output of games_frame(), including enough history for
+            the rolling windows (Elo comes from the engine's checkpoint)
+        elo: EloEngine, updated in place
+        windows: Last-N-games window sizes
+        workers: Worker processes (see compute_game_features)
+        venue_coordinates: {venue: (latitude, longitude)} for travel
+        form: FormTracker, updated in place (default: a fresh tracker)
+        h2h: HeadToHeadIndex, updated in place (default: a fresh index)
+        history: Callable returning the games_frame() of every game up to
+            the end of games_df, read only to replay the engines after a
+            score correction (default: games_df holds the whole history)
+
+    Returns:
+        int: Number of games recomputed
+    """
+    stale = store.stale_mask(games_df)
+    if not stale.any():
+        return 0
+
+    form = form if form is not None else FormTracker()
+    h2h = h2h if h2h is not None else HeadToHeadIndex()
+    first_stale = np.argmax(stale)
+    changed = games_df["id"][store.changed_mask(games_df)]
+    if any(game_id in engine for engine in (elo, form, h2h) for game_id in changed):
+        print("   A folded game changed; replaying ELO/form/head-to-head from the full history")
+        full = history() if history is not None else games_df
+        _replay(full, games_df.iloc[first_stale], elo, form, h2h)
+
+    # Only the stale games plus the history their windows need; earlier
+    # games just advance the ELO engine, form tracker and head-to-head index
+    # (games they have already seen are skipped)
+    form = form if form is not None else FormTracker()
+    h2h = h2h if h2h is not None else HeadToHeadIndex()
+    first_stale = np.argmax(stale)
+    prior = games_df.iloc[:first_stale].to_dict("records")
+    elo.update(prior)
+    form.update(prior)
+    h2h.update(prior)
+    context = history_tail(games_df.iloc[:first_stale], max(windows), SCHEDULE_CONTEXT_DAYS)
+    frame = games_frame(pd.concat([context, games_df.iloc[first_stale:]], ignore_index=True))
+
+    features = compute_game_features(
+        frame, elo, windows, workers, venue_coordinates, form, h2h
+    )
+    fingerprints = store.fingerprints(frame)
+    keep = features["id"].isin(games_df["id"][stale]).to_numpy()
+    store.write(features[keep], fingerprints[keep])
+    return int(keep.sum())
+
+
+def _replay(games_df, until, *engines):
+    """Reset the engines and fold in the games ordered before `until`."""
+    start = games_df["startTime"].to_numpy()
+    until_start = np.datetime64(until["startTime"], "ms")
+    same_start = (start == until_start) & (games_df["id"] < until["id"]).to_numpy()
+    before = (start < until_start) | same_start
+    prior = games_df[before].to_dict("records")
+    for engine in engines:
+        engine.reset()
+        engine.update(prior)
+
+
+def compute_game_features(
+    games_df, elo, windows=RECENT_WINDOWS, workers=1, venue_coordinates=None, form=None,
+    h2h=None,
+):
+    """
+    Compute the feature table for a chronologically sorted game frame.
+
+    ELO, streak/momentum and head-to-head history are sequential pre-passes
+    in this process. The per-team stages are
+    independent between leagues and (given each team's previous games as
+    context) between seasons, so with workers > 1 they run in a process pool
+    per league/season and are merged back in game order; the result is
+    identical to a single-process run.
+
+    Args:
+        games_df: Output of games_frame()
+        elo: EloEngine, updated in place with FINAL games
+        windows: Last-N-games window sizes
+        workers: Worker processes for the per league/season stages
+        venue_coordinates: {venue: (latitude, longitude)} for travel
+        form: FormTracker, updated in place (default: a fresh tracker)
+        h2h: HeadToHeadIndex, updated in place (default: a fresh index)
+
+    Returns:
+        DataFrame: Identifiers, targets and features per game
+    """
+    league = _league_column(games_df)
+    home_score = games_df["homeScore"].to_numpy()
+    away_score = games_df["awayScore"].to_numpy()
+    done = completed_mask(games_df)
+
+    features = pd.DataFrame({
+        "id": games_df["id"].to_numpy(),
+        "league": league.to_numpy(),
+        "season": season_of(games_df["startTime"]),
+        "startTime": games_df["startTime"].to_numpy(),
+        "homeTeamId": games_df["homeTeamId"].to_numpy(),
+        "awayTeamId": games_df["awayTeamId"].to_numpy(),
+        "status": games_df["status"].to_numpy(),
+        # Targets (NaN until the game is FINAL)
+        "home_win": np.where(done, (home_score > away_score).astype(np.float64), np.nan),
+        "spread": np.where(done, away_score - home_score, np.nan),
+        "total": np.where(done, home_score + away_score, np.nan),
+    })
+
+    home_elo, away_elo = calculate_elo_features(elo, games_df)
+    features["home_elo"] = home_elo
+    features["away_elo"] = away_elo
+    features["elo_diff"] = home_elo - away_elo
+
+    form = form if form is not None else FormTracker()
+    home_form, away_form = calculate_form_features(form, games_df)
+    for i, stat in enumerate(FORM_STATS):
+        features[f"home_{stat}"] = home_form[:, i]
+        features[f"away_{stat}"] = away_form[:, i]
+
+    h2h = h2h if h2h is not None else HeadToHeadIndex()
+    matchup = calculate_matchup_features(h2h, games_df)
+    features = pd.concat([features, matchup.drop(columns="id")], axis=1)
+
+    if workers > 1:
+        team_features = _calculate_partitioned(games_df, windows, workers, venue_coordinates)
+    else:
+        team_features = calculate_team_features(games_df, windows, venue_coordinates)
+    return pd.concat([features, team_features.drop(columns="id")], axis=1)
+
+
+def verify_team_state(games_df, venue_coordinates=None, windows=RECENT_WINDOWS):
+    """
+    Compare TeamState serving features with the batch extractor, bit for bit.
+
+    A TeamState and HeadToHeadIndex are built from the frame's games up to
+    its last FINAL game; the later (unplayed) games are then featurized from
+    the state and by compute_game_features over the whole frame.
+
+    Args:
+        games_df: Output of games_frame(), from the start of the history
+        venue_coordinates: {venue: (latitude, longitude)} for travel
+        windows: Last-N-games window sizes
+
+    Returns:
+        list: Columns whose values (or bit patterns) differ; empty if none
+    """
+    start = games_df["startTime"].to_numpy()
+    final = games_df["status"].to_numpy() == "FINAL"
+    if not final.any():
+        return []
+    upcoming = start > start[final].max()
+    history = games_df[~upcoming]
+
+    state = TeamState(windows=windows)
+    state.update(history, venue_coordinates)
+    h2h = HeadToHeadIndex()
+    h2h.update(history.to_dict("records"))
+    served = state.features(games_df[upcoming], h2h, venue_coordinates)
+
+    batch = compute_game_features(games_df, EloEngine(), windows, 1, venue_coordinates)
+    batch = batch[upcoming].reset_index(drop=True)
+    if list(batch.columns) != list(served.columns):
+        return sorted(set(batch.columns) ^ set(served.columns))
+
+    mismatched = []
+    for column in batch.columns:
+        expected, actual = batch[column].to_numpy(), served[column].to_numpy()
+        if expected.dtype.kind == "f" or actual.dtype.kind == "f":
+            expected = expected.astype(np.float64)
+            actual = actual.astype(np.float64)
+            missing = np.isnan(expected)
+            # Same NaN positions and identical bit patterns everywhere else
+            same = np.array_equal(missing, np.isnan(actual)) and np.array_equal(
+                expected[~missing].view(np.int64), actual[~missing].view(np.int64)
+            )
+        else:
+            same = np.array_equal(expected, actual)
+        if not same:
+            mismatched.append(column)
+    return mismatched
+
+
+def calculate_elo_features(elo, games_df):
+    """
+    Pre-game ELO ratings for both teams of every game.
+
+    Games are fed to the engine in order, so each game sees exactly the
+    ratings produced by the games before it. Games that are not FINAL get the
+    teams' ratings at that point in time.
+
+    Returns:
+        tuple: (home_elo, away_elo) arrays aligned with games_df
+    """
+    columns = ["id", "homeTeamId", "awayTeamId", "startTime", "status", "homeScore", "awayScore"]
+    games = games_df[columns].to_dict("records")
+    home_elo = np.empty(len(games))
+    away_elo = np.empty(len(games))
+
+    for i, game in enumerate(games):
+        if game["id"] not in elo:
+            elo.update([game])
+        if game["id"] in elo:
+            home_elo[i], away_elo[i] = elo.pre_game_ratings(game["id"])
+        else:
+            home_elo[i] = elo.rating(game["homeTeamId"])
+            away_elo[i] = elo.rating(game["awayTeamId"])
+
+    return home_elo, away_elo
+
+
+def calculate_form_features(form, games_df):
+    """
+    Pre-game streak and momentum for both teams of every game.
+
+    Like calculate_elo_features, each game is folded into the tracker after
+    its pre-game form is read, in O(1) per game. Games that are not FINAL get
+    the teams' current form.
+
+    Returns:
+        tuple: (home_form, away_form) arrays of shape (n_games, len(FORM_STATS))
+    """
+    columns = ["id", "homeTeamId", "awayTeamId", "startTime", "status", "homeScore", "awayScore"]
+    games = games_df[columns].to_dict("records")
+    home_form = np.empty((len(games), len(FORM_STATS)))
+    away_form = np.empty((len(games), len(FORM_STATS)))
+
+    for i, game in enumerate(games):
+        if game["id"] not in form:
+            form.update([game])
+        if game["id"] in form:
+            home_form[i], away_form[i] = form.pre_game_form(game["id"])
+        else:
+            home_form[i] = form.current(game["homeTeamId"])
+            away_form[i] = form.current(game["awayTeamId"])
+
+    return home_form, away_form
+
+
+def calculate_matchup_features(h2h, games_df, k=H2H_LAST_MEETINGS):
+    """
+    Pre-game head-to-head record for every game, from the home team's view.
+
+    The frame's FINAL games are added to the index first; lookups only count
+    meetings that started strictly before each game, so a game never sees
+    its own result.
+
+    Returns:
+        DataFrame: "id" plus h2h_* columns aligned with games_df
+    """
+    columns = ["id", "homeTeamId", "awayTeamId", "startTime", "status", "homeScore", "awayScore"]
+    h2h.update(games_df[columns].to_dict("records"))
+    return h2h.features(games_df, k)
+
+
+def add_odds_features(
+    conn, features, now=None, games_per_chunk=ODDS_GAMES_PER_CHUNK, archive=None,
+    predicted_at=None,
+):
+    """
+    Join point-in-time odds features onto feature rows.
+
+    Odds are joined at read time rather than kept in the feature store: the
+    as-of line of an upcoming game moves between runs while its game row
+    does not. Each game only sees snapshots up to its prediction cutoff
+    (its stored MLPrediction.predictedAt, otherwise shortly before the
+    start, never after now). A live prediction run passes `predicted_at`
+    instead: every game is cut off at that time, which is the predictedAt
+    its new prediction rows are stored with. Snapshots are read a batch of games at a
+    time, so memory does not grow with the date range. With an odds archive,
+    history comes from its Parquet partitions and only snapshots past its
+    watermark are queried from the database.
+
+    Args:
+        conn: psycopg2 connection
+        features: Feature rows with "id", "league" and "startTime"
+        now: Current time (default: UTC now)
+        games_per_chunk: Games per odds query
+        archive: Optional OddsArchive
+        predicted_at: Time of a live prediction run (naive UTC); replaces
+            the stored prediction times and now
+
+    Returns:
+        DataFrame: features with ODDS_FEATURE_COLUMNS and
+            CLOSING_LINE_COLUMNS (NaN for games without snapshots)
+    """
+    columns = ODDS_FEATURE_COLUMNS + CLOSING_LINE_COLUMNS
+    features = features.drop(columns=[c for c in columns if c in features])
+    games = features[["id", "league", "startTime"]].reset_index(drop=True)
+    if predicted_at is not None:
+        now = predicted_at
+        prediction_times = dict.fromkeys(games["id"], predicted_at)
+    else:
+        prediction_times = fetch_prediction_times(conn, games["id"])
+    cutoffs = prediction_cutoffs(games, prediction_times, now=now)
+    if archive is not None and not archive.exists():
+        archive = None
+    since = archive.watermark if archive is not None else None
+
+    parts = []
+    for start in range(0, len(games), games_per_chunk):
+        batch = games.iloc[start:start + games_per_chunk]
+        snapshots = list(stream_odds(conn, batch["id"], games_per_chunk, since=since))
+        if archive is not None:
+            snapshots.append(archive.read(batch))
+        snapshots = pd.concat([s for s in snapshots if len(s)] or snapshots[:1], ignore_index=True)
+        cutoff = cutoffs[start:start + games_per_chunk]
+        parts.append(odds_features(snapshots, batch, cutoff, now=now))
+
+    odds = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=["id", *columns])
+    return features.merge(odds.astype({c: np.float64 for c in columns}), on="id", how="left")
+
+
+def calculate_team_features(games_df, windows=RECENT_WINDOWS, venue_coordinates=None):
+    """
+    Per-team feature stages (each team's own history, no cross-team state).
+
+    Returns:
+        DataFrame: "id" plus recent-performance and schedule columns, in
+            games_frame() order
+    """
+    recent = calculate_recent_performance(games_df, windows)
+    schedule = calculate_schedule_features(games_df, venue_coordinates)
+    return pd.concat([recent, schedule.drop(columns="id")], axis=1)
+
+
+def calculate_schedule_features(games_df, venue_coordinates=None):
+    """Rest days, back-to-backs, schedule density and travel for every game."""
+    return schedule_features(games_df, venue_coordinates)
+
+
+def calculate_recent_performance(games_df, windows=RECENT_WINDOWS):
+    """Calculate last N games performance for both teams of every game."""
+    return rolling_last_n_games(games_df, windows)
+
+
+def _calculate_partitioned(games_df, windows, workers, venue_coordinates=None):
+    """
+    Run the per-team feature stages per league/season in a process pool.
+
+    Each task ships only compact arrays (int32 team codes, datetime64 start
+    times, float64 scores and coordinates, status flags, row numbers) for
+    one league/season plus the
+    previous season's tail that its windows need. Results come back as
+    arrays keyed by row number and are scattered into game order.
+    """
+    team_codes, _ = pd.factorize(np.concatenate([
+        games_df["homeTeamId"].to_numpy(dtype=object),
+        games_df["awayTeamId"].to_numpy(dtype=object),
+    ]))
+    n = len(games_df)
+    latitude, longitude = game_locations(games_df, venue_coordinates)
+    arrays = {
+        "row": np.arange(n, dtype=np.int64),
+        "home": team_codes[:n].astype(np.int32),
+        "away": team_codes[n:].astype(np.int32),
+        "start": games_df["startTime"].to_numpy(dtype="datetime64[ms]"),
+        "home_score": games_df["homeScore"].to_numpy(dtype=np.float64),
+        "away_score": games_df["awayScore"].to_numpy(dtype=np.float64),
+        "latitude": latitude,
+        "longitude": longitude,
+        "completed": completed_mask(games_df),
+        "played": ~games_df["status"].isin(NOT_PLAYED).to_numpy(),
+    }
+
+    tasks = []
+    partitions = pd.DataFrame({
+        "league": _league_column(games_df).to_numpy(),
+        "season": season_of(games_df["startTime"]),
+    }).groupby(["league", "season"], sort=True).indices
+    previous = {}
+    for (league, season), rows in partitions.items():
+        context = previous.get(league, np.empty(0, dtype=np.int64))
+        task_rows = np.concatenate([context, rows])
+        tasks.append(({k: v[task_rows] for k, v in arrays.items()}, len(context)))
+        tail = history_tail(games_df.iloc[task_rows], max(windows), SCHEDULE_CONTEXT_DAYS)
+        previous[league] = task_rows[np.isin(games_df["id"].to_numpy()[task_rows], tail["id"].to_numpy())]
+
+    columns = None
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for rows, result in pool.map(_partition_features, tasks, repeat(windows)):
+            if columns is None:
+                columns = {name: np.empty(n, dtype=values.dtype) for name, values in result.items()}
+            for name, values in result.items():
+                columns[name][rows] = values
+
+    recent = pd.DataFrame(columns or {})
+    recent.insert(0, "id", games_df["id"].to_numpy())
+    return recent
+
+
+def _partition_features(task, windows):
+    """Worker: per-team features for one league/season task."""
+    arrays, n_context = task
+    games = pd.DataFrame({
+        "id": arrays["row"],
+        "homeTeamId": arrays["home"],
+        "awayTeamId": arrays["away"],
+        "startTime": arrays["start"],
+        "status": np.where(
+            arrays["completed"], "FINAL", np.where(arrays["played"], "SCHEDULED", "CANCELLED")
+        ),
+        "homeScore": arrays["home_score"],
+        "awayScore": arrays["away_score"],
+        "latitude": arrays["latitude"],
+        "longitude": arrays["longitude"],
+    })
+    recent = calculate_team_features(games, windows)
+
+    rows = recent["id"].to_numpy()
+    target = np.isin(rows, arrays["row"][n_context:])
+    result = {
+        name: recent[name].to_numpy()[target]
+        for name in recent.columns if name != "id"
+    }
+    return rows[target], result
+
+
+def _league_column(games_df):
+    return games_df["league"] if "league" in games_df else games_df["leagueId"]
+
+
+class PartitionedParquetWriter:
+    """
+    Writes feature rows as a league=/season= partitioned Parquet dataset.
+
+    Rows are buffered per partition and written in row groups of exactly
+    row_group_size rows (the last group of each file may be smaller), so
+    readers can skip row groups using startTime statistics.
+
+    Each partition is written to a hidden temporary file and only renamed
+    over league=/season=/part-0.parquet by close(), so readers never see a
+    half-written file and abort() leaves the dataset untouched. Rows of an
+    existing partition whose game ids were not rewritten are kept, so a
+    date range that covers part of a season updates it instead of
+    truncating it.
+    """
+
+    def __init__(self, root, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+        self.root = Path(root)
+        self.row_group_size = row_group_size
+        self.schema = None
+        self._writers = {}
+        self._buffers = {}
+
+    def write(self, features):
+        """Buffer a feature chunk and flush any full row groups."""
+        if features.empty:
+            return
+        for (league, season), part in features.groupby(["league", "season"], sort=False):
+            table = pa.Table.from_pandas(
+                part.drop(columns=["league", "season"]), preserve_index=False
+            )
+            if self.schema is None:
+                self.schema = table.schema
+            key = (str(league), int(season))
+            self._buffers.setdefault(key, []).append(table.cast(self.schema))
+            self._flush(key, final=False)
+
+    def close(self):
+        """
+        Flush remaining rows and publish every partition.
+
+        Raises:
+            ValueError: An existing partition keeps rows but has another
+                schema (e.g. an older FEATURE_VERSION); rerun whole seasons
+        """
+        for key in list(self._buffers):
+            self._flush(key, final=True)
+        self._buffers.clear()
+        for writer in self._writers.values():
+            writer.close()
+        try:
+            for key in list(self._writers):
+                self._publish(key)
+        finally:
+            self.abort()
+
+    def abort(self):
+        """Close and delete the unpublished partition files."""
+        for key, writer in self._writers.items():
+            writer.close()
+            self._temp_path(key).unlink(missing_ok=True)
+        self._writers.clear()
+        self._buffers.clear()
+
+    def _path(self, key):
+        league, season = key
+        return self.root / f"league={league}" / f"season={season}" / "part-0.parquet"
+
+    def _temp_path(self, key):
+        path = self._path(key)
+        return path.with_name(f".{path.name}.tmp")  # Hidden from dataset readers
+
+    def _flush(self, key, final):
+        buffered = pa.concat_tables(self._buffers[key])
+        full = len(buffered) if final else len(buffered) - len(buffered) % self.row_group_size
+        if full == 0:
+            self._buffers[key] = [buffered]
+            return
+
+        writer = self._writers.get(key)
+        if writer is None:
+            path = self._temp_path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            writer = pq.ParquetWriter(path, self.schema)
+            self._writers[key] = writer
+
+        writer.write_table(buffered.slice(0, full), row_group_size=self.row_group_size)
+        self._buffers[key] = [buffered.slice(full)]
+
+    def _publish(self, key):
+        path, tmp = self._path(key), self._temp_path(key)
+        if path.exists():
+            existing = pq.read_table(path)
+            written = pq.read_table(tmp)
+            kept = existing.filter(pc.invert(pc.is_in(existing["id"], value_set=written["id"])))
+            if len(kept):
+                if not kept.schema.equals(written.schema):
+                    raise ValueError(
+                        f"{path} has another schema; rerun whole seasons to replace it"
+                    )
+                merged = pa.concat_tables([kept, written])
+                merged = merged.sort_by([("startTime", "ascending"), ("id", "ascending")])
+                pq.write_table(merged, tmp, row_group_size=self.row_group_size)
+        os.replace(tmp, path)
+        del self._writers[key]
+
+
+def _load_elo(checkpoint):
+    if checkpoint and Path(checkpoint).exists():
+        elo = EloEngine.load(checkpoint)
+        print(f"   Resuming ELO from {checkpoint} ({len(elo)} rated games)")
+        return elo
+    return EloEngine()
+
+
+def _load_form(checkpoint):
+    if checkpoint and Path(checkpoint).exists():
+        form = FormTracker.load(checkpoint)
+        print(f"   Resuming form from {checkpoint} ({len(form)} games)")
+        return form
+    return FormTracker()
+
+
+def _load_h2h(checkpoint):
+    if checkpoint and Path(checkpoint).exists():
+        h2h = HeadToHeadIndex.load(checkpoint)
+        print(f"   Resuming head-to-head index from {checkpoint} ({len(h2h)} games)")
+        return h2h
+    return HeadToHeadIndex()
+
+
+def _load_team_state(checkpoint):
+    if checkpoint and Path(checkpoint).exists():
+        state = TeamState.load(checkpoint)
+        print(f"   Resuming team state from {checkpoint} ({len(state)} teams)")
+        return state
+    return TeamState(windows=RECENT_WINDOWS)
 
 
 def main():
@@ -104,21 +859,121 @@ def main():
     )
     parser.add_argument(
         "--output",
-        default="data/features.parquet",
-        help="Output path for features"
+        default=None,
+        help="Output path for features (default: data/features.parquet, "
+             "or data/features/ with --stream)"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream games in chunks and write Parquet partitioned by league/season"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Games fetched per chunk"
+    )
+    parser.add_argument(
+        "--row-group-size",
+        type=int,
+        default=DEFAULT_ROW_GROUP_SIZE,
+        help="Rows per Parquet row group (stream mode)"
+    )
+    parser.add_argument(
+        "--elo-checkpoint",
+        default=None,
+        help="ELO checkpoint (.npz) to resume from and update"
+    )
+    parser.add_argument(
+        "--form-checkpoint",
+        default=None,
+        help="Streak/momentum checkpoint (.npz) to resume from and update"
+    )
+    parser.add_argument(
+        "--h2h-checkpoint",
+        default=None,
+        help="Head-to-head index checkpoint (.npz) to resume from and update"
     )
-    
+    parser.add_argument(
+        "--team-state",
+        default=None,
+        help="Team state snapshot (.npz) to resume from and advance (served by "
+             "daily_predictions.py)"
+    )
+    parser.add_argument(
+        "--verify-team-state",
+        action="store_true",
+        help="Check the team state serving features against the batch features"
+    )
+    parser.add_argument(
+        "--skip-odds",
+        action="store_true",
+        help="Do not join point-in-time odds features from OddsSnapshot"
+    )
+    parser.add_argument(
+        "--odds-archive",
+        default=DEFAULT_ODDS_ARCHIVE,
+        help="Compacted odds archive (compact_odds.py); only snapshots past its "
+             "watermark are read from the database"
+    )
+    parser.add_argument(
+        "--store",
+        default=None,
+        help="Feature store (SQLite) for incremental refresh; only new, "
+             "changed or outdated games are recomputed"
+    )
+    parser.add_argument(
+        "--venues",
+        default=None,
+        help="Venue coordinate CSV (venue,latitude,longitude) for travel distance"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes; per-team features run per league/season in parallel"
+    )
+
+    add_run_arguments(parser)
+
     args = parser.parse_args()
-    
+    if args.stream and args.store:
+        parser.error("--store cannot be combined with --stream")
+    if args.stream and args.verify_team_state:
+        parser.error("--verify-team-state cannot be combined with --stream")
+
+    output = args.output or ("data/features" if args.stream else "data/features.parquet")
+
     # Create output directory
-    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
-    
+    if args.stream:
+        Path(output).mkdir(parents=True, exist_ok=True)
+    else:
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+
     # Extract features
-    extract_features(args.start_date, args.end_date, args.output)
-    
+    with RunRecorder("extract_features", args.metrics, args.profile):
+        extract_features(
+            args.start_date,
+            args.end_date,
+            output,
+            stream=args.stream,
+            chunk_size=args.chunk_size,
+            row_group_size=args.row_group_size,
+            elo_checkpoint=args.elo_checkpoint,
+            store_path=args.store,
+            workers=args.workers,
+            venues_path=args.venues,
+            form_checkpoint=args.form_checkpoint,
+            h2h_checkpoint=args.h2h_checkpoint,
+            odds=not args.skip_odds,
+            odds_archive=args.odds_archive,
+            team_state=args.team_state,
+            verify_state=args.verify_team_state,
+        )
+
     print("\n✨ Feature extraction complete!")
 
 
 if __name__ == "__main__":
     main()
-
@@ -2,16 +2,30 @@
 """
 Batch Prediction Script
 
-Generates predictions for upcoming games using the active model.
-This is a STUB - full implementation pending.
+Generates and stores predictions for one day's games with the active (or a
+given) registry model.
 
 Usage:
     python predict.py --model-id <model-id> --date 2024-12-25
-    python predict.py --model-id auto --date 2024-12-25  # Use active model
+    python predict.py --model-id auto --date 2024-12-25  # Every ACTIVE model
 """
 
 import argparse
-from datetime import datetime, timedelta
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from daily_predictions import (  # noqa: E402
+    extract_features_for_games,
+    generate_batch_predictions,
+    store_predictions,
+    update_model_performance,
+)
+from db import connection, fetch_games_on_date, fetch_model, fetch_models  # noqa: E402
+from monitoring import RunRecorder, add_run_arguments, stage  # noqa: E402
+from serving import ServedModel  # noqa: E402
 
 
 def generate_predictions(model_id: str, date: str):
@@ -19,78 +33,81 @@ def generate_predictions(model_id: str, date: str):
     Generate predictions for games on the specified date.
     
     Args:
-        model_id: Model ID or 'auto' for active model
+        model_id: Model ID, or 'auto' for every ACTIVE model (one per type)
         date: Date to predict (YYYY-MM-DD)
     """
     print(f"🔮 Generating predictions for {date}")
     
-    # TODO: Get active model if model_id='auto'
-    if model_id == "auto":
-        # model = db.query("SELECT * FROM MLModel WHERE status = 'ACTIVE' ORDER BY trainedAt DESC LIMIT 1")
-        print("   Using active model")
-    else:
-        print(f"   Using model: {model_id}")
-    
-    # TODO: Fetch upcoming games
-    # games = db.query("""
-    #     SELECT * FROM Game 
-    #     WHERE DATE(startTime) = %s 
-    #     AND status = 'SCHEDULED'
-    # """, (date,))
-    
-    games = []  # Placeholder
+    auto = model_id == "auto"
+    with stage("fetch_games") as step, connection() as conn:
+        if auto:
+            active = {}
+            for row in fetch_models(conn, ["ACTIVE"]):  # newest first, as served
+                active.setdefault(row["model_type"], row)
+            if not active:
+                raise RuntimeError("No ACTIVE model in the registry")
+            versions = ", ".join(f"{t} {m['version']}" for t, m in sorted(active.items()))
+            print(f"   Using ACTIVE models: {versions}")
+        else:
+            model = fetch_model(conn, model_id)
+            if model is None:
+                raise RuntimeError(f"Model not found: {model_id}")
+            print(f"   Using model: {model['version']}")
+            model_id = model["id"]
+
+        games = fetch_games_on_date(conn, date).to_dict("records")
+        step.rows_out = len(games)
     print(f"   Found {len(games)} games")
     
-    # TODO: Extract features for each game
-    # features = extract_features_for_games(games)
-    
-    # TODO: Load model and generate predictions
-    # model = load_model(model_path)
-    # predictions = model.predict(features)
-    
-    predictions = []  # Placeholder
-    
-    # TODO: Store predictions in database
-    # for game, pred in zip(games, predictions):
-    #     db.mlprediction.create({
-    #         'model_id': model_id,
-    #         'game_id': game.id,
-    #         'home_win_prob': pred['home_win_prob'],
-    #         'away_win_prob': pred['away_win_prob'],
-    #         'spread_pred': pred['spread'],
-    #         'total_pred': pred['total'],
-    #         'predicted_at': datetime.now(),
-    #     })
+    # Features for each game (read from the feature store), odds as of the
+    # predictedAt the predictions are stored with
+    predicted_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    with stage("extract_features") as step:
+        step.rows_in = len(games)
+        features = extract_features_for_games(games, predicted_at)
+        step.rows_out = len(features)
+    
+    # "auto": every ACTIVE model (one per type, served warm by the model
+    # server) writes its own rows; any other model is loaded for this run only
+    with stage("predict") as step:
+        step.rows_in = len(features)
+        if auto:
+            predictions = generate_batch_predictions(features)
+        else:
+            served = ServedModel.load(model)
+            predictions = [
+                {**pred, 'model_id': model_id, 'game_id': row['id'], 'game_start_time': row['startTime']}
+                for row, pred in zip(features, served.predict_rows(features))
+            ]
+        step.rows_out = len(predictions)
+    
+    # Store predictions in database (one COPY + upsert for the whole batch)
+    with stage("store_predictions") as step:
+        step.rows_in = len(predictions)
+        store_predictions(predictions, predicted_at)
     
     print(f"✅ Predictions generated and stored")
     
     # TODO: Display predictions
     for i, pred in enumerate(predictions[:5]):  # Show first 5
         print(f"\n   Game {i+1}:")
-        print(f"      Home Win Prob: {pred.get('home_win_prob', 0):.1%}")
-        print(f"      Spread: {pred.get('spread', 0):.1f}")
-        print(f"      Total: {pred.get('total', 0):.1f}")
+        print(f"      Home Win Prob: {pred.get('home_win_prob') or 0:.1%}")
+        print(f"      Spread: {pred.get('spread_pred') or 0:.1f}")
+        print(f"      Total: {pred.get('total_pred') or 0:.1f}")
 
 
 def update_model_metrics():
-    """Update model performance metrics after games complete."""
+    """
+    Update model performance metrics after games complete.
+
+    Folds only newly FINAL games into each model's rolling metrics (see
+    daily_predictions.update_model_performance).
+
+    Returns:
+        int: Number of predictions evaluated
+    """
     print("📊 Updating model metrics...")
-    
-    # TODO: Get completed games with predictions
-    # completed = db.query("""
-    #     SELECT p.*, g.homeScore, g.awayScore 
-    #     FROM MLPrediction p
-    #     JOIN Game g ON p.gameId = g.id
-    #     WHERE g.status = 'FINAL'
-    #     AND p.evaluatedAt IS NULL
-    # """)
-    
-    # TODO: Calculate actual log loss, brier score, etc.
-    # for each model
-    
-    # TODO: Update MLModel table with rolling metrics
-    
-    pass
+    return update_model_performance()
 
 
 def main():
@@ -98,7 +115,7 @@ def main():
     parser.add_argument(
         "--model-id",
         default="auto",
-        help="Model ID or 'auto' for active model"
+        help="Model ID or 'auto' for every ACTIVE model"
     )
     parser.add_argument(
         "--date",
@@ -111,10 +128,14 @@ def main():
         help="Update model performance metrics"
     )
     
+    add_run_arguments(parser)
+    
     args = parser.parse_args()
     
     if args.update_metrics:
-        update_model_metrics()
+        with RunRecorder("predict.update_metrics", args.metrics, args.profile):
+            with stage("update_model_performance") as step:
+                step.rows_out = update_model_metrics()
         return
     
     # Default to tomorrow
@@ -123,7 +144,8 @@ def main():
     else:
         date = args.date
     
-    generate_predictions(args.model_id, date)
+    with RunRecorder("predict", args.metrics, args.profile):
+        generate_predictions(args.model_id, date)
     
     print("\n✨ Prediction generation complete!")
 
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Model Server
+
+Long-running local prediction service. Keeps the ACTIVE model of every
+ModelType in memory and swaps in new versions when the registry changes, so
+predict.py, the daily job and the web app skip model loading per call.
+
+Usage:
+    python serve_models.py
+    python serve_models.py --port 8765 --poll-seconds 30
+
+    curl -s localhost:8765/health
+    curl -s -X POST localhost:8765/predict -d '{"rows": [{"id": "...", "elo_diff": 35.0}]}'
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from serving import ModelCache, make_server  # noqa: E402
+from serving.server import DEFAULT_HOST, DEFAULT_POLL_SECONDS, DEFAULT_PORT  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve ACTIVE models over local HTTP")
+    parser.add_argument(
+        "--host",
+        default=DEFAULT_HOST,
+        help="Bind address (local only; the server has no authentication)"
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help="TCP port"
+    )
+    parser.add_argument(
+        "--poll-seconds",
+        type=int,
+        default=DEFAULT_POLL_SECONDS,
+        help="Registry polling interval for hot swaps (0 = only on POST /reload)"
+    )
+
+    args = parser.parse_args()
+
+    cache = ModelCache()
+    server = make_server(cache, args.host, args.port, args.poll_seconds)
+    print(f"🚀 Serving models on http://{args.host}:{args.port}")
+    for model_type, model in sorted(cache.models().items()):
+        print(f"   {model_type}: {model['version']}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
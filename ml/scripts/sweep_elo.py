@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+ELO Parameter Sweep
+
+Scores a grid of ELO parameters (K, home advantage, margin-of-victory
+multiplier, season regression) per league in a single replay of the games
+and reports log loss, Brier score and accuracy for every combination.
+
+Usage:
+    python sweep_elo.py --start-date 2015-10-01 --end-date 2024-07-01
+    python sweep_elo.py --start-date 2015-10-01 --end-date 2024-07-01 \\
+        --league NBA --league NFL --score-from 2017-07-01 --output data/elo_sweep.csv
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from db import connection, fetch_games_arrow  # noqa: E402
+from features.team_strength import ELO_SWEEP_GRID, elo_sweep  # noqa: E402
+
+
+def sweep_elo(start_date, end_date, leagues=None, grid=None, score_from=None, top=10):
+    """
+    Run elo_sweep for every league in a date range.
+
+    Args:
+        start_date: First game day (YYYY-MM-DD)
+        end_date: Last game day (YYYY-MM-DD)
+        leagues: League names to sweep (default: all in the range)
+        grid: {parameter: values} overriding ELO_SWEEP_GRID entries
+        score_from: Only score games from this date (earlier games warm up)
+        top: Combinations printed per league
+
+    Returns:
+        DataFrame: elo_sweep() rows with a "league" column
+    """
+    print(f"📈 Sweeping ELO parameters ({start_date} to {end_date})")
+    with connection() as conn:
+        games = fetch_games_arrow(conn, start_date, end_date).to_pandas()
+    print(f"   Loaded {len(games)} games")
+
+    results = []
+    for league, league_games in games.groupby("league", sort=True):
+        if leagues and league not in leagues:
+            continue
+        result = elo_sweep(league_games, grid=grid, score_from=score_from)
+        result.insert(0, "league", league)
+        results.append(result)
+
+        print(f"\n🏆 {league}: {len(result)} combinations, {result['games'].iloc[0]} games scored")
+        print(result.head(top).drop(columns=["league", "games"]).to_string(index=False))
+
+    return pd.concat(results, ignore_index=True) if results else pd.DataFrame()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score ELO parameter combinations per league")
+    parser.add_argument("--start-date", required=True, help="First game day (YYYY-MM-DD)")
+    parser.add_argument("--end-date", required=True, help="Last game day (YYYY-MM-DD)")
+    parser.add_argument("--league", action="append", help="League to sweep (repeatable; default: all)")
+    parser.add_argument(
+        "--score-from",
+        help="Only score games from this date; earlier seasons warm the ratings up"
+    )
+    parser.add_argument(
+        "--k-factors", type=float, nargs="+", default=list(ELO_SWEEP_GRID["k_factor"])
+    )
+    parser.add_argument(
+        "--home-advantages", type=float, nargs="+", default=list(ELO_SWEEP_GRID["home_advantage"])
+    )
+    parser.add_argument(
+        "--season-regressions", type=float, nargs="+",
+        default=list(ELO_SWEEP_GRID["season_regression"])
+    )
+    parser.add_argument(
+        "--no-margin-multiplier",
+        action="store_true",
+        help="Only sweep plain (win/loss) updates"
+    )
+    parser.add_argument("--top", type=int, default=10, help="Combinations printed per league")
+    parser.add_argument("--output", help="Write every combination to this CSV")
+
+    args = parser.parse_args()
+    grid = {
+        "k_factor": tuple(args.k_factors),
+        "home_advantage": tuple(args.home_advantages),
+        "season_regression": tuple(args.season_regressions),
+    }
+    if args.no_margin_multiplier:
+        grid["margin_multiplier"] = (False,)
+
+    results = sweep_elo(
+        args.start_date, args.end_date, args.league, grid, args.score_from, args.top
+    )
+    if args.output and not results.empty:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        results.to_csv(args.output, index=False)
+        print(f"\n✅ Saved {len(results)} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
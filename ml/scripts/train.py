@@ -2,105 +2,238 @@
 """
 Model Training Script
 
-Trains ML models for win probability, spread, and total predictions.
-This is a STUB - full implementation pending.
+Trains ML models for win probability, spread, and total predictions, with
+optional walk-forward backtesting and hyperparameter tuning.
 
 Usage:
     python train.py --model-type win_probability --version v1.0.0
+    python train.py --model-type win_probability --version v1.0.0 \
+        --backtest --features data/features.parquet --workers 4
+    python train.py --model-type win_probability --version v1.0.0 --tune --workers 8
 """
 
 import argparse
+import json
+import sys
 from datetime import datetime
 from pathlib import Path
 
+import joblib
+import numpy as np
 
-def train_model(model_type: str, model_name: str, version: str):
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from db import connection, set_model_config  # noqa: E402
+from monitoring import RunRecorder, add_run_arguments, stage  # noqa: E402
+from storage import TrialStore  # noqa: E402
+from training import (  # noqa: E402
+    TARGETS,
+    FeatureMatrix,
+    calculate_metrics,
+    calibration_curve,
+    make_estimator,
+    predict_values,
+    registry_model_type,
+    run_backtest,
+    score_backtest,
+    tune,
+)
+from training.backtest import DEFAULT_CACHE_DIR, DEFAULT_MIN_TRAIN_SEASONS  # noqa: E402
+from training.tuning import DEFAULT_MAX_BUDGET, DEFAULT_MIN_BUDGET  # noqa: E402
+
+
+def train_model(
+    model_type: str,
+    model_name: str,
+    version: str,
+    params: dict = None,
+    features_path: str = "data/features.parquet",
+    cache_dir: str = DEFAULT_CACHE_DIR,
+):
     """
     Train a model for the specified prediction type.
-    
+
+    Features come from the memory-mapped FeatureMatrix (shared with the
+    backtest and tuning runs); the last season with results is held out for
+    validation.
+
     Args:
         model_type: win_probability, spread, or total
         model_name: lightgbm, xgboost, logistic_regression
         version: Model version string (e.g., v1.0.0)
+        params: Estimator parameters (e.g. from hyperparameter_tuning)
+        features_path: Feature Parquet file or partitioned directory
+        cache_dir: Matrix cache
+
+    Returns:
+        Path: Saved model, to record as the MLModel row's modelPath
     """
     print(f"🚀 Training {model_type} model ({model_name})")
     print(f"   Version: {version}")
-    
-    # TODO: Load features
-    # X_train, y_train = load_features('data/train_features.parquet')
-    # X_val, y_val = load_features('data/val_features.parquet')
-    
-    # TODO: Initialize model
-    if model_name == "lightgbm":
-        # model = lgb.LGBMClassifier(...)
-        pass
-    elif model_name == "xgboost":
-        # model = xgb.XGBClassifier(...)
-        pass
-    elif model_name == "logistic_regression":
-        # model = LogisticRegression(...)
-        pass
-    
-    # TODO: Train model
-    # model.fit(X_train, y_train)
-    
-    # TODO: Evaluate on validation set
-    # val_metrics = evaluate(model, X_val, y_val)
-    
-    val_metrics = {
-        "log_loss": 0.0,  # Placeholder
-        "brier_score": 0.0,
-        "accuracy": 0.0,
-    }
-    
+    if params:
+        print(f"   Params: {params}")
+
+    registry_type = registry_model_type(model_type)
+    matrix = FeatureMatrix.build(features_path, cache_dir)
+    y = matrix.target(TARGETS[registry_type])
+    labelled = ~np.isnan(y)
+    val_season = int(matrix.season[labelled].max())
+    train = np.flatnonzero(labelled & (matrix.season < val_season))
+    val = np.flatnonzero(labelled & (matrix.season == val_season))
+    print(f"   Train: {len(train)} games, validation: {len(val)} games (season {val_season})")
+
+    model = make_estimator(registry_type, model_name, params)
+    model.fit(matrix.rows(train), y[train])
+
+    val_metrics = calculate_metrics(
+        registry_type, y[val], predict_values(model, registry_type, matrix.rows(val))
+    )
+
     print("\n📊 Validation Metrics:")
-    print(f"   Log Loss: {val_metrics['log_loss']:.4f}")
-    print(f"   Brier Score: {val_metrics['brier_score']:.4f}")
-    print(f"   Accuracy: {val_metrics['accuracy']:.3f}")
-    
-    # TODO: Save model
-    model_path = f"models/{model_type}_{version}.pkl"
-    # joblib.dump(model, model_path)
-    
-    # TODO: Save to model registry (database)
-    # save_to_registry({
-    #     'version': version,
-    #     'model_type': model_type,
-    #     'metrics': val_metrics,
-    #     'model_path': model_path,
-    # })
-    
+    for metric_name, value in val_metrics.items():
+        print(f"   {metric_name}: {value:.4f}")
+
+    model_path = Path("models") / f"{model_type}_{version}.pkl"
+    model_path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(model, model_path)
+
     print(f"\n✅ Model saved: {model_path}")
+    return model_path
 
 
-def hyperparameter_tuning(model_type: str, model_name: str):
-    """Run hyperparameter tuning with cross-validation."""
-    print("🔧 Running hyperparameter tuning...")
-    
-    # TODO: Define search space
-    # param_space = {
-    #     'learning_rate': [0.01, 0.05, 0.1],
-    #     'max_depth': [3, 5, 7],
-    #     'num_leaves': [31, 63, 127],
-    # }
-    
-    # TODO: Use GridSearchCV or BayesianOptimization
-    # best_params = optimize(model, param_space, X_train, y_train)
-    
-    pass
+def backtest_model(
+    model_type: str,
+    model_name: str,
+    features_path: str,
+    min_train_seasons: int = DEFAULT_MIN_TRAIN_SEASONS,
+    max_train_seasons: int = None,
+    workers: int = 1,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+    params: dict = None,
+):
+    """
+    Walk-forward backtest: one fold per season, trained on earlier seasons.
+
+    The feature table is frozen into a memory-mapped matrix once and reused
+    across runs; folds already predicted for the same data and model
+    configuration are skipped.
+
+    Args:
+        model_type: win_probability, spread, or total
+        model_name: lightgbm, xgboost, logistic_regression
+        features_path: Feature Parquet file or partitioned directory
+        min_train_seasons: Seasons before the first test season
+        max_train_seasons: Optional rolling training window (seasons)
+        workers: Folds trained in parallel
+        cache_dir: Matrix and fold prediction cache
+        params: Estimator parameters
+
+    Returns:
+        Path: Run directory (score again with evaluate.py --backtest)
+    """
+    print(f"🔁 Backtesting {model_type} model ({model_name})")
+
+    with stage("build_matrix") as step:
+        matrix = FeatureMatrix.build(features_path, cache_dir)
+        step.rows_out = len(matrix.X)
+    print(f"   Matrix: {len(matrix.X)} games x {len(matrix.feature_names)} features")
+
+    with stage("backtest") as step:
+        step.rows_in = len(matrix.X)
+        run_dir = run_backtest(
+            matrix,
+            registry_model_type(model_type),
+            model_name,
+            params,
+            min_train_seasons=min_train_seasons,
+            max_train_seasons=max_train_seasons,
+            workers=workers,
+        )
+
+    print("\n📊 Walk-Forward Metrics:")
+    with stage("score"):
+        scores = score_backtest(run_dir)
+    print(scores.to_string(index=False, float_format="%.4f"))
+    print(f"\n✅ Fold predictions cached in {run_dir}")
+    return run_dir
+
+
+def hyperparameter_tuning(
+    model_type: str,
+    model_name: str,
+    version: str,
+    features_path: str = "data/features.parquet",
+    method: str = "hyperband",
+    min_rounds: int = DEFAULT_MIN_BUDGET,
+    max_rounds: int = DEFAULT_MAX_BUDGET,
+    workers: int = 1,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+):
+    """
+    Run hyperparameter tuning over walk-forward folds.
+
+    Successive halving / Hyperband on boosting rounds; trials run
+    concurrently and are persisted, so rerunning the same command resumes an
+    interrupted search. The best configuration is written next to the model
+    and recorded as the configPath of the version's MLModel row.
+
+    Returns:
+        dict: Best estimator parameters
+    """
+    print(f"🔧 Running hyperparameter tuning ({method})...")
+
+    with stage("build_matrix") as step:
+        matrix = FeatureMatrix.build(features_path, cache_dir)
+        step.rows_out = len(matrix.X)
+    with stage("tune") as step, TrialStore(Path(cache_dir) / "tuning.sqlite") as trials:
+        step.rows_in = len(matrix.X)
+        result = tune(
+            matrix,
+            registry_model_type(model_type),
+            model_name,
+            trials,
+            min_budget=min_rounds,
+            max_budget=max_rounds,
+            method=method,
+            workers=workers,
+        )
+        result["top_trials"] = trials.trials(result["study"])[:10]
+        step.note(trials=result["trials"])
+
+    print(f"   Best {result['objective']}: {result['best_score']:.4f} "
+          f"({result['trials']} trials)")
+    print(f"   Best params: {result['best_params']}")
+
+    config_path = Path("models") / f"{model_type}_{version}_config.json"
+    config_path.parent.mkdir(parents=True, exist_ok=True)
+    config_path.write_text(json.dumps({
+        "model_type": registry_model_type(model_type),
+        "model_name": model_name,
+        "version": version,
+        "features": matrix.feature_names,
+        "params": result["best_params"],
+        "tuning": result,
+    }, indent=2))
+
+    with connection() as conn:
+        recorded = set_model_config(conn, version, config_path)
+    if recorded:
+        print(f"   Recorded {config_path} on MLModel {version}")
+    else:
+        print(f"   Saved {config_path} (no MLModel row for {version} yet)")
+    return result["best_params"]
 
 
 def calculate_calibration(y_true, y_pred):
-    """Calculate calibration curve."""
+    """
+    Calculate calibration curve.
+
+    Returns:
+        DataFrame: Decile bins with count, average predicted probability
+            and actual outcome rate
+    """
     print("📈 Calculating calibration...")
-    
-    # TODO: Bin predictions into deciles
-    # For each bin, calculate:
-    # - Average predicted probability
-    # - Actual outcome rate
-    # Plot calibration curve
-    
-    pass
+    return calibration_curve(y_true, y_pred)
 
 
 def main():
@@ -127,17 +260,104 @@ def main():
         action="store_true",
         help="Run hyperparameter tuning"
     )
+    parser.add_argument(
+        "--tune-method",
+        default="hyperband",
+        choices=["hyperband", "halving"],
+        help="Tuning schedule: Hyperband brackets or a single successive-halving bracket"
+    )
+    parser.add_argument(
+        "--min-rounds",
+        type=int,
+        default=DEFAULT_MIN_BUDGET,
+        help="Boosting rounds in the first tuning rung"
+    )
+    parser.add_argument(
+        "--max-rounds",
+        type=int,
+        default=DEFAULT_MAX_BUDGET,
+        help="Boosting rounds in the last tuning rung"
+    )
+    parser.add_argument(
+        "--backtest",
+        action="store_true",
+        help="Run a season-by-season walk-forward backtest instead of training"
+    )
+    parser.add_argument(
+        "--features",
+        default="data/features.parquet",
+        help="Feature Parquet file or partitioned directory"
+    )
+    parser.add_argument(
+        "--min-train-seasons",
+        type=int,
+        default=DEFAULT_MIN_TRAIN_SEASONS,
+        help="Seasons of history before the first backtest fold"
+    )
+    parser.add_argument(
+        "--max-train-seasons",
+        type=int,
+        default=None,
+        help="Train each fold on at most this many prior seasons"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Backtest folds / tuning trials run in parallel"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help="Backtest matrix and fold prediction cache"
+    )
+    
+    add_run_arguments(parser)
     
     args = parser.parse_args()
     
+    if args.backtest:
+        with RunRecorder("train.backtest", args.metrics, args.profile):
+            backtest_model(
+                args.model_type,
+                args.model_name,
+                args.features,
+                min_train_seasons=args.min_train_seasons,
+                max_train_seasons=args.max_train_seasons,
+                workers=args.workers,
+                cache_dir=args.cache_dir,
+            )
+        print("\n✨ Backtest complete!")
+        return
+    
     # Create models directory
     Path("models").mkdir(exist_ok=True)
     
-    if args.tune:
-        hyperparameter_tuning(args.model_type, args.model_name)
-    
-    # Train model
-    train_model(args.model_type, args.model_name, args.version)
+    with RunRecorder("train", args.metrics, args.profile):
+        params = None
+        if args.tune:
+            params = hyperparameter_tuning(
+                args.model_type,
+                args.model_name,
+                args.version,
+                features_path=args.features,
+                method=args.tune_method,
+                min_rounds=args.min_rounds,
+                max_rounds=args.max_rounds,
+                workers=args.workers,
+                cache_dir=args.cache_dir,
+            )
+
+        # Train model
+        with stage("train_model"):
+            train_model(
+                args.model_type,
+                args.model_name,
+                args.version,
+                params,
+                features_path=args.features,
+                cache_dir=args.cache_dir,
+            )
     
     print("\n✨ Training complete!")
 
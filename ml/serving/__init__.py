@@ -0,0 +1,25 @@
+"""
+Serving Module
+
+Warm in-memory models and a local prediction service for the ML scripts
+and the web app.
+"""
+
+from .batch import merge_outputs, score_models, split_outputs
+from .cache import ModelCache
+from .client import PredictionClient, ServerUnavailable
+from .models import PREDICTION_OUTPUTS, ServedModel, load_model
+from .server import make_server
+
+__all__ = [
+    "ModelCache",
+    "merge_outputs",
+    "score_models",
+    "split_outputs",
+    "PredictionClient",
+    "ServerUnavailable",
+    "PREDICTION_OUTPUTS",
+    "ServedModel",
+    "load_model",
+    "make_server",
+]
@@ -0,0 +1,103 @@
+"""
+Batch Scoring
+
+Scores the same feature rows with many registry models at once.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .models import PREDICTION_OUTPUTS, feature_matrix
+
+
+def score_models(models, rows, max_workers=None, on_error=None):
+    """
+    Score feature rows with several ServedModels.
+
+    The rows are converted once, to a float64 matrix over the union of the
+    models' features, and each model scores its own column selection. Models
+    run on a thread pool: LightGBM, XGBoost and NumPy-heavy scikit-learn
+    predict calls release the GIL, so one more model costs about its
+    inference time.
+
+    Args:
+        models: ServedModel instances
+        rows: Feature dicts (as read from the feature store)
+        max_workers: Threads (default: one per model, up to the CPU count)
+        on_error: Called as on_error(model, exception) when a model fails;
+            its result is then None (default: the exception propagates)
+
+    Returns:
+        list: Per model (in order), one dict of its MLPrediction fields per row
+    """
+    models = list(models)
+    if not models:
+        return []
+    if not rows:
+        return [[] for _ in models]
+
+    names = list(dict.fromkeys(name for model in models for name in model.feature_names))
+    position = {name: i for i, name in enumerate(names)}
+    matrix = feature_matrix(rows, names)
+
+    def run(model):
+        columns = [position[name] for name in model.feature_names]
+        return model.prediction_fields(model.predict(matrix[:, columns]))
+
+    workers = max_workers or min(len(models), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run, model) for model in models]
+        results = []
+        for model, future in zip(models, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                if on_error is None:
+                    raise
+                on_error(model, e)
+                results.append(None)
+    return results
+
+
+def merge_outputs(rows, outputs):
+    """
+    Combine model outputs into one prediction dict per row.
+
+    Args:
+        rows: Feature dicts, each with the game "id"
+        outputs: score_models() results to merge (None entries are skipped)
+
+    Returns:
+        list: One dict per row with game_id and every MLPrediction output
+            field (None for model types without an output)
+    """
+    empty = {field: None for fields in PREDICTION_OUTPUTS.values() for field in fields}
+    predictions = [{"game_id": row.get("id"), **empty} for row in rows]
+    for values in outputs:
+        for prediction, fields in zip(predictions, values or ()):
+            prediction.update(fields)
+    return predictions
+
+
+def split_outputs(predictions, models):
+    """
+    Split merged predictions (merge_outputs, /predict) back into per-model outputs.
+
+    Args:
+        predictions: One merged dict per row
+        models: {model_type: {"id", "version"}} of the models that produced
+            them (ModelCache.models())
+
+    Returns:
+        list: (model, outputs) pairs, model being {"id", "version",
+            "model_type"} and outputs one dict of that model's own
+            MLPrediction fields per row
+    """
+    return [
+        (
+            {**model, "model_type": model_type},
+            [{field: prediction.get(field) for field in PREDICTION_OUTPUTS[model_type]}
+             for prediction in predictions],
+        )
+        for model_type, model in models.items()
+    ]
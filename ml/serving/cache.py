@@ -0,0 +1,97 @@
+"""
+Model Cache
+
+Keeps the ACTIVE MLModel of every ModelType loaded and swaps in new
+versions when the registry changes.
+"""
+
+import threading
+
+from db import fetch_models
+
+from .batch import merge_outputs, score_models
+from .models import ServedModel, load_model
+
+
+class ModelCache:
+    """
+    Warm ACTIVE models, one per ModelType, with hot swapping.
+
+    refresh() compares each ACTIVE registry row's (id, updatedAt) with the
+    loaded model and loads only what changed. New artifacts are loaded
+    before the swap, and the type -> model mapping is replaced as a whole,
+    so concurrent predict() calls never block on a reload and always see a
+    complete set of models.
+
+    Usage:
+        cache = ModelCache()
+        with connection() as conn:
+            cache.refresh(conn)
+        predictions = cache.predict(feature_rows)
+    """
+
+    def __init__(self, loader=load_model):
+        self.loader = loader
+        self._models = {}
+        self._lock = threading.Lock()  # serializes refreshes only
+
+    def refresh(self, conn):
+        """
+        Sync with the registry's ACTIVE models.
+
+        Args:
+            conn: psycopg2 connection
+
+        Returns:
+            list: Model types that were loaded, swapped or dropped
+        """
+        with self._lock:
+            active = {}
+            for row in fetch_models(conn, ["ACTIVE"]):  # newest first
+                active.setdefault(row["model_type"], row)
+
+            models = dict(self._models)
+            changed = []
+            for model_type, row in active.items():
+                current = models.get(model_type)
+                if current is None or current.key != (row["id"], row.get("updated_at")):
+                    models[model_type] = ServedModel.load(row, self.loader)
+                    changed.append(model_type)
+            for model_type in set(models) - set(active):
+                del models[model_type]
+                changed.append(model_type)
+
+            self._models = models
+            return changed
+
+    def get(self, model_type):
+        """Loaded model for a ModelType, or None."""
+        return self._models.get(model_type)
+
+    def models(self):
+        """
+        Loaded models.
+
+        Returns:
+            dict: {model_type: {"id", "version"}}
+        """
+        return {model_type: model.describe() for model_type, model in self._models.items()}
+
+    def predict(self, rows):
+        """
+        Score feature rows with every loaded model.
+
+        Args:
+            rows: Feature dicts (as read from the feature store), each with
+                the game "id"
+
+        Returns:
+            list: One dict per row with game_id and the MLPrediction fields
+                of every loaded model type (None for types not loaded)
+        """
+        models = self.served()  # one consistent set for the whole batch
+        return merge_outputs(rows, score_models(models, rows))
+
+    def served(self):
+        """Loaded ServedModels (a consistent snapshot of the current set)."""
+        return list(self._models.values())
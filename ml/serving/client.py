@@ -0,0 +1,97 @@
+"""
+Prediction Client
+
+Thin client for the local prediction server.
+"""
+
+import json
+import math
+import os
+import urllib.error
+import urllib.request
+from datetime import date, datetime
+
+from .batch import split_outputs
+
+DEFAULT_URL = "http://127.0.0.1:8765"
+
+
+class ServerUnavailable(RuntimeError):
+    """The prediction server could not be reached."""
+
+
+class PredictionClient:
+    """
+    Calls a running prediction server (see scripts/serve_models.py).
+
+    Usage:
+        client = PredictionClient()
+        predictions = client.predict(feature_rows)
+    """
+
+    def __init__(self, url=None, timeout=10.0):
+        self.url = (url or os.environ.get("MODEL_SERVER_URL") or DEFAULT_URL).rstrip("/")
+        self.timeout = timeout
+
+    def predict(self, rows):
+        """
+        Score feature rows with the server's ACTIVE models.
+
+        Returns:
+            list: One dict per row (game_id plus MLPrediction fields)
+        """
+        return self._post("/predict", {"rows": list(rows)})["predictions"]
+
+    def predict_by_model(self, rows):
+        """
+        Score feature rows with the server's ACTIVE models, per model.
+
+        Returns:
+            list: (model, outputs) pairs (see batch.split_outputs), one per
+                ACTIVE model type
+        """
+        response = self._post("/predict", {"rows": list(rows)})
+        return split_outputs(response["predictions"], response["models"])
+
+    def health(self):
+        """Loaded models as reported by the server."""
+        return self._request(urllib.request.Request(self.url + "/health"))
+
+    def reload(self):
+        """Ask the server to re-check the registry now."""
+        return self._post("/reload", {})
+
+    def _post(self, path, payload):
+        data = json.dumps(_strip_nan(payload), default=_json_default).encode()
+        request = urllib.request.Request(
+            self.url + path, data=data, headers={"Content-Type": "application/json"}
+        )
+        return self._request(request)
+
+    def _request(self, request):
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(f"Prediction server error {e.code}: {e.read().decode()}") from e
+        except (urllib.error.URLError, ConnectionError, TimeoutError) as e:
+            raise ServerUnavailable(f"Prediction server not reachable at {self.url}: {e}") from e
+
+
+def _strip_nan(value):
+    """Replace NaN/inf (not valid JSON) with None; the server reads them as NaN."""
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {k: _strip_nan(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_strip_nan(v) for v in value]
+    return value
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "item"):  # NumPy scalars
+        return _strip_nan(value.item())
+    return str(value)
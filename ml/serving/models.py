@@ -0,0 +1,127 @@
+"""
+Served Models
+
+Loading of trained model artifacts and prediction over feature rows.
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+# MLPrediction fields produced by each ModelType
+PREDICTION_OUTPUTS = {
+    "WIN_PROBABILITY": ("home_win_prob", "away_win_prob"),
+    "SPREAD": ("spread_pred",),
+    "TOTAL": ("total_pred",),
+}
+
+
+def load_model(model_path):
+    """
+    Load a trained model artifact.
+
+    Args:
+        model_path: joblib pickle (.pkl/.joblib), LightGBM text model (.txt)
+            or XGBoost model (.json/.ubj)
+
+    Returns:
+        object: Estimator with predict() (and predict_proba() for sklearn
+            classifiers) or a LightGBM/XGBoost Booster
+    """
+    path = Path(model_path)
+    if not path.exists():
+        raise FileNotFoundError(f"Model file not found: {model_path}")
+
+    if path.suffix == ".txt":
+        import lightgbm as lgb
+        return lgb.Booster(model_file=str(path))
+    if path.suffix in (".json", ".ubj"):
+        import xgboost as xgb
+        booster = xgb.Booster()
+        booster.load_model(str(path))
+        return booster
+
+    import joblib
+    return joblib.load(path)
+
+
+def feature_matrix(rows, names):
+    """Feature rows (dicts) as a (n_rows, len(names)) float64 matrix; missing -> NaN."""
+    matrix = np.array([[row.get(name) for name in names] for row in rows], dtype=np.float64)
+    return matrix.reshape(len(rows), len(names))
+
+
+class ServedModel:
+    """
+    One registry model loaded into memory.
+
+    Feature rows are turned into a float64 matrix in the model's feature order
+    (MLModel.features; missing values become NaN) and scored in one call, so
+    a request costs one small array build plus the estimator itself.
+    """
+
+    def __init__(self, row, estimator):
+        self.row = row
+        self.estimator = estimator
+        self.model_type = row["model_type"]
+        self.feature_names = list(row.get("features") or [])
+        self.outputs = PREDICTION_OUTPUTS[self.model_type]
+
+    @classmethod
+    def load(cls, row, loader=load_model):
+        """Load the artifact of an MLModel row (see fetch_model)."""
+        if not row.get("model_path"):
+            raise RuntimeError(f"Model {row['version']} has no modelPath")
+        return cls(row, loader(row["model_path"]))
+
+    @property
+    def key(self):
+        """(id, updatedAt): changes whenever the registry row changes."""
+        return self.row["id"], self.row.get("updated_at")
+
+    def feature_matrix(self, rows):
+        """Feature rows (dicts) as a (n_rows, n_features) float64 matrix."""
+        return feature_matrix(rows, self.feature_names)
+
+    def predict(self, matrix):
+        """
+        Score a feature matrix.
+
+        Returns:
+            ndarray: Home win probability (WIN_PROBABILITY) or the predicted
+                spread/total, one value per row
+        """
+        estimator = self.estimator
+        if type(estimator).__module__.startswith("xgboost") and type(estimator).__name__ == "Booster":
+            import xgboost as xgb
+            return estimator.predict(xgb.DMatrix(matrix, feature_names=self.feature_names or None))
+        if self.model_type == "WIN_PROBABILITY" and hasattr(estimator, "predict_proba"):
+            return estimator.predict_proba(matrix)[:, 1]
+        return np.asarray(estimator.predict(matrix), dtype=np.float64)
+
+    def predict_rows(self, rows):
+        """
+        Score feature rows.
+
+        Returns:
+            list: One dict of this model's MLPrediction fields per row
+        """
+        if not rows:
+            return []
+        return self.prediction_fields(self.predict(self.feature_matrix(rows)))
+
+    def prediction_fields(self, values):
+        """
+        MLPrediction fields for predict() output.
+
+        Returns:
+            list: One dict of this model's fields per value
+        """
+        values = np.asarray(values, dtype=np.float64).tolist()
+        if self.model_type == "WIN_PROBABILITY":
+            return [{"home_win_prob": p, "away_win_prob": 1.0 - p} for p in values]
+        return [{self.outputs[0]: value} for value in values]
+
+    def describe(self):
+        """Registry identity for responses and logs."""
+        return {"id": self.row["id"], "version": self.row["version"]}
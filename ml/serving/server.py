@@ -0,0 +1,143 @@
+"""
+Prediction Server
+
+Local HTTP front end for a ModelCache.
+
+Endpoints:
+    GET  /health   Loaded models
+    POST /predict  {"rows": [feature dicts]} -> {"predictions": [...], "models": {...}}
+    POST /reload   Re-check the registry now
+"""
+
+import json
+import math
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from db import connection
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_POLL_SECONDS = 60
+
+
+def make_server(cache, host=DEFAULT_HOST, port=DEFAULT_PORT, poll_seconds=DEFAULT_POLL_SECONDS):
+    """
+    Build a threaded HTTP server around a ModelCache.
+
+    The registry is polled every poll_seconds on a daemon thread while the
+    server runs (see serve_forever); new ACTIVE versions are swapped in
+    without dropping requests.
+
+    Args:
+        cache: ModelCache (refreshed once before the server starts)
+        host: Bind address (keep it local; there is no authentication)
+        port: TCP port
+        poll_seconds: Registry polling interval (0 disables polling)
+
+    Returns:
+        PredictionServer: Call serve_forever() to run
+    """
+    with connection() as conn:
+        cache.refresh(conn)
+    return PredictionServer((host, port), cache, poll_seconds)
+
+
+class PredictionServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer that owns a ModelCache and its registry poller."""
+
+    daemon_threads = True
+
+    def __init__(self, address, cache, poll_seconds=DEFAULT_POLL_SECONDS):
+        super().__init__(address, PredictionHandler)
+        self.cache = cache
+        self.poll_seconds = poll_seconds
+        self._stopped = threading.Event()
+
+    def serve_forever(self, poll_interval=0.5):
+        if self.poll_seconds:
+            threading.Thread(target=self._poll_registry, daemon=True).start()
+        try:
+            super().serve_forever(poll_interval)
+        finally:
+            self._stopped.set()
+
+    def reload(self):
+        """Refresh the cache from the registry; returns swapped model types."""
+        with connection() as conn:
+            changed = self.cache.refresh(conn)
+        if changed:
+            print(f"🔄 Reloaded models: {', '.join(sorted(changed))} -> {self.cache.models()}")
+        return changed
+
+    def _poll_registry(self):
+        while not self._stopped.wait(self.poll_seconds):
+            try:
+                self.reload()
+            except Exception as e:  # keep serving the loaded models
+                print(f"⚠️  Registry refresh failed: {e}")
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    """JSON request handler for PredictionServer."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive for the per-request web path
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, {"status": "ok", "models": self.server.cache.models()})
+        else:
+            self._send(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        try:
+            body = self._read_json()
+            if self.path == "/predict":
+                rows = body.get("rows")
+                if not isinstance(rows, list):
+                    raise ValueError('"rows" must be a list of feature objects')
+                cache = self.server.cache
+                self._send(200, {"predictions": cache.predict(rows), "models": cache.models()})
+            elif self.path == "/reload":
+                self._send(200, {"reloaded": self.server.reload(), "models": self.server.cache.models()})
+            else:
+                self._send(404, {"error": f"Unknown path: {self.path}"})
+        except ValueError as e:
+            self._send(400, {"error": str(e)})
+        except Exception as e:
+            self._send(500, {"error": str(e)})
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length))
+
+    def _send(self, status, payload):
+        data = json.dumps(_jsonable(payload), default=_json_default).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # one line per request is too noisy for the web app path
+
+
+def _jsonable(value):
+    """Replace NaN/inf (not valid JSON) with None."""
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_jsonable(v) for v in value]
+    return value
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
@@ -0,0 +1,15 @@
+"""
+Storage Module
+
+Local on-disk stores for ML artifacts derived from the database.
+"""
+
+from .feature_store import FeatureStore
+from .odds_archive import OddsArchive
+from .trial_store import TrialStore
+
+__all__ = [
+    "FeatureStore",
+    "OddsArchive",
+    "TrialStore",
+]
@@ -0,0 +1,222 @@
+"""
+Feature Store
+
+SQLite store of computed feature rows keyed by game, tagged with the feature
+version that produced them and a fingerprint of the game's source data.
+Training and serving both read rows from here, so they see the same values.
+"""
+
+import hashlib
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS features (
+    game_id          TEXT PRIMARY KEY,
+    feature_version  TEXT NOT NULL,
+    fingerprint      TEXT NOT NULL,
+    start_time       TEXT NOT NULL,
+    computed_at      TEXT NOT NULL,
+    payload          TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS features_start_time ON features (start_time);
+"""
+
+# Game fields whose change invalidates a game's features
+FINGERPRINT_COLUMNS = ["homeTeamId", "awayTeamId", "startTime", "status", "homeScore", "awayScore"]
+
+
+class FeatureStore:
+    """
+    Persistent per-game feature rows with incremental refresh.
+
+    A stored row is fresh when it was produced by the current feature version
+    and the game's fingerprint (teams, start time, status, scores) is
+    unchanged. Because features depend on earlier games, a new or changed game
+    also invalidates every later game of the teams it touches, transitively
+    (ratings flow to later opponents).
+
+    Usage:
+        store = FeatureStore("data/feature_store.sqlite", FEATURE_VERSION)
+        stale = store.stale_mask(games_df)
+        store.write(features[stale], store.fingerprints(games_df)[stale])
+        rows = store.read(game_ids)
+    """
+
+    def __init__(self, path, feature_version):
+        self.path = Path(path)
+        self.feature_version = str(feature_version)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def fingerprints(games_df):
+        """
+        Hash each game's source fields.
+
+        Args:
+            games_df: Output of games_frame()
+
+        Returns:
+            ndarray: Hex digest per game (object array)
+        """
+        parts = games_df[FINGERPRINT_COLUMNS].to_numpy(dtype=object)
+        return np.array(
+            [hashlib.sha1("|".join(map(_fingerprint_field, row)).encode()).hexdigest() for row in parts],
+            dtype=object,
+        )
+
+    def stale_mask(self, games_df):
+        """
+        Find games whose stored features must be (re)computed.
+
+        Args:
+            games_df: Output of games_frame(), chronologically sorted
+
+        Returns:
+            ndarray: Boolean mask aligned with games_df
+        """
+        stored = self._stored_keys(games_df["id"].tolist())
+        fingerprints = self.fingerprints(games_df)
+
+        dirty = np.array([
+            stored.get(game_id) != (self.feature_version, fingerprint)
+            for game_id, fingerprint in zip(games_df["id"], fingerprints)
+        ], dtype=bool)
+
+        # Propagate forward in time through both teams
+        stale = dirty.copy()
+        tainted = set()
+        home = games_df["homeTeamId"].to_numpy()
+        away = games_df["awayTeamId"].to_numpy()
+        for i in range(len(games_df)):
+            if stale[i] or home[i] in tainted or away[i] in tainted:
+                stale[i] = True
+                tainted.add(home[i])
+                tainted.add(away[i])
+        return stale
+
+    def changed_mask(self, games_df):
+        """
+        Find stored games whose source fields changed since they were written.
+
+        Unlike stale_mask(), a FEATURE_VERSION change alone does not count:
+        this flags games whose result (status, scores), teams or start time
+        differ from what the stored row was computed from.
+
+        Args:
+            games_df: Output of games_frame()
+
+        Returns:
+            ndarray: Boolean mask aligned with games_df
+        """
+        stored = self._stored_keys(games_df["id"].tolist())
+        return np.array([
+            game_id in stored and stored[game_id][1] != fingerprint
+            for game_id, fingerprint in zip(games_df["id"], self.fingerprints(games_df))
+        ], dtype=bool)
+
+    def write(self, features, fingerprints):
+        """
+        Upsert feature rows.
+
+        Args:
+            features: DataFrame with "id" and "startTime" columns plus features
+            fingerprints: Fingerprint per row (from fingerprints())
+        """
+        computed_at = datetime.now().isoformat()
+        records = features.to_dict("records")
+        rows = []
+        for record, fingerprint in zip(records, fingerprints):
+            start_time = pd.Timestamp(record["startTime"]).isoformat()
+            payload = {k: _jsonable(v) for k, v in record.items()}
+            rows.append((
+                record["id"], self.feature_version, fingerprint,
+                start_time, computed_at, json.dumps(payload),
+            ))
+
+        with self._conn:
+            self._conn.executemany(
+                """
+                INSERT INTO features (game_id, feature_version, fingerprint,
+                                      start_time, computed_at, payload)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (game_id) DO UPDATE SET
+                    feature_version = excluded.feature_version,
+                    fingerprint = excluded.fingerprint,
+                    start_time = excluded.start_time,
+                    computed_at = excluded.computed_at,
+                    payload = excluded.payload
+                """,
+                rows,
+            )
+
+    def read(self, game_ids=None):
+        """
+        Read stored feature rows for the current feature version.
+
+        Args:
+            game_ids: Games to read (default: all), returned in this order
+
+        Returns:
+            DataFrame: One row per stored game, ordered by start time when
+                game_ids is not given
+        """
+        query = "SELECT game_id, payload FROM features WHERE feature_version = ?"
+        if game_ids is None:
+            rows = self._conn.execute(query + " ORDER BY start_time, game_id",
+                                      (self.feature_version,)).fetchall()
+        else:
+            game_ids = list(game_ids)
+            found = dict(self._select_in(query, game_ids, (self.feature_version,)))
+            rows = [(g, found[g]) for g in game_ids if g in found]
+
+        df = pd.DataFrame.from_records([json.loads(payload) for _, payload in rows])
+        if "startTime" in df:
+            df["startTime"] = pd.to_datetime(df["startTime"]).astype("datetime64[ms]")
+        return df
+
+    def _stored_keys(self, game_ids):
+        query = "SELECT game_id, feature_version, fingerprint FROM features WHERE 1 = 1"
+        return {
+            game_id: (version, fingerprint)
+            for game_id, version, fingerprint in self._select_in(query, game_ids)
+        }
+
+    def _select_in(self, query, game_ids, params=(), batch=500):
+        for i in range(0, len(game_ids), batch):
+            ids = game_ids[i:i + batch]
+            placeholders = ",".join("?" * len(ids))
+            yield from self._conn.execute(
+                f"{query} AND game_id IN ({placeholders})", (*params, *ids)
+            )
+
+
+def _fingerprint_field(value):
+    """Field as text; missing values (None/NaN/NaT, e.g. unplayed scores) are empty."""
+    return "" if pd.isna(value) else str(value)
+
+
+def _jsonable(value):
+    if isinstance(value, (pd.Timestamp, np.datetime64, datetime)):
+        return pd.Timestamp(value).isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
@@ -0,0 +1,224 @@
+"""
+Odds Archive
+
+Compacted Parquet copy of the OddsSnapshot history, partitioned by league
+and game date. Consecutive snapshots with unchanged prices are dropped, ids
+are dictionary-encoded and prices stored as float32, so feature jobs read a
+small fraction of what Postgres would return. New snapshots are appended
+incrementally past a timestamp watermark.
+"""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+PRICE_COLUMNS = ["homeOdds", "awayOdds", "overOdds", "underOdds", "line"]
+SERIES_COLUMNS = ["gameId", "market", "bookmakerId"]
+
+ARCHIVE_SCHEMA = pa.schema([
+    ("gameId", pa.dictionary(pa.int32(), pa.string())),
+    ("market", pa.dictionary(pa.int8(), pa.string())),
+    ("bookmakerId", pa.dictionary(pa.int32(), pa.string())),
+    ("timestamp", pa.timestamp("ms")),
+    *[(column, pa.float32()) for column in PRICE_COLUMNS],
+])
+
+# Series whose game started this long before the watermark get no new odds;
+# their last price is dropped from the dedup state
+STATE_RETENTION_DAYS = 14
+
+
+class OddsArchive:
+    """
+    Append-only, deduplicated odds history on disk.
+
+    Layout:
+        <root>/league=<abbr>/date=<YYYY-MM-DD>/data.parquet
+        <root>/_state/watermark.json   latest archived snapshot timestamp
+        <root>/_state/last.parquet     last price per (game, market, book)
+
+    Each partition is a single file, rewritten when an append touches it
+    (a partition is one league's games of one day, so rewrites are small).
+
+    Usage:
+        archive = OddsArchive("data/odds_archive")
+        archive.append(snapshots)        # rows newer than archive.watermark
+        odds = archive.read(games)       # games: id, league, startTime
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self._state_dir = self.root / "_state"
+
+    def exists(self):
+        return (self._state_dir / "watermark.json").exists()
+
+    @property
+    def watermark(self):
+        """Latest archived snapshot timestamp (datetime64[ms]), or None."""
+        path = self._state_dir / "watermark.json"
+        if not path.exists():
+            return None
+        return np.datetime64(json.loads(path.read_text())["timestamp"], "ms")
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def append(self, snapshots):
+        """
+        Archive snapshots newer than the watermark.
+
+        Args:
+            snapshots: DataFrame with SERIES_COLUMNS, timestamp,
+                PRICE_COLUMNS, league and gameStartTime
+
+        Returns:
+            int: Rows written after deduplication
+        """
+        if snapshots.empty:
+            return 0
+        frame = snapshots.copy()
+        frame["timestamp"] = pd.to_datetime(frame["timestamp"]).astype("datetime64[ms]")
+        frame["gameStartTime"] = pd.to_datetime(frame["gameStartTime"]).astype("datetime64[ms]")
+        watermark = self.watermark
+        if watermark is not None:
+            frame = frame[frame["timestamp"].to_numpy() > watermark]
+            if frame.empty:
+                return 0
+        for column in PRICE_COLUMNS:
+            frame[column] = pd.to_numeric(frame[column], errors="coerce").astype(np.float32)
+
+        # The watermark covers every snapshot seen, including the duplicates
+        # dropped below: an all-duplicate batch still advances it
+        latest = frame["timestamp"].max()
+        state = self._read_state()
+        frame, state = _deduplicate(frame, state)
+        frame["date"] = frame["gameStartTime"].dt.strftime("%Y-%m-%d")
+        for (league, day), rows in frame.groupby(["league", "date"], sort=True):
+            self._write_partition(league, day, rows)
+
+        cutoff = latest - pd.Timedelta(days=STATE_RETENTION_DAYS)
+        self._write_state(state[state["gameStartTime"] >= cutoff], latest)
+        return len(frame)
+
+    def _write_partition(self, league, day, rows):
+        directory = self.root / f"league={league}" / f"date={day}"
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / "data.parquet"
+        table = _to_table(rows)
+        if path.exists():
+            table = pa.concat_tables([pq.read_table(path).unify_dictionaries(), table])
+            table = _to_table(_sort(table.to_pandas()))  # Re-encode one dictionary per column
+        _atomic_write(table, path)
+
+    def _read_state(self):
+        path = self._state_dir / "last.parquet"
+        return pd.read_parquet(path) if path.exists() else None
+
+    def _write_state(self, state, watermark):
+        self._state_dir.mkdir(parents=True, exist_ok=True)
+        state.reset_index(drop=True).to_parquet(self._state_dir / "last.parquet", index=False)
+        # Watermark last: a crash before this line re-archives the same rows,
+        # which deduplication then drops
+        path = self._state_dir / "watermark.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"timestamp": pd.Timestamp(watermark).isoformat()}))
+        os.replace(tmp, path)
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def read(self, games):
+        """
+        Archived snapshots of a set of games.
+
+        Only the partitions of the games' (league, start date) are opened.
+
+        Args:
+            games: DataFrame with id, league and startTime
+
+        Returns:
+            DataFrame: gameId, market, bookmakerId, timestamp and
+                PRICE_COLUMNS (float64) in (gameId, market, bookmakerId,
+                timestamp) order
+        """
+        days = pd.to_datetime(games["startTime"]).dt.strftime("%Y-%m-%d")
+        game_ids = set(games["id"])
+        tables = []
+        for league, day in sorted(set(zip(games["league"], days))):
+            path = self.root / f"league={league}" / f"date={day}" / "data.parquet"
+            if path.exists():
+                table = pq.read_table(path)
+                tables.append(table.filter(pc.is_in(
+                    table["gameId"].combine_chunks().dictionary_decode(),
+                    value_set=pa.array(list(game_ids), pa.string()),
+                )))
+        if not tables:
+            return pd.DataFrame(columns=SERIES_COLUMNS + ["timestamp"] + PRICE_COLUMNS)
+
+        frame = pa.concat_tables(tables).to_pandas()
+        for column in SERIES_COLUMNS:
+            frame[column] = frame[column].astype(object)
+        for column in PRICE_COLUMNS:
+            frame[column] = frame[column].astype(np.float64)
+        return _sort(frame)
+
+
+def _deduplicate(frame, state):
+    """
+    Drop snapshots whose prices equal the previous snapshot of their series.
+
+    The previous snapshot of a series' first new row comes from `state`
+    (the last archived price per series, None before the first append), so
+    duplicates are also dropped across appends.
+
+    Returns:
+        tuple: (kept rows, updated state)
+    """
+    if state is None:
+        state = frame.iloc[:0][SERIES_COLUMNS + PRICE_COLUMNS + ["gameStartTime"]]
+    state = state.assign(_state=True)
+    combined = pd.concat([state, frame.assign(_state=False)], ignore_index=True)
+    combined = combined.sort_values(
+        SERIES_COLUMNS + ["_state", "timestamp"],
+        ascending=[True, True, True, False, True],
+        kind="mergesort",
+    ).reset_index(drop=True)
+
+    series = combined[SERIES_COLUMNS].astype(str).to_numpy()
+    prices = combined[PRICE_COLUMNS].to_numpy(dtype=np.float32)
+    same_series = np.zeros(len(combined), dtype=bool)
+    same_series[1:] = (series[1:] == series[:-1]).all(axis=1)
+    same_price = np.zeros(len(combined), dtype=bool)
+    same_price[1:] = (
+        (prices[1:] == prices[:-1]) | (np.isnan(prices[1:]) & np.isnan(prices[:-1]))
+    ).all(axis=1)
+
+    is_state = combined["_state"].to_numpy(dtype=bool)
+    kept = combined[~is_state & ~(same_series & same_price)].drop(columns="_state")
+    last = combined.groupby(SERIES_COLUMNS, sort=False).tail(1)
+    new_state = last[SERIES_COLUMNS + PRICE_COLUMNS + ["gameStartTime"]]
+    return kept.reset_index(drop=True), new_state
+
+
+def _sort(frame):
+    return frame.sort_values(SERIES_COLUMNS + ["timestamp"], kind="mergesort").reset_index(drop=True)
+
+
+def _to_table(frame):
+    frame = frame[[field.name for field in ARCHIVE_SCHEMA]]
+    return pa.Table.from_pandas(frame, schema=ARCHIVE_SCHEMA, preserve_index=False)
+
+
+def _atomic_write(table, path):
+    tmp = path.with_suffix(".tmp")
+    pq.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, path)
@@ -0,0 +1,88 @@
+"""
+Trial Store
+
+SQLite log of hyperparameter trials. Every finished (configuration, budget)
+evaluation is committed as soon as it completes, so an interrupted search
+resumes from the trials already on disk.
+"""
+
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trials (
+    study         TEXT NOT NULL,
+    config_key    TEXT NOT NULL,
+    budget        INTEGER NOT NULL,
+    params        TEXT NOT NULL,
+    score         REAL NOT NULL,
+    completed_at  TEXT NOT NULL,
+    PRIMARY KEY (study, config_key, budget)
+);
+"""
+
+
+class TrialStore:
+    """
+    Persistent trial results keyed by (study, configuration, budget).
+
+    Usage:
+        with TrialStore("data/tuning.sqlite") as trials:
+            score = trials.get(study, key, budget)
+            trials.put(study, key, budget, params, score)
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, study, config_key, budget):
+        """Recorded score, or None if the trial has not run."""
+        row = self._conn.execute(
+            "SELECT score FROM trials WHERE study = ? AND config_key = ? AND budget = ?",
+            (study, config_key, budget),
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def put(self, study, config_key, budget, params, score):
+        """Record one finished trial."""
+        with self._conn:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO trials
+                    (study, config_key, budget, params, score, completed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (study, config_key, budget, json.dumps(params, sort_keys=True),
+                 float(score), datetime.now().isoformat()),
+            )
+
+    def trials(self, study):
+        """
+        All trials of a study, best score first.
+
+        Returns:
+            list: {"config_key", "budget", "params", "score"} dicts
+        """
+        rows = self._conn.execute(
+            "SELECT config_key, budget, params, score FROM trials "
+            "WHERE study = ? ORDER BY score, budget DESC",
+            (study,),
+        ).fetchall()
+        return [
+            {"config_key": key, "budget": budget, "params": json.loads(params), "score": score}
+            for key, budget, params, score in rows
+        ]
@@ -0,0 +1,43 @@
+"""
+Test Fixtures
+
+Small hand-written game tables for the unit tests. The benchmark suite
+(benchmarks/) has the large synthetic datasets.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def make_game(game_id, home, away, start, home_score=None, away_score=None, status=None):
+    """Game dict as read from the Game table."""
+    if status is None:
+        status = "FINAL" if home_score is not None else "SCHEDULED"
+    return {
+        "id": game_id,
+        "leagueId": "nba",
+        "league": "NBA",
+        "homeTeamId": home,
+        "awayTeamId": away,
+        "startTime": start,
+        "status": status,
+        "homeScore": home_score,
+        "awayScore": away_score,
+        "venue": None,
+    }
+
+
+@pytest.fixture
+def games():
+    """A short FINAL history of three teams followed by one SCHEDULED game."""
+    return [
+        make_game("g1", "A", "B", "2024-01-01T00:00:00", 100, 90),
+        make_game("g2", "B", "C", "2024-01-02T00:00:00", 95, 99),
+        make_game("g3", "C", "A", "2024-01-03T00:00:00", 101, 104),
+        make_game("g4", "A", "B", "2024-01-05T00:00:00", 88, 97),
+        make_game("g5", "B", "C", "2024-01-07T00:00:00"),
+    ]
@@ -0,0 +1,41 @@
+"""FeatureStore tests."""
+
+import pandas as pd
+
+from features.game_log import games_frame
+from storage import FeatureStore
+
+
+def _features(games_df):
+    return pd.DataFrame({
+        "id": games_df["id"],
+        "startTime": games_df["startTime"],
+        "home_elo": 1500.0,
+    })
+
+
+def test_fingerprints_handle_unplayed_games(games):
+    games_df = games_frame(games)
+    fingerprints = FeatureStore.fingerprints(games_df)
+    assert len(set(fingerprints)) == len(games_df)
+
+
+def test_scheduled_game_round_trip(tmp_path, games):
+    games_df = games_frame(games)
+    with FeatureStore(tmp_path / "store.sqlite", "1") as store:
+        assert store.stale_mask(games_df).all()
+        store.write(_features(games_df), store.fingerprints(games_df))
+        assert not store.stale_mask(games_df).any()
+        assert store.read(["g5"])["id"].tolist() == ["g5"]
+
+
+def test_result_invalidates_game_and_later_games(tmp_path, games):
+    with FeatureStore(tmp_path / "store.sqlite", "1") as store:
+        games_df = games_frame(games)
+        store.write(_features(games_df), store.fingerprints(games_df))
+
+        games[4].update(status="FINAL", homeScore=90, awayScore=80)
+        assert store.stale_mask(games_frame(games)).tolist() == [False, False, False, False, True]
+
+        games[3]["homeScore"] = 89
+        assert store.stale_mask(games_frame(games)).tolist() == [False, False, False, True, True]
@@ -0,0 +1,48 @@
+"""Append-only history and checkpoints shared by the sequential engines."""
+
+import pytest
+
+from features.game_log import games_frame
+from features.matchup import HeadToHeadIndex
+from features.recent_performance import FormTracker
+from features.team_state import TeamState
+from features.team_strength import EloEngine
+
+from tests.conftest import make_game
+
+ENGINES = [EloEngine, FormTracker, HeadToHeadIndex, TeamState]
+
+
+def _snapshot(engine, games):
+    folded = [g["id"] for g in games if g["status"] == "FINAL"]
+    if isinstance(engine, EloEngine):
+        return [engine.pre_game_ratings(g) for g in folded], engine.ratings()
+    if isinstance(engine, FormTracker):
+        return [engine.pre_game_form(g) for g in folded]
+    if isinstance(engine, HeadToHeadIndex):
+        return engine.features(games_frame(games)).to_dict("list")
+    return engine.table().to_dict("list")
+
+
+@pytest.mark.parametrize("cls", ENGINES)
+def test_checkpoint_then_update_matches_single_pass(cls, games, tmp_path):
+    final = [g for g in games if g["status"] == "FINAL"]
+    first = cls()
+    first.update(final[:2])
+    first.save(tmp_path / "engine.npz")
+
+    resumed = cls.load(tmp_path / "engine.npz")
+    assert resumed.update(games) == len(final) - 2
+    fresh = cls()
+    fresh.update(games)
+
+    # repr() so NaN form values compare equal
+    assert repr(_snapshot(resumed, games)) == repr(_snapshot(fresh, games))
+
+
+@pytest.mark.parametrize("cls", ENGINES)
+def test_update_rejects_games_before_the_last_folded_one(cls, games):
+    engine = cls()
+    engine.update(games)
+    with pytest.raises(ValueError, match="rebuild"):
+        engine.update([make_game("late", "A", "B", "2024-01-04T00:00:00", 90, 80)])
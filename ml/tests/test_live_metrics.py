@@ -0,0 +1,134 @@
+"""Live model metrics: MetricsAccumulator and the daily metric update."""
+
+import contextlib
+import json
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from training import MetricsAccumulator
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+import daily_predictions  # noqa: E402
+
+
+def test_metrics_by_hand():
+    acc = MetricsAccumulator()
+    acc.update(
+        [1, 2, 3],
+        home_win_prob=[0.8, 0.4, np.nan],
+        home_win=[1, 0, 1],
+        spread_pred=[-3.0, 2.0, 1.0],
+        spread=[-5.0, 2.0, np.nan],
+    )
+    metrics = acc.metrics()
+
+    assert metrics["games"] == 2
+    assert metrics["log_loss"] == pytest.approx(-(math.log(0.8) + math.log(0.6)) / 2)
+    assert metrics["brier_score"] == pytest.approx((0.04 + 0.16) / 2)
+    assert metrics["accuracy"] == 1.0
+    assert metrics["spread_mae"] == pytest.approx(1.0)
+    assert metrics["spread_rmse"] == pytest.approx(math.sqrt(2.0))
+    assert np.isnan(metrics["total_mae"])
+
+
+def test_rolling_window_keeps_the_latest_games():
+    acc = MetricsAccumulator(window=3)
+    acc.update([1, 2], spread_pred=[1.0, 2.0], spread=[0.0, 0.0])
+    acc.update([3, 4, 5], spread_pred=[3.0, 4.0, 5.0], spread=[0.0, 0.0, 0.0])
+
+    assert acc.rolling_metrics()["games"] == 3
+    assert acc.rolling_metrics()["spread_mae"] == pytest.approx(4.0)
+    assert acc.metrics()["spread_mae"] == pytest.approx(3.0)
+    assert acc.to_dict()["window_times"] == [3.0, 4.0, 5.0]
+
+    # One update larger than the window keeps only its last games
+    acc.update([6, 7, 8, 9], spread_pred=[6.0, 7.0, 8.0, 9.0], spread=[0.0] * 4)
+    assert acc.to_dict()["window_times"] == [7.0, 8.0, 9.0]
+    assert acc.rolling_metrics()["spread_mae"] == pytest.approx(8.0)
+
+
+def test_merge_matches_one_accumulator_over_both():
+    first, second, both = (MetricsAccumulator(window=3) for _ in range(3))
+    first.update([1, 3], home_win_prob=[0.6, 0.3], home_win=[1, 1])
+    second.update([2, 4], home_win_prob=[0.9, 0.2], home_win=[0, 0])
+    both.update([1, 2, 3, 4], home_win_prob=[0.6, 0.9, 0.3, 0.2], home_win=[1, 0, 1, 0])
+
+    merged = first.merge(second)
+    assert merged.to_dict()["window_times"] == [2.0, 3.0, 4.0]
+    assert merged.rolling_metrics() == pytest.approx(both.rolling_metrics(), nan_ok=True)
+    assert merged.metrics() == pytest.approx(both.metrics(), nan_ok=True)
+    assert merged.calibration() == both.calibration()
+
+
+def test_to_dict_from_dict_round_trip():
+    acc = MetricsAccumulator(window=4, bins=5)
+    acc.update(
+        [1, 2, 3, 4, 5, 6],
+        home_win_prob=[0.1, 0.55, 0.7, np.nan, 0.9, 0.35],
+        home_win=[0, 1, 0, 1, 1, 0],
+        total_pred=[210.0, np.nan, 198.0, 205.0, 220.0, 201.0],
+        total=[200.0, 190.0, 199.0, 210.0, 215.0, 201.0],
+    )
+    state = json.loads(json.dumps(acc.to_dict(), allow_nan=False))
+    restored = MetricsAccumulator.from_dict(state)
+
+    assert restored.to_dict() == acc.to_dict()
+    for a in (acc, restored):
+        a.update([7], home_win_prob=[0.8], home_win=[1], total_pred=[200.0], total=[190.0])
+    assert restored.to_dict() == acc.to_dict()
+    assert restored.rolling_metrics() == pytest.approx(acc.rolling_metrics(), nan_ok=True)
+
+
+def test_calibration_bins():
+    acc = MetricsAccumulator(bins=10)
+    acc.update(
+        [1, 2, 3, 4, 5],
+        home_win_prob=[0.05, 0.15, 0.12, 0.95, 1.0],
+        home_win=[0, 1, 0, 1, 1],
+    )
+    bins = acc.calibration()
+
+    assert len(bins) == 10
+    assert (bins[0]["bin_lower"], bins[0]["bin_upper"]) == (0.0, 0.1)
+    assert [b["count"] for b in bins] == [1, 2, 0, 0, 0, 0, 0, 0, 0, 2]
+    assert bins[0]["predicted"] == pytest.approx(0.05) and bins[0]["observed"] == 0.0
+    assert bins[1]["predicted"] == pytest.approx(0.135) and bins[1]["observed"] == 0.5
+    assert bins[9]["predicted"] == pytest.approx(0.975) and bins[9]["observed"] == 1.0
+    assert bins[4]["predicted"] is None and bins[4]["observed"] is None
+
+
+def test_update_model_performance_marks_only_folded_models(monkeypatch):
+    unevaluated = pa.table({
+        "id": ["p1", "p2", "p3"],
+        "model_id": ["m1", "m1", "gone"],
+        "home_win_prob": [0.7, 0.4, 0.5],
+        "spread_pred": [np.nan, np.nan, np.nan],
+        "total_pred": [np.nan, np.nan, np.nan],
+        "start_time": pa.array([1_700_000_000_000, 1_700_086_400_000, 1_700_000_000_000],
+                               pa.timestamp("ms")),
+        "home_score": [100.0, 90.0, 100.0],
+        "away_score": [95.0, 99.0, 95.0],
+    })
+    recorded = {}
+
+    def record(conn, updates, evaluated_ids):
+        recorded.update(updates=updates, ids=evaluated_ids)
+        return len(evaluated_ids)
+
+    monkeypatch.setattr(daily_predictions, "connection", contextlib.nullcontext)
+    monkeypatch.setattr(daily_predictions, "fetch_unevaluated_predictions", lambda conn: unevaluated)
+    monkeypatch.setattr(daily_predictions, "fetch_model_metric_state", lambda conn, ids: {
+        "m1": {"model_type": "WIN_PROBABILITY", "calibration_plot": None},
+    })
+    monkeypatch.setattr(daily_predictions, "record_model_metrics", record)
+
+    assert daily_predictions.update_model_performance() == 2
+    assert recorded["ids"] == ["p1", "p2"]
+    assert [u["model_id"] for u in recorded["updates"]] == ["m1"]
+    assert recorded["updates"][0]["accuracy"] == 1.0
@@ -0,0 +1,162 @@
+"""Head-to-head index against a brute-force scan of the game list."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from features import HeadToHeadIndex
+from features.game_log import games_frame
+from tests.conftest import make_game
+
+TEAMS = ["A", "B", "C", "D"]
+
+
+@pytest.fixture
+def games():
+    """Random meetings of four teams, ties and same-time games included."""
+    rng = np.random.default_rng(7)
+    games = []
+    for i in range(120):
+        home, away = rng.choice(TEAMS, size=2, replace=False)
+        start = pd.Timestamp("2024-01-01") + pd.Timedelta(hours=int(rng.integers(0, 24 * 30)))
+        score = rng.integers(90, 100, size=2)
+        final = rng.random() < 0.85
+        games.append(make_game(
+            f"g{i:03d}", str(home), str(away), start.isoformat(),
+            *(map(float, score) if final else (None, None)),
+        ))
+    # A doubleheader: the second game must not see the first
+    games += [
+        make_game("dh1", "A", "B", "2024-01-15T12:00:00", 101, 99),
+        make_game("dh2", "B", "A", "2024-01-15T12:00:00", 95, 97),
+    ]
+    return games
+
+
+def _meetings(games, team_a, team_b, before):
+    """Brute force: team_a's margins in FINAL meetings strictly before a time."""
+    before = pd.Timestamp(before)
+    meetings = []
+    for g in games:
+        if g["status"] != "FINAL" or {g["homeTeamId"], g["awayTeamId"]} != {team_a, team_b}:
+            continue
+        if pd.Timestamp(g["startTime"]) >= before:
+            continue
+        margin = g["homeScore"] - g["awayScore"]
+        meetings.append((pd.Timestamp(g["startTime"]), g["id"],
+                         margin if g["homeTeamId"] == team_a else -margin))
+    return sorted(meetings)
+
+
+def _record(meetings):
+    margins = [m for _, _, m in meetings]
+    return {
+        "games": len(margins),
+        "wins": sum(m > 0 for m in margins),
+        "losses": sum(m < 0 for m in margins),
+        "margin": np.mean(margins) if margins else np.nan,
+    }
+
+
+def _index(games):
+    h2h = HeadToHeadIndex()
+    h2h.update(games)
+    return h2h
+
+
+def test_features_match_a_brute_force_scan(games):
+    frame = games_frame(games)
+    features = _index(games).features(frame, k=5).set_index("id")
+
+    for game in frame.to_dict("records"):
+        meetings = _meetings(games, game["homeTeamId"], game["awayTeamId"], game["startTime"])
+        row = features.loc[game["id"]]
+        for prefix, window in (("h2h", meetings), ("h2h_l5", meetings[-5:])):
+            record = _record(window)
+            assert row[f"{prefix}_games"] == record["games"]
+            if record["games"]:
+                assert row[f"{prefix}_win_pct"] == pytest.approx(record["wins"] / record["games"])
+                assert row[f"{prefix}_margin"] == pytest.approx(record["margin"])
+            else:
+                assert np.isnan(row[f"{prefix}_win_pct"]) and np.isnan(row[f"{prefix}_margin"])
+
+
+@pytest.mark.parametrize("k", [None, 3])
+def test_record_before_and_last_meetings_match_a_brute_force_scan(games, k):
+    h2h = _index(games)
+    times = ["2023-12-31", "2024-01-08T05:00:00", "2024-01-15T12:00:00", "2024-03-01"]
+
+    for team_a in TEAMS:
+        for team_b in TEAMS:
+            if team_a == team_b:
+                continue
+            for before in times:
+                meetings = _meetings(games, team_a, team_b, before)
+                window = meetings if k is None else meetings[-k:]
+                record = h2h.record_before(team_a, team_b, pd.Timestamp(before), k)
+                expected = _record(window)
+                assert {key: record[key] for key in ("games", "wins", "losses")} == {
+                    key: expected[key] for key in ("games", "wins", "losses")
+                }
+                np.testing.assert_allclose(record["margin"], expected["margin"])
+
+                last = h2h.last_meetings(team_a, team_b, pd.Timestamp(before), k=k or 5)
+                assert last["game_id"].tolist() == [g for _, g, _ in meetings[-(k or 5):]]
+                assert last["margin"].tolist() == [m for _, _, m in meetings[-(k or 5):]]
+
+
+def test_home_away_flip_mirrors_the_record(games):
+    h2h = _index(games)
+    forward = h2h.record_before("A", "C", pd.Timestamp("2024-03-01"))
+    reverse = h2h.record_before("C", "A", pd.Timestamp("2024-03-01"))
+    assert forward["games"] == reverse["games"] > 0
+    assert (forward["wins"], forward["losses"]) == (reverse["losses"], reverse["wins"])
+    assert forward["margin"] == pytest.approx(-reverse["margin"])
+
+    slate = games_frame([
+        make_game("ac", "A", "C", "2024-03-01T00:00:00"),
+        make_game("ca", "C", "A", "2024-03-01T00:00:00"),
+    ])
+    features = h2h.features(slate).set_index("id")
+    assert features.loc["ac", "h2h_games"] == features.loc["ca", "h2h_games"]
+    assert features.loc["ac", "h2h_win_pct"] == pytest.approx(
+        forward["wins"] / forward["games"]
+    )
+    assert features.loc["ca", "h2h_win_pct"] == pytest.approx(
+        reverse["wins"] / reverse["games"]
+    )
+    assert features.loc["ac", "h2h_margin"] == pytest.approx(-features.loc["ca", "h2h_margin"])
+
+
+def test_same_time_games_are_not_before_each_other(games):
+    h2h = _index(games)
+    features = h2h.features(games_frame(games)).set_index("id")
+    previous = _meetings(games, "A", "B", "2024-01-15T12:00:00")
+
+    assert "dh1" in h2h and "dh2" in h2h
+    assert features.loc["dh1", "h2h_games"] == features.loc["dh2", "h2h_games"] == len(previous)
+    at = h2h.last_meetings("A", "B", pd.Timestamp("2024-01-15T12:00:00"))
+    after = h2h.last_meetings("A", "B", pd.Timestamp("2024-01-15T12:00:01"))
+    assert at["game_id"].tolist() == [g for _, g, _ in previous[-5:]]
+    assert after["game_id"].tolist()[-2:] == ["dh1", "dh2"]
+
+
+def test_save_load_round_trip(games, tmp_path):
+    split = pd.Timestamp("2024-01-20")
+    first = [g for g in games if pd.Timestamp(g["startTime"]) < split]
+    later = [g for g in games if pd.Timestamp(g["startTime"]) >= split]
+    h2h = _index(first)
+    h2h.save(tmp_path / "h2h.npz")
+    restored = HeadToHeadIndex.load(tmp_path / "h2h.npz")
+
+    frame = games_frame(games)
+    assert len(restored) == len(h2h)
+    pd.testing.assert_frame_equal(restored.features(frame), h2h.features(frame))
+    pd.testing.assert_frame_equal(
+        restored.last_meetings("B", "D", pd.Timestamp("2024-03-01")),
+        h2h.last_meetings("B", "D", pd.Timestamp("2024-03-01")),
+    )
+
+    # Later games extend the restored index like the original one
+    assert restored.update(later) == sum(g["status"] == "FINAL" for g in later) > 0
+    pd.testing.assert_frame_equal(restored.features(frame), _index(first + later).features(frame))
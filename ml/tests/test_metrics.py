@@ -0,0 +1,111 @@
+"""Grouped streaming metrics against hand-computed values."""
+
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from training.metrics import MetricSums, probability_metrics
+
+NAN = np.nan
+
+PREDICTIONS = pd.DataFrame({
+    "model": ["m1", "m1", "m1", "m1", "m1", "m2"],
+    "league": ["NBA", "NBA", "NBA", "NFL", "NFL", "NBA"],
+    "home_win_prob": [0.2, 0.4, 0.8, 0.7, NAN, 0.9],
+    "home_win": [0.0, 1.0, 1.0, 0.0, 1.0, 1.0],
+    "spread_pred": [1.0, -2.0, NAN, 5.0, 0.0, 2.0],
+    "spread": [3.0, -2.0, 4.0, 1.0, NAN, 2.0],
+    "spread_lower": [0.0, -4.0, NAN, NAN, NAN, NAN],
+    "spread_upper": [2.0, 0.0, NAN, NAN, NAN, NAN],
+})
+
+
+def _sums(*chunks):
+    sums = MetricSums(group_by=("model", "league"), bins=2)
+    for chunk in chunks:
+        sums.update(chunk)
+    return sums
+
+
+def test_summary_rolls_up_to_the_model():
+    summary = _sums(PREDICTIONS).summary(by=("model",)).set_index("model")
+    m1, m2 = summary.loc["m1"], summary.loc["m2"]
+
+    # m1 probabilities 0.2, 0.4, 0.8, 0.7 against 0, 1, 1, 0 (the NaN row is skipped)
+    assert m1["games"] == 4
+    likelihood = 0.8 * 0.4 * 0.8 * 0.3
+    assert m1["log_loss"] == pytest.approx(-math.log(likelihood) / 4)
+    assert m1["brier_score"] == pytest.approx((0.04 + 0.36 + 0.04 + 0.49) / 4)
+    assert m1["accuracy"] == 0.5
+    # Bin [0, 0.5): predicted 0.6, observed 1; bin [0.5, 1]: predicted 1.5, observed 1
+    assert m1["ece"] == pytest.approx((0.4 + 0.5) / 4)
+    assert m1["mce"] == pytest.approx(0.25)
+    # Spread errors -2, 0, 4; one of two intervals covers the actual value
+    assert m1["spread_mae"] == pytest.approx(2.0)
+    assert m1["spread_rmse"] == pytest.approx(math.sqrt(20 / 3))
+    assert m1["spread_coverage"] == 0.5
+    assert m1["spread_width"] == pytest.approx(3.0)
+    assert np.isnan(m1["total_mae"])
+
+    assert m2["games"] == 1
+    assert m2["brier_score"] == pytest.approx(0.01)
+    assert m2["ece"] == pytest.approx(0.1) and m2["mce"] == pytest.approx(0.1)
+    assert m2["spread_mae"] == 0.0
+    assert np.isnan(m2["spread_coverage"])
+
+
+def test_summary_per_group_and_overall():
+    sums = _sums(PREDICTIONS)
+    groups = sums.summary().set_index(["model", "league"])
+    assert groups.index.tolist() == [("m1", "NBA"), ("m1", "NFL"), ("m2", "NBA")]
+    assert groups.loc[("m1", "NFL"), "brier_score"] == pytest.approx(0.49)
+    assert groups.loc[("m1", "NFL"), "spread_mae"] == pytest.approx(4.0)
+
+    overall = sums.summary(by=()).iloc[0]
+    assert overall["games"] == 5
+    assert overall["brier_score"] == pytest.approx((0.04 + 0.36 + 0.04 + 0.49 + 0.01) / 5)
+    # Bin [0.5, 1] now holds 0.8, 0.7, 0.9: mean 0.8 against a win rate of 2/3
+    assert overall["ece"] == pytest.approx((0.4 + 0.4) / 5)
+    assert overall["mce"] == pytest.approx(0.2)
+
+    with pytest.raises(ValueError, match="season"):
+        sums.summary(by=("season",))
+
+
+def test_merge_matches_one_pass():
+    first, second = _sums(PREDICTIONS.iloc[:3]), _sums(PREDICTIONS.iloc[3:])
+    merged = first.merge(second)
+
+    pd.testing.assert_frame_equal(merged.summary(), _sums(PREDICTIONS).summary())
+    pd.testing.assert_frame_equal(merged.reliability(), _sums(PREDICTIONS).reliability())
+    with pytest.raises(ValueError, match="different groups"):
+        merged.merge(MetricSums(group_by=("model",), bins=2))
+
+
+def test_all_nan_group_has_nan_metrics():
+    sums = _sums({
+        "model": ["m1"], "league": ["NBA"],
+        "home_win_prob": [NAN], "home_win": [1.0], "spread_pred": [1.0], "spread": [NAN],
+    })
+    row = sums.summary().iloc[0]
+    assert row["games"] == 0
+    for column in ("log_loss", "brier_score", "accuracy", "ece", "mce", "spread_mae"):
+        assert np.isnan(row[column])
+
+
+def test_reliability_bins():
+    bins = _sums(PREDICTIONS).reliability(by=("model",))
+    m1 = bins[bins["model"] == "m1"]
+    assert m1["count"].tolist() == [2, 2]
+    assert m1["predicted"].tolist() == pytest.approx([0.3, 0.75])
+    assert m1["observed"].tolist() == pytest.approx([0.5, 0.5])
+    assert m1["bin_upper"].tolist() == [0.5, 1.0]
+
+
+def test_probability_metrics_ece_and_mce():
+    metrics = probability_metrics([0, 1, 1, 0], [0.2, 0.4, 0.8, 0.7], bins=2)
+    assert metrics["calibration_error"] == pytest.approx(0.225)
+    assert metrics["mce"] == pytest.approx(0.25)
+    assert metrics["accuracy"] == 0.5
@@ -0,0 +1,111 @@
+"""Point-in-time odds features and the prediction times that bound them."""
+
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from db.writers import create_sqlite_tables, upsert_predictions
+from features.odds import MARKETS, ODDS_STATS, odds_features, prediction_cutoffs
+
+
+def snapshot(game_id, book, timestamp, home_odds, away_odds, market="MONEYLINE", line=None):
+    return {
+        "gameId": game_id,
+        "market": market,
+        "bookmakerId": book,
+        "timestamp": timestamp,
+        "homeOdds": home_odds,
+        "awayOdds": away_odds,
+        "line": line,
+    }
+
+
+def test_odds_features_ignore_snapshots_after_the_cutoff():
+    games = pd.DataFrame({
+        "id": ["g1", "g2"],
+        "startTime": ["2024-01-10T00:00:00", "2024-01-11T00:00:00"],
+    })
+    cutoffs = prediction_cutoffs(
+        games, {"g1": datetime(2024, 1, 9, 12)}, now=datetime(2024, 1, 20)
+    )
+    before = [
+        snapshot("g1", "b1", "2024-01-09T06:00:00", -150, 130),
+        snapshot("g1", "b2", "2024-01-09T12:00:00", -140, 120),
+        snapshot("g2", "b1", "2024-01-10T20:00:00", 110, -130),
+        snapshot("g1", "b1", "2024-01-08T00:00:00", 0, 0, market="SPREAD", line=-3.5),
+    ]
+    after = [
+        snapshot("g1", "b1", "2024-01-09T12:00:01", 300, -400),
+        snapshot("g1", "b3", "2024-01-09T18:00:00", 300, -400),
+        snapshot("g2", "b1", "2024-01-10T23:30:00", -500, 400),
+        snapshot("g1", "b1", "2024-01-09T13:00:00", 0, 0, market="SPREAD", line=7.5),
+        snapshot("g2", "b2", "2024-01-10T23:59:00", 0, 0, market="TOTAL", line=230.5),
+    ]
+    columns = [f"{prefix}_{stat}" for prefix in MARKETS.values() for stat in ODDS_STATS]
+
+    expected = odds_features(pd.DataFrame(before), games, cutoffs, now=datetime(2024, 1, 20))
+    actual = odds_features(pd.DataFrame(before + after), games, cutoffs, now=datetime(2024, 1, 20))
+
+    pd.testing.assert_frame_equal(actual[columns], expected[columns])
+    assert actual["ml_home_prob_books"].tolist() == [2.0, 1.0]
+    assert np.isnan(actual["total_line_current"]).all()
+
+
+def test_upsert_predictions_defaults_predicted_at_to_utc():
+    conn = sqlite3.connect(":memory:")
+    create_sqlite_tables(conn)
+    before = datetime.now(timezone.utc).replace(tzinfo=None)
+    upsert_predictions(conn, [{
+        "model_id": "m1",
+        "game_id": "g1",
+        "home_win_prob": 0.6,
+        "game_start_time": datetime(2024, 1, 10),
+    }])
+    after = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    predicted_at, created_at = conn.execute(
+        'SELECT "predictedAt", "createdAt" FROM "MLPrediction"'
+    ).fetchone()
+    for value in (predicted_at, created_at):
+        stamp = datetime.fromisoformat(value)
+        assert stamp.tzinfo is None
+        assert before - timedelta(seconds=1) <= stamp <= after + timedelta(seconds=1)
+
+
+def test_training_odds_match_the_latest_stored_prediction(monkeypatch):
+    from scripts import extract_features
+
+    games = pd.DataFrame({"id": ["g1"], "league": ["NBA"], "startTime": ["2024-01-10T00:00:00"]})
+    snapshots = pd.DataFrame([
+        snapshot("g1", "b1", "2024-01-03T06:00:00", -150, 130),
+        snapshot("g1", "b1", "2024-01-08T06:00:00", -200, 170),
+        snapshot("g1", "b1", "2024-01-09T06:00:00", 300, -400),
+    ])
+    monkeypatch.setattr(extract_features, "stream_odds", lambda *args, **kwargs: iter([snapshots]))
+
+    conn = sqlite3.connect(":memory:")
+    create_sqlite_tables(conn)
+    served = {}
+    for predicted_at in (datetime(2024, 1, 3, 12), datetime(2024, 1, 8, 12)):
+        served[predicted_at] = extract_features.add_odds_features(
+            conn, games, predicted_at=predicted_at
+        )
+        upsert_predictions(conn, [{
+            "model_id": "m1", "game_id": "g1", "home_win_prob": 0.6,
+            "game_start_time": datetime(2024, 1, 10), "predicted_at": predicted_at,
+        }])
+
+    # The re-prediction replaced the row: training cuts off at its predictedAt
+    stored = dict(conn.execute('SELECT "gameId", "predictedAt" FROM "MLPrediction"'))
+    assert stored == {"g1": "2024-01-08T12:00:00"}
+    monkeypatch.setattr(extract_features, "fetch_prediction_times", lambda conn, ids: stored)
+    training = extract_features.add_odds_features(conn, games, now=datetime(2024, 1, 20))
+
+    columns = [f"ml_home_prob_{stat}" for stat in ODDS_STATS]
+    latest = served[datetime(2024, 1, 8, 12)]
+    pd.testing.assert_frame_equal(training[columns], latest[columns])
+    assert training["ml_home_prob_current"].iloc[0] == pytest.approx(200 / 300 / (200 / 300 + 100 / 270))
+    assert served[datetime(2024, 1, 3, 12)]["ml_home_prob_books"].tolist() == [1.0]
@@ -0,0 +1,64 @@
+"""Incremental appends to the compacted odds archive."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from storage.odds_archive import OddsArchive
+
+GAMES = pd.DataFrame({"id": ["g1"], "league": ["NBA"], "startTime": ["2024-01-10T00:00:00"]})
+
+
+def snapshots(timestamp, line, book="b1"):
+    return pd.DataFrame({
+        "gameId": ["g1"],
+        "market": ["SPREAD"],
+        "bookmakerId": [book],
+        "timestamp": [timestamp],
+        "homeOdds": [-110.0],
+        "awayOdds": [-110.0],
+        "overOdds": [np.nan],
+        "underOdds": [np.nan],
+        "line": [line],
+        "league": ["NBA"],
+        "gameStartTime": ["2024-01-10T00:00:00"],
+    })
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return OddsArchive(tmp_path / "odds")
+
+
+def test_all_duplicate_batch_advances_the_watermark(archive):
+    assert archive.append(snapshots("2024-01-09T10:00:00", -3.5)) == 1
+    assert archive.append(snapshots("2024-01-09T11:00:00", -3.5)) == 0
+    assert archive.watermark == np.datetime64("2024-01-09T11:00:00", "ms")
+
+    assert archive.append(snapshots("2024-01-09T12:00:00", -4.5)) == 1
+    assert archive.read(GAMES)["line"].tolist() == [-3.5, -4.5]
+
+
+def test_duplicates_are_dropped_across_appends(archive):
+    archive.append(pd.concat([
+        snapshots("2024-01-09T10:00:00", -3.5),
+        snapshots("2024-01-09T10:00:00", -2.5, book="b2"),
+    ]))
+    kept = archive.append(pd.concat([
+        snapshots("2024-01-09T11:00:00", -3.5),
+        snapshots("2024-01-09T11:00:00", -3.0, book="b2"),
+        snapshots("2024-01-09T12:00:00", -3.5),
+        snapshots("2024-01-09T13:00:00", -3.0),
+    ]))
+    assert kept == 2
+
+    odds = archive.read(GAMES)
+    assert list(zip(odds["bookmakerId"], odds["line"])) == [
+        ("b1", -3.5), ("b1", -3.0), ("b2", -2.5), ("b2", -3.0),
+    ]
+
+
+def test_snapshots_at_or_before_the_watermark_are_ignored(archive):
+    archive.append(snapshots("2024-01-09T10:00:00", -3.5))
+    assert archive.append(snapshots("2024-01-09T10:00:00", -7.5)) == 0
+    assert archive.read(GAMES)["line"].tolist() == [-3.5]
@@ -0,0 +1,73 @@
+"""Partitioned Parquet output of the streaming extractor."""
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from scripts.extract_features import PartitionedParquetWriter
+
+
+def features(ids, value, season=2023):
+    return pd.DataFrame({
+        "id": [f"g{i:02d}" for i in ids],
+        "league": "NBA",
+        "season": season,
+        "startTime": pd.to_datetime([f"2023-11-{1 + i:02d}" for i in ids]),
+        "home_elo": [float(value)] * len(ids),
+    })
+
+
+def write(root, *frames, row_group_size=4):
+    writer = PartitionedParquetWriter(root, row_group_size)
+    for frame in frames:
+        writer.write(frame)
+    writer.close()
+
+
+def partition(root, season=2023):
+    return pq.read_table(root / "league=NBA" / f"season={season}" / "part-0.parquet").to_pandas()
+
+
+def test_partial_season_rerun_keeps_the_other_rows(tmp_path):
+    write(tmp_path, features(range(10), 1500))
+    write(tmp_path, features([3, 4, 12], 1600), features([11], 1600))
+
+    table = partition(tmp_path)
+    assert table["id"].tolist() == [f"g{i:02d}" for i in [*range(10), 11, 12]]
+    assert table.set_index("id")["home_elo"].to_dict() == {
+        **{f"g{i:02d}": 1500.0 for i in range(10)},
+        **{f"g{i:02d}": 1600.0 for i in (3, 4, 11, 12)},
+    }
+    assert pq.ParquetFile(
+        tmp_path / "league=NBA" / "season=2023" / "part-0.parquet"
+    ).metadata.num_row_groups == 3
+    assert [p.name for p in tmp_path.rglob("*") if p.is_file()] == ["part-0.parquet"]
+
+
+def test_whole_season_rerun_replaces_the_partition(tmp_path):
+    write(tmp_path, features(range(10), 1500))
+    rerun = features(range(10), 1600).rename(columns={"home_elo": "elo_v2"})
+    write(tmp_path, rerun)
+    assert partition(tmp_path).columns.tolist() == ["id", "startTime", "elo_v2"]
+
+
+def test_partial_rerun_with_another_schema_is_rejected(tmp_path):
+    write(tmp_path, features(range(10), 1500))
+    rerun = features([3], 1600).rename(columns={"home_elo": "elo_v2"})
+    with pytest.raises(ValueError, match="whole seasons"):
+        write(tmp_path, rerun)
+
+    assert partition(tmp_path)["home_elo"].tolist() == [1500.0] * 10
+    assert [p.name for p in tmp_path.rglob("*") if p.is_file()] == ["part-0.parquet"]
+
+
+def test_abort_leaves_the_dataset_untouched(tmp_path):
+    write(tmp_path, features(range(10), 1500))
+    writer = PartitionedParquetWriter(tmp_path, 4)
+    writer.write(features(range(10), 1600))
+    writer.write(features(range(3), 1600, season=2024))
+    writer.abort()
+
+    assert partition(tmp_path)["home_elo"].tolist() == [1500.0] * 10
+    assert not (tmp_path / "league=NBA" / "season=2024" / "part-0.parquet").exists()
+    assert [p.name for p in tmp_path.rglob("*") if p.is_file()] == ["part-0.parquet"]
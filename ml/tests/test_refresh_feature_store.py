@@ -0,0 +1,113 @@
+"""Incremental feature store refresh tests."""
+
+import numpy as np
+import pytest
+
+from features import EloEngine, FormTracker, HeadToHeadIndex
+from features.game_log import games_frame
+from scripts.extract_features import compute_game_features, refresh_feature_store
+from storage import FeatureStore
+from tests.conftest import make_game
+
+
+def _season():
+    teams = ["A", "B", "C", "D"]
+    games = []
+    for day in range(40):
+        home, away = teams[day % 4], teams[(day + 1 + day // 4) % 4]
+        if home == away:
+            away = teams[(day + 2) % 4]
+        games.append(make_game(
+            f"g{day:02d}", home, away, f"2024-01-{1 + day // 2:02d}T{12 + day % 2 * 6:02d}:00:00",
+            100 + (day * 7) % 13, 98 + (day * 5) % 11,
+        ))
+    games.append(make_game("next", "A", "B", "2024-02-01T19:00:00"))
+    return games
+
+
+def _from_scratch(games):
+    return compute_game_features(
+        games_frame(games), EloEngine(), form=FormTracker(), h2h=HeadToHeadIndex()
+    )
+
+
+def _refresh(store, games, checkpoints):
+    engines = {
+        "elo": EloEngine.load(checkpoints / "elo.npz"),
+        "form": FormTracker.load(checkpoints / "form.npz"),
+        "h2h": HeadToHeadIndex.load(checkpoints / "h2h.npz"),
+    }
+    refresh_feature_store(store, games_frame(games), **engines)
+    return engines
+
+
+@pytest.fixture
+def seeded(tmp_path):
+    games = _season()
+    store = FeatureStore(tmp_path / "store.sqlite", "1")
+    elo, form, h2h = EloEngine(), FormTracker(), HeadToHeadIndex()
+    refresh_feature_store(store, games_frame(games), elo, form=form, h2h=h2h)
+    elo.save(tmp_path / "elo.npz")
+    form.save(tmp_path / "form.npz")
+    h2h.save(tmp_path / "h2h.npz")
+    yield store, games, tmp_path
+    store.close()
+
+
+def _assert_store_matches(store, games):
+    expected = _from_scratch(games)
+    stored = store.read(expected["id"])
+    for column in ("home_elo", "away_elo", "elo_diff"):
+        np.testing.assert_array_equal(stored[column].to_numpy(), expected[column].to_numpy())
+
+
+def test_feature_version_change_with_checkpoints_matches_rebuild(seeded):
+    store, games, checkpoints = seeded
+    bumped = FeatureStore(store.path, "2")
+    try:
+        _refresh(bumped, games, checkpoints)
+        _assert_store_matches(bumped, games)
+    finally:
+        bumped.close()
+
+
+def test_new_result_with_checkpoints_matches_rebuild(seeded):
+    store, games, checkpoints = seeded
+    games[-1].update(status="FINAL", homeScore=101, awayScore=99)
+    _refresh(store, games, checkpoints)
+    _assert_store_matches(store, games)
+
+
+def test_score_correction_of_folded_game_replays_the_engines(seeded):
+    store, games, checkpoints = seeded
+    games[3]["homeScore"] = games[3]["awayScore"] - 20  # The home win becomes a loss
+    engines = _refresh(store, games, checkpoints)
+    _assert_store_matches(store, games)
+
+    expected = _from_scratch(games)
+    stored = store.read(expected["id"])
+    for column in ("home_streak", "away_ew_point_diff", "h2h_win_pct", "h2h_margin"):
+        np.testing.assert_array_equal(stored[column].to_numpy(), expected[column].to_numpy())
+    assert engines["elo"].ratings() == _rebuilt_ratings(games)
+
+
+def test_score_correction_replays_from_the_full_history(seeded):
+    store, games, checkpoints = seeded
+    games[3]["homeScore"] = games[3]["awayScore"] - 20
+    recent = games_frame(games[2:])
+    engines = {
+        "elo": EloEngine.load(checkpoints / "elo.npz"),
+        "form": FormTracker.load(checkpoints / "form.npz"),
+        "h2h": HeadToHeadIndex.load(checkpoints / "h2h.npz"),
+    }
+    refresh_feature_store(store, recent, **engines, history=lambda: games_frame(games))
+
+    assert engines["elo"].ratings() == _rebuilt_ratings(games)
+    assert engines["elo"].ratings() != EloEngine.load(checkpoints / "elo.npz").ratings()
+    assert len(engines["h2h"]) == len(HeadToHeadIndex.load(checkpoints / "h2h.npz"))
+
+
+def _rebuilt_ratings(games):
+    elo = EloEngine()
+    elo.update(games)
+    return elo.ratings()
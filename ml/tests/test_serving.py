@@ -0,0 +1,162 @@
+"""Batch scoring and per-model prediction rows."""
+
+import contextlib
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from serving import ServedModel, ServerUnavailable, merge_outputs, score_models, split_outputs
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+import daily_predictions  # noqa: E402
+
+
+class SumEstimator:
+    """predict() = sum of the feature columns (NaN counts as 0)."""
+
+    def predict(self, X):
+        return np.nansum(X, axis=1)
+
+
+class FailingEstimator:
+    def predict(self, X):
+        raise RuntimeError("broken artifact")
+
+
+def served(model_id, model_type, features, estimator=None):
+    row = {"id": model_id, "version": f"v-{model_id}", "model_type": model_type,
+           "features": features}
+    return ServedModel(row, estimator or SumEstimator())
+
+
+ROWS = [
+    {"id": "g1", "startTime": "2024-01-10T00:00:00", "a": 1.0, "b": 2.0},
+    {"id": "g2", "startTime": "2024-01-11T00:00:00", "a": 3.0, "b": None},
+]
+
+
+def test_score_models_selects_each_models_columns():
+    spread = served("s", "SPREAD", ["a", "b"])
+    total = served("t", "TOTAL", ["b", "missing"])
+    outputs = score_models([spread, total], ROWS)
+
+    assert outputs == [
+        [{"spread_pred": 3.0}, {"spread_pred": 3.0}],
+        [{"total_pred": 2.0}, {"total_pred": 0.0}],
+    ]
+
+
+def test_score_models_on_error():
+    broken = served("x", "SPREAD", ["a"], FailingEstimator())
+    ok = served("t", "TOTAL", ["a"])
+    with pytest.raises(RuntimeError, match="broken"):
+        score_models([broken, ok], ROWS)
+
+    failed = []
+    outputs = score_models([broken, ok], ROWS, on_error=lambda m, e: failed.append(m))
+    assert failed == [broken]
+    assert outputs[0] is None
+    assert outputs[1] == [{"total_pred": 1.0}, {"total_pred": 3.0}]
+
+
+def test_merge_then_split_outputs_round_trip():
+    spread = served("s", "SPREAD", ["a"])
+    total = served("t", "TOTAL", ["b"])
+    merged = merge_outputs(ROWS, score_models([spread, total], ROWS) + [None])
+
+    assert merged[0] == {
+        "game_id": "g1", "home_win_prob": None, "away_win_prob": None,
+        "spread_pred": 1.0, "total_pred": 2.0,
+    }
+    split = split_outputs(merged, {
+        "SPREAD": {"id": "s", "version": "v-s"},
+        "TOTAL": {"id": "t", "version": "v-t"},
+    })
+    assert split == [
+        ({"id": "s", "version": "v-s", "model_type": "SPREAD"},
+         [{"spread_pred": 1.0}, {"spread_pred": 3.0}]),
+        ({"id": "t", "version": "v-t", "model_type": "TOTAL"},
+         [{"total_pred": 2.0}, {"total_pred": 0.0}]),
+    ]
+
+
+def _by_model(predictions):
+    rows = {}
+    for prediction in predictions:
+        rows.setdefault(prediction["model_id"], []).append(prediction)
+    return rows
+
+
+def test_one_row_per_active_and_shadow_model_in_process(monkeypatch):
+    active = [served("w", "WIN_PROBABILITY", ["a"]), served("s", "SPREAD", ["a", "b"])]
+
+    class Client:
+        def predict_by_model(self, rows):
+            raise ServerUnavailable("down")
+
+    class Cache:
+        def refresh(self, conn):
+            pass
+
+        def served(self):
+            return active
+
+    monkeypatch.setattr(daily_predictions, "PredictionClient", Client)
+    monkeypatch.setattr(daily_predictions, "ModelCache", Cache)
+    monkeypatch.setattr(daily_predictions, "connection", contextlib.nullcontext)
+
+    shadow = served("s2", "SPREAD", ["b"])
+    broken = served("x", "TOTAL", ["a"], FailingEstimator())
+    predictions = daily_predictions.generate_batch_predictions(ROWS, [shadow, broken])
+
+    rows = _by_model(predictions)
+    assert sorted(rows) == ["s", "s2", "w"]
+    assert [p["game_id"] for p in rows["s"]] == ["g1", "g2"]
+    assert [p["spread_pred"] for p in rows["s"]] == [3.0, 3.0]
+    assert [p["spread_pred"] for p in rows["s2"]] == [2.0, 0.0]
+    assert set(rows["s"][0]) == {"spread_pred", "model_id", "game_id", "game_start_time"}
+    assert set(rows["w"][0]) == {
+        "home_win_prob", "away_win_prob", "model_id", "game_id", "game_start_time",
+    }
+
+
+def test_one_row_per_active_model_from_the_server(monkeypatch):
+    class Client:
+        def predict_by_model(self, rows):
+            return [
+                ({"id": "w", "version": "v-w", "model_type": "WIN_PROBABILITY"},
+                 [{"home_win_prob": 0.6, "away_win_prob": 0.4}] * len(rows)),
+                ({"id": "t", "version": "v-t", "model_type": "TOTAL"},
+                 [{"total_pred": 210.0}] * len(rows)),
+            ]
+
+    monkeypatch.setattr(daily_predictions, "PredictionClient", Client)
+    predictions = daily_predictions.generate_batch_predictions(ROWS)
+
+    rows = _by_model(predictions)
+    assert sorted(rows) == ["t", "w"]
+    assert "spread_pred" not in rows["w"][0] and "total_pred" not in rows["w"][0]
+    assert [p["total_pred"] for p in rows["t"]] == [210.0, 210.0]
+    assert rows["t"][1]["game_start_time"] == "2024-01-11T00:00:00"
+
+
+def test_active_model_failure_is_not_skipped(monkeypatch):
+    class Client:
+        def predict_by_model(self, rows):
+            raise ServerUnavailable("down")
+
+    class Cache:
+        def refresh(self, conn):
+            pass
+
+        def served(self):
+            return [served("x", "TOTAL", ["a"], FailingEstimator())]
+
+    monkeypatch.setattr(daily_predictions, "PredictionClient", Client)
+    monkeypatch.setattr(daily_predictions, "ModelCache", Cache)
+    monkeypatch.setattr(daily_predictions, "connection", contextlib.nullcontext)
+    with pytest.raises(RuntimeError, match="broken"):
+        daily_predictions.generate_batch_predictions(ROWS)
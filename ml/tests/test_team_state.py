@@ -0,0 +1,158 @@
+"""Serving-time team state: parity with the batch extractor and daily updates."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from features import HeadToHeadIndex, TeamState
+from features.game_log import games_frame
+from scripts.extract_features import RECENT_WINDOWS, verify_team_state
+from tests.conftest import make_game
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+import daily_predictions  # noqa: E402
+
+TEAMS = ["A", "B", "C", "D", "E"]
+
+
+def _schedule(days=60):
+    """Two games a day for `days` days, then a SCHEDULED slate."""
+    games = []
+    for day in range(days):
+        for slot in range(2):
+            i = 2 * day + slot
+            home, away = TEAMS[i % 5], TEAMS[(i + 1 + day % 4) % 5]
+            start = pd.Timestamp("2024-01-01T18:00:00") + pd.Timedelta(days=day, hours=2 * slot)
+            game = make_game(f"g{i:03d}", home, away, start.isoformat(),
+                             95 + (i * 7) % 17, 93 + (i * 11) % 19)
+            game["updatedAt"] = (start + pd.Timedelta(hours=3)).isoformat()
+            games.append(game)
+    slate = pd.Timestamp("2024-01-01T19:00:00") + pd.Timedelta(days=days)
+    games += [
+        make_game("next1", "A", "B", slate.isoformat()),
+        make_game("next2", "C", "D", (slate + pd.Timedelta(hours=1)).isoformat()),
+    ]
+    return games
+
+
+def _build(games):
+    state, h2h = TeamState(windows=RECENT_WINDOWS), HeadToHeadIndex()
+    state.update(games)
+    h2h.update(games)
+    return state, h2h
+
+
+def _slate(games):
+    return [g for g in games if g["status"] == "SCHEDULED"]
+
+
+def test_verify_team_state_matches_the_batch_extractor():
+    assert verify_team_state(games_frame(_schedule())) == []
+
+
+def test_verify_team_state_reports_mismatched_columns(monkeypatch):
+    features = TeamState.features
+
+    def shifted(self, *args, **kwargs):
+        rows = features(self, *args, **kwargs)
+        rows["home_elo"] += 1.0
+        return rows
+
+    monkeypatch.setattr(TeamState, "features", shifted)
+    assert "home_elo" in verify_team_state(games_frame(_schedule()))
+
+
+def test_incremental_update_through_checkpoints_matches_a_full_build(tmp_path):
+    games = _schedule()
+    final = [g for g in games if g["status"] == "FINAL"]
+
+    state, h2h = _build(final[:80])
+    for day in range(80, len(final), 10):
+        state.save(tmp_path / "team_state.npz")
+        h2h.save(tmp_path / "h2h.npz")
+        state = TeamState.load(tmp_path / "team_state.npz")
+        h2h = HeadToHeadIndex.load(tmp_path / "h2h.npz")
+        # Each run re-reads a few already folded days
+        assert state.update(final[day - 6:day + 10]) == len(final[day:day + 10])
+        h2h.update(final[day - 6:day + 10])
+
+    full_state, full_h2h = _build(final)
+    assert state.synced_at == full_state.synced_at == np.datetime64(final[-1]["updatedAt"], "ms")
+    pd.testing.assert_frame_equal(
+        state.features(_slate(games), h2h), full_state.features(_slate(games), full_h2h)
+    )
+    pd.testing.assert_frame_equal(state.table(), full_state.table())
+
+
+class _GameTable:
+    """In-memory Game table behind the two queries advance_team_state runs."""
+
+    def __init__(self, games):
+        self.games = games_frame(games)
+        self.games["updatedAt"] = pd.to_datetime(self.games["updatedAt"]).astype("datetime64[ms]")
+
+    def updated_since(self, conn, updated_since, before):
+        g = self.games
+        late = (g["status"] == "FINAL") & (g["startTime"] < before) & (g["updatedAt"] > updated_since)
+        return g[late].reset_index(drop=True)
+
+    def between(self, conn, start_date, end_date):
+        g = self.games
+        start = pd.Timestamp(start_date)
+        end = pd.Timestamp(end_date) + pd.Timedelta(days=1)
+        return pa.Table.from_pandas(g[(g["startTime"] >= start) & (g["startTime"] < end)])
+
+
+def _advance(monkeypatch, state, h2h, games):
+    table = _GameTable(games)
+    monkeypatch.setattr(daily_predictions, "fetch_final_games_updated_since", table.updated_since)
+    monkeypatch.setattr(daily_predictions, "fetch_games_arrow", table.between)
+    end = table.games["startTime"].max().date()
+    return daily_predictions.advance_team_state(None, state, h2h, end)
+
+
+def _with_late_result(games, game_id, updated_at):
+    late = [dict(g) for g in games]
+    game = next(g for g in late if g["id"] == game_id)
+    game.update(status="FINAL", homeScore=101, awayScore=99, updatedAt=updated_at)
+    return late
+
+
+def test_advance_folds_new_results(monkeypatch):
+    games = _schedule()
+    final = [g for g in games if g["status"] == "FINAL"]
+    state, h2h = _build(final[:100])
+
+    assert _advance(monkeypatch, state, h2h, games) == len(final) - 100
+    full_state, full_h2h = _build(final)
+    pd.testing.assert_frame_equal(
+        state.features(_slate(games), h2h), full_state.features(_slate(games), full_h2h)
+    )
+
+
+@pytest.mark.parametrize("days_late", [3, 20])
+def test_advance_rejects_results_that_arrive_late(monkeypatch, days_late):
+    games = _schedule()
+    late_id = f"g{100 - 2 * days_late:03d}"
+    played = [g for g in games if g["status"] == "FINAL" and g["id"] != late_id]
+    state, h2h = _build(played[:99])
+    assert state.watermark == np.datetime64(games[99]["startTime"], "ms")
+
+    # The game went FINAL after the state was built, days after its start
+    games = _with_late_result(games, late_id, "2024-03-01T00:00:00")
+    games = [g for g in games if g["id"] in {p["id"] for p in played[:99]} | {late_id}]
+    with pytest.raises(ValueError, match=f"{late_id}.*rebuild"):
+        _advance(monkeypatch, state, h2h, games)
+
+
+def test_advance_requires_an_updated_at_watermark(monkeypatch):
+    games = [{k: v for k, v in g.items() if k != "updatedAt"} for g in _schedule(10)]
+    state, h2h = _build(games)
+    assert state.synced_at is None
+    with pytest.raises(ValueError, match="rebuild"):
+        _advance(monkeypatch, state, h2h, _schedule(10))
@@ -0,0 +1,89 @@
+"""Hyperparameter search for every ModelType / algorithm pair."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from storage.trial_store import TrialStore
+from training.backtest import FeatureMatrix
+from training.estimators import make_estimator
+from training.tuning import BUDGET_PARAMS, SEARCH_SPACES, search_algorithm, tune
+
+
+def _build_matrix(directory, seasons, unplayed=()):
+    """A feature table with one informative feature, 40 games per season."""
+    rng = np.random.default_rng(0)
+    seasons = [*seasons, *unplayed]
+    n = 40 * len(seasons)
+    strength = rng.normal(size=n)
+    spread = 5 * strength + rng.normal(size=n)
+    played = ~np.isin(np.repeat(seasons, 40), unplayed)
+    table = pd.DataFrame({
+        "id": [f"g{i}" for i in range(n)],
+        "league": "NBA",
+        "season": np.repeat(seasons, 40),
+        "startTime": pd.date_range("2021-01-01", periods=n, freq="D"),
+        "homeTeamId": "A",
+        "awayTeamId": "B",
+        "status": np.where(played, "FINAL", "SCHEDULED"),
+        "home_win": np.where(played, (spread > 0).astype(float), np.nan),
+        "spread": np.where(played, spread, np.nan),
+        "total": np.where(played, 200 + rng.normal(size=n), np.nan),
+        "strength": strength,
+        "noise": rng.normal(size=n),
+    })
+    path = directory / "features.parquet"
+    table.to_parquet(path)
+    return FeatureMatrix.build(str(path), str(directory / "cache"))
+
+
+@pytest.fixture
+def matrix(tmp_path):
+    """Three seasons of a feature table with one informative feature."""
+    return _build_matrix(tmp_path, [2021, 2022, 2023])
+
+
+def test_logistic_regression_tunes_ridge_alpha_for_regressors():
+    assert search_algorithm("SPREAD", "logistic_regression") == "ridge"
+    assert search_algorithm("WIN_PROBABILITY", "logistic_regression") == "logistic_regression"
+    assert BUDGET_PARAMS["ridge"] is None
+    for alpha in SEARCH_SPACES["ridge"]["alpha"]:
+        make_estimator("TOTAL", "logistic_regression", {"alpha": alpha})
+
+
+@pytest.mark.parametrize("model_type", ["SPREAD", "TOTAL"])
+def test_tune_ridge_grid(matrix, tmp_path, model_type):
+    with TrialStore(tmp_path / "tuning.sqlite") as trials:
+        result = tune(matrix, model_type, "logistic_regression", trials, folds=1)
+        recorded = trials.trials(result["study"])
+
+    assert set(result["best_params"]) == {"alpha"}
+    assert result["trials"] == len(SEARCH_SPACES["ridge"]["alpha"])
+    assert {trial["budget"] for trial in recorded} == {0}
+
+
+def test_tune_logistic_regression_races_max_iter(matrix, tmp_path):
+    with TrialStore(tmp_path / "tuning.sqlite") as trials:
+        result = tune(
+            matrix, "WIN_PROBABILITY", "logistic_regression", trials,
+            min_budget=10, max_budget=30, method="halving", folds=1,
+        )
+
+    assert set(result["best_params"]) == {"C", "max_iter"}
+
+
+def test_tune_ignores_unplayed_seasons(tmp_path):
+    matrix = _build_matrix(tmp_path, [2021, 2022, 2023], unplayed=[2024])
+    with TrialStore(tmp_path / "tuning.sqlite") as trials:
+        result = tune(matrix, "SPREAD", "logistic_regression", trials, folds=1)
+        scores = [trial["score"] for trial in trials.trials(result["study"])]
+
+    assert result["best_params"] is not None
+    assert np.isfinite(scores).all()
+
+
+def test_tune_without_a_fold_raises(tmp_path):
+    matrix = _build_matrix(tmp_path, [2021, 2022], unplayed=[2023])
+    with TrialStore(tmp_path / "tuning.sqlite") as trials:
+        with pytest.raises(ValueError, match="No walk-forward fold"):
+            tune(matrix, "SPREAD", "logistic_regression", trials)
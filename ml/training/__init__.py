@@ -0,0 +1,37 @@
+"""
+Training Module
+
+Estimators, metrics and walk-forward backtesting for the training scripts.
+"""
+
+from .accumulators import MetricsAccumulator
+from .backtest import FeatureMatrix, run_backtest, score_backtest, walk_forward_folds
+from .estimators import (
+    TARGETS,
+    feature_columns,
+    make_estimator,
+    predict_values,
+    registry_model_type,
+)
+from .metrics import MetricSums, calculate_metrics, calibration_curve
+from .tuning import SEARCH_SPACES, hyperband_brackets, search_algorithm, tune
+
+__all__ = [
+    "MetricsAccumulator",
+    "FeatureMatrix",
+    "run_backtest",
+    "score_backtest",
+    "walk_forward_folds",
+    "TARGETS",
+    "feature_columns",
+    "make_estimator",
+    "predict_values",
+    "registry_model_type",
+    "MetricSums",
+    "calculate_metrics",
+    "calibration_curve",
+    "SEARCH_SPACES",
+    "hyperband_brackets",
+    "search_algorithm",
+    "tune",
+]
@@ -0,0 +1,257 @@
+"""
+Metric Accumulators
+
+Mergeable running state for live model metrics. Predictions are folded in
+once, when their game goes FINAL, so refreshing a model's metrics costs
+O(new games) however many predictions it has made.
+"""
+
+import numpy as np
+
+from .metrics import CALIBRATION_BINS, PROBABILITY_EPS
+
+DEFAULT_WINDOW = 500  # games in the rolling window
+
+# Per-game losses kept in the ring buffer (NaN when not applicable)
+WINDOW_COLUMNS = ("log_loss", "brier", "correct", "spread_abs_error", "total_abs_error")
+
+SUM_KEYS = (
+    "n_prob", "log_loss", "brier", "correct",
+    "n_spread", "spread_abs_error", "spread_sq_error",
+    "n_total", "total_abs_error", "total_sq_error",
+)
+
+
+class MetricsAccumulator:
+    """
+    Running sums, calibration bins and a rolling window for one model.
+
+    Cumulative metrics come from sums and counts; rolling metrics from a ring
+    buffer of the last `window` games' losses, ordered by game start time.
+    Two accumulators over disjoint predictions merge into the same state as
+    one accumulator over both. State round-trips through to_dict/from_dict
+    (plain JSON types), so it can be stored with the model.
+
+    Usage:
+        acc = MetricsAccumulator.from_dict(stored) if stored else MetricsAccumulator()
+        acc.update(start_times, home_win_prob, home_win, spread_pred, spread, ...)
+        acc.rolling_metrics(), acc.calibration()
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, bins=CALIBRATION_BINS):
+        self.window = int(window)
+        self.bins = int(bins)
+        self.sums = dict.fromkeys(SUM_KEYS, 0.0)
+        self.bin_count = np.zeros(self.bins)
+        self.bin_predicted = np.zeros(self.bins)
+        self.bin_observed = np.zeros(self.bins)
+        # Ring buffer: row i holds one game's losses; _times orders rows
+        self._ring = np.full((self.window, len(WINDOW_COLUMNS)), np.nan)
+        self._times = np.full(self.window, -np.inf)
+        self._head = 0
+        self._filled = 0
+
+    def update(
+        self,
+        start_times,
+        home_win_prob=None,
+        home_win=None,
+        spread_pred=None,
+        spread=None,
+        total_pred=None,
+        total=None,
+    ):
+        """
+        Fold in newly evaluated predictions.
+
+        Args:
+            start_times: Game start times (datetime64 or epoch seconds),
+                ascending and not earlier than anything already folded
+            home_win_prob, home_win: Predicted probability and outcome (0/1)
+            spread_pred, spread: Predicted and actual spread (away - home)
+            total_pred, total: Predicted and actual total points
+
+        Missing predictions (None/NaN) skip the metrics they would feed.
+        """
+        times = _epoch_seconds(start_times)
+        n = len(times)
+        losses = np.full((n, len(WINDOW_COLUMNS)), np.nan)
+
+        prob, outcome = _pair(home_win_prob, home_win, n)
+        has = ~np.isnan(prob) & ~np.isnan(outcome)
+        if has.any():
+            p, y = prob[has], outcome[has]
+            clipped = np.clip(p, PROBABILITY_EPS, 1 - PROBABILITY_EPS)
+            log_loss = -(y * np.log(clipped) + (1 - y) * np.log(1 - clipped))
+            brier = (p - y) ** 2
+            correct = ((p >= 0.5) == (y == 1)).astype(np.float64)
+            losses[has, 0], losses[has, 1], losses[has, 2] = log_loss, brier, correct
+            self.sums["n_prob"] += has.sum()
+            self.sums["log_loss"] += log_loss.sum()
+            self.sums["brier"] += brier.sum()
+            self.sums["correct"] += correct.sum()
+            b = np.minimum((p * self.bins).astype(np.int64), self.bins - 1)
+            self.bin_count += np.bincount(b, minlength=self.bins)
+            self.bin_predicted += np.bincount(b, weights=p, minlength=self.bins)
+            self.bin_observed += np.bincount(b, weights=y, minlength=self.bins)
+
+        for column, name, pred, actual in (
+            (3, "spread", spread_pred, spread),
+            (4, "total", total_pred, total),
+        ):
+            pred, actual = _pair(pred, actual, n)
+            has = ~np.isnan(pred) & ~np.isnan(actual)
+            error = pred[has] - actual[has]
+            losses[has, column] = np.abs(error)
+            self.sums[f"n_{name}"] += has.sum()
+            self.sums[f"{name}_abs_error"] += np.abs(error).sum()
+            self.sums[f"{name}_sq_error"] += (error ** 2).sum()
+
+        self._push(times, losses)
+
+    def merge(self, other):
+        """
+        Fold another accumulator's state into this one.
+
+        Sums and bins add; the rolling window keeps the latest `window` games
+        of both by start time.
+        """
+        for key in SUM_KEYS:
+            self.sums[key] += other.sums[key]
+        self.bin_count += other.bin_count
+        self.bin_predicted += other.bin_predicted
+        self.bin_observed += other.bin_observed
+
+        times = np.concatenate([self._window_times(), other._window_times()])
+        losses = np.concatenate([self._window_losses(), other._window_losses()])
+        order = np.argsort(times, kind="mergesort")
+        self._head = self._filled = 0
+        self._push(times[order], losses[order])
+        return self
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def metrics(self):
+        """Cumulative metrics over every folded prediction."""
+        s = self.sums
+        return {
+            "games": int(max(s["n_prob"], s["n_spread"], s["n_total"])),
+            "log_loss": _ratio(s["log_loss"], s["n_prob"]),
+            "brier_score": _ratio(s["brier"], s["n_prob"]),
+            "accuracy": _ratio(s["correct"], s["n_prob"]),
+            "spread_mae": _ratio(s["spread_abs_error"], s["n_spread"]),
+            "spread_rmse": float(np.sqrt(_ratio(s["spread_sq_error"], s["n_spread"]))),
+            "total_mae": _ratio(s["total_abs_error"], s["n_total"]),
+            "total_rmse": float(np.sqrt(_ratio(s["total_sq_error"], s["n_total"]))),
+        }
+
+    def rolling_metrics(self):
+        """Metrics over the last `window` games."""
+        losses = self._window_losses()
+        with np.errstate(invalid="ignore"):
+            means = {
+                name: float(np.nanmean(losses[:, i])) if np.isfinite(losses[:, i]).any() else np.nan
+                for i, name in enumerate(WINDOW_COLUMNS)
+            }
+        return {
+            "games": len(losses),
+            "log_loss": means["log_loss"],
+            "brier_score": means["brier"],
+            "accuracy": means["correct"],
+            "spread_mae": means["spread_abs_error"],
+            "total_mae": means["total_abs_error"],
+        }
+
+    def calibration(self):
+        """
+        Reliability bins over every folded probability.
+
+        Returns:
+            list: {"bin_lower", "bin_upper", "count", "predicted", "observed"}
+                per bin (predicted/observed are None for empty bins)
+        """
+        edges = np.linspace(0, 1, self.bins + 1)
+        return [
+            {
+                "bin_lower": float(edges[i]),
+                "bin_upper": float(edges[i + 1]),
+                "count": int(self.bin_count[i]),
+                "predicted": _json_float(_ratio(self.bin_predicted[i], self.bin_count[i])),
+                "observed": _json_float(_ratio(self.bin_observed[i], self.bin_count[i])),
+            }
+            for i in range(self.bins)
+        ]
+
+    # ------------------------------------------------------------------
+    # State
+    # ------------------------------------------------------------------
+
+    def to_dict(self):
+        """State as JSON-serializable types."""
+        return {
+            "window": self.window,
+            "bins": self.bins,
+            "sums": {k: float(v) for k, v in self.sums.items()},
+            "bin_count": self.bin_count.tolist(),
+            "bin_predicted": self.bin_predicted.tolist(),
+            "bin_observed": self.bin_observed.tolist(),
+            "window_times": self._window_times().tolist(),
+            "window_losses": [[_json_float(v) for v in row] for row in self._window_losses().tolist()],
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        """Restore an accumulator written by to_dict()."""
+        acc = cls(state["window"], state["bins"])
+        acc.sums.update(state["sums"])
+        acc.bin_count = np.asarray(state["bin_count"], dtype=np.float64)
+        acc.bin_predicted = np.asarray(state["bin_predicted"], dtype=np.float64)
+        acc.bin_observed = np.asarray(state["bin_observed"], dtype=np.float64)
+        losses = np.array(state["window_losses"], dtype=np.float64).reshape(-1, len(WINDOW_COLUMNS))
+        acc._push(np.asarray(state["window_times"], dtype=np.float64), losses)
+        return acc
+
+    def _push(self, times, losses):
+        if len(times) > self.window:
+            times, losses = times[-self.window:], losses[-self.window:]
+        slots = (self._head + np.arange(len(times))) % self.window
+        self._ring[slots] = losses
+        self._times[slots] = times
+        self._head = (self._head + len(times)) % self.window
+        self._filled = min(self._filled + len(times), self.window)
+
+    def _window_order(self):
+        start = (self._head - self._filled) % self.window
+        return (start + np.arange(self._filled)) % self.window
+
+    def _window_times(self):
+        return self._times[self._window_order()]
+
+    def _window_losses(self):
+        return self._ring[self._window_order()]
+
+
+def _pair(pred, actual, n):
+    if pred is None or actual is None:
+        return np.full(n, np.nan), np.full(n, np.nan)
+    return (
+        np.asarray(pred, dtype=np.float64).reshape(n),
+        np.asarray(actual, dtype=np.float64).reshape(n),
+    )
+
+
+def _epoch_seconds(start_times):
+    times = np.asarray(start_times)
+    if np.issubdtype(times.dtype, np.datetime64):
+        return times.astype("datetime64[ms]").astype(np.int64) / 1000.0
+    return times.astype(np.float64)
+
+
+def _ratio(numerator, denominator):
+    return float(numerator / denominator) if denominator else np.nan
+
+
+def _json_float(value):
+    return None if value is None or not np.isfinite(value) else float(value)
@@ -0,0 +1,415 @@
+"""
+Walk-Forward Backtest
+
+Season-by-season rolling-origin evaluation. The feature table is frozen once
+into memory-mapped arrays that every fold worker shares, folds train in a
+process pool, and each fold's test predictions are cached on disk so that
+re-scoring (new metrics, calibration) never retrains anything.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from .estimators import TARGETS, feature_columns, make_estimator, predict_values
+from .metrics import MetricSums
+
+DEFAULT_CACHE_DIR = "data/backtest"
+DEFAULT_MIN_TRAIN_SEASONS = 2
+MATRIX_LAYOUT = "3"  # Bump when FeatureMatrix files change
+MATRIX_COLUMN_BATCH = 32  # Parquet columns read at a time while building
+INDEX_COLUMNS = ["id", "league", "season", "startTime", "homeTeamId", "awayTeamId"]
+
+# Backtest prediction columns (see MetricSums.update) per ModelType
+PREDICTION_COLUMNS = {
+    "WIN_PROBABILITY": ("home_win_prob", "home_win"),
+    "SPREAD": ("spread_pred", "spread"),
+    "TOTAL": ("total_pred", "total"),
+}
+
+# Groups kept while scoring; any subset can be reported
+SCORE_GROUPS = ("run", "test_season", "league", "month")
+
+
+class FeatureMatrix:
+    """
+    A feature table as memory-mapped NumPy arrays.
+
+    Directory layout:
+        X.npy               rows x features, float32, column-major
+        y_<target>.npy      one float32 column per target (NaN: no result)
+        season.npy, start.npy
+        game.npy, league.npy, home_team.npy, away_team.npy
+                            int32 codes into the vocab_<name>.npy string tables
+        schema.json         layout, feature names, array dtypes/shapes,
+                            vocabularies and source signature
+
+    Rows are in (startTime, id) order, so every season is one contiguous
+    block. Arrays are opened with mmap_mode="r": train, tune, evaluate and
+    every worker process share the OS page cache instead of each
+    deserializing a copy, and a feature column is one contiguous run of the
+    file. Game, team and league ids stay int32 codes until decode().
+
+    Usage:
+        matrix = FeatureMatrix.build("data/features.parquet")
+        X, y = matrix.rows(train), matrix.target("home_win")[train]
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.schema = json.loads((self.directory / "schema.json").read_text())
+        if self.schema.get("layout") != MATRIX_LAYOUT:
+            raise ValueError(
+                f"{self.directory} has matrix layout {self.schema.get('layout')}, "
+                f"expected {MATRIX_LAYOUT}"
+            )
+        self.feature_names = self.schema["features"]
+        self.X = self._load("X")
+        self.season = self._load("season")
+        self.start = self._load("start")
+        self.game = self._load("game")
+        self.league = self._load("league")
+        self.home_team = self._load("home_team")
+        self.away_team = self._load("away_team")
+        self._vocabularies = {}
+
+    @property
+    def key(self):
+        """Identity of the source data and feature set."""
+        return self.schema["key"]
+
+    def __len__(self):
+        return self.schema["rows"]
+
+    def target(self, name):
+        """Target column (NaN where the game has no result)."""
+        return self._load(f"y_{name}")
+
+    def rows(self, index, features=None):
+        """
+        Feature rows as a float32 column-major array, ready for fitting.
+
+        Columns are gathered one contiguous file column at a time into a
+        single float32 Fortran-ordered array, which LightGBM, XGBoost and
+        scikit-learn accept without another conversion.
+
+        Args:
+            index: Row positions (array) or a slice
+            features: Feature names in the order wanted (default: all);
+                names missing from the matrix become NaN columns
+
+        Returns:
+            ndarray: (len(index), n_features) float32
+        """
+        positions = np.arange(len(self))[index] if isinstance(index, slice) else np.asarray(index)
+        if features is None:
+            columns = np.arange(len(self.feature_names))
+        else:
+            lookup = {name: j for j, name in enumerate(self.feature_names)}
+            columns = np.array([lookup.get(name, -1) for name in features], dtype=np.int64)
+
+        out = np.empty((len(positions), len(columns)), dtype=np.float32, order="F")
+        for j, column in enumerate(columns):
+            if column < 0:
+                out[:, j] = np.nan
+            elif isinstance(index, slice):
+                out[:, j] = self.X[index, column]
+            else:
+                np.take(self.X[:, column], positions, out=out[:, j])
+        return out
+
+    def decode(self, name, index=slice(None)):
+        """
+        Original ids of an interned column (game, league, home_team, away_team).
+
+        Returns:
+            ndarray: Strings for the selected rows
+        """
+        vocabulary = self.schema["columns"][name]["vocabulary"]
+        if vocabulary not in self._vocabularies:
+            self._vocabularies[vocabulary] = self._load(f"vocab_{vocabulary}")
+        return self._vocabularies[vocabulary][getattr(self, name)[index]]
+
+    def _load(self, name):
+        return np.load(self.directory / f"{name}.npy", mmap_mode="r")
+
+    @classmethod
+    def build(cls, features_path, cache_dir=DEFAULT_CACHE_DIR):
+        """
+        Freeze a feature table (file or partitioned directory) into a matrix.
+
+        The matrix is reused while the source files are unchanged (same
+        paths, sizes and modification times). The Parquet columns are read
+        one at a time into the column-major file, so building never holds a
+        float64 copy of the whole table.
+
+        Returns:
+            FeatureMatrix
+        """
+        key = _source_signature(features_path, MATRIX_LAYOUT)
+        directory = Path(cache_dir) / "matrix" / key
+        if (directory / "schema.json").exists():
+            return cls(directory)
+
+        dataset = pq.ParquetDataset(features_path)
+        names = feature_columns(dataset.schema.empty_table().to_pandas())
+        index = dataset.read(columns=INDEX_COLUMNS).to_pandas()
+        index["startTime"] = pd.to_datetime(index["startTime"]).astype("datetime64[ms]")
+        order = np.lexsort((index["id"].astype(str).to_numpy(), index["startTime"].to_numpy()))
+        index = index.iloc[order].reset_index(drop=True)
+        n_rows = len(index)
+
+        tmp = directory.with_name(directory.name + ".tmp")
+        tmp.mkdir(parents=True, exist_ok=True)
+        arrays = {}
+
+        def save(name, values):
+            values = np.asarray(values)
+            np.save(tmp / f"{name}.npy", values)
+            arrays[name] = {"dtype": values.dtype.str, "shape": list(values.shape)}
+
+        X = np.lib.format.open_memmap(
+            tmp / "X.npy", mode="w+", dtype=np.float32, shape=(n_rows, len(names)),
+            fortran_order=True,
+        )
+        for start in range(0, len(names), MATRIX_COLUMN_BATCH):
+            batch = names[start:start + MATRIX_COLUMN_BATCH]
+            table = dataset.read(columns=batch).to_pandas()
+            for j, name in enumerate(batch, start):
+                X[:, j] = table[name].to_numpy(dtype=np.float32, na_value=np.nan)[order]
+        X.flush()
+        del X
+        arrays["X"] = {"dtype": np.dtype(np.float32).str, "shape": [n_rows, len(names)],
+                       "order": "F"}
+
+        targets = dataset.read(columns=list(TARGETS.values())).to_pandas()
+        for target in TARGETS.values():
+            save(f"y_{target}", targets[target].to_numpy(dtype=np.float32, na_value=np.nan)[order])
+        del targets
+        save("season", index["season"].astype(np.int32).to_numpy())
+        save("start", index["startTime"].to_numpy())
+
+        vocabularies = {}
+        columns = {}
+        teams = pd.unique(pd.concat([index["homeTeamId"], index["awayTeamId"]]).astype(str))
+        for name, source, vocabulary in (
+            ("game", "id", "game"),
+            ("league", "league", "league"),
+            ("home_team", "homeTeamId", "team"),
+            ("away_team", "awayTeamId", "team"),
+        ):
+            if vocabulary not in vocabularies:
+                values = teams if vocabulary == "team" else pd.unique(index[source].astype(str))
+                vocabularies[vocabulary] = np.sort(np.asarray(values, dtype=str))
+                save(f"vocab_{vocabulary}", vocabularies[vocabulary])
+            codes = np.searchsorted(vocabularies[vocabulary], index[source].astype(str).to_numpy())
+            save(name, codes.astype(np.int32))
+            columns[name] = {"source": source, "vocabulary": vocabulary}
+
+        (tmp / "schema.json").write_text(json.dumps({
+            "layout": MATRIX_LAYOUT,
+            "key": key,
+            "source": str(features_path),
+            "rows": n_rows,
+            "features": names,
+            "targets": list(TARGETS.values()),
+            "columns": columns,
+            "arrays": arrays,
+        }, indent=2))
+        tmp.rename(directory)
+        return cls(directory)
+
+
+def walk_forward_folds(seasons, min_train_seasons=DEFAULT_MIN_TRAIN_SEASONS, max_train_seasons=None):
+    """
+    Rolling-origin folds, one per test season.
+
+    Each season after the first min_train_seasons is tested on a model
+    trained on the seasons before it (all of them, or only the last
+    max_train_seasons for a rolling window).
+
+    Args:
+        seasons: Season label per row
+        min_train_seasons: Seasons required before the first test season
+        max_train_seasons: Optional cap on training seasons per fold
+
+    Returns:
+        list: Folds as {"test_season": int, "train_seasons": [int, ...]}
+    """
+    labels = sorted(int(s) for s in np.unique(seasons))
+    folds = []
+    for i in range(min_train_seasons, len(labels)):
+        first = 0 if max_train_seasons is None else max(0, i - max_train_seasons)
+        folds.append({"test_season": labels[i], "train_seasons": labels[first:i]})
+    return folds
+
+
+def run_backtest(
+    matrix,
+    model_type,
+    model_name,
+    params=None,
+    min_train_seasons=DEFAULT_MIN_TRAIN_SEASONS,
+    max_train_seasons=None,
+    workers=1,
+):
+    """
+    Train and predict every walk-forward fold, reusing cached folds.
+
+    A run is identified by the matrix and the model configuration; folds
+    whose predictions are already cached for that run are skipped. Workers
+    split the machine's cores between them, so the estimators' own threads
+    do not oversubscribe the CPU.
+
+    Args:
+        matrix: FeatureMatrix
+        model_type: Registry ModelType
+        model_name: lightgbm, xgboost or logistic_regression
+        params: Estimator parameters
+        min_train_seasons: See walk_forward_folds
+        max_train_seasons: See walk_forward_folds
+        workers: Folds trained in parallel
+
+    Returns:
+        Path: Run directory with config.json and one season=<s>.npz per fold
+    """
+    config = {
+        "matrix": matrix.key,
+        "model_type": model_type,
+        "model_name": model_name,
+        "params": params or {},
+    }
+    run_id = hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+    run_dir = matrix.directory.parent.parent / "runs" / run_id
+    run_dir.mkdir(parents=True, exist_ok=True)
+    (run_dir / "config.json").write_text(json.dumps(config, indent=2, sort_keys=True))
+
+    folds = walk_forward_folds(matrix.season, min_train_seasons, max_train_seasons)
+    tasks = [
+        {
+            **config,
+            **fold,
+            "matrix_dir": str(matrix.directory),
+            "path": str(run_dir / f"season={fold['test_season']}.npz"),
+        }
+        for fold in folds
+        if not _fold_cached(run_dir / f"season={fold['test_season']}.npz", fold)
+    ]
+    print(f"   {len(folds)} folds, {len(folds) - len(tasks)} cached")
+
+    n_jobs = max(1, (os.cpu_count() or 1) // max(workers, 1))
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for path in pool.map(_train_fold, tasks, [n_jobs] * len(tasks)):
+                print(f"   ... {Path(path).stem}")
+    else:
+        for task in tasks:
+            print(f"   ... {Path(_train_fold(task, n_jobs)).stem}")
+    return run_dir
+
+
+def iter_fold_predictions(run_dir):
+    """
+    Cached predictions of a run, one fold at a time.
+
+    Yields:
+        DataFrame: run, test_season, game_id, league, start_time and the
+            run's prediction/outcome columns (PREDICTION_COLUMNS)
+    """
+    run_dir = Path(run_dir)
+    config = json.loads((run_dir / "config.json").read_text())
+    pred_column, true_column = PREDICTION_COLUMNS[config["model_type"]]
+    matrix = None
+    for path in sorted(run_dir.glob("season=*.npz")):
+        with np.load(path) as fold:
+            if matrix is None:
+                matrix = FeatureMatrix(str(fold["matrix_dir"]))
+            rows = fold["rows"]
+            yield pd.DataFrame({
+                "run": run_dir.name,
+                "test_season": int(fold["test_season"]),
+                "game_id": matrix.decode("game", rows),
+                "league": matrix.decode("league", rows),
+                "start_time": matrix.start[rows],
+                true_column: fold["y_true"],
+                pred_column: fold["y_pred"],
+            })
+
+
+def score_backtest(run_dirs, by=("test_season",)):
+    """
+    Metrics from cached predictions only, for one or many runs.
+
+    All folds of all runs are folded into one MetricSums in a single pass;
+    reporting by another grouping (league, month, ...) reuses the same sums.
+
+    Args:
+        run_dirs: Run directory or list of them
+        by: Groups to report per run, any of test_season, league, month
+
+    Returns:
+        DataFrame: One row per run and group plus an "all" row per run
+    """
+    if isinstance(run_dirs, (str, Path)):
+        run_dirs = [run_dirs]
+    sums = MetricSums(group_by=SCORE_GROUPS)
+    for run_dir in run_dirs:
+        for chunk in iter_fold_predictions(run_dir):
+            sums.update(chunk)
+
+    by = tuple(by)
+    detail = sums.summary(by=("run", *by))
+    overall = sums.summary(by=("run",)).assign(**dict.fromkeys(by, "all"))
+    table = pd.concat([detail.astype({c: str for c in by}), overall[detail.columns]])
+    table = table.sort_values("run", kind="mergesort").reset_index(drop=True)
+    return table.dropna(axis=1, how="all")
+
+
+def _train_fold(task, n_jobs):
+    """Worker: fit one fold on the shared matrix and cache its test predictions."""
+    matrix = FeatureMatrix(task["matrix_dir"])
+    y = matrix.target(TARGETS[task["model_type"]])
+    labelled = ~np.isnan(y)
+    train = np.flatnonzero(labelled & np.isin(matrix.season, task["train_seasons"]))
+    test = np.flatnonzero(labelled & (matrix.season == task["test_season"]))
+
+    estimator = make_estimator(task["model_type"], task["model_name"], task["params"], n_jobs)
+    estimator.fit(matrix.rows(train), y[train])
+    y_pred = predict_values(estimator, task["model_type"], matrix.rows(test))
+
+    path = Path(task["path"])
+    tmp = path.with_name(path.stem + ".tmp.npz")
+    np.savez(
+        tmp,
+        matrix_dir=task["matrix_dir"],
+        test_season=task["test_season"],
+        train_seasons=np.array(task["train_seasons"], dtype=np.int32),
+        rows=test,
+        y_true=y[test],
+        y_pred=y_pred,
+    )
+    tmp.replace(path)
+    return str(path)
+
+
+def _fold_cached(path, fold):
+    if not path.exists():
+        return False
+    with np.load(path) as cached:
+        return cached["train_seasons"].tolist() == list(fold["train_seasons"])
+
+
+def _source_signature(features_path, layout):
+    path = Path(features_path)
+    files = sorted(path.rglob("*.parquet")) if path.is_dir() else [path]
+    digest = hashlib.sha1(layout.encode())
+    for file in files:
+        stat = file.stat()
+        digest.update(f"{file.resolve()}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:16]
@@ -0,0 +1,86 @@
+"""
+Estimators
+
+Model construction for each ModelType / algorithm pair. Model libraries are
+imported lazily so feature-only jobs do not pay for them.
+"""
+
+import numpy as np
+
+from features.odds import CLOSING_LINE_COLUMNS
+
+# Feature-table target column per ModelType
+TARGETS = {
+    "WIN_PROBABILITY": "home_win",
+    "SPREAD": "spread",
+    "TOTAL": "total",
+}
+
+# Feature-table columns that are identifiers, targets or labels, not features
+NON_FEATURE_COLUMNS = {
+    "id", "league", "season", "startTime", "homeTeamId", "awayTeamId", "status",
+    *TARGETS.values(),
+    *CLOSING_LINE_COLUMNS,
+}
+
+
+def registry_model_type(model_type):
+    """CLI model type (win_probability) -> registry ModelType (WIN_PROBABILITY)."""
+    model_type = model_type.upper()
+    if model_type not in TARGETS:
+        raise ValueError(f"Unknown model type: {model_type}")
+    return model_type
+
+
+def feature_columns(features_df):
+    """Numeric feature columns of a feature table, in table order."""
+    return [
+        column for column in features_df.columns
+        if column not in NON_FEATURE_COLUMNS
+        and np.issubdtype(features_df[column].dtype, np.number)
+    ]
+
+
+def make_estimator(model_type, model_name, params=None, n_jobs=1):
+    """
+    Build an unfitted estimator.
+
+    Args:
+        model_type: Registry ModelType (WIN_PROBABILITY is a classifier,
+            SPREAD/TOTAL are regressors)
+        model_name: lightgbm, xgboost or logistic_regression (a ridge
+            regression for SPREAD/TOTAL)
+        params: Estimator keyword arguments
+        n_jobs: Threads the estimator may use
+
+    Returns:
+        object: scikit-learn compatible estimator
+    """
+    params = dict(params or {})
+    classifier = registry_model_type(model_type) == "WIN_PROBABILITY"
+
+    if model_name == "lightgbm":
+        import lightgbm as lgb
+        cls = lgb.LGBMClassifier if classifier else lgb.LGBMRegressor
+        return cls(n_jobs=n_jobs, verbose=-1, **params)
+    if model_name == "xgboost":
+        import xgboost as xgb
+        cls = xgb.XGBClassifier if classifier else xgb.XGBRegressor
+        return cls(n_jobs=n_jobs, **params)
+    if model_name == "logistic_regression":
+        from sklearn.impute import SimpleImputer
+        from sklearn.linear_model import LogisticRegression, Ridge
+        from sklearn.pipeline import make_pipeline
+        from sklearn.preprocessing import StandardScaler
+        linear = (
+            LogisticRegression(**{"max_iter": 1000, **params}) if classifier else Ridge(**params)
+        )
+        return make_pipeline(SimpleImputer(), StandardScaler(), linear)
+    raise ValueError(f"Unknown model name: {model_name}")
+
+
+def predict_values(estimator, model_type, X):
+    """Home win probability (WIN_PROBABILITY) or predicted spread/total."""
+    if registry_model_type(model_type) == "WIN_PROBABILITY":
+        return estimator.predict_proba(X)[:, 1]
+    return np.asarray(estimator.predict(X), dtype=np.float64)
@@ -0,0 +1,298 @@
+"""
+Metrics
+
+Vectorized evaluation kernels for win probability, spread and total
+predictions. Every metric is derived from additive sums (counts, loss sums,
+calibration-bin sums), so chunks can be folded in one pass with memory
+bounded by the number of groups, and finer groups roll up into coarser ones
+without touching the predictions again.
+"""
+
+import numpy as np
+import pandas as pd
+
+PROBABILITY_EPS = 1e-15
+CALIBRATION_BINS = 10
+
+# Input columns understood by MetricSums.update (all optional)
+PROBABILITY_COLUMNS = ("home_win_prob", "home_win")
+INTERVAL_TARGETS = ("spread", "total")  # {t}_pred, {t}, {t}_lower, {t}_upper
+
+# Additive sums kept per group
+SUM_COLUMNS = (
+    "n_prob", "log_loss_sum", "brier_sum", "correct",
+    *(f"{t}_{s}" for t in INTERVAL_TARGETS for s in (
+        "n", "abs_error_sum", "sq_error_sum", "n_interval", "covered", "width_sum",
+    )),
+)
+
+
+class MetricSums:
+    """
+    Streaming, grouped metric state.
+
+    Rows are assigned to groups by the group_by columns (e.g. model, league,
+    season, month); each update() folds one chunk into per-group sums with
+    np.bincount, so a pass over any number of predictions keeps only
+    O(groups x bins) numbers. summary() and reliability() can aggregate to
+    any subset of the group columns.
+
+    Usage:
+        sums = MetricSums(group_by=("model", "league", "season"))
+        for chunk in chunks:
+            sums.update(chunk)
+        sums.summary(by=("model", "season"))
+    """
+
+    def __init__(self, group_by=("model",), bins=CALIBRATION_BINS):
+        self.group_by = tuple(group_by)
+        self.bins = int(bins)
+        self._codes = {}
+        self._keys = []
+        self._sums = np.zeros((0, len(SUM_COLUMNS)))
+        # Calibration bins: count, predicted sum, observed sum
+        self._bin_sums = np.zeros((0, self.bins, 3))
+
+    def update(self, chunk):
+        """
+        Fold in a chunk of predictions.
+
+        Args:
+            chunk: DataFrame (or dict of arrays) with the group_by columns
+                and any of home_win_prob/home_win, {spread,total}_pred,
+                {spread,total} (actual) and {spread,total}_{lower,upper}.
+                A "month" group is derived from start_time if missing.
+                Rows with NaN predictions or outcomes are skipped per metric.
+        """
+        chunk = pd.DataFrame(chunk) if not isinstance(chunk, pd.DataFrame) else chunk
+        if chunk.empty:
+            return
+        codes = self._group_codes(chunk)
+        n_groups = len(self._keys)
+        sums = np.zeros((n_groups, len(SUM_COLUMNS)))
+
+        def add(name, mask, weights=None):
+            column = SUM_COLUMNS.index(name)
+            sums[:, column] += np.bincount(codes[mask], weights=weights, minlength=n_groups)
+
+        if all(c in chunk for c in PROBABILITY_COLUMNS):
+            prob = _column(chunk, "home_win_prob")
+            outcome = _column(chunk, "home_win")
+            has = ~np.isnan(prob) & ~np.isnan(outcome)
+            p, y = prob[has], outcome[has]
+            clipped = np.clip(p, PROBABILITY_EPS, 1 - PROBABILITY_EPS)
+            add("n_prob", has)
+            add("log_loss_sum", has, -(y * np.log(clipped) + (1 - y) * np.log(1 - clipped)))
+            add("brier_sum", has, (p - y) ** 2)
+            add("correct", has, ((p >= 0.5) == (y == 1)).astype(np.float64))
+
+            b = np.minimum((p * self.bins).astype(np.int64), self.bins - 1)
+            flat = codes[has] * self.bins + b
+            size = n_groups * self.bins
+            bin_sums = np.stack([
+                np.bincount(flat, minlength=size),
+                np.bincount(flat, weights=p, minlength=size),
+                np.bincount(flat, weights=y, minlength=size),
+            ], axis=-1).reshape(n_groups, self.bins, 3)
+            self._bin_sums[:n_groups] += bin_sums
+
+        for target in INTERVAL_TARGETS:
+            if f"{target}_pred" not in chunk or target not in chunk:
+                continue
+            pred, actual = _column(chunk, f"{target}_pred"), _column(chunk, target)
+            has = ~np.isnan(pred) & ~np.isnan(actual)
+            error = pred[has] - actual[has]
+            add(f"{target}_n", has)
+            add(f"{target}_abs_error_sum", has, np.abs(error))
+            add(f"{target}_sq_error_sum", has, error ** 2)
+
+            if f"{target}_lower" in chunk and f"{target}_upper" in chunk:
+                lower = _column(chunk, f"{target}_lower")
+                upper = _column(chunk, f"{target}_upper")
+                has = ~np.isnan(lower) & ~np.isnan(upper) & ~np.isnan(actual)
+                inside = (actual[has] >= lower[has]) & (actual[has] <= upper[has])
+                add(f"{target}_n_interval", has)
+                add(f"{target}_covered", has, inside.astype(np.float64))
+                add(f"{target}_width_sum", has, upper[has] - lower[has])
+
+        self._sums[:n_groups] += sums
+
+    def merge(self, other):
+        """Add another MetricSums with the same group_by and bins."""
+        if other.group_by != self.group_by or other.bins != self.bins:
+            raise ValueError("Cannot merge MetricSums with different groups or bins")
+        n = len(other._keys)
+        codes = np.array([self._code(key) for key in other._keys], dtype=np.int64)
+        np.add.at(self._sums, codes, other._sums[:n])
+        np.add.at(self._bin_sums, codes, other._bin_sums[:n])
+        return self
+
+    def summary(self, by=None):
+        """
+        Metrics per group.
+
+        Args:
+            by: Subset of group_by to aggregate to (default: all of them;
+                () for one overall row)
+
+        Returns:
+            DataFrame: Group columns plus games, log_loss, brier_score,
+                accuracy, ece, mce, {spread,total}_{mae,rmse,coverage,width}
+        """
+        keys, sums, bin_sums = self._rollup(by)
+        s = dict(zip(SUM_COLUMNS, sums.T))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            count, predicted, observed = bin_sums[..., 0], bin_sums[..., 1], bin_sums[..., 2]
+            gap = np.abs(predicted / count - observed / count)
+            out = {
+                "games": np.maximum.reduce([s["n_prob"], s["spread_n"], s["total_n"]]).astype(np.int64),
+                "log_loss": s["log_loss_sum"] / s["n_prob"],
+                "brier_score": s["brier_sum"] / s["n_prob"],
+                "accuracy": s["correct"] / s["n_prob"],
+                "ece": np.abs(predicted - observed).sum(axis=1) / s["n_prob"],
+                "mce": np.where(
+                    s["n_prob"] > 0, np.nanmax(np.where(count > 0, gap, -np.inf), axis=1), np.nan
+                ),
+            }
+            for target in INTERVAL_TARGETS:
+                n = s[f"{target}_n"]
+                n_interval = s[f"{target}_n_interval"]
+                out[f"{target}_mae"] = s[f"{target}_abs_error_sum"] / n
+                out[f"{target}_rmse"] = np.sqrt(s[f"{target}_sq_error_sum"] / n)
+                out[f"{target}_coverage"] = s[f"{target}_covered"] / n_interval
+                out[f"{target}_width"] = s[f"{target}_width_sum"] / n_interval
+        return pd.concat([keys, pd.DataFrame(out)], axis=1)
+
+    def reliability(self, by=None):
+        """
+        Reliability-curve bins per group.
+
+        Returns:
+            DataFrame: Group columns plus bin, bin_lower, bin_upper, count,
+                predicted (mean probability) and observed (win rate)
+        """
+        keys, _, bin_sums = self._rollup(by)
+        n_groups = len(keys)
+        edges = np.linspace(0, 1, self.bins + 1)
+        count = bin_sums[..., 0].ravel()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            table = pd.DataFrame({
+                "bin": np.tile(np.arange(self.bins), n_groups),
+                "bin_lower": np.tile(edges[:-1], n_groups),
+                "bin_upper": np.tile(edges[1:], n_groups),
+                "count": count.astype(np.int64),
+                "predicted": bin_sums[..., 1].ravel() / count,
+                "observed": bin_sums[..., 2].ravel() / count,
+            })
+        keys = keys.loc[keys.index.repeat(self.bins)].reset_index(drop=True)
+        return pd.concat([keys, table], axis=1)
+
+    def _rollup(self, by):
+        by = self.group_by if by is None else tuple(by)
+        missing = set(by) - set(self.group_by)
+        if missing:
+            raise ValueError(f"Not grouped by {sorted(missing)}")
+
+        n = len(self._keys)
+        group_sums, group_bins = self._sums[:n], self._bin_sums[:n]
+        if not by:
+            return (pd.DataFrame(index=[0]), group_sums.sum(axis=0, keepdims=True),
+                    group_bins.sum(axis=0, keepdims=True))
+        keys = pd.DataFrame(self._keys, columns=list(self.group_by))
+        if by == self.group_by:
+            return keys, group_sums, group_bins
+
+        codes, uniques = pd.MultiIndex.from_frame(keys[list(by)]).factorize()
+        sums = np.zeros((len(uniques), group_sums.shape[1]))
+        bin_sums = np.zeros((len(uniques),) + group_bins.shape[1:])
+        np.add.at(sums, codes, group_sums)
+        np.add.at(bin_sums, codes, group_bins)
+        return pd.DataFrame(list(uniques), columns=list(by)), sums, bin_sums
+
+    def _group_codes(self, chunk):
+        if "month" in self.group_by and "month" not in chunk:
+            start = chunk["start_time"] if "start_time" in chunk else chunk["startTime"]
+            chunk = chunk.assign(month=pd.to_datetime(start).dt.strftime("%Y-%m"))
+        if not self.group_by:
+            local, uniques = np.zeros(len(chunk), dtype=np.int64), [()]
+        else:
+            local, uniques = pd.MultiIndex.from_frame(chunk[list(self.group_by)]).factorize()
+        mapping = np.array([self._code(tuple(key)) for key in uniques], dtype=np.int64)
+        return mapping[local]
+
+    def _code(self, key):
+        code = self._codes.get(key)
+        if code is None:
+            code = len(self._keys)
+            self._codes[key] = code
+            self._keys.append(key)
+            if code >= len(self._sums):
+                capacity = max(2 * len(self._sums), 16)
+                self._sums = np.concatenate([self._sums, np.zeros((capacity - len(self._sums), len(SUM_COLUMNS)))])
+                self._bin_sums = np.concatenate([
+                    self._bin_sums, np.zeros((capacity - len(self._bin_sums), self.bins, 3))
+                ])
+        return code
+
+
+def calculate_metrics(model_type, y_true, y_pred):
+    """
+    Metrics for one model's predictions.
+
+    Args:
+        model_type: Registry ModelType
+        y_true: Outcomes (home_win 0/1, or actual spread/total)
+        y_pred: Home win probabilities, or predicted spread/total
+
+    Returns:
+        dict: log_loss, brier_score, accuracy, calibration_error (ECE), mce
+            for WIN_PROBABILITY; mae, rmse for SPREAD/TOTAL
+    """
+    if model_type == "WIN_PROBABILITY":
+        return probability_metrics(y_true, y_pred)
+    return regression_metrics(y_true, y_pred)
+
+
+def probability_metrics(y_true, prob, bins=CALIBRATION_BINS):
+    """Log loss, Brier score, accuracy and expected/maximum calibration error."""
+    sums = MetricSums(group_by=(), bins=bins)
+    sums.update({"home_win_prob": np.asarray(prob, dtype=np.float64),
+                 "home_win": np.asarray(y_true, dtype=np.float64)})
+    row = _overall(sums)
+    return {
+        "log_loss": row["log_loss"],
+        "brier_score": row["brier_score"],
+        "accuracy": row["accuracy"],
+        "calibration_error": row["ece"],
+        "mce": row["mce"],
+    }
+
+
+def regression_metrics(y_true, y_pred):
+    """Mean absolute and root mean squared error."""
+    sums = MetricSums(group_by=())
+    sums.update({"spread_pred": np.asarray(y_pred, dtype=np.float64),
+                 "spread": np.asarray(y_true, dtype=np.float64)})
+    row = _overall(sums)
+    return {"mae": row["spread_mae"], "rmse": row["spread_rmse"]}
+
+
+def calibration_curve(y_true, prob, bins=CALIBRATION_BINS):
+    """
+    Reliability-curve bins for one set of probabilities.
+
+    Returns:
+        DataFrame: bin, bin_lower, bin_upper, count, predicted, observed
+    """
+    sums = MetricSums(group_by=(), bins=bins)
+    sums.update({"home_win_prob": np.asarray(prob, dtype=np.float64),
+                 "home_win": np.asarray(y_true, dtype=np.float64)})
+    return sums.reliability(by=())
+
+
+def _overall(sums):
+    return {k: float(v) for k, v in sums.summary(by=()).iloc[0].items()}
+
+
+def _column(chunk, name):
+    return pd.to_numeric(chunk[name], errors="coerce").to_numpy(dtype=np.float64)
@@ -0,0 +1,294 @@
+"""
+Hyperparameter Tuning
+
+Budget-aware search over walk-forward folds. Configurations are sampled
+from a search space and raced with successive halving (one bracket) or
+Hyperband (several brackets trading breadth for budget) on the number of
+boosting rounds: every rung keeps the best 1/eta configurations and gives
+them eta times the rounds, so hopeless configurations stop early.
+Algorithms without a budget parameter (the closed-form ridge regression
+behind logistic_regression for SPREAD/TOTAL) are grid-searched instead.
+"""
+
+import hashlib
+import itertools
+import json
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from .backtest import DEFAULT_MIN_TRAIN_SEASONS, FeatureMatrix, walk_forward_folds
+from .estimators import TARGETS, make_estimator, predict_values, registry_model_type
+from .metrics import calculate_metrics
+
+# Sampled values per algorithm (the budget parameter is set by the search);
+# keyed by search_algorithm()
+SEARCH_SPACES = {
+    "lightgbm": {
+        "learning_rate": [0.01, 0.02, 0.05, 0.1],
+        "num_leaves": [15, 31, 63, 127],
+        "max_depth": [-1, 3, 5, 7],
+        "min_child_samples": [10, 20, 50, 100],
+        "colsample_bytree": [0.6, 0.8, 1.0],
+    },
+    "xgboost": {
+        "learning_rate": [0.01, 0.02, 0.05, 0.1],
+        "max_depth": [3, 4, 5, 7],
+        "min_child_weight": [1, 5, 10],
+        "subsample": [0.6, 0.8, 1.0],
+        "colsample_bytree": [0.6, 0.8, 1.0],
+    },
+    "logistic_regression": {
+        "C": [0.01, 0.03, 0.1, 0.3, 1.0, 3.0],
+    },
+    "ridge": {
+        "alpha": [0.1, 0.3, 1.0, 3.0, 10.0, 30.0, 100.0],
+    },
+}
+
+# Parameter that receives the budget (boosting rounds / solver iterations);
+# None when the fit has no budget to race on (Ridge is solved in closed form)
+BUDGET_PARAMS = {
+    "lightgbm": "n_estimators",
+    "xgboost": "n_estimators",
+    "logistic_regression": "max_iter",
+    "ridge": None,
+}
+
+# Score minimized per ModelType
+OBJECTIVES = {
+    "WIN_PROBABILITY": "log_loss",
+    "SPREAD": "mae",
+    "TOTAL": "mae",
+}
+
+DEFAULT_MIN_BUDGET = 50
+DEFAULT_MAX_BUDGET = 1000
+DEFAULT_ETA = 3
+DEFAULT_TUNING_FOLDS = 2
+
+
+def search_algorithm(model_type, model_name):
+    """
+    SEARCH_SPACES / BUDGET_PARAMS key of a ModelType / algorithm pair.
+
+    logistic_regression is a ridge regression for SPREAD/TOTAL
+    (make_estimator), which takes alpha rather than C and has no iterations.
+    """
+    if model_name == "logistic_regression" and registry_model_type(model_type) != "WIN_PROBABILITY":
+        return "ridge"
+    return model_name
+
+
+def hyperband_brackets(min_budget, max_budget, eta=DEFAULT_ETA, method="hyperband"):
+    """
+    Rung schedule of each bracket.
+
+    Args:
+        min_budget: Smallest budget given to a configuration
+        max_budget: Largest budget
+        eta: Halving rate (keep 1/eta per rung, multiply budget by eta)
+        method: "hyperband" (all brackets) or "halving" (most aggressive
+            bracket only)
+
+    Returns:
+        list: Brackets, each a list of (n_configs, budget) rungs
+    """
+    s_max = int(math.floor(math.log(max_budget / min_budget, eta) + 1e-9))
+    brackets = []
+    for s in range(s_max, -1, -1):
+        n = int(math.ceil((s_max + 1) / (s + 1) * eta ** s))
+        brackets.append([
+            (max(1, int(n * eta ** -i)), int(round(max_budget * eta ** (i - s))))
+            for i in range(s + 1)
+        ])
+        if method == "halving":
+            break
+    return brackets
+
+
+def tune(
+    matrix,
+    model_type,
+    model_name,
+    trials,
+    space=None,
+    min_budget=DEFAULT_MIN_BUDGET,
+    max_budget=DEFAULT_MAX_BUDGET,
+    eta=DEFAULT_ETA,
+    method="hyperband",
+    folds=DEFAULT_TUNING_FOLDS,
+    workers=1,
+    seed=0,
+):
+    """
+    Search hyperparameters with successive halving / Hyperband.
+
+    When the algorithm has no budget parameter (BUDGET_PARAMS), every
+    configuration of the space is evaluated once instead.
+
+    Each trial trains on the last `folds` walk-forward folds over the
+    seasons with labelled games (unplayed seasons have no target to fit or
+    score) and is scored by the mean validation objective (log loss or
+    MAE). Trials
+    of a rung run concurrently in a process pool; each worker's estimator
+    gets cpu_count // workers threads so the pool never oversubscribes the
+    CPU. Results are committed to the TrialStore as they finish, and
+    configurations are sampled deterministically from the seed, so rerunning
+    an interrupted search skips every trial already recorded.
+
+    Args:
+        matrix: FeatureMatrix
+        model_type: Registry ModelType
+        model_name: lightgbm, xgboost or logistic_regression
+        trials: TrialStore
+        space: {param: [values]} (default: the SEARCH_SPACES entry of
+            search_algorithm())
+        min_budget: Rounds for the first rung
+        max_budget: Rounds for the last rung
+        eta: Halving rate
+        method: "hyperband" or "halving"
+        folds: Walk-forward folds per trial (most recent)
+        workers: Concurrent trials
+        seed: Sampling seed
+
+    Returns:
+        dict: study, objective, best_params (budget included, if any),
+            best_score, trials (number recorded)
+
+    Raises:
+        ValueError: Too few seasons with labelled games to form a fold
+    """
+    if not _tuning_folds(matrix, model_type, folds):
+        raise ValueError(
+            f"No walk-forward fold for {model_type}: labelled games are needed in more "
+            f"than {DEFAULT_MIN_TRAIN_SEASONS} seasons"
+        )
+    algorithm = search_algorithm(model_type, model_name)
+    space = space or SEARCH_SPACES[algorithm]
+    budget_param = BUDGET_PARAMS[algorithm]
+    study = hashlib.sha1(json.dumps({
+        "matrix": matrix.key, "model_type": model_type, "model_name": model_name,
+        "space": space, "budgets": [min_budget, max_budget], "eta": eta,
+        "method": method, "folds": folds, "seed": seed,
+    }, sort_keys=True).encode()).hexdigest()[:16]
+    n_jobs = max(1, (os.cpu_count() or 1) // max(workers, 1))
+
+    best = (math.inf, None)
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        if budget_param is None:
+            names = sorted(space)
+            grid = [
+                dict(zip(names, values))
+                for values in itertools.product(*(space[name] for name in names))
+            ]
+            brackets = [[(len(grid), 0)]]
+        else:
+            brackets = hyperband_brackets(min_budget, max_budget, eta, method)
+
+        for b, bracket in enumerate(brackets):
+            if budget_param is None:
+                configs = grid
+            else:
+                rng = random.Random(f"{seed}:{b}")
+                configs = [
+                    {name: rng.choice(values) for name, values in sorted(space.items())}
+                    for _ in range(bracket[0][0])
+                ]
+            for rung, (_, budget) in enumerate(bracket):
+                scored = _run_rung(
+                    pool, trials, study, matrix, model_type, model_name, configs,
+                    budget_param, budget, folds, n_jobs,
+                )
+                ranked = sorted(zip(scored, range(len(configs))))
+                if ranked and ranked[0][0] < best[0]:
+                    best_params = _with_budget(configs[ranked[0][1]], budget_param, budget)
+                    best = (ranked[0][0], best_params)
+                rung_name = "grid" if budget_param is None else f"rung {budget_param}={budget}"
+                print(f"   bracket {b} {rung_name}: "
+                      f"{len(configs)} configs, best {ranked[0][0]:.4f}")
+                if rung + 1 < len(bracket):
+                    configs = [configs[i] for _, i in ranked[:bracket[rung + 1][0]]]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return {
+        "study": study,
+        "objective": OBJECTIVES[model_type],
+        "best_params": best[1],
+        "best_score": best[0],
+        "trials": len(trials.trials(study)),
+    }
+
+
+def _tuning_folds(matrix, model_type, folds=DEFAULT_TUNING_FOLDS):
+    """
+    The last `folds` walk-forward folds over seasons with labelled games.
+
+    Returns:
+        list: Folds as returned by walk_forward_folds
+    """
+    labelled = ~np.isnan(matrix.target(TARGETS[model_type]))
+    return walk_forward_folds(matrix.season[labelled])[-folds:]
+
+
+def _run_rung(pool, trials, study, matrix, model_type, model_name, configs,
+              budget_param, budget, folds, n_jobs):
+    """Scores of all configs at one budget, from the store or freshly run."""
+    scores = [None] * len(configs)
+    pending = {}
+    for i, params in enumerate(configs):
+        key = _config_key(params)
+        cached = trials.get(study, key, budget)
+        if cached is not None:
+            scores[i] = cached
+        else:
+            pending[i] = {
+                "matrix_dir": str(matrix.directory),
+                "model_type": model_type,
+                "model_name": model_name,
+                "params": _with_budget(params, budget_param, budget),
+                "folds": folds,
+            }
+
+    if pool is None:
+        results = ((i, _evaluate_trial(task, n_jobs)) for i, task in pending.items())
+    else:
+        futures = {pool.submit(_evaluate_trial, task, n_jobs): i for i, task in pending.items()}
+        results = ((futures[f], f.result()) for f in as_completed(futures))
+
+    for i, score in results:
+        trials.put(study, _config_key(configs[i]), budget, pending[i]["params"], score)
+        scores[i] = score
+    return scores
+
+
+def _evaluate_trial(task, n_jobs):
+    """Worker: mean validation objective of one configuration."""
+    matrix = FeatureMatrix(task["matrix_dir"])
+    model_type = task["model_type"]
+    y = matrix.target(TARGETS[model_type])
+    labelled = ~np.isnan(y)
+
+    scores = []
+    for fold in _tuning_folds(matrix, model_type, task["folds"]):
+        train = np.flatnonzero(labelled & np.isin(matrix.season, fold["train_seasons"]))
+        test = np.flatnonzero(labelled & (matrix.season == fold["test_season"]))
+        estimator = make_estimator(model_type, task["model_name"], task["params"], n_jobs)
+        estimator.fit(matrix.rows(train), y[train])
+        y_pred = predict_values(estimator, model_type, matrix.rows(test))
+        scores.append(calculate_metrics(model_type, y[test], y_pred)[OBJECTIVES[model_type]])
+    return float(np.mean(scores))
+
+
+def _with_budget(params, budget_param, budget):
+    return dict(params) if budget_param is None else {**params, budget_param: budget}
+
+
+def _config_key(params):
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:12]
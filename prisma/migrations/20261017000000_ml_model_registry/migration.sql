@@ -0,0 +1,98 @@
+-- The ML model registry was added to schema.prisma without a migration, so
+-- databases set up with `db push` already have these objects and migrated
+-- ones do not. Every statement is a no-op when the object exists.
+
+-- CreateEnum
+DO $$ BEGIN
+    CREATE TYPE "ModelType" AS ENUM ('WIN_PROBABILITY', 'SPREAD', 'TOTAL');
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
+
+-- CreateEnum
+DO $$ BEGIN
+    CREATE TYPE "ModelStatus" AS ENUM ('TRAINING', 'EVALUATING', 'ACTIVE', 'DEPRECATED', 'FAILED');
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
+
+-- CreateTable
+CREATE TABLE IF NOT EXISTS "MLModel" (
+    "id" TEXT NOT NULL,
+    "version" TEXT NOT NULL,
+    "modelType" "ModelType" NOT NULL,
+    "status" "ModelStatus" NOT NULL DEFAULT 'TRAINING',
+    "trainedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "trainStartDate" TIMESTAMP(3),
+    "trainEndDate" TIMESTAMP(3),
+    "features" TEXT[],
+    "logLoss" DOUBLE PRECISION,
+    "brierScore" DOUBLE PRECISION,
+    "accuracy" DOUBLE PRECISION,
+    "mae" DOUBLE PRECISION,
+    "calibrationPlot" JSONB,
+    "modelPath" TEXT,
+    "configPath" TEXT,
+    "deployedAt" TIMESTAMP(3),
+    "deprecatedAt" TIMESTAMP(3),
+    "notes" TEXT,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "MLModel_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateTable
+CREATE TABLE IF NOT EXISTS "MLPrediction" (
+    "id" TEXT NOT NULL,
+    "modelId" TEXT NOT NULL,
+    "gameId" TEXT NOT NULL,
+    "homeWinProb" DOUBLE PRECISION,
+    "awayWinProb" DOUBLE PRECISION,
+    "spreadPred" DOUBLE PRECISION,
+    "totalPred" DOUBLE PRECISION,
+    "spreadLower" DOUBLE PRECISION,
+    "spreadUpper" DOUBLE PRECISION,
+    "totalLower" DOUBLE PRECISION,
+    "totalUpper" DOUBLE PRECISION,
+    "predictedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "gameStartTime" TIMESTAMP(3) NOT NULL,
+    "features" JSONB,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "MLPrediction_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE UNIQUE INDEX IF NOT EXISTS "MLModel_version_key" ON "MLModel"("version");
+
+-- CreateIndex
+CREATE INDEX IF NOT EXISTS "MLModel_modelType_status_idx" ON "MLModel"("modelType", "status");
+
+-- CreateIndex
+CREATE INDEX IF NOT EXISTS "MLModel_version_idx" ON "MLModel"("version");
+
+-- CreateIndex
+CREATE INDEX IF NOT EXISTS "MLModel_trainedAt_idx" ON "MLModel"("trainedAt");
+
+-- CreateIndex
+CREATE UNIQUE INDEX IF NOT EXISTS "MLPrediction_modelId_gameId_key" ON "MLPrediction"("modelId", "gameId");
+
+-- CreateIndex
+CREATE INDEX IF NOT EXISTS "MLPrediction_gameId_idx" ON "MLPrediction"("gameId");
+
+-- CreateIndex
+CREATE INDEX IF NOT EXISTS "MLPrediction_gameStartTime_idx" ON "MLPrediction"("gameStartTime");
+
+-- CreateIndex
+CREATE INDEX IF NOT EXISTS "MLPrediction_predictedAt_idx" ON "MLPrediction"("predictedAt");
+
+-- AddForeignKey
+DO $$ BEGIN
+    ALTER TABLE "MLPrediction" ADD CONSTRAINT "MLPrediction_modelId_fkey" FOREIGN KEY ("modelId") REFERENCES "MLModel"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
+
+-- AddForeignKey
+DO $$ BEGIN
+    ALTER TABLE "MLPrediction" ADD CONSTRAINT "MLPrediction_gameId_fkey" FOREIGN KEY ("gameId") REFERENCES "Game"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
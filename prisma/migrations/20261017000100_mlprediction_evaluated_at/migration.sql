@@ -0,0 +1,5 @@
+-- AlterTable
+ALTER TABLE "MLPrediction" ADD COLUMN IF NOT EXISTS "evaluatedAt" TIMESTAMP(3);
+
+-- CreateIndex
+CREATE INDEX IF NOT EXISTS "MLPrediction_modelId_evaluatedAt_idx" ON "MLPrediction"("modelId", "evaluatedAt");